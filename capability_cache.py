@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+CACHE_FORMAT = 1
+DEFAULT_REVALIDATE_DELAY = 30.0  # seconds after startup
+
+
+def default_cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "raspberry_ninja", "capabilities.json")
+
+
+def gst_registry_paths() -> List[str]:
+    """Registry files whose mtime changes when GStreamer rescans plugins."""
+    explicit = os.environ.get("GST_REGISTRY_1_0") or os.environ.get("GST_REGISTRY")
+    if explicit:
+        return [explicit]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return sorted(glob.glob(os.path.join(base, "gstreamer-1.0", "registry.*.bin")))
+
+
+def device_node_identities(patterns: Iterable[str] = ("/dev/video*", "/dev/media*")) -> List[List[Any]]:
+    """(path, device number, driver name) of each V4L2 node, so swapped hardware invalidates the cache."""
+    nodes = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            try:
+                rdev = os.stat(path).st_rdev
+            except OSError:
+                continue
+            name = ""
+            try:
+                with open(f"/sys/class/video4linux/{os.path.basename(path)}/name") as handle:
+                    name = handle.read().strip()
+            except OSError:
+                pass
+            nodes.append([path, rdev, name])
+    return nodes
+
+
+def capability_fingerprint(gst_version: str) -> Dict[str, Any]:
+    registries = []
+    for path in gst_registry_paths():
+        try:
+            registries.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            registries.append([path, None])
+    return {
+        "format": CACHE_FORMAT,
+        "kernel": platform.release(),
+        "gstreamer": gst_version,
+        "registry": registries,
+        "devices": device_node_identities(),
+    }
+
+
+class CapabilityCache:
+    """On-disk cache of hardware probe results.
+
+    Entries are only trusted while the fingerprint (kernel release,
+    GStreamer version, plugin registry mtime and V4L2 device nodes)
+    matches the one they were stored under; any change discards them.
+    Values must be JSON serialisable. Cache hits are re-probed later by
+    ``start_revalidation()`` so a stale answer is corrected for the next
+    start without delaying this one. Probes that open a device must opt
+    out with ``revalidate=False``: by then the running pipeline usually
+    holds the device, and the failed re-probe would replace a good result.
+    Such probes should also pass ``cacheable`` so a failure that may be
+    temporary (a busy device at boot) is probed again on the next start
+    instead of being remembered.
+    """
+
+    def __init__(self, path: str, fingerprint: Dict[str, Any]):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, Any] = {}
+        self._pending: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._revalidation: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("fingerprint") == self.fingerprint:
+            entries = data.get("entries")
+            if isinstance(entries, dict):
+                self.entries = entries
+
+    def save(self) -> bool:
+        with self._lock:
+            content = json.dumps({"fingerprint": self.fingerprint, "entries": self.entries}, indent=1, sort_keys=True)
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as handle:
+                    handle.write(content)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            return False
+        return True
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self.entries:
+                return True, self.entries[key]
+        return False, None
+
+    def store(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.entries[key] = value
+        self.save()
+
+    def get_or_probe(
+        self,
+        key: str,
+        probe: Callable[[], Any],
+        revalidate: bool = True,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached result for ``key`` or run ``probe`` and remember it.
+
+        With ``cacheable`` set, only results it accepts are stored, and a
+        stored result it rejects (from an older cache file) is probed again.
+        """
+        hit, value = self.lookup(key)
+        if hit and (cacheable is None or cacheable(value)):
+            if revalidate:
+                with self._lock:
+                    self._pending[key] = probe
+            return value
+        value = probe()
+        if cacheable is None or cacheable(value):
+            self.store(key, value)
+        elif hit:
+            with self._lock:
+                self.entries.pop(key, None)
+            self.save()
+        return value
+
+    def revalidate(self) -> Dict[str, Tuple[Any, Any]]:
+        """Re-run probes for entries served from disk; returns ``{key: (old, new)}`` for changes."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        changed = {}
+        for key, probe in pending.items():
+            try:
+                value = json.loads(json.dumps(probe()))
+            except Exception:
+                continue
+            hit, old = self.lookup(key)
+            if not hit or old != value:
+                changed[key] = (old, value)
+                with self._lock:
+                    self.entries[key] = value
+        if changed:
+            self.save()
+        return changed
+
+    def start_revalidation(
+        self,
+        delay: float = DEFAULT_REVALIDATE_DELAY,
+        on_change: Optional[Callable[[Dict[str, Tuple[Any, Any]]], None]] = None,
+    ) -> None:
+        """Revalidate cache hits once, ``delay`` seconds from now, on a daemon thread."""
+        if self._revalidation is not None:
+            return
+
+        def run():
+            time.sleep(delay)
+            changed = self.revalidate()
+            if changed and on_change:
+                on_change(changed)
+
+        self._revalidation = threading.Thread(target=run, name="capability-revalidate", daemon=True)
+        self._revalidation.start()
@@ -11,63 +11,28 @@ except:
     from io import BytesIO
 from socketserver import ThreadingMixIn
 from http.server import BaseHTTPRequestHandler, HTTPServer
-import socket
-import multiprocessing
 import numpy as np
-import time
-from multiprocessing import shared_memory, Lock
-from multiprocessing.resource_tracker import unregister
 from threading import Event
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_ring import DEFAULT_RING_NAME, FrameRingClosed, FrameRingReader  # shipped next to publish.py
+
 global last_frame, jpeg,promise
 promise = Event()
 
 def read_shared_memory():
     global last_frame, jpeg, promise
 
+    ring = None
     try:
-        shm = False
-        trigger_socket = False
-        trigger_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        trigger_socket.bind(("127.0.0.1", 12345))
-
-        shm_name = "psm_raspininja_streamid"
-        shm = shared_memory.SharedMemory(name=shm_name)
-        frame_buffer = np.ndarray(shm.size, dtype=np.uint8, buffer=shm.buf)
-        unregister(shm._name, 'shared_memory') # https://forums.raspberrypi.com/viewtopic.php?t=340441#p2039792
+        ring = FrameRingReader.open(DEFAULT_RING_NAME)
         last_frame = -1
-        frame = 0
-        failed = 0
-
-        prev_array = False
 
         while True:
-            trigger_signal = trigger_socket.recv(1024) # wait for some alert that the shared memory was updated
-            frame_data = frame_buffer.copy()  # Make a copy to avoid modifying the shared memory
-            frame_array = np.frombuffer(frame_data, dtype=np.uint8)
-            meta_header = frame_array[0:5]
-            frame = meta_header[4]
-            if frame == last_frame:
-                failed = failed + 1
-                if failed > 5:
-                    print("this is unexpected; let's reconnect")
-                    break
-            failed = 0
-            width = meta_header[0]*255+meta_header[1]
-            if width==0:
-                print("image size is 0. will retry")
-                time.sleep(1)
+            frame = ring.read(timeout=5) # wait for the next complete frame; raises FrameRingClosed if publish.py restarts
+            if frame is None:
                 continue
-            height = meta_header[2]*255+meta_header[3]
-            
-            frame_array = frame_array[5:5+width*height*3].reshape((height,width,3))
-
-#            if type(prev_array) == type(False):
- #               prev_array = frame_array
-  #              modded_array = frame_array
-   #         if np.shape(frame_array) == np.shape(prev_array):
-    #            modded_array = frame_array%128+128 - prev_array%128
-     #           prev_array = frame_array
+            frame_array = frame.to_numpy()
 
             try: # Try OpenCV
                 _, jpeg = cv2.imencode('.jpeg', frame_array)
@@ -77,17 +42,17 @@ def read_shared_memory():
                     im.save(f, format='JPEG')
                     jpeg = f.getvalue()
 
-            last_frame = frame
+            last_frame = frame.number
             if not promise.is_set(): # let any waiting thread know we are done
                 promise.set()
-            print(np.shape(frame_array),frame, frame_array[0, 0, :])
+            print(np.shape(frame_array), frame.number, frame_array[0, 0, :])
+    except FrameRingClosed:
+        print("frame ring closed; reconnecting")
     except Exception as E:
         print(E)
     finally:
-        if shm:
-            shm.close()
-        if trigger_socket:
-            trigger_socket.close()
+        if ring:
+            ring.close()
         return True
 
 
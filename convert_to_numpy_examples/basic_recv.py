@@ -1,45 +1,27 @@
-import multiprocessing
-import numpy as np
-import time
-from multiprocessing import shared_memory, Lock
-from multiprocessing.resource_tracker import unregister
+import os
+import sys
 
-def receiver_process(shm_name):
-    shm = shared_memory.SharedMemory(name=shm_name)
-    frame_buffer = np.ndarray(shm.size, dtype=np.uint8, buffer=shm.buf)
-    unregister(shm._name, 'shared_memory') # https://forums.raspberrypi.com/viewtopic.php?t=340441#p2039792
-    last_frame = -1
-    #lock = Lock()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_ring import DEFAULT_RING_NAME, FrameRingClosed, FrameRingReader  # shipped next to publish.py
+
+def receiver_process(ring_name):
+    ring = FrameRingReader.open(ring_name)  # waits until publish.py --framebuffer creates the ring
     try:
         while True:
-            #lock.acquire()
-            frame_data = frame_buffer.copy()  # Make a copy to avoid modifying the shared memory
-            #lock.release()
-            frame_array = np.frombuffer(frame_data, dtype=np.uint8)
-            meta_header = frame_array[0:5]
-    
-            frame = meta_header[4]
-            if frame == last_frame:
+            try:
+                frame = ring.read(timeout=5)  # blocks until a new, complete frame is published
+            except FrameRingClosed:  # publish.py restarted or the frame size grew; attach again
+                ring.close()
+                ring = FrameRingReader.open(ring_name)
                 continue
-    
-            width = meta_header[0]*255+meta_header[1]
-            if width==0:
-                print("image size is 0. will retry")
-                time.sleep(1)
+            if frame is None:
+                print("no frames for 5 seconds; still waiting")
                 continue
-            height = meta_header[2]*255+meta_header[3]
-            last_frame = frame
-
-            frame_array = frame_array[5:5+width*height*3].reshape((height,width,3))
-            print(np.shape(frame_array),frame, frame_array[0, 0, :])
 
-            time.sleep(1/60)
+            frame_array = frame.to_numpy()  # (height, width, 3) BGR numpy array
+            print(frame_array.shape, frame.number, frame_array[0, 0, :])
     finally:
-        shm.close()
+        ring.close()
 
 if __name__ == "__main__":
-    shm_name = "psm_raspininja_streamid"
-    
-    receiver = multiprocessing.Process(target=receiver_process, args=(shm_name,))
-    receiver.start()
-    receiver.join()
+    receiver_process(DEFAULT_RING_NAME)
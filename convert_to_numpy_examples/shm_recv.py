@@ -0,0 +1,26 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shm_frames import ShmFrameReader  # shipped next to publish.py
+
+def receiver_process(socket_path):
+    while True:
+        try:
+            reader = ShmFrameReader(socket_path)  # publish.py --framebuffer-socket must be running
+        except OSError:
+            time.sleep(0.5)
+            continue
+        try:
+            while True:
+                with reader.read() as frame:  # the frame goes back to shmsink when the block ends
+                    frame_array = frame.to_numpy()  # (height, width, 3) BGR view, no copy
+                    print(frame_array.shape, frame_array[0, 0, :])
+        except ConnectionError:  # publish.py stopped or restarted; connect again
+            pass
+        finally:
+            reader.close()
+
+if __name__ == "__main__":
+    receiver_process(sys.argv[1] if len(sys.argv) > 1 else "/tmp/raspininja-frames.sock")
@@ -0,0 +1,23 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_transport import FrameReceiver  # shipped next to publish.py
+
+def receiver_process(host, port, unix_path):
+    receiver = FrameReceiver(host, port, unix_path=unix_path)  # start this before or after publish.py --socketout
+    try:
+        for frame in receiver:  # only complete frames; incomplete UDP frames are dropped
+            frame_array = frame.to_numpy()  # (height, width, 3) BGR numpy array; JPEG needs cv2
+            print(frame_array.shape, frame.frame_id, "dropped so far:", receiver.assembler.frames_dropped)
+    finally:
+        receiver.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Receive frames from publish.py --socketout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12345)
+    parser.add_argument("--path", default=None, help="Unix socket path, matching publish.py --socket-path")
+    args = parser.parse_args()
+    receiver_process(args.host, args.port, args.path)
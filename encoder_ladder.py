@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from typing import List, NamedTuple, Optional, Sequence
+
+
+DEFAULT_LADDER_HEIGHTS = (1080, 720, 360)
+LADDER_CODECS = ("h264", "vp8")
+
+# Tee names for each rung; rung 0 keeps the regular multiviewer tee name so
+# code that looks up "videotee" keeps finding the top rendition.
+LADDER_TEE_PREFIX = "videotee"
+
+# Loss thresholds (fractions) and the hold time that keep viewers from
+# oscillating between rungs.
+LADDER_STEP_DOWN_LOSS = 0.05
+LADDER_STEP_UP_LOSS = 0.01
+LADDER_STEP_UP_HEADROOM = 1.3
+LADDER_HOLD_SECONDS = 10.0
+# How long a rung switch waits for the new rung's keyframe before giving up.
+LADDER_KEYFRAME_TIMEOUT = 3.0
+
+
+class LadderRung(NamedTuple):
+    index: int
+    width: int
+    height: int
+    bitrate: int  # kbps
+
+    @property
+    def tee_name(self) -> str:
+        return ladder_tee_name(self.index)
+
+    @property
+    def label(self) -> str:
+        return f"{self.height}p"
+
+
+def ladder_tee_name(index: int) -> str:
+    return LADDER_TEE_PREFIX if index == 0 else f"{LADDER_TEE_PREFIX}_{index}"
+
+
+def parse_ladder_heights(spec: Optional[str]) -> List[int]:
+    """Parse a comma-separated list of rung heights, e.g. "1080,720,360"."""
+    if not spec or str(spec).strip().lower() in ("1", "true", "auto", "default"):
+        return list(DEFAULT_LADDER_HEIGHTS)
+    heights = []
+    for token in str(spec).split(","):
+        token = token.strip().lower().rstrip("p")
+        if not token:
+            continue
+        value = int(token)
+        if value < 90:
+            raise ValueError(f"ladder rung height {value} is too small")
+        heights.append(value)
+    if not 2 <= len(heights) <= 3:
+        raise ValueError("an encoder ladder needs 2 or 3 rungs")
+    return sorted(set(heights), reverse=True)
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2.0)) * 2)
+
+
+def build_encoder_ladder(width: int, height: int, bitrate: int, heights: Sequence[int]) -> List[LadderRung]:
+    """Scale the source resolution and bitrate down for each requested rung height."""
+    rungs: List[LadderRung] = []
+    source_pixels = max(1, width * height)
+    for target_height in sorted(set(heights), reverse=True):
+        rung_height = min(target_height, height)
+        rung_width = _even(width * rung_height / float(height))
+        rung_height = _even(rung_height)
+        if any(rung.height == rung_height for rung in rungs):
+            continue
+        pixel_ratio = (rung_width * rung_height) / source_pixels
+        # Lower rungs get proportionally more bits per pixel.
+        rung_bitrate = max(150, int(bitrate * pixel_ratio ** 0.75))
+        rungs.append(LadderRung(len(rungs), rung_width, rung_height, rung_bitrate))
+    return rungs
+
+
+def build_ladder_rung_encoder(rung: LadderRung, codec: str, framerate: int) -> str:
+    keyframe_interval = max(1, int(framerate)) * 2
+    if codec == "vp8":
+        return (
+            f"vp8enc name=ladderenc{rung.index} deadline=1 cpu-used=8 end-usage=cbr "
+            f"keyframe-max-dist={keyframe_interval} target-bitrate={rung.bitrate * 1000}"
+        )
+    return (
+        f"x264enc name=ladderenc{rung.index} bitrate={rung.bitrate} speed-preset=ultrafast "
+        f"tune=zerolatency key-int-max={keyframe_interval} qos=true "
+        "! video/x-h264,profile=constrained-baseline,stream-format=(string)byte-stream "
+        "! h264parse config-interval=-1"
+    )
+
+
+def build_encoder_ladder_fragment(rungs: Sequence[LadderRung], codec: str, framerate: int) -> str:
+    """gst-launch fragment that fans raw video out to one encoder + tee per rung.
+
+    Encoded (not payloaded) frames leave each rung tee, so every viewer keeps
+    its own payloader and RTP sequence across rung switches.
+    """
+    if codec not in LADDER_CODECS:
+        raise ValueError(f"encoder ladder does not support {codec}")
+    parts = [" ! tee name=laddersrc"]
+    for rung in rungs:
+        parts.append(
+            f" laddersrc. ! queue max-size-buffers=2 leaky=downstream ! videoscale "
+            f"! video/x-raw,width={rung.width},height={rung.height} "
+            f"! {build_ladder_rung_encoder(rung, codec, framerate)} "
+            f"! tee name={rung.tee_name} allow-not-linked=true"
+        )
+    return "".join(parts)
+
+
+def ladder_payloader_description(codec: str) -> str:
+    if codec == "vp8":
+        return "rtpvp8pay ! application/x-rtp,media=video,encoding-name=VP8,payload=96"
+    return (
+        "rtph264pay config-interval=-1 aggregate-mode=zero-latency "
+        "! application/x-rtp,media=video,encoding-name=H264,payload=96"
+    )
+
+
+def select_ladder_rung(
+    rungs: Sequence[LadderRung],
+    current: int,
+    loss: Optional[float],
+    available_kbps: Optional[float],
+    now: float,
+    last_switch: float,
+) -> int:
+    """Return the rung a viewer should use given its loss fraction and bandwidth."""
+    if not rungs:
+        return current
+    lowest = len(rungs) - 1
+    current = min(max(current, 0), lowest)
+
+    if available_kbps is not None and available_kbps > 0:
+        fitting = next((rung.index for rung in rungs if rung.bitrate <= available_kbps), lowest)
+        if fitting > current:
+            return fitting
+    if loss is not None and loss >= LADDER_STEP_DOWN_LOSS and current < lowest:
+        return current + 1
+
+    if current == 0 or now - last_switch < LADDER_HOLD_SECONDS:
+        return current
+    if loss is None or loss > LADDER_STEP_UP_LOSS:
+        return current
+    higher = rungs[current - 1]
+    if available_kbps is not None and available_kbps < higher.bitrate * LADDER_STEP_UP_HEADROOM:
+        return current
+    return current - 1
@@ -0,0 +1,321 @@
+"""Shared-memory ring of raw video frames for ``--framebuffer`` consumers.
+
+Layout (little endian). A 64-byte ring header::
+
+    0  magic "RNFR"        4  version (u32)      8  flags (u32, bit 0 = closed)
+    12 slot count (u32)    16 slot capacity (u32)
+    20 notify word (u32, low 32 bits of the latest frame number; futex)
+    24 latest frame number (u64, 0 = none yet)
+
+followed by ``slot count`` slots, each a 64-byte slot header and
+``slot capacity`` payload bytes::
+
+    0  sequence (u64, odd while the slot is being written)
+    8  frame number (u64)   16 width (u32)   20 height (u32)
+    24 stride (u32)         28 payload size (u32)
+    32 format (4 ASCII bytes, e.g. "BGR\\0")  40 pts in ns (u64, or 2**64-1)
+
+A reader copies a slot and accepts it only if the slot sequence was even
+and unchanged across the copy (a seqlock), so it never returns a torn
+frame. When a frame outgrows the slots the writer marks the ring closed
+and recreates it under the same name with larger slots; readers reopen.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import mmap
+import os
+import platform
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+RING_MAGIC = b"RNFR"
+RING_VERSION = 1
+DEFAULT_RING_NAME = "psm_raspininja_ring"
+DEFAULT_SLOTS = 3
+DEFAULT_SLOT_CAPACITY = 1920 * 1080 * 3
+PTS_NONE = 2 ** 64 - 1
+
+FLAG_CLOSED = 1
+
+RING_HEADER = struct.Struct("<4sIIIIIQ")
+RING_HEADER_SIZE = 64
+NOTIFY_OFFSET = 20
+LATEST_OFFSET = 24
+SLOT_HEADER = struct.Struct("<QQIIII4sIQ")
+SLOT_HEADER_SIZE = 64
+
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+# futex(2) syscall numbers; other platforms poll instead.
+_FUTEX_SYSCALLS = {
+    "x86_64": 202,
+    "amd64": 202,
+    "aarch64": 98,
+    "arm64": 98,
+    "riscv64": 98,
+    "armv6l": 240,
+    "armv7l": 240,
+    "armv8l": 240,
+    "i386": 240,
+    "i686": 240,
+}
+_FUTEX_WAIT = 0
+_FUTEX_WAKE = 1
+POLL_INTERVAL = 0.002
+
+
+class FrameRingClosed(Exception):
+    """The writer closed or replaced the ring; open it again by name."""
+
+
+class Frame(NamedTuple):
+    number: int
+    width: int
+    height: int
+    stride: int
+    format: str
+    pts: Optional[int]  # nanoseconds
+    data: bytes
+
+    def to_numpy(self):
+        """Return a ``(height, width, channels)`` uint8 view of packed RGB/BGR data (needs numpy)."""
+        import numpy as np
+
+        channels = 4 if len(self.format) == 4 else 3
+        rows = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.stride)
+        return rows[:, : self.width * channels].reshape(self.height, self.width, channels)
+
+
+class _Futex:
+    """Process-shared futex on a 32-bit word inside a shared mapping."""
+
+    def __init__(self, buf: memoryview, offset: int):
+        self._word = ctypes.c_uint32.from_buffer(buf, offset)
+        self._syscall = None
+        self._number = _FUTEX_SYSCALLS.get(platform.machine().lower()) if sys.platform.startswith("linux") else None
+        if self._number is not None:
+            try:
+                self._syscall = ctypes.CDLL(None, use_errno=True).syscall
+            except (OSError, AttributeError):
+                self._syscall = None
+
+    @property
+    def available(self) -> bool:
+        return self._syscall is not None
+
+    def wait(self, expected: int, timeout: Optional[float]) -> None:
+        if self._syscall is None:
+            time.sleep(POLL_INTERVAL if timeout is None else min(POLL_INTERVAL, max(timeout, 0.0)))
+            return
+        spec = None
+        if timeout is not None:
+            timeout = max(timeout, 0.0)
+            spec = (ctypes.c_long * 2)(int(timeout), int((timeout % 1) * 1e9))
+        self._syscall(
+            self._number, ctypes.byref(self._word), _FUTEX_WAIT, ctypes.c_uint32(expected),
+            spec, None, 0,
+        )
+
+    def wake(self) -> None:
+        if self._syscall is not None:
+            self._syscall(self._number, ctypes.byref(self._word), _FUTEX_WAKE, 0x7FFFFFFF, None, None, 0)
+
+    def release(self) -> None:
+        # The ctypes view pins the buffer; drop it before closing the mapping.
+        self._word = None
+
+
+def _slot_stride(capacity: int) -> int:
+    return SLOT_HEADER_SIZE + (capacity + 63) // 64 * 64
+
+
+def _format_bytes(fmt: str) -> bytes:
+    return fmt.encode("ascii")[:4].ljust(4, b"\0")
+
+
+class FrameRingWriter:
+    """Single writer that publishes frames into a named shared-memory ring."""
+
+    def __init__(self, name: str = DEFAULT_RING_NAME, slots: int = DEFAULT_SLOTS, capacity: int = DEFAULT_SLOT_CAPACITY):
+        self.name = name
+        self.slots = max(2, int(slots))
+        self.capacity = 0
+        self.frame_number = 0
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self._futex: Optional[_Futex] = None
+        self._create(max(1, int(capacity)))
+
+    def _create(self, capacity: int) -> None:
+        size = RING_HEADER_SIZE + self.slots * _slot_stride(capacity)
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a writer that did not exit cleanly
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self.capacity = capacity
+        RING_HEADER.pack_into(self.shm.buf, 0, RING_MAGIC, RING_VERSION, 0, self.slots, capacity, 0, self.frame_number)
+        self._futex = _Futex(self.shm.buf, NOTIFY_OFFSET)
+
+    def _retire(self) -> None:
+        """Mark the current ring closed, wake readers and unlink it."""
+        if self.shm is None:
+            return
+        _U32.pack_into(self.shm.buf, 8, FLAG_CLOSED)
+        self._futex.wake()
+        self._futex.release()
+        self._futex = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+    def write(self, data, width: int, height: int, stride: Optional[int] = None, fmt: str = "BGR", pts: Optional[int] = None) -> int:
+        """Copy one frame (any buffer-protocol object) into the next slot and wake readers."""
+        payload = memoryview(data).cast("B")
+        size = payload.nbytes
+        if size > self.capacity:
+            self._retire()
+            self._create(size + size // 4)
+        frame = self.frame_number + 1
+        buf = self.shm.buf
+        offset = RING_HEADER_SIZE + (frame % self.slots) * _slot_stride(self.capacity)
+        sequence = _U64.unpack_from(buf, offset)[0]
+        _U64.pack_into(buf, offset, sequence + 1)
+        start = offset + SLOT_HEADER_SIZE
+        buf[start:start + size] = payload
+        SLOT_HEADER.pack_into(
+            buf, offset, sequence + 1, frame, width, height,
+            stride if stride is not None else (size // height if height else 0), size,
+            _format_bytes(fmt), 0, PTS_NONE if pts is None else pts,
+        )
+        _U64.pack_into(buf, offset, sequence + 2)
+        _U64.pack_into(buf, LATEST_OFFSET, frame)
+        _U32.pack_into(buf, NOTIFY_OFFSET, frame & 0xFFFFFFFF)
+        self.frame_number = frame
+        self._futex.wake()
+        return frame
+
+    def close(self) -> None:
+        self._retire()
+
+
+class FrameRingReader:
+    """Reader for a ring published by :class:`FrameRingWriter` (usually ``publish.py --framebuffer``)."""
+
+    def __init__(self, name: str = DEFAULT_RING_NAME):
+        self.name = name
+        self.shm = _Mapping(name)
+        magic, version, _flags, slots, capacity, _notify, _latest = RING_HEADER.unpack_from(self.shm.buf, 0)
+        if magic != RING_MAGIC or version != RING_VERSION:
+            self.shm.close()
+            raise ValueError(f"{name} is not a version {RING_VERSION} frame ring")
+        self.slots = slots
+        self.capacity = capacity
+        self.last_frame = 0
+        self._futex = _Futex(self.shm.buf, NOTIFY_OFFSET)
+
+    @classmethod
+    def open(cls, name: str = DEFAULT_RING_NAME, timeout: Optional[float] = None, interval: float = 0.1) -> "FrameRingReader":
+        """Attach to ``name``, retrying while the writer has not created (or is recreating) it."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return cls(name)
+            except (FileNotFoundError, ValueError):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+                time.sleep(interval)
+
+    @property
+    def closed(self) -> bool:
+        return bool(_U32.unpack_from(self.shm.buf, 8)[0] & FLAG_CLOSED)
+
+    def latest_frame_number(self) -> int:
+        return _U64.unpack_from(self.shm.buf, LATEST_OFFSET)[0]
+
+    def read(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Return the newest frame not returned before, waiting up to ``timeout`` seconds.
+
+        Frames the reader was too slow for are skipped. Returns None on
+        timeout and raises :class:`FrameRingClosed` once the writer is gone.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.closed:
+                raise FrameRingClosed(self.name)
+            latest = self.latest_frame_number()
+            if latest > self.last_frame:
+                frame = self._read_slot(latest)
+                if frame is not None:
+                    self.last_frame = frame.number
+                    return frame
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            if latest > self.last_frame:
+                # Slot overwritten or mid-write; the writer is about to finish it
+                time.sleep(POLL_INTERVAL / 2)
+                continue
+            self._futex.wait(latest & 0xFFFFFFFF, remaining if remaining is not None else 1.0)
+
+    def _read_slot(self, number: int) -> Optional[Frame]:
+        buf = self.shm.buf
+        offset = RING_HEADER_SIZE + (number % self.slots) * _slot_stride(self.capacity)
+        sequence, frame, width, height, stride, size, fmt, _reserved, pts = SLOT_HEADER.unpack_from(buf, offset)
+        if sequence & 1 or frame != number or size > self.capacity:
+            return None
+        start = offset + SLOT_HEADER_SIZE
+        data = bytes(buf[start:start + size])
+        if _U64.unpack_from(buf, offset)[0] != sequence:
+            return None
+        return Frame(
+            frame, width, height, stride, fmt.rstrip(b"\0").decode("ascii", "replace"),
+            None if pts == PTS_NONE else pts, data,
+        )
+
+    def close(self) -> None:
+        if self._futex is not None:
+            self._futex.release()
+            self._futex = None
+        self.shm.close()
+
+
+class _Mapping:
+    """Read/write mapping of an existing POSIX shared-memory segment."""
+
+    def __init__(self, name: str):
+        self._mmap = None
+        self._shm = None
+        path = f"/dev/shm/{name.lstrip('/')}"
+        if os.path.exists("/dev/shm"):
+            # Map the file directly so this process's resource tracker never
+            # adopts (and later unlinks) the writer's segment.
+            fd = os.open(path, os.O_RDWR)
+            try:
+                self._mmap = mmap.mmap(fd, os.fstat(fd).st_size)
+            finally:
+                os.close(fd)
+            self.buf = memoryview(self._mmap)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self.buf = self._shm.buf
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self.buf.release()
+            self._mmap.close()
+            self._mmap = None
+        elif self._shm is not None:
+            self._shm.close()
+            self._shm = None
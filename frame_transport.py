@@ -0,0 +1,404 @@
+"""Framed transport for ``--socketout`` video frames.
+
+Every frame is split into chunks, each sent with a 24-byte header
+(network byte order)::
+
+    0  magic "RN"   2 version (u8)   3 codec (u8, 0 = raw BGR, 1 = JPEG)
+    4  frame id (u32)   8 chunk index (u16)   10 chunk count (u16)
+    12 byte offset of this chunk (u32)   16 frame size (u32)
+    20 width (u16)   22 height (u16)
+
+Over UDP each chunk is one datagram and a whole frame goes out in one
+``sendmmsg`` call where available; the receiver reassembles by offset and
+drops frames that are still incomplete when a newer one finishes. Over a
+Unix stream socket a frame is a single header (chunk count 1) followed by
+the payload.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import socket
+import struct
+import sys
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+MAGIC = b"RN"
+VERSION = 1
+CODEC_RAW = 0
+CODEC_JPEG = 1
+CODEC_NAMES = {CODEC_RAW: "raw", CODEC_JPEG: "jpeg"}
+CODECS = {name: value for value, name in CODEC_NAMES.items()}
+
+CHUNK_HEADER = struct.Struct("!2sBBIHHIIHH")
+_FRAME_ID = struct.Struct("!I")
+MAX_DATAGRAM = 65507
+DEFAULT_CHUNK_SIZE = MAX_DATAGRAM - CHUNK_HEADER.size
+SENDMMSG_BATCH = 1024  # UIO_MAXIOV
+RECONNECT_INTERVAL = 1.0
+
+
+class FrameHeader(NamedTuple):
+    codec: int
+    frame_id: int
+    chunk_index: int
+    chunk_count: int
+    offset: int
+    frame_size: int
+    width: int
+    height: int
+
+
+class ReceivedFrame(NamedTuple):
+    frame_id: int
+    width: int
+    height: int
+    codec: str
+    data: bytes
+
+    @property
+    def stride(self) -> int:
+        return len(self.data) // self.height if self.height else 0
+
+    def to_numpy(self):
+        """Decode to a ``(height, width, 3)`` BGR array (numpy; cv2 for JPEG)."""
+        import numpy as np
+
+        if self.codec == "jpeg":
+            import cv2
+
+            return cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        rows = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.stride)
+        return rows[:, : self.width * 3].reshape(self.height, self.width, 3)
+
+
+def pack_header(codec: int, frame_id: int, index: int, count: int, offset: int, size: int, width: int, height: int) -> bytes:
+    return CHUNK_HEADER.pack(MAGIC, VERSION, codec, frame_id, index, count, offset, size, width, height)
+
+
+def parse_header(data) -> Optional[FrameHeader]:
+    if len(data) < CHUNK_HEADER.size:
+        return None
+    magic, version, *fields = CHUNK_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return FrameHeader(*fields)
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        func = ctypes.CDLL(None, use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+class FrameSender:
+    """Send frames to a UDP ``(host, port)`` or, with ``unix_path``, a Unix stream socket."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 12345,
+        unix_path: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_sendmmsg: bool = True,
+    ):
+        self.address = unix_path or (host, int(port))
+        self.unix_path = unix_path
+        self.chunk_size = max(1, min(int(chunk_size), DEFAULT_CHUNK_SIZE))
+        self.frame_id = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.sock: Optional[socket.socket] = None
+        self._next_connect = 0.0
+        self._sendmmsg = _sendmmsg if use_sendmmsg else None
+        self._batch: Optional[_DatagramBatch] = None
+        if not unix_path:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.connect(self.address)
+
+    def send(self, data, width: int, height: int, codec: int = CODEC_RAW) -> bool:
+        """Send one frame; returns False if it was dropped (no receiver, socket error)."""
+        payload = data if isinstance(data, bytes) else bytes(data)
+        self.frame_id = (self.frame_id + 1) & 0xFFFFFFFF
+        try:
+            if self.unix_path:
+                sent = self._send_stream(payload, width, height, codec)
+            else:
+                self._send_datagrams(payload, width, height, codec)
+                sent = True
+        except (ConnectionRefusedError, BlockingIOError):
+            sent = False  # nobody listening on the UDP port
+        except OSError:
+            self._disconnect()
+            sent = False
+        if sent:
+            self.frames_sent += 1
+        else:
+            self.frames_dropped += 1
+        return sent
+
+    def _send_stream(self, payload: bytes, width: int, height: int, codec: int) -> bool:
+        if self.sock is None and not self._connect():
+            return False
+        header = pack_header(codec, self.frame_id, 0, 1, 0, len(payload), width, height)
+        sent = self.sock.sendmsg([header, payload])
+        total = len(header) + len(payload)
+        if sent < total:
+            self.sock.sendall(memoryview(header + payload)[sent:])
+        return True
+
+    def _connect(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_connect:
+            return False
+        self._next_connect = now + RECONNECT_INTERVAL
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.unix_path)
+        except OSError:
+            sock.close()
+            return False
+        self.sock = sock
+        return True
+
+    def _disconnect(self) -> None:
+        if self.unix_path and self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _chunks(self, size: int):
+        count = max(1, -(-size // self.chunk_size))
+        if count > 0xFFFF:
+            raise ValueError(f"frame of {size} bytes needs more than 65535 chunks")
+        for index in range(count):
+            offset = index * self.chunk_size
+            yield index, count, offset, min(self.chunk_size, size - offset)
+
+    def _send_datagrams(self, payload: bytes, width: int, height: int, codec: int) -> None:
+        size = len(payload)
+        if self._sendmmsg is None:
+            view = memoryview(payload)
+            for index, count, offset, length in self._chunks(size):
+                header = pack_header(codec, self.frame_id, index, count, offset, size, width, height)
+                self.sock.sendmsg([header, view[offset:offset + length]])
+            return
+        batch = self._batch
+        if batch is None or batch.key != (size, width, height, codec):
+            batch = self._batch = _DatagramBatch(self, size, width, height, codec)
+        batch.send(self.sock.fileno(), payload, self.frame_id)
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class _DatagramBatch:
+    """Prepared ``sendmmsg`` arrays for one frame size, reused while it stays the same.
+
+    Only the frame id in each header and the payload address change
+    between frames, so sending costs one field update per chunk plus one
+    system call per 1024 chunks.
+    """
+
+    def __init__(self, sender: FrameSender, size: int, width: int, height: int, codec: int):
+        self.key = (size, width, height, codec)
+        chunks = list(sender._chunks(size))
+        self.offsets = [offset for _index, _count, offset, _length in chunks]
+        self.headers = ctypes.create_string_buffer(len(chunks) * CHUNK_HEADER.size)
+        self.iovecs = (_IoVec * (2 * len(chunks)))()
+        self.messages = (_MMsgHdr * len(chunks))()
+        header_base = ctypes.addressof(self.headers)
+        for i, (index, count, offset, length) in enumerate(chunks):
+            CHUNK_HEADER.pack_into(self.headers, i * CHUNK_HEADER.size, MAGIC, VERSION, codec, 0, index, count, offset, size, width, height)
+            self.iovecs[2 * i].iov_base = header_base + i * CHUNK_HEADER.size
+            self.iovecs[2 * i].iov_len = CHUNK_HEADER.size
+            self.iovecs[2 * i + 1].iov_len = length
+            self.messages[i].msg_hdr.msg_iov = ctypes.cast(ctypes.addressof(self.iovecs[2 * i]), ctypes.POINTER(_IoVec))
+            self.messages[i].msg_hdr.msg_iovlen = 2
+        self._sendmmsg = sender._sendmmsg
+
+    def send(self, fd: int, payload: bytes, frame_id: int) -> None:
+        base = ctypes.cast(ctypes.c_char_p(payload), ctypes.c_void_p).value or 0
+        iovecs, headers = self.iovecs, self.headers
+        for i, offset in enumerate(self.offsets):
+            _FRAME_ID.pack_into(headers, i * CHUNK_HEADER.size + 4, frame_id)
+            iovecs[2 * i + 1].iov_base = base + offset
+        total = len(self.offsets)
+        done = 0
+        while done < total:
+            pending = ctypes.cast(ctypes.addressof(self.messages[done]), ctypes.POINTER(_MMsgHdr))
+            result = self._sendmmsg(fd, pending, min(total - done, SENDMMSG_BATCH), 0)
+            if result < 0:
+                code = ctypes.get_errno()
+                if code == errno.EINTR:
+                    continue
+                raise OSError(code, os.strerror(code))
+            done += result
+
+
+class FrameAssembler:
+    """Reassemble chunked frames, dropping any that cannot complete in order."""
+
+    def __init__(self, max_pending: int = 4):
+        self.max_pending = max_pending
+        self.frames_completed = 0
+        self.frames_dropped = 0
+        self._last_frame: Optional[int] = None
+        self._pending: Dict[int, Tuple[FrameHeader, bytearray, set]] = {}
+
+    def reset(self) -> None:
+        self._last_frame = None
+        self._pending.clear()
+
+    @staticmethod
+    def _newer(frame_id: int, than: int) -> bool:
+        return 0 < ((frame_id - than) & 0xFFFFFFFF) < 0x80000000
+
+    def add(self, header: FrameHeader, chunk) -> Optional[ReceivedFrame]:
+        """Feed one chunk; returns the frame it completed, if any."""
+        if header.frame_id == 1 and self._last_frame not in (None, 0, 1):
+            self.reset()  # every sender starts at frame 1, so the publisher restarted
+        if self._last_frame is not None and not self._newer(header.frame_id, self._last_frame):
+            return None  # late chunk of a frame already delivered or dropped
+        if header.offset + len(chunk) > header.frame_size or header.chunk_index >= header.chunk_count:
+            return None
+        entry = self._pending.get(header.frame_id)
+        if entry is None:
+            if len(self._pending) >= self.max_pending:
+                del self._pending[max(self._pending, key=lambda fid: (header.frame_id - fid) & 0xFFFFFFFF)]
+            entry = (header, bytearray(header.frame_size), set())
+            self._pending[header.frame_id] = entry
+        first, buffer, received = entry
+        if header.frame_size != first.frame_size or header.chunk_count != first.chunk_count:
+            return None
+        buffer[header.offset:header.offset + len(chunk)] = chunk
+        received.add(header.chunk_index)
+        if len(received) < first.chunk_count:
+            return None
+        del self._pending[header.frame_id]
+        stale = [fid for fid in self._pending if not self._newer(fid, header.frame_id)]
+        for frame_id in stale:
+            del self._pending[frame_id]
+        if self._last_frame is None:
+            self.frames_dropped += len(stale)
+        else:
+            # Every frame id skipped since the last delivery was lost or left incomplete
+            self.frames_dropped += ((header.frame_id - self._last_frame) & 0xFFFFFFFF) - 1
+        self._last_frame = header.frame_id
+        self.frames_completed += 1
+        return ReceivedFrame(
+            first.frame_id, first.width, first.height,
+            CODEC_NAMES.get(first.codec, str(first.codec)), bytes(buffer),
+        )
+
+
+class FrameReceiver:
+    """Reference receiver for :class:`FrameSender`; iterate it for frames."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 12345, unix_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.unix_path = unix_path
+        self.assembler = FrameAssembler()
+        self.timeout = timeout
+        self._conn: Optional[socket.socket] = None
+        if unix_path:
+            try:
+                os.unlink(unix_path)
+            except FileNotFoundError:
+                pass
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(unix_path)
+            self.sock.listen(1)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+            self.sock.bind((host, int(port)))
+        self.sock.settimeout(timeout)
+
+    def receive(self) -> ReceivedFrame:
+        """Block for the next complete frame; raises ``socket.timeout`` after ``timeout``."""
+        if self.unix_path:
+            return self._receive_stream()
+        buffer = bytearray(MAX_DATAGRAM)
+        while True:
+            size = self.sock.recv_into(buffer)
+            header = parse_header(buffer[:size])
+            if header is None:
+                continue
+            frame = self.assembler.add(header, memoryview(buffer)[CHUNK_HEADER.size:size])
+            if frame is not None:
+                return frame
+
+    def _receive_stream(self) -> ReceivedFrame:
+        while True:
+            if self._conn is None:
+                self._conn, _ = self.sock.accept()
+                self._conn.settimeout(self.timeout)
+            try:
+                header = parse_header(self._recv_exact(CHUNK_HEADER.size))
+                if header is None:
+                    raise ConnectionError("bad frame header")
+                data = self._recv_exact(header.frame_size)
+            except ConnectionError:
+                self._conn.close()
+                self._conn = None
+                continue
+            self.assembler.frames_completed += 1
+            return ReceivedFrame(header.frame_id, header.width, header.height, CODEC_NAMES.get(header.codec, str(header.codec)), data)
+
+    def _recv_exact(self, size: int) -> bytes:
+        data = bytearray(size)
+        view = memoryview(data)
+        while view:
+            count = self._conn.recv_into(view)
+            if not count:
+                raise ConnectionError("sender closed the connection")
+            view = view[count:]
+        return bytes(data)
+
+    def __iter__(self) -> Iterator[ReceivedFrame]:
+        while True:
+            yield self.receive()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.sock.close()
+        if self.unix_path:
+            try:
+                os.unlink(self.unix_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+PingCallback = Callable[[], Optional[bool]]
+StatsCallback = Callable[[], None]
+
+
+class HeartbeatHandle:
+    """Stands in for the per-client ping timer; ``cancel()`` unregisters the peer."""
+
+    __slots__ = ("_scheduler", "key")
+
+    def __init__(self, scheduler: "HeartbeatScheduler", key: int):
+        self._scheduler = scheduler
+        self.key = key
+
+    def cancel(self) -> None:
+        self._scheduler.unregister(self.key)
+
+
+class _Entry:
+    __slots__ = ("ping", "stats", "next_ping", "next_stats")
+
+    def __init__(self, ping: PingCallback, stats: Optional[StatsCallback], next_ping: float, next_stats: float):
+        self.ping = ping
+        self.stats = stats
+        self.next_ping = next_ping
+        self.next_stats = next_stats
+
+
+class HeartbeatScheduler:
+    """One asyncio task that drives data-channel pings and get-stats for every peer.
+
+    Pings that fall due within ``batch_window`` of each other are sent in the
+    same wakeup. get-stats requests are spread out so no more than
+    ``max_stats_per_second`` are issued, and each peer's stats interval grows
+    with the number of registered peers. ``register`` and ``unregister`` may be
+    called from GStreamer threads.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        ping_interval: float = 3.0,
+        stats_interval: float = 3.0,
+        max_stats_per_second: float = 4.0,
+        max_stats_interval: float = 15.0,
+        batch_window: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+        log: Callable[[str], None] = print,
+    ):
+        self.loop = loop
+        self.ping_interval = ping_interval
+        self.stats_interval = stats_interval
+        self.max_stats_per_second = max_stats_per_second
+        self.max_stats_interval = max_stats_interval
+        self.batch_window = batch_window
+        self.clock = clock
+        self.log = log
+        self._entries: Dict[int, _Entry] = {}
+        self._lock = threading.Lock()
+        self._keys = itertools.count(1)
+        self._next_stats_slot = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats_interval_for(self, peer_count: int) -> float:
+        """Per-peer get-stats period that keeps the total request rate bounded."""
+        if peer_count <= 0:
+            return self.stats_interval
+        rate_limited = peer_count / self.max_stats_per_second
+        return min(self.max_stats_interval, max(self.stats_interval, rate_limited))
+
+    def register(self, ping: PingCallback, stats: Optional[StatsCallback] = None) -> HeartbeatHandle:
+        now = self.clock()
+        key = next(self._keys)
+        with self._lock:
+            self._entries[key] = _Entry(ping, stats, now + self.ping_interval, now + self.ping_interval)
+        self._schedule_wake()
+        return HeartbeatHandle(self, key)
+
+    def unregister(self, key: int) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            self._entries.clear()
+        self._schedule_wake()
+
+    def tick(self, now: Optional[float] = None) -> Optional[float]:
+        """Run every callback that is due; return seconds until the next one."""
+        if now is None:
+            now = self.clock()
+        horizon = now + self.batch_window
+        with self._lock:
+            peer_count = len(self._entries)
+            due_pings = [(key, entry) for key, entry in self._entries.items() if entry.next_ping <= horizon]
+            due_stats = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if entry.stats is not None and entry.next_stats <= horizon
+            ]
+
+        finished = []
+        for key, entry in due_pings:
+            entry.next_ping = now + self.ping_interval
+            try:
+                keep = entry.ping()
+            except Exception as exc:
+                self.log(f"Heartbeat callback failed: {exc}")
+                keep = True
+            if keep is False:
+                finished.append(key)
+
+        stats_spacing = 1.0 / self.max_stats_per_second
+        stats_interval = self.stats_interval_for(peer_count)
+        cursor = max(now, self._next_stats_slot)
+        for key, entry in due_stats:
+            if key in finished:
+                continue
+            if cursor > horizon:
+                # Over the request budget for this wakeup; take a later slot.
+                entry.next_stats = cursor
+                cursor += stats_spacing
+                continue
+            self._next_stats_slot = cursor + stats_spacing
+            cursor += stats_spacing
+            entry.next_stats = now + stats_interval
+            try:
+                entry.stats()
+            except Exception as exc:
+                self.log(f"Stats request failed: {exc}")
+
+        with self._lock:
+            for key in finished:
+                self._entries.pop(key, None)
+            if not self._entries:
+                return None
+            next_due = min(
+                min(entry.next_ping, entry.next_stats if entry.stats is not None else entry.next_ping)
+                for entry in self._entries.values()
+            )
+        return max(0.0, next_due - self.clock())
+
+    def _schedule_wake(self) -> None:
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._ensure_running)
+        except RuntimeError:
+            pass
+
+    def _ensure_running(self) -> None:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._wake.set()
+        if not self._closed and (self._task is None or self._task.done()):
+            self._task = self.loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            delay = self.tick()
+            self._wake.clear()
+            try:
+                if delay is None:
+                    await self._wake.wait()
+                else:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
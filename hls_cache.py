@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+DEFAULT_CACHED_SEGMENTS = 8
+DEFAULT_CACHED_PLAYLISTS = 8
+DEFAULT_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+
+def file_validator(st: os.stat_result) -> Tuple[int, int, int]:
+    """Identity of one version of a file; an atomic replace changes the inode."""
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def file_etag(st: os.stat_result) -> str:
+    inode, mtime_ns, size = file_validator(st)
+    return f'"{inode:x}-{mtime_ns:x}-{size:x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag == etag or tag == "W/" + etag:
+            return True
+    return False
+
+
+def read_file(path: str) -> Tuple[bytes, os.stat_result]:
+    """Read ``path`` and stat the same descriptor, so body and validator agree."""
+    with open(path, "rb") as handle:
+        st = os.fstat(handle.fileno())
+        return handle.read(), st
+
+
+class HlsFileCache:
+    """LRU of recently served HLS files, validated against ``os.stat``.
+
+    Playlists and segments have separate limits so a burst of segment
+    requests never evicts the playlists every viewer polls. An entry is
+    stale as soon as the writer touches the file: playlists are replaced
+    atomically (new inode) and segments grow (new size and mtime).
+    """
+
+    def __init__(
+        self,
+        max_segments: int = DEFAULT_CACHED_SEGMENTS,
+        max_playlists: int = DEFAULT_CACHED_PLAYLISTS,
+        max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES,
+    ):
+        self.max_entry_bytes = max_entry_bytes
+        self._limits = {"playlist": max(0, max_playlists), "segment": max(0, max_segments)}
+        self._entries = {"playlist": OrderedDict(), "segment": OrderedDict()}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _kind(path: str) -> str:
+        return "playlist" if path.endswith(".m3u8") else "segment"
+
+    def get(self, path: str, st: os.stat_result) -> Optional[bytes]:
+        entries = self._entries[self._kind(path)]
+        entry = entries.get(path)
+        if entry is not None and entry[0] == file_validator(st):
+            entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del entries[path]
+        self.misses += 1
+        return None
+
+    def put(self, path: str, st: os.stat_result, body: bytes) -> bool:
+        kind = self._kind(path)
+        if len(body) > self.max_entry_bytes or not self._limits[kind]:
+            return False
+        entries = self._entries[kind]
+        entries[path] = (file_validator(st), body)
+        entries.move_to_end(path)
+        while len(entries) > self._limits[kind]:
+            entries.popitem(last=False)
+        return True
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop ``path`` (or everything) from the cache."""
+        for entries in self._entries.values():
+            if path is None:
+                entries.clear()
+            else:
+                entries.pop(path, None)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
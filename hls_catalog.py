@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from hls_playlist import playlist_position
+
+RECORDING_WINDOW = 10.0  # seconds since last activity
+LIVE_WINDOW = 60.0
+HLS_STREAM_STATUSES = ("recording", "live", "incomplete", "complete")
+
+
+class _CatalogEntry:
+    __slots__ = ("filename", "validator", "size", "modified", "is_complete", "has_segments", "segment_count", "activity")
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.validator: Optional[Tuple[int, int, int]] = None
+        self.size = 0
+        self.modified = 0.0
+        self.is_complete = False
+        self.has_segments = False
+        self.segment_count = 0
+        self.activity = 0.0
+
+
+class HlsCatalog:
+    """In-memory index of the HLS playlists in one directory.
+
+    The directory is listed again only when its mtime changes (a playlist
+    or segment was created, replaced or removed), and at most once per
+    ``min_interval`` seconds. A playlist is re-read only when its own stat
+    changes. Segment counts come from the playlist (media sequence plus
+    listed segments), and activity from the playlist and its newest
+    segment, so a refresh costs one stat per playlist instead of one per
+    segment. ``query()`` is safe to call from executor threads.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".",
+        min_interval: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = directory
+        self.min_interval = min_interval
+        self.clock = clock
+        self._entries: Dict[str, _CatalogEntry] = {}
+        self._dir_mtime: Optional[int] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        now = self.clock()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.min_interval:
+            return
+        self._refreshed_at = now
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            self._entries.clear()
+            return
+        if force or dir_mtime != self._dir_mtime:
+            self._dir_mtime = dir_mtime
+            names = set()
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(".m3u8") and not entry.name.startswith("."):
+                        names.add(entry.name)
+            for name in list(self._entries):
+                if name not in names:
+                    del self._entries[name]
+            for name in names:
+                self._entries.setdefault(name, _CatalogEntry(name))
+        for name in list(self._entries):
+            if not self._update(self._entries[name]):
+                del self._entries[name]
+
+    def _update(self, entry: _CatalogEntry) -> bool:
+        path = os.path.join(self.directory, entry.filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        validator = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if validator == entry.validator:
+            return True
+        entry.validator = validator
+        entry.size = st.st_size
+        entry.modified = st.st_mtime
+        try:
+            with open(path, "r") as handle:
+                content = handle.read()
+        except (OSError, UnicodeDecodeError):
+            content = ""
+        entry.is_complete = "#EXT-X-ENDLIST" in content
+        entry.has_segments = "#EXTINF:" in content
+        entry.segment_count, _parts = playlist_position(content)
+        entry.activity = st.st_mtime
+        newest = self._newest_segment(entry.filename[: -len(".m3u8")], entry.segment_count)
+        if newest > entry.activity:
+            entry.activity = newest
+        return True
+
+    def _newest_segment(self, base: str, segment_count: int) -> float:
+        """mtime of the segment being written (or the last listed one), if present."""
+        for index in (segment_count, segment_count - 1):
+            if index < 0:
+                continue
+            try:
+                return os.stat(os.path.join(self.directory, f"{base}_{index:05d}.ts")).st_mtime
+            except OSError:
+                continue
+        return 0.0
+
+    def _status(self, entry: _CatalogEntry, now: float) -> str:
+        idle = now - entry.activity
+        if idle < RECORDING_WINDOW:
+            return "recording"
+        if idle < LIVE_WINDOW and not entry.is_complete:
+            return "live"
+        if not entry.is_complete and entry.has_segments:
+            return "incomplete"
+        return "complete"
+
+    def _describe(self, entry: _CatalogEntry, now: float) -> Dict[str, Any]:
+        info: Dict[str, Any] = {
+            "filename": entry.filename,
+            "url": f"/hls/{entry.filename}",
+            "size": entry.size,
+            "modified": entry.modified,
+            "segments": [],
+            "is_complete": entry.is_complete,
+            "has_segments": entry.has_segments,
+            "segment_count": entry.segment_count,
+            "last_activity": entry.activity,
+            "status": self._status(entry, now),
+        }
+        # Format: room_streamid_timestamp.m3u8
+        parts = entry.filename[: -len(".m3u8")].split("_")
+        if len(parts) >= 3:
+            info["room"] = parts[0]
+            info["stream_id"] = parts[1]
+            info["timestamp"] = parts[2]
+        return info
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        room: Optional[str] = None,
+        stream_id: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of streams (newest first) and the number that matched."""
+        with self._lock:
+            self.refresh()
+            now = self.clock()
+            described = [self._describe(entry, now) for entry in self._entries.values()]
+        streams = []
+        for info in described:
+            if status and info["status"] != status:
+                continue
+            if room and info.get("room") != room:
+                continue
+            if stream_id and info.get("stream_id") != stream_id:
+                continue
+            streams.append(info)
+        streams.sort(key=lambda info: info["modified"], reverse=True)
+        offset = max(0, offset)
+        end = offset + limit if limit else None
+        return streams[offset:end], len(streams)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import tempfile
+from typing import List, NamedTuple, Optional, Tuple
+
+
+PLAYLIST_TYPES = ("live", "event", "vod")
+DEFAULT_LIVE_WINDOW = 6
+# Segments at the live edge whose partial segments stay listed (and on disk).
+DEFAULT_PART_WINDOW = 3
+
+
+class HlsPart(NamedTuple):
+    uri: str
+    duration: float  # seconds
+    independent: bool = False
+
+
+class HlsSegment(NamedTuple):
+    uri: str
+    duration: float  # seconds
+    parts: Tuple[HlsPart, ...] = ()
+
+
+class HlsPlaylist:
+    """Media playlist that is rewritten atomically and only when it changes.
+
+    ``live`` playlists keep a sliding window of ``window`` segments (0 keeps
+    every segment). ``event`` playlists keep every segment and declare
+    ``EXT-X-PLAYLIST-TYPE:EVENT``. ``vod`` playlists are published as EVENT
+    while recording and switch to ``VOD`` when ``finish()`` is called.
+
+    With ``part_target`` set the playlist is Low-Latency HLS: partial
+    segments of the open segment are listed as ``EXT-X-PART`` with a
+    ``EXT-X-PRELOAD-HINT`` for the next one, and parts of the last
+    ``part_window`` segments are kept. Parts that fall out of that window
+    are queued for deletion, see ``pop_expired_parts()``.
+
+    Writes go to a temporary file in the same directory followed by
+    ``os.replace`` so a polling player never sees a partial file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        target_duration: float = 5.0,
+        playlist_type: str = "live",
+        window: int = DEFAULT_LIVE_WINDOW,
+        version: int = 3,
+        part_target: Optional[float] = None,
+        part_window: int = DEFAULT_PART_WINDOW,
+    ):
+        if playlist_type not in PLAYLIST_TYPES:
+            raise ValueError(f"unknown HLS playlist type {playlist_type!r}")
+        self.path = path
+        self.target_duration = target_duration
+        self.playlist_type = playlist_type
+        self.window = max(0, int(window)) if playlist_type == "live" else 0
+        self.part_target = part_target if part_target and part_target > 0 else None
+        self.part_window = max(1, int(part_window))
+        self.version = max(version, 6) if self.part_target else version
+        self.segments: List[HlsSegment] = []
+        self.open_parts: List[HlsPart] = []
+        self.preload_hint: Optional[str] = None
+        self.finished = False
+        self._expired_parts: List[str] = []
+        self._uris = set()
+        self._written: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def __contains__(self, uri: str) -> bool:
+        return os.path.basename(uri) in self._uris
+
+    def add_segment(self, uri: str, duration: Optional[float] = None) -> bool:
+        """Append a finished segment and publish the playlist; False for duplicates."""
+        uri = os.path.basename(uri)
+        if uri in self._uris or self.finished:
+            return False
+        if duration is None or duration <= 0:
+            duration = self.target_duration
+        self.segments.append(HlsSegment(uri, float(duration), tuple(self.open_parts)))
+        self.open_parts = []
+        self._uris.add(uri)
+        if len(self.segments) > self.part_window:
+            index = len(self.segments) - self.part_window - 1
+            self._expire_parts(index)
+        self.write()
+        return True
+
+    def add_part(self, uri: str, duration: float, independent: bool = False, preload_hint: Optional[str] = None) -> bool:
+        """Append a finished partial segment of the open segment and publish the playlist."""
+        if not self.part_target or self.finished:
+            return False
+        self.open_parts.append(HlsPart(os.path.basename(uri), float(duration), independent))
+        self.preload_hint = os.path.basename(preload_hint) if preload_hint else None
+        self.write()
+        return True
+
+    def pop_expired_parts(self) -> List[str]:
+        """Return paths of part files no longer referenced by the playlist."""
+        directory = os.path.dirname(self.path)
+        expired = [os.path.join(directory, uri) for uri in self._expired_parts]
+        self._expired_parts = []
+        return expired
+
+    def _expire_parts(self, index: int) -> None:
+        segment = self.segments[index]
+        if segment.parts:
+            self._expired_parts.extend(part.uri for part in segment.parts)
+            self.segments[index] = segment._replace(parts=())
+
+    def finish(self) -> None:
+        """Mark the recording complete with ``EXT-X-ENDLIST``; partial segments are dropped."""
+        if not self.finished:
+            self.finished = True
+            for index in range(len(self.segments)):
+                self._expire_parts(index)
+            self._expired_parts.extend(part.uri for part in self.open_parts)
+            self.open_parts = []
+            self.preload_hint = None
+            self.write()
+
+    def visible_segments(self) -> List[HlsSegment]:
+        if self.window and len(self.segments) > self.window:
+            return self.segments[-self.window:]
+        return self.segments
+
+    def render(self) -> str:
+        visible = self.visible_segments()
+        media_sequence = len(self.segments) - len(visible)
+        longest = max([self.target_duration] + [segment.duration for segment in visible])
+        lines = [
+            "#EXTM3U",
+            f"#EXT-X-VERSION:{self.version}",
+            f"#EXT-X-TARGETDURATION:{int(math.ceil(longest - 1e-6))}",
+            f"#EXT-X-MEDIA-SEQUENCE:{media_sequence}",
+        ]
+        if self.part_target:
+            lines.append(
+                f"#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,PART-HOLD-BACK={3 * self.part_target:.3f}"
+            )
+            lines.append(f"#EXT-X-PART-INF:PART-TARGET={self.part_target:.3f}")
+        if self.playlist_type == "event" or (self.playlist_type == "vod" and not self.finished):
+            lines.append("#EXT-X-PLAYLIST-TYPE:EVENT")
+        elif self.playlist_type == "vod":
+            lines.append("#EXT-X-PLAYLIST-TYPE:VOD")
+        lines.append("")
+        for segment in visible:
+            lines.extend(_part_lines(segment.parts))
+            lines.append(f"#EXTINF:{segment.duration:.3f},")
+            lines.append(segment.uri)
+        if self.part_target and not self.finished:
+            lines.extend(_part_lines(self.open_parts))
+            if self.preload_hint:
+                lines.append(f'#EXT-X-PRELOAD-HINT:TYPE=PART,URI="{self.preload_hint}"')
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> bool:
+        """Publish the playlist if its contents changed; returns whether a write happened."""
+        content = self.render()
+        if content == self._written:
+            return False
+        write_atomic(self.path, content)
+        self._written = content
+        return True
+
+
+def _part_lines(parts) -> List[str]:
+    return [
+        f'#EXT-X-PART:DURATION={part.duration:.3f},URI="{part.uri}"'
+        + (",INDEPENDENT=YES" if part.independent else "")
+        for part in parts
+    ]
+
+
+_MEDIA_SEQUENCE_RE = re.compile(r"^#EXT-X-MEDIA-SEQUENCE:(\d+)", re.MULTILINE)
+_TARGET_DURATION_RE = re.compile(r"^#EXT-X-TARGETDURATION:(\d+)", re.MULTILINE)
+
+
+def playlist_position(text: str) -> Tuple[int, int]:
+    """Return ``(msn, parts)`` of the open segment in a rendered media playlist.
+
+    ``msn`` is the media sequence number the next full segment will get and
+    ``parts`` the number of its partial segments already listed.
+    """
+    match = _MEDIA_SEQUENCE_RE.search(text)
+    msn = int(match.group(1)) if match else 0
+    parts = 0
+    for line in text.splitlines():
+        if line.startswith("#EXTINF:"):
+            msn += 1
+            parts = 0
+        elif line.startswith("#EXT-X-PART:"):
+            parts += 1
+    return msn, parts
+
+
+def blocking_reload_ready(text: str, msn: int, part: Optional[int] = None) -> bool:
+    """Whether a playlist answers an ``_HLS_msn``/``_HLS_part`` blocking reload."""
+    if "#EXT-X-ENDLIST" in text:
+        return True
+    open_msn, open_parts = playlist_position(text)
+    if msn < open_msn:
+        return True
+    return msn == open_msn and part is not None and part < open_parts
+
+
+MEDIA_LISTED = "listed"
+MEDIA_HINTED = "hinted"
+MEDIA_UNLISTED = "unlisted"
+_URI_ATTRIBUTE_RE = re.compile(r'URI="([^"]*)"')
+_MEDIA_NAME_RE = re.compile(r"^(?P<base>.+)(?:\.part\d+\.\d+|_\d+)\.ts$")
+
+
+def media_status(text: str, uri: str) -> str:
+    """Whether a playlist lists ``uri`` as a segment or part, only names it in a preload hint, or neither."""
+    uri = os.path.basename(uri)
+    hinted = False
+    for line in text.splitlines():
+        if line.startswith("#EXT-X-PART:") or line.startswith("#EXT-X-PRELOAD-HINT:"):
+            match = _URI_ATTRIBUTE_RE.search(line)
+            if match and match.group(1) == uri:
+                if line.startswith("#EXT-X-PART:"):
+                    return MEDIA_LISTED
+                hinted = True
+        elif line and not line.startswith("#") and line.strip() == uri:
+            return MEDIA_LISTED
+    return MEDIA_HINTED if hinted else MEDIA_UNLISTED
+
+
+def media_playlist(path: str) -> Optional[str]:
+    """Playlist that lists a segment (``base_00001.ts``) or part (``base.part00001.2.ts``) file."""
+    match = _MEDIA_NAME_RE.match(os.path.basename(path))
+    if not match:
+        return None
+    return os.path.join(os.path.dirname(path), match.group("base") + ".m3u8")
+
+
+def playlist_target_duration(text: str, default: float = 5.0) -> float:
+    match = _TARGET_DURATION_RE.search(text)
+    return float(match.group(1)) if match else default
+
+
+def write_atomic(path: str, content: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as handle:
+            handle.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class KeyframeSegmenter:
+    """Chooses HLS cut points from a stream of buffer timestamps and keyframe flags.
+
+    A keyframe is requested ``keyframe_lead`` seconds before the target
+    boundary (and again every ``target_duration`` while none arrives);
+    the cut happens on the first keyframe at or after the boundary, so
+    every segment starts with a decodable frame.
+    """
+
+    def __init__(self, target_duration: float, keyframe_lead: float = 0.5):
+        self.target_duration = target_duration
+        self.keyframe_lead = min(keyframe_lead, target_duration)
+        self.segment_start: Optional[float] = None
+        self._requested_at: Optional[float] = None
+        self._cut_pending = False
+
+    def request_cut(self) -> None:
+        """Cut at the next keyframe regardless of the segment length so far."""
+        self._cut_pending = True
+
+    def observe(self, pts: float, is_keyframe: bool):
+        """Return ``(request_keyframe, cut_duration)`` for a buffer at ``pts`` seconds.
+
+        ``cut_duration`` is the length of the segment that ends before this
+        buffer, or None when the buffer does not start a new segment.
+        """
+        if self.segment_start is None:
+            self.segment_start = pts
+            return False, None
+        elapsed = pts - self.segment_start
+        request = False
+        if elapsed >= self.target_duration - self.keyframe_lead and (
+            self._requested_at is None or pts - self._requested_at >= self.target_duration
+        ):
+            request = True
+            self._requested_at = pts
+        if is_keyframe and elapsed > 0 and (self._cut_pending or elapsed >= self.target_duration):
+            self.segment_start = pts
+            self._requested_at = None
+            self._cut_pending = False
+            return False, elapsed
+        return request, None
+
+
+class PartSplitter:
+    """Splits the open segment into LL-HLS partial segments of at most ``part_target`` seconds.
+
+    A part ends before the buffer that would carry it past the target,
+    estimated from the spacing of the last two buffers.
+    """
+
+    def __init__(self, part_target: float):
+        self.part_target = part_target
+        self.part_start: Optional[float] = None
+        self._last_pts: Optional[float] = None
+
+    def observe(self, pts: float) -> Optional[float]:
+        """Return the duration of the part that ends before a buffer at ``pts``, if any."""
+        if self.part_start is None:
+            self.restart(pts)
+            return None
+        gap = max(0.0, pts - self._last_pts)
+        self._last_pts = max(self._last_pts, pts)
+        elapsed = pts - self.part_start
+        if elapsed > 0 and elapsed + gap > self.part_target:
+            self.part_start = pts
+            return elapsed
+        return None
+
+    def restart(self, pts: float) -> Optional[float]:
+        """Start a new part at ``pts`` (a segment boundary); returns the length of the previous one."""
+        elapsed = pts - self.part_start if self.part_start is not None else None
+        self.part_start = pts
+        self._last_pts = pts
+        return elapsed
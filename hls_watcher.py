@@ -0,0 +1,130 @@
+"""One change notifier per HLS playlist, shared by every request waiting on it.
+
+LL-HLS blocking playlist reloads (``_HLS_msn``/``_HLS_part``) and requests
+for a preload-hinted part wait until the recorder rewrites the playlist.
+The requests don't each stat and read the file on the event loop.
+Instead, :class:`PlaylistWatcher` runs one poller per playlist while
+anyone waits on it, and for ``linger`` seconds after, so a burst of
+requests shares it. The poller stats the file in the default executor,
+re-reads it only when it changed, and wakes every waiter at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+from hls_cache import file_validator, read_file
+
+DEFAULT_POLL_INTERVAL = 0.05
+DEFAULT_LINGER = 2.0
+
+
+def _read_if_changed(path: str, validator: Optional[Tuple[int, int, int]]) -> Optional[Tuple[Tuple[int, int, int], str]]:
+    if file_validator(os.stat(path)) == validator:
+        return None
+    content, st = read_file(path)
+    return file_validator(st), content.decode("utf-8", "replace")
+
+
+class _Watch:
+    __slots__ = ("path", "content", "validator", "missing", "waiters", "last_used", "changed", "task")
+
+    def __init__(self, path: str, now: float):
+        self.path = path
+        self.content: Optional[str] = None
+        self.validator: Optional[Tuple[int, int, int]] = None
+        self.missing = False
+        self.waiters = 0
+        self.last_used = now
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class PlaylistWatcher:
+    """Wait for playlists to reach a state, with one poller per playlist."""
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL, linger: float = DEFAULT_LINGER):
+        self.poll_interval = poll_interval
+        self.linger = linger
+        self.reads = 0
+        self._watches: Dict[str, _Watch] = {}
+
+    @property
+    def watching(self) -> int:
+        return len(self._watches)
+
+    async def wait_until(
+        self,
+        path: str,
+        ready: Callable[[str], bool],
+        timeout: Callable[[str], float],
+    ) -> Optional[str]:
+        """Return the playlist text once ``ready(text)`` holds.
+
+        ``timeout(text)`` gives the limit in seconds, counted from the
+        first read. Returns None on timeout or when the playlist doesn't exist.
+        """
+        loop = asyncio.get_running_loop()
+        watch = self._watches.get(path)
+        if watch is None:
+            watch = self._watches[path] = _Watch(path, loop.time())
+            watch.task = loop.create_task(self._poll(watch))
+        watch.waiters += 1
+        try:
+            deadline = None
+            while True:
+                if watch.missing:
+                    return None
+                changed = watch.changed
+                if watch.content is not None:
+                    if ready(watch.content):
+                        return watch.content
+                    if deadline is None:
+                        deadline = loop.time() + timeout(watch.content)
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+        finally:
+            watch.waiters -= 1
+            watch.last_used = loop.time()
+
+    async def close(self) -> None:
+        watches, self._watches = list(self._watches.values()), {}
+        for watch in watches:
+            if watch.task is not None:
+                watch.task.cancel()
+        for watch in watches:
+            if watch.task is not None:
+                try:
+                    await watch.task
+                except asyncio.CancelledError:
+                    pass
+
+    def _notify(self, watch: _Watch) -> None:
+        changed, watch.changed = watch.changed, asyncio.Event()
+        changed.set()
+
+    async def _poll(self, watch: _Watch) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while watch.waiters or loop.time() - watch.last_used < self.linger:
+                try:
+                    update = await loop.run_in_executor(None, _read_if_changed, watch.path, watch.validator)
+                except OSError:
+                    watch.missing = True
+                    self._notify(watch)
+                    break
+                if update is not None:
+                    self.reads += 1
+                    watch.validator, watch.content = update
+                    self._notify(watch)
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if self._watches.get(watch.path) is watch:
+                del self._watches[watch.path]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_WINDOW = 0.03  # seconds to wait for more candidates
+DEFAULT_MAX_BATCH = 20
+
+Schedule = Callable[[float, Callable[[], None]], Any]
+Send = Callable[[Dict[str, Any]], Any]
+
+
+class IceCandidateBatcher:
+    """Coalesce trickled ICE candidates into one ``candidates`` message per peer.
+
+    The first candidate for a key (typically the peer UUID, session and
+    direction) opens a batch; later ones join it until ``window`` seconds
+    pass, ``max_batch`` candidates are queued or :meth:`flush` is called
+    (for example when gathering completes). ``add`` may be called from any
+    thread; ``schedule(delay, callback)`` must run the callback on the
+    thread that owns ``send`` (the asyncio loop in publish.py).
+    """
+
+    def __init__(self, schedule: Schedule, window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.schedule = schedule
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.messages_sent = 0
+        self.candidates_sent = 0
+        # key -> (envelope, candidates, send, generation)
+        self._pending: Dict[Hashable, Tuple[Dict[str, Any], List[Dict[str, Any]], Send, int]] = {}
+        self._generations = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, key: Hashable, envelope: Dict[str, Any], candidate: Dict[str, Any], send: Send) -> None:
+        """Queue ``candidate``; ``envelope`` holds the other message fields (session, type, UUID)."""
+        with self._lock:
+            batch = self._pending.get(key)
+            opened = batch is None
+            if opened:
+                batch = (dict(envelope), [], send, next(self._generations))
+                self._pending[key] = batch
+            batch[1].append(candidate)
+            full = len(batch[1]) >= self.max_batch
+        generation = batch[3]
+        # Callbacks carry their batch's generation so a stale window timer
+        # can't flush a later batch for the same key early
+        if full or self.window <= 0:
+            self.schedule(0, lambda: self._flush(key, generation))
+        elif opened:
+            self.schedule(self.window, lambda: self._flush(key, generation))
+
+    def flush(self, key: Hashable) -> None:
+        """Send the batch for ``key`` as soon as possible (thread-safe)."""
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is None:
+                return
+            generation = batch[3]
+        self.schedule(0, lambda: self._flush(key, generation))
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def pending(self, key: Hashable) -> int:
+        with self._lock:
+            batch = self._pending.get(key)
+            return len(batch[1]) if batch else 0
+
+    def _flush(self, key: Hashable, generation: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is None or (generation is not None and batch[3] != generation):
+                return None
+            del self._pending[key]
+        envelope, candidates, send, _generation = batch
+        envelope["candidates"] = candidates
+        self.messages_sent += 1
+        self.candidates_sent += len(candidates)
+        send(envelope)
+        return envelope
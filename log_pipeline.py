@@ -0,0 +1,333 @@
+"""Console logging for publish.py: levels, per-call-site rate limits and a background writer.
+
+``printc`` formats a line and hands it to :class:`LogPipeline`, which
+drops it if it is below the configured level or its call site is over
+budget, mirrors it into the web UI ring, and queues it for a writer
+thread. A slow serial console or journald pipe then only delays the
+writer thread, never the GLib or asyncio loops. With ``capture_stdout``
+bare ``print()`` output joins the same queue, so it keeps its place
+among the log lines.
+"""
+
+from __future__ import annotations
+
+import atexit
+import collections
+import functools
+import itertools
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+
+RESET = "\033[0m"
+DEFAULT_RATE = 20.0  # lines per second per call site
+DEFAULT_BURST = 100
+DEFAULT_MAX_PENDING = 10000
+
+_ANSI_RE = re.compile(r"\033\[[0-9;]*m")
+
+
+@functools.lru_cache(maxsize=256)
+def ansi_color(hex_color: str) -> str:
+    """Map an ``RGB``/``RRGGBB`` hex color to the nearest xterm-256 escape sequence."""
+    hex_color = hex_color.lstrip("#")
+
+    if len(hex_color) == 6:
+        r = int(hex_color[0:2], 16)
+        g = int(hex_color[2:4], 16)
+        b = int(hex_color[4:6], 16)
+    elif len(hex_color) == 3:
+        r = int(hex_color[0] * 2, 16)
+        g = int(hex_color[1] * 2, 16)
+        b = int(hex_color[2] * 2, 16)
+    else:
+        return hex_color
+
+    code = 16 + (36 * int(r / 255 * 5)) + (6 * int(g / 255 * 5)) + int(b / 255 * 5)
+    return f"\033[38;5;{code}m"
+
+
+def strip_ansi(text: str) -> str:
+    return _ANSI_RE.sub("", text) if "\033" in text else text
+
+
+class RateLimiter:
+    """Token bucket per key: ``burst`` lines at once, then ``rate`` lines per second."""
+
+    MAX_KEYS = 4096
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._buckets: Dict[Hashable, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: Hashable) -> Tuple[bool, int]:
+        """Return ``(allowed, suppressed)``; ``suppressed`` counts lines dropped since the last allowed one."""
+        if self.rate <= 0:
+            return True, 0
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_KEYS:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False, 0
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = int(bucket[2]), 0
+            return True, suppressed
+
+
+class LogRing:
+    """The most recent log lines, timestamped, for the web UI."""
+
+    def __init__(self, maxlen: int = 1000, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._counter = itertools.count(1)
+        self._entries: Deque[Tuple[int, float, str]] = collections.deque(maxlen=maxlen)
+
+    @property
+    def maxlen(self) -> int:
+        return self._entries.maxlen
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number of the newest line (0 if empty), for :meth:`since`."""
+        entries = self._entries
+        return entries[-1][0] if entries else 0
+
+    def append(self, message: str) -> None:
+        # next() on itertools.count is atomic, so writers on other threads keep unique numbers
+        self._entries.append((next(self._counter), self.clock(), message))
+
+    @staticmethod
+    def _format(entries: Iterable[Tuple[int, float, str]]) -> List[str]:
+        return [f"[{time.strftime('%H:%M:%S', time.localtime(ts))}] {message}" for _seq, ts, message in entries]
+
+    def tail(self, count: int) -> List[str]:
+        return self._format(list(self._entries)[-count:] if count > 0 else [])
+
+    def since(self, cursor: int) -> Tuple[int, List[str]]:
+        """Return ``(new_cursor, lines)`` for lines appended after ``cursor`` that are still held."""
+        entries = [entry for entry in list(self._entries) if entry[0] > cursor]
+        entries.sort()
+        return (entries[-1][0] if entries else cursor), self._format(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _StdoutProxy:
+    """Stands in for ``sys.stdout`` while a :class:`LogWriter` runs; complete lines go to its queue."""
+
+    def __init__(self, writer: "LogWriter", stream: Any):
+        self._writer = writer
+        self._stream = stream
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+        for line in lines:
+            self._writer.write(line)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def take_partial(self) -> str:
+        with self._lock:
+            partial, self._partial = self._partial, ""
+        return partial
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class LogWriter:
+    """Write lines to a stream, from a daemon thread once :meth:`start` is called.
+
+    Before ``start`` (and after ``stop``) writes are synchronous. While
+    running, at most ``max_pending`` lines are queued; beyond that the
+    oldest are dropped and counted, so a stalled console costs memory
+    only up to that bound. ``start(capture_stdout=True)`` also replaces
+    ``sys.stdout`` until ``stop`` so bare ``print()`` calls are queued in
+    order with everything else instead of overtaking it.
+    """
+
+    def __init__(self, stream: Optional[Any] = None, max_pending: int = DEFAULT_MAX_PENDING):
+        self._stream = stream
+        self.max_pending = max(1, max_pending)
+        self.dropped = 0
+        self._reported_drops = 0
+        self._pending: Deque[str] = collections.deque()
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stdout_proxy: Optional[_StdoutProxy] = None
+
+    @property
+    def stream(self):
+        if self._stream is not None:
+            return self._stream
+        if self._stdout_proxy is not None:
+            return self._stdout_proxy._stream
+        return sys.stdout
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, capture_stdout: bool = False) -> None:
+        if self._thread is not None:
+            return
+        self._closed = False
+        if capture_stdout and not isinstance(sys.stdout, _StdoutProxy):
+            self._stdout_proxy = _StdoutProxy(self, sys.stdout)
+            sys.stdout = self._stdout_proxy
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def write(self, line: str) -> None:
+        if self._thread is None:
+            with self._io_lock:
+                self._write((line,))
+            return
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(line)
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """Write everything queued so far from the calling thread."""
+        with self._io_lock:
+            self._write(self._drain())
+
+    def stop(self, timeout: float = 2.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        proxy = self._stdout_proxy
+        if proxy is not None:
+            if sys.stdout is proxy:
+                sys.stdout = proxy._stream
+            self._stdout_proxy = None
+            partial = proxy.take_partial()
+            if partial:
+                self.write(partial)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def _drain(self) -> List[str]:
+        with self._cond:
+            lines = list(self._pending)
+            self._pending.clear()
+            if self.dropped != self._reported_drops:
+                lines.insert(0, f"[log] {self.dropped - self._reported_drops} lines dropped (console too slow)")
+                self._reported_drops = self.dropped
+        return lines
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self.flush()
+
+    def _write(self, lines: Iterable[str]) -> None:
+        text = "\n".join(lines)
+        if not text:
+            return
+        text += "\n"
+        stream = self.stream
+        try:
+            try:
+                stream.write(text)
+            except UnicodeEncodeError:
+                encoding = getattr(stream, "encoding", None) or "ascii"
+                stream.write(text.encode(encoding, "replace").decode(encoding))
+            stream.flush()
+        except (OSError, ValueError, AttributeError):
+            pass
+
+
+class LogPipeline:
+    """Level filter, rate limiter, web mirror and writer for one process."""
+
+    def __init__(self, level: int = INFO, limiter: Optional[RateLimiter] = None, writer: Optional[LogWriter] = None):
+        self.level = level
+        self.limiter = limiter or RateLimiter()
+        self.writer = writer or LogWriter()
+        self.web_log: Optional[Callable[[str], None]] = None
+
+    def configure(self, level: Optional[int] = None, rate: Optional[float] = None, burst: Optional[int] = None) -> None:
+        if level is not None:
+            self.level = level
+        if rate is not None:
+            self.limiter.rate = rate
+        if burst is not None:
+            self.limiter.burst = max(1, burst)
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def emit(self, message: Any, color: Optional[str] = None, level: int = INFO, key: Hashable = None) -> bool:
+        """Log ``message``; returns False if it was filtered or rate limited."""
+        if level < self.level:
+            return False
+        allowed, suppressed = self.limiter.allow(key)
+        if not allowed:
+            return False
+        if not isinstance(message, str):
+            message = str(message)
+        if suppressed:
+            self._output(f"[log] {suppressed} similar lines suppressed", None)
+        self._output(message, color)
+        if level >= ERROR and self.writer.running:
+            self.writer.flush()
+        return True
+
+    def _output(self, message: str, color: Optional[str]) -> None:
+        if color is not None:
+            self.writer.write(f"{ansi_color(color)}{message}{RESET}")
+        else:
+            self.writer.write(message)
+        web_log = self.web_log
+        if web_log is not None:
+            web_log(strip_ansi(message))
+
+    def start(self, capture_stdout: bool = False) -> None:
+        self.writer.start(capture_stdout)
+
+    def flush(self) -> None:
+        self.writer.flush()
+
+    def stop(self) -> None:
+        self.writer.stop()
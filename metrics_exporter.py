@@ -0,0 +1,268 @@
+"""Prometheus text-format metrics for the ``/metrics`` endpoint.
+
+A small dependency-free registry of counters, gauges and histograms with
+labels. Values are updated from GStreamer stats callbacks (any thread)
+and rendered on scrape. :class:`PeerMetrics` defines the per-peer RTP
+metrics shared by viewer connections in publish.py and the recorder
+subprocesses, whose stats arrive over IPC.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Mapping[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def remove_matching(self, **labels: Any) -> int:
+        """Drop every series carrying all of ``labels``; returns how many were removed."""
+        if not labels or any(name not in self.labelnames for name in labels):
+            return 0
+        wanted = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            stale = [key for key in self._values if all(key[index] == value for index, value in wanted)]
+            for key in stale:
+                del self._values[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels: Any) -> Any:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = self._samples()
+        if not samples:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}", *samples]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: Optional[float], **labels: Any) -> None:
+        """Set the gauge; ``None`` (unknown) removes the series instead."""
+        key = self._key(labels)
+        with self._lock:
+            if value is None:
+                self._values.pop(key, None)
+            else:
+                self._values[key] = float(value)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, total: Optional[float], **labels: Any) -> None:
+        """Mirror a cumulative total kept elsewhere (e.g. webrtcbin bytes-sent).
+
+        A lower value than before is exported as-is; Prometheus treats
+        it as a counter reset, which is what a reconnected peer is.
+        """
+        if total is None:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(total)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], lock: threading.Lock, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: Optional[float], **labels: Any) -> None:
+        if value is None:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh process-wide gauges on each scrape."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"metric {metric.name} already registered differently")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames, self._lock))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, self._lock))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, self._lock, buckets))
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        self._collectors.append(collect)
+
+    def remove_matching(self, **labels: Any) -> int:
+        return sum(metric.remove_matching(**labels) for metric in self._metrics.values())
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+PEER_LABELS = ("peer", "stream", "role")
+RTT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+
+
+class PeerMetrics:
+    """Per-peer RTP metrics, labelled by peer UUID, stream ID and role.
+
+    ``role`` is ``publish`` (we send to a viewer), ``view`` (we receive)
+    or ``recorder`` (a recorder subprocess receives).
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        r = registry
+        self.bytes = r.counter("rn_peer_rtp_bytes_total", "RTP bytes sent or received.", PEER_LABELS + ("kind",))
+        self.packets = r.counter("rn_peer_rtp_packets_total", "RTP packets sent or received.", PEER_LABELS)
+        self.packets_lost = r.counter("rn_peer_rtp_packets_lost_total", "RTP packets reported lost.", PEER_LABELS)
+        self.fec_recovered = r.counter("rn_peer_fec_packets_recovered_total", "Packets recovered by FEC.", PEER_LABELS)
+        self.rtx_received = r.counter("rn_peer_rtx_packets_received_total", "Retransmitted packets received.", PEER_LABELS)
+        self.bitrate = r.gauge("rn_peer_bitrate_kbps", "Measured media bitrate.", PEER_LABELS)
+        self.loss_ratio = r.gauge("rn_peer_packet_loss_ratio", "Packet loss fraction used for quality and bitrate control.", PEER_LABELS)
+        self.jitter = r.gauge("rn_peer_jitter_seconds", "RTP interarrival jitter.", PEER_LABELS)
+        self.rtt = r.histogram("rn_peer_round_trip_seconds", "Round-trip time per stats sample.", PEER_LABELS, RTT_BUCKETS)
+        self.fec_active = r.gauge("rn_peer_fec_active", "1 once FEC has recovered packets for the peer.", PEER_LABELS)
+        self.rtx_active = r.gauge("rn_peer_rtx_active", "1 once retransmitted packets have been received from the peer.", PEER_LABELS)
+        self.jitter_buffer = r.gauge("rn_peer_jitter_buffer_latency_ms", "Jitter buffer latency applied to the peer.", PEER_LABELS)
+        self.encoder_bitrate = r.gauge("rn_peer_encoder_target_kbps", "Encoder target bitrate for the peer.", PEER_LABELS)
+        self.pings_outstanding = r.gauge("rn_peer_pings_outstanding", "Data-channel pings without a pong.", PEER_LABELS)
+        self.frame_height = r.gauge("rn_peer_video_height_pixels", "Current video frame height.", PEER_LABELS)
+        self.samples = r.counter("rn_peer_stats_samples_total", "Stats samples taken.", PEER_LABELS)
+        self._registry = registry
+
+    def record(self, peer: str, stream: str, role: str, summary: Mapping[str, Any], **gauges: Optional[float]) -> None:
+        """Record a :meth:`webrtc_stats.PeerStatsSnapshot.summary` plus optional gauges.
+
+        Gauge keyword names are ``bitrate``, ``loss_ratio``, ``fec_active``,
+        ``rtx_active``, ``jitter_buffer``, ``encoder_bitrate`` and
+        ``pings_outstanding``; ``None`` leaves the series unset.
+        """
+        labels = {"peer": peer, "stream": stream or "", "role": role}
+        for kind in ("video", "audio"):
+            self.bytes.set_total(summary.get(f"{kind}_bytes"), kind=kind, **labels)
+        self.packets.set_total(summary.get("packets"), **labels)
+        self.packets_lost.set_total(_non_negative(summary.get("packets_lost")), **labels)
+        self.fec_recovered.set_total(summary.get("fec_packets_recovered"), **labels)
+        self.rtx_received.set_total(summary.get("retransmitted_packets_received"), **labels)
+        self.jitter.set(summary.get("jitter"), **labels)
+        self.rtt.observe(summary.get("round_trip_time"), **labels)
+        self.frame_height.set(summary.get("frame_height") or None, **labels)
+        if "loss_ratio" not in gauges and summary.get("fraction_lost") is not None:
+            gauges["loss_ratio"] = summary["fraction_lost"]
+        for name, value in gauges.items():
+            if isinstance(value, bool):
+                value = float(value)
+            getattr(self, name).set(value, **labels)
+        self.samples.inc(**labels)
+
+    def remove(self, **labels: str) -> int:
+        """Forget the series of a departed peer, e.g. ``remove(peer=uuid)``."""
+        return self._registry.remove_matching(**labels)
+
+
+def _non_negative(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    return max(0, value)
@@ -0,0 +1,252 @@
+"""Admission control and supervision for record.py's publish.py children.
+
+:class:`ProcessSupervisor` queues job requests and starts at most
+``max_running`` children at a time, in submission order. Each child is
+awaited through asyncio's child watcher (pidfd or SIGCHLD, depending on
+the platform), so it is reaped as soon as it exits. Its timeout runs
+from the moment it starts, not from the next polling tick. Finished jobs
+stay listed, up to ``history``, for the status API. ``on_exit(job)`` runs
+on the event loop whenever a job reaches a finished state, however it
+got there.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import itertools
+import time
+from typing import Any, Callable, Deque, Dict, Optional, Sequence
+
+QUEUED = "queued"
+RUNNING = "running"
+EXITED = "exited"
+TIMED_OUT = "timed_out"
+STOPPED = "stopped"
+FAILED = "failed"  # could not be started
+FINISHED_STATES = (EXITED, TIMED_OUT, STOPPED, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised by :meth:`ProcessSupervisor.submit` when the admission queue is full."""
+
+
+class Job:
+    """One supervised child process."""
+
+    def __init__(self, job_id: int, argv: Sequence[str], record: Optional[str], timeout: Optional[float], now: float):
+        self.id = job_id
+        self.argv = list(argv)
+        self.record = record
+        self.timeout = timeout
+        self.state = QUEUED
+        self.pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+        self.error: Optional[str] = None
+        self.queued_at = now
+        self.started_at: Optional[float] = None
+        self.ended_at: Optional[float] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.task: Optional[asyncio.Task] = None
+        self.admitted: Optional[asyncio.Future] = None
+        self.holds_slot = False
+        self.stop_requested = False
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "record": self.record,
+            "state": self.state,
+            "pid": self.pid,
+            "returncode": self.returncode,
+            "error": self.error,
+            "timeout": self.timeout,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+        }
+
+
+class ProcessSupervisor:
+    """Run child processes with a concurrency cap, FIFO admission and per-job timeouts."""
+
+    def __init__(
+        self,
+        max_running: int = 4,
+        timeout: Optional[float] = 3600.0,
+        max_queued: int = 100,
+        stop_grace: float = 10.0,
+        history: int = 200,
+        spawn: Callable[..., Any] = asyncio.create_subprocess_exec,
+        clock: Callable[[], float] = time.time,
+        on_exit: Optional[Callable[[Job], None]] = None,
+        log: Callable[[str], None] = print,
+    ):
+        self.max_running = max(1, max_running)
+        self.timeout = timeout
+        self.max_queued = max(0, max_queued)
+        self.stop_grace = stop_grace
+        self.spawn = spawn
+        self.clock = clock
+        self.on_exit = on_exit
+        self.log = log
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, Job] = {}
+        self._waiting: Deque[Job] = collections.deque()
+        self._finished: Deque[int] = collections.deque()
+        self._history = max(0, history)
+        self._running = 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    def submit(self, argv: Sequence[str], record: Optional[str] = None, timeout: Optional[float] = None, **spawn_kwargs: Any) -> Job:
+        """Queue ``argv``; it starts as soon as a slot is free. Must be called on the event loop."""
+        if self._running >= self.max_running and len(self._waiting) >= self.max_queued:
+            raise QueueFull(f"{self._running} jobs running and {len(self._waiting)} queued")
+        loop = asyncio.get_running_loop()
+        job = Job(next(self._ids), argv, record, self.timeout if timeout is None else timeout, self.clock())
+        job.admitted = loop.create_future()
+        self._jobs[job.id] = job
+        if self._running < self.max_running:
+            self._grant(job)
+        else:
+            self._waiting.append(job)
+        job.task = loop.create_task(self._run(job, spawn_kwargs))
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def find(self, record: Optional[str] = None, pid: Optional[int] = None) -> Optional[Job]:
+        """Newest unfinished job matching ``record`` and/or ``pid``."""
+        for job in reversed(list(self._jobs.values())):
+            if job.finished:
+                continue
+            if (record is None or job.record == record) and (pid is None or job.pid == pid):
+                return job
+        return None
+
+    def position(self, job: Job) -> Optional[int]:
+        """1-based place in the admission queue, or None if not queued."""
+        try:
+            return self._waiting.index(job) + 1
+        except ValueError:
+            return None
+
+    def describe(self, job: Job) -> Dict[str, Any]:
+        entry = job.to_dict()
+        entry["position"] = self.position(job)
+        return entry
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "queued": len(self._waiting),
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "jobs": [self.describe(job) for job in self._jobs.values()],
+        }
+
+    async def stop(self, job_id: int) -> Optional[Job]:
+        """Cancel a queued job or terminate a running one, and wait until it has ended."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job in self._waiting:
+            self._waiting.remove(job)
+            self._finish(job, STOPPED)
+            job.admitted.set_result(None)
+        elif not job.finished:
+            job.stop_requested = True
+            if job.process is not None:
+                await self._terminate(job.process)
+        if job.task is not None:
+            await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    async def shutdown(self) -> None:
+        await asyncio.gather(*(self.stop(job.id) for job in list(self._jobs.values()) if not job.finished))
+
+    async def _run(self, job: Job, spawn_kwargs: Dict[str, Any]) -> None:
+        await job.admitted
+        if job.finished:  # stopped while queued
+            return
+        try:
+            if job.stop_requested:
+                self._finish(job, STOPPED)
+                return
+            try:
+                job.process = await self.spawn(*job.argv, **spawn_kwargs)
+            except (OSError, ValueError) as exc:
+                job.error = str(exc)
+                self._finish(job, FAILED)
+                return
+            job.pid = job.process.pid
+            job.started_at = self.clock()
+            job.state = RUNNING
+            if job.stop_requested:  # stop() arrived while the child was being spawned
+                await self._terminate(job.process)
+            try:
+                # Process.wait() is woken by the loop's child watcher (pidfd/SIGCHLD), not by polling
+                await asyncio.wait_for(job.process.wait(), job.timeout)
+            except asyncio.TimeoutError:
+                await self._terminate(job.process)
+                self._finish(job, TIMED_OUT)
+                return
+            self._finish(job, STOPPED if job.stop_requested else EXITED)
+        finally:
+            self._release(job)
+
+    def _grant(self, job: Job) -> None:
+        self._running += 1
+        job.holds_slot = True
+        job.admitted.set_result(None)
+
+    def _release(self, job: Job) -> None:
+        if not job.holds_slot:
+            return
+        job.holds_slot = False
+        self._running -= 1
+        while self._waiting and self._running < self.max_running:
+            self._grant(self._waiting.popleft())
+
+    def _finish(self, job: Job, state: str) -> None:
+        if job.finished:
+            return
+        job.state = state
+        job.ended_at = self.clock()
+        if job.process is not None:
+            job.returncode = job.process.returncode
+        self._finished.append(job.id)
+        while len(self._finished) > self._history:
+            self._jobs.pop(self._finished.popleft(), None)
+        if self.on_exit is not None:
+            try:
+                self.on_exit(job)
+            except Exception as exc:
+                self.log(f"Job {job.id} exit handler failed: {exc}")
+
+    async def _terminate(self, process: asyncio.subprocess.Process) -> None:
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), self.stop_grace)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
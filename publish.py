@@ -3,6 +3,7 @@ import random
 import ssl
 import websockets
 import asyncio
+import itertools
 import os
 import sys
 import json
@@ -28,6 +29,31 @@ from functools import lru_cache
 from config_loader import apply_config_overrides, load_config_file
 from signaling_utils import handshake_server_requires_puuid
 from v4l2_devices import resolve_v4l2_input_device, resolve_v4l2_output_device
+from encoder_ladder import (
+    LADDER_KEYFRAME_TIMEOUT,
+    build_encoder_ladder,
+    build_encoder_ladder_fragment,
+    ladder_payloader_description,
+    parse_ladder_heights,
+    select_ladder_rung,
+)
+from heartbeat_scheduler import HeartbeatScheduler
+from capability_cache import CapabilityCache, capability_fingerprint, default_cache_path
+from frame_ring import FrameRingWriter
+from shm_frames import DEFAULT_SHM_SIZE, caps_path, write_caps_file
+from frame_transport import CODECS as SOCKET_CODECS, FrameSender
+from ice_batcher import IceCandidateBatcher
+from log_pipeline import DEBUG, ERROR, INFO, LEVELS, WARNING, LogPipeline, LogRing, ansi_color
+from room_registry import EVENT_LEFT, EVENT_STATE, STATE_CONNECTED, STATE_RECORDING, STATE_REQUESTED, RoomRegistry
+from stats_hub import StatsHub
+from metrics_exporter import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, PeerMetrics
+from recording_rollover import PASSTHROUGH_FORMATS, FragmentLog, fragment_location, passthrough_description
+from hls_cache import HlsFileCache, etag_matches, file_etag, read_file
+from hls_catalog import HLS_STREAM_STATUSES, HlsCatalog
+from hls_playlist import MEDIA_HINTED, MEDIA_LISTED, blocking_reload_ready, media_playlist, media_status, playlist_target_duration
+from hls_watcher import PlaylistWatcher
+from webrtc_stats import parse_webrtc_stats
+from recorder_ipc import KIND_CONTROL, KIND_LOG, encode_control, read_frame, spawn_framed_subprocess
 try:
     import hashlib
     from urllib.parse import urlparse, urlencode
@@ -50,10 +76,7 @@ except ImportError:
     aiohttp = None
     
 try:
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    from cryptography.hazmat.primitives import hashes, padding
-    from cryptography.hazmat.backends import default_backend
+    from signaling_crypto import decrypt_message, encrypt_fields
 except ImportError as e:
     raise ImportError("Run `pip install cryptography` to install the dependencies needed for passwords") from e
 
@@ -127,6 +150,7 @@ RN_DISABLE_HW_DECODER = env_flag("RN_DISABLE_HW_DECODER")
 RN_FORCE_HW_DECODER = env_flag("RN_FORCE_HW_DECODER")
 RN_DISABLE_V4L2_ENCODER = env_flag("RN_DISABLE_V4L2_ENCODER")
 RN_FORCE_V4L2_ENCODER = env_flag("RN_FORCE_V4L2_ENCODER")
+RN_NO_CAPABILITY_CACHE = env_flag("RN_NO_CAPABILITY_CACHE")
 
 H264_PROFILE_ALIASES = {
     "baseline": "42001f",
@@ -288,52 +312,38 @@ def disableLEDs():
         pass
 
 def hex_to_ansi(hex_color):
-    hex_color = hex_color.lstrip('#')
-
-    if len(hex_color)==6:
-        r = int(hex_color[0:2], 16)
-        g = int(hex_color[2:4], 16)
-        b = int(hex_color[4:6], 16)
-    elif len(hex_color)==3:
-        r = int(hex_color[0:1]+hex_color[0:1], 16)
-        g = int(hex_color[1:2]+hex_color[1:2], 16)
-        b = int(hex_color[2:3]+hex_color[2:3], 16)
-    else:
-        return hex_color
-
-    ansi_color = 16 + (36 * int(r / 255 * 5)) + (6 * int(g / 255 * 5)) + int(b / 255 * 5)
+    return ansi_color(hex_color)
 
-    return f"\033[38;5;{ansi_color}m"
+# Console/web log pipeline; main() starts its writer thread and applies --log-level/--log-rate
+LOG = LogPipeline()
 
-# Global webserver reference for logging
-_webserver_instance = None
+def _log(message, color_code, level, key):
+    if level is None:
+        level = ERROR if color_code == "F00" else INFO
+    if level < LOG.level:
+        return
+    if key is None:
+        # Rate-limit per call site of printc/printwarn/...
+        caller = sys._getframe(2)
+        key = (caller.f_code, caller.f_lineno)
+    LOG.emit(message, color_code, level, key)
 
-def printc(message, color_code=None):
-    reset_color = "\033[0m"
+def printc(message, color_code=None, level=None, key=None):
+    _log(message, color_code, level, key)
 
-    if color_code is not None:
-        color_code = hex_to_ansi(color_code)
-        colored_message = f"{color_code}{message}{reset_color}"
-        print(colored_message)
-    else:
-        print(message)
-    
-    # Send to webserver if available
-    if _webserver_instance:
-        # Strip ANSI codes for web display
-        clean_message = re.sub(r'\033\[[0-9;]*m', '', message)
-        _webserver_instance.add_log(clean_message)
+def printdebug(message, color_code=None):
+    _log(message, color_code, DEBUG, None)
 
 def printwin(message):
-    printc("<= "+message,"93F")
+    _log("<= "+message, "93F", None, None)
 def printwout(message):
-    printc("=> "+message,"9F3")
+    _log("=> "+message, "9F3", None, None)
 def printin(message):
-    printc("<= "+message,"F6A")
+    _log("<= "+message, "F6A", None, None)
 def printout(message):
-    printc("=> "+message,"6F6")
+    _log("=> "+message, "6F6", None, None)
 def printwarn(message):
-    printc(message,"FF0")
+    _log(message, "FF0", WARNING, None)
 
 
 def clear_display_surfaces() -> bool:
@@ -596,9 +606,57 @@ def gst_element_available(name: str) -> bool:
         return False
 
 
+_capability_cache: Optional[CapabilityCache] = None
+_capability_cache_lock = threading.Lock()
+
+
+def _report_capability_changes(changed: Dict[str, Tuple[Any, Any]]) -> None:
+    for key in sorted(changed):
+        printwarn(f"Cached hardware capability '{key}' changed on re-probe; the new result applies from the next start.")
+
+
+def get_capability_cache() -> Optional[CapabilityCache]:
+    """Return the on-disk hardware capability cache, or None when RN_NO_CAPABILITY_CACHE is set.
+
+    RN_CAPABILITY_CACHE overrides the cache file location.
+    """
+    global _capability_cache
+    if RN_NO_CAPABILITY_CACHE:
+        return None
+    with _capability_cache_lock:
+        if _capability_cache is None:
+            path = os.environ.get("RN_CAPABILITY_CACHE") or default_cache_path()
+            _capability_cache = CapabilityCache(path, capability_fingerprint(Gst.version_string()))
+            _capability_cache.start_revalidation(on_change=_report_capability_changes)
+        return _capability_cache
+
+
+def cached_capability_probe(key: str, probe, revalidate: bool = True, cacheable=None):
+    """Run ``probe`` once per hardware/software fingerprint and reuse its result across starts.
+
+    Probes that open a device pass ``revalidate=False`` and a ``cacheable``
+    that keeps only successes (see CapabilityCache).
+    """
+    cache = get_capability_cache()
+    if cache is None:
+        return probe()
+    return cache.get_or_probe(key, probe, revalidate, cacheable)
+
+
+def _device_probe_succeeded(result) -> bool:
+    return bool(result and result[0])
+
+
 @lru_cache(maxsize=None)
 def gst_element_supports_property(element_name: str, property_name: str) -> bool:
     """Check whether a GStreamer element exposes a specific property."""
+    return bool(cached_capability_probe(
+        f"property:{element_name}.{property_name}",
+        lambda: _gst_element_has_property(element_name, property_name),
+    ))
+
+
+def _gst_element_has_property(element_name: str, property_name: str) -> bool:
     try:
         element = Gst.ElementFactory.make(element_name)
         if not element:
@@ -669,7 +727,9 @@ def v4l2_h264_encoder_usable() -> bool:
         printwarn("V4L2 H.264 encoder probe bypassed via RN_FORCE_V4L2_ENCODER")
         return True
 
-    usable, reason = _run_v4l2_h264_encoder_probe()
+    usable, reason = cached_capability_probe(
+        "probe:v4l2h264enc", _run_v4l2_h264_encoder_probe, revalidate=False, cacheable=_device_probe_succeeded
+    )
     if usable:
         return True
 
@@ -723,7 +783,9 @@ def v4l2_jpeg_decoder_usable() -> bool:
     if not gst_element_available("v4l2jpegdec"):
         return False
 
-    usable, reason = _run_v4l2_jpeg_decoder_probe()
+    usable, reason = cached_capability_probe(
+        "probe:v4l2jpegdec", _run_v4l2_jpeg_decoder_probe, revalidate=False, cacheable=_device_probe_succeeded
+    )
     if usable:
         return True
 
@@ -986,6 +1048,8 @@ def validate_receiver_output_args(args) -> None:
             "--framebuffer expects a VDO.Ninja stream ID, not a /dev/fb device. "
             "For HDMI output, use --view STREAM_ID."
         )
+    if getattr(args, "framebuffer_socket", None) and not framebuffer:
+        raise ValueError("--framebuffer-socket only applies to --framebuffer STREAM_ID.")
 
     for attr, option in (
         ("viewer_retry_initial", "--viewer-retry-initial"),
@@ -1344,69 +1408,23 @@ def generateHash(input_str, length=None):
 def convert_string_to_bytes(input_str):
     return input_str.encode('utf-8')
 
-def to_hex_string(byte_data):
-    return ''.join(f'{b:02x}' for b in byte_data)
-
-def to_byte_array(hex_str):
-    return bytes.fromhex(hex_str)
-
-def generate_key(phrase):
-    return hashlib.sha256(phrase.encode()).digest()
-
-def pad_message(message):
-    padder = padding.PKCS7(algorithms.AES.block_size).padder()
-    padded_data = padder.update(message.encode('utf-8')) + padder.finalize()
-    return padded_data
-
-def unpad_message(padded_message):
-    unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
-    try:
-        data = unpadder.update(padded_message) + unpadder.finalize()
-        return data
-    except ValueError as e:
-        print(f"Padding error: {e}")
-        return None
-
-def encrypt_message(message, phrase):
-    try:
-        message = json.dumps(message)
-    except Exception as E:
-        printwarn(get_exception_info(E))
-
-    key = generate_key(phrase)
-    iv = os.urandom(16)
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-    encryptor = cipher.encryptor()
-    padded_message = pad_message(message)
-    encrypted_message = encryptor.update(padded_message) + encryptor.finalize()
-    return to_hex_string(encrypted_message), to_hex_string(iv)
-
-def decrypt_message(encrypted_data, iv, phrase):
-    key = generate_key(phrase)
-    encrypted_data_bytes = to_byte_array(encrypted_data)
-    iv_bytes = to_byte_array(iv)
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv_bytes), backend=default_backend())
-    decryptor = cipher.decryptor()
-    try:
-        decrypted_padded_message = decryptor.update(encrypted_data_bytes) + decryptor.finalize()
-        unpadded_message = unpad_message(decrypted_padded_message)
-        if unpadded_message is not None:
-            return unpadded_message.decode('utf-8')
-        else:
-            return None
-    except (UnicodeDecodeError, ValueError) as e:
-        print(f"Error decoding message: {e}")
-        return None
-
-
 class WebServer:
     def __init__(self, port, client):
         self.port = port
         self.client = client
         self.app = web.Application()
         self.runner = None
-        self.logs = []  # Store recent logs
         self.max_logs = 1000
+        self.logs = LogRing(self.max_logs)  # Store recent logs
+        self._log_cursor = 0
+        self._process = None
+        # One sampler feeds every /ws dashboard
+        self.stats_hub = StatsHub(self.collect_dashboard_stats, log=printwarn)
+        self.stats_hub.add_extra(self._collect_new_logs)
+        self.hls_cache = HlsFileCache()
+        self.hls_catalog = HlsCatalog('.')
+        # Blocking reloads and preload-hint requests share one poller per playlist
+        self.playlist_watcher = PlaylistWatcher()
         
         # Setup routes
         self.app.router.add_get('/', self.index)
@@ -1418,6 +1436,7 @@ class WebServer:
         self.app.router.add_get('/api/devices', self.get_devices)
         self.app.router.add_get('/api/pipeline', self.get_pipeline_info)
         self.app.router.add_get('/api/ice', self.get_ice_stats)
+        self.app.router.add_get('/metrics', self.get_metrics)
         self.app.router.add_get('/api/hls', self.get_hls_streams)
         self.app.router.add_get('/hls/{filename}', self.serve_hls_file)
         self.app.router.add_static('/hls/', path='.', name='hls_static')
@@ -1857,19 +1876,94 @@ class WebServer:
                     return parts.join(' ');
                 }
                 
+                // Stats are pushed over /ws: a full snapshot on connect, then deltas.
+                // REST polling is only used while the websocket is down.
+                let dashboardState = null;
+                let pollTimer = null;
+                
+                function startPolling() {
+                    if (!pollTimer) {
+                        pollTimer = setInterval(() => {
+                            fetchStats();
+                            fetchSystemStats();
+                        }, 2000);
+                    }
+                }
+                
+                function stopPolling() {
+                    if (pollTimer) {
+                        clearInterval(pollTimer);
+                        pollTimer = null;
+                    }
+                }
+                
+                function isPlainObject(value) {
+                    return value !== null && typeof value === 'object' && !Array.isArray(value);
+                }
+                
+                function applyDelta(state, changes) {
+                    for (const [key, value] of Object.entries(changes)) {
+                        if (isPlainObject(value) && isPlainObject(state[key])) {
+                            applyDelta(state[key], value);
+                        } else {
+                            state[key] = value;
+                        }
+                    }
+                }
+                
+                function removePaths(state, paths) {
+                    for (const path of paths) {
+                        let target = state;
+                        for (const key of path.slice(0, -1)) {
+                            target = isPlainObject(target) ? target[key] : undefined;
+                        }
+                        if (isPlainObject(target)) {
+                            delete target[path[path.length - 1]];
+                        }
+                    }
+                }
+                
+                function renderDashboard() {
+                    if (dashboardState.stats) {
+                        updateStats(Object.assign({}, dashboardState.stats));
+                        trackQuality(dashboardState.stats);
+                    }
+                    if (dashboardState.system) {
+                        renderSystemStats(dashboardState.system);
+                    }
+                }
+                
                 function connectWebSocket() {
-                    ws = new WebSocket('ws://' + window.location.host + '/ws');
+                    const scheme = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+                    ws = new WebSocket(scheme + window.location.host + '/ws');
+                    
+                    ws.onopen = () => {
+                        stopPolling();
+                    };
                     
                     ws.onmessage = (event) => {
                         const data = JSON.parse(event.data);
-                        if (data.type === 'stats') {
-                            updateStats(data.stats);
+                        if (data.type === 'snapshot') {
+                            dashboardState = data.stats;
+                            renderDashboard();
+                        } else if (data.type === 'delta') {
+                            if (!dashboardState) {
+                                ws.send(JSON.stringify({type: 'resync'}));
+                                return;
+                            }
+                            applyDelta(dashboardState, data.changes || {});
+                            removePaths(dashboardState, data.removed || []);
+                            renderDashboard();
+                        } else if (data.type === 'logs') {
+                            data.messages.forEach(addLog);
                         } else if (data.type === 'log') {
                             addLog(data.message);
                         }
                     };
                     
                     ws.onclose = () => {
+                        dashboardState = null;
+                        startPolling();
                         setTimeout(connectWebSocket, 5000);
                     };
                 }
@@ -1878,7 +1972,8 @@ class WebServer:
                     try {
                         const response = await fetch('/api/stats');
                         const stats = await response.json();
-                        updateStats(stats);
+                        updateStats(Object.assign({}, stats));
+                        trackQuality(stats);
                     } catch (error) {
                         console.error('Failed to fetch stats:', error);
                     }
@@ -2192,20 +2287,22 @@ class WebServer:
                     ctx.fillText('now', width - 30, height - 20);
                 }
                 
+                function renderSystemStats(stats) {
+                    if (!stats.error) {
+                        const systemDiv = document.getElementById('systemStats');
+                        systemDiv.innerHTML = Object.entries(stats).map(([key, value]) => 
+                            '<div class="stat-card">' +
+                            '<div class="stat-label">' + key.replace(/_/g, ' ').toUpperCase() + '</div>' +
+                            '<div class="stat-value">' + value + '</div>' +
+                            '</div>'
+                        ).join('');
+                    }
+                }
+                
                 async function fetchSystemStats() {
                     try {
                         const response = await fetch('/api/system');
-                        const stats = await response.json();
-                        
-                        if (!stats.error) {
-                            const systemDiv = document.getElementById('systemStats');
-                            systemDiv.innerHTML = Object.entries(stats).map(([key, value]) => 
-                                '<div class="stat-card">' +
-                                '<div class="stat-label">' + key.replace(/_/g, ' ').toUpperCase() + '</div>' +
-                                '<div class="stat-value">' + value + '</div>' +
-                                '</div>'
-                            ).join('');
-                        }
+                        renderSystemStats(await response.json());
                     } catch (error) {
                         console.error('Failed to fetch system stats:', error);
                     }
@@ -2213,7 +2310,7 @@ class WebServer:
                 
                 async function fetchHLSStreams() {
                     try {
-                        const response = await fetch('/api/hls');
+                        const response = await fetch('/api/hls?limit=100');
                         const streams = await response.json();
                         
                         const hlsDiv = document.getElementById('hlsStreams');
@@ -2268,33 +2365,23 @@ class WebServer:
                 }
                 
                 
-                // Update fetchStats to track quality
-                const originalFetchStats = fetchStats;
-                fetchStats = async function() {
-                    await originalFetchStats();
-                    
-                    // Extract bitrate from stats for graph
-                    try {
-                        const response = await fetch('/api/stats');
-                        const stats = await response.json();
-                        const bitrateMatch = stats.bitrate.match(/(\d+)/);
-                        if (bitrateMatch) {
-                            const bitrate = parseInt(bitrateMatch[1]);
-                            qualityHistory.bitrate.push(bitrate);
-                            qualityHistory.timestamps.push(Date.now());
-                            
-                            // Trim old data
-                            if (qualityHistory.bitrate.length > maxHistoryPoints) {
-                                qualityHistory.bitrate.shift();
-                                qualityHistory.timestamps.shift();
-                            }
-                            
-                            updateQualityGraph();
+                // Track bitrate for the quality graph
+                function trackQuality(stats) {
+                    const bitrateMatch = String(stats.current_bitrate || '').match(/(\d+)/);
+                    if (bitrateMatch) {
+                        const bitrate = parseInt(bitrateMatch[1]);
+                        qualityHistory.bitrate.push(bitrate);
+                        qualityHistory.timestamps.push(Date.now());
+                        
+                        // Trim old data
+                        if (qualityHistory.bitrate.length > maxHistoryPoints) {
+                            qualityHistory.bitrate.shift();
+                            qualityHistory.timestamps.shift();
                         }
-                    } catch (error) {
-                        // Ignore errors
+                        
+                        updateQualityGraph();
                     }
-                };
+                }
                 
                 // Modal functions
                 function showModal(title, content) {
@@ -2377,8 +2464,11 @@ class WebServer:
                 
                 async function showICEStats() {
                     try {
-                        const response = await fetch('/api/ice');
-                        const ice = await response.json();
+                        let ice = dashboardState && dashboardState.ice;
+                        if (!ice) {
+                            const response = await fetch('/api/ice');
+                            ice = await response.json();
+                        }
                         
                         let content = '<h3>ICE Configuration</h3>';
                         content += '<p><strong>STUN Server:</strong> ' + ice.stun_server + '</p>';
@@ -2404,11 +2494,8 @@ class WebServer:
                     }
                 }
                 
-                // Refresh stats every 2 seconds
-                setInterval(fetchStats, 2000);
-                setInterval(fetchSystemStats, 5000);
+                // Stats and system metrics arrive over the websocket; HLS listings are polled
                 setInterval(fetchHLSStreams, 3000);
-                fetchSystemStats();
                 fetchHLSStreams();
             </script>
         </body>
@@ -2416,7 +2503,24 @@ class WebServer:
         """
         return web.Response(text=html, content_type='text/html')
     
+    def collect_dashboard_stats(self):
+        """Everything the dashboard shows, sampled once per StatsHub tick"""
+        return {
+            'stats': self.collect_stats(),
+            'system': self.collect_system_stats(),
+            'ice': self.collect_ice_stats(),
+        }
+
+    def _collect_new_logs(self):
+        self._log_cursor, messages = self.logs.since(self._log_cursor)
+        if messages:
+            return {'type': 'logs', 'messages': messages}
+        return None
+
     async def get_stats(self, request):
+        return web.json_response(self.collect_stats())
+
+    def collect_stats(self):
         # Get real-time stats from the first connected client
         current_bitrate = 0
         packet_loss = 0.0
@@ -2467,6 +2571,10 @@ class WebServer:
             recording_info['audio_enabled'] = not self.client.noaudio
             # Note: Detailed subprocess tracking would require additional implementation
             recording_info['note'] = 'Recording all streams in room to separate files'
+            room_recorders = getattr(self.client, 'room_recorders', None) or {}
+            for recorder in list(room_recorders.values()):
+                recording_info['files'].extend(self.client._room_recorder_files(recorder))
+            recording_info['active_recordings'] = sum(1 for recorder in list(room_recorders.values()) if recorder.get('recording'))
         elif self.client.record:
             recording_info['enabled'] = True
             recording_info['mode'] = 'single_stream'
@@ -2494,15 +2602,17 @@ class WebServer:
                     'id': uuid[:8],
                     'status': 'connected',
                     'has_data_channel': bool(client_data.get('send_channel')),
-                    'ping': client_data.get('ping', 0)
+                    'ping': client_data.get('ping', 0),
+                    'bitrate': client_data.get('_last_bitrate_sent', 0),
+                    'packet_loss': client_data.get('_last_packet_loss', 0.0)
                 }
                 viewer_list.append(viewer_info)
             stats['viewer_details'] = viewer_list
         
-        return web.json_response(stats)
+        return stats
     
     async def get_logs(self, request):
-        return web.json_response(self.logs[-100:])  # Return last 100 logs
+        return web.json_response(self.logs.tail(100))  # Return last 100 logs
     
     async def control(self, request):
         try:
@@ -2571,39 +2681,54 @@ class WebServer:
             return web.json_response({'status': 'error', 'message': str(e)})
     
     async def websocket_handler(self, request):
-        ws = web.WebSocketResponse()
+        """Subscribe a dashboard to the shared stats stream (snapshot, then deltas and log lines)"""
+        ws = web.WebSocketResponse(heartbeat=30)
         await ws.prepare(request)
+        send = ws.send_str
         
-        # TODO: Implement real-time updates via websocket
+        if not self.stats_hub.subscribers:
+            # Dashboards load recent history from /api/logs; only stream newer lines
+            self._log_cursor = self.logs.cursor
+        await self.stats_hub.subscribe(send)
         
-        async for msg in ws:
-            if msg.type == aiohttp.WSMsgType.TEXT:
-                # Handle incoming websocket messages
-                pass
-            elif msg.type == aiohttp.WSMsgType.ERROR:
-                print(f'WebSocket error: {ws.exception()}')
+        try:
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        data = json.loads(msg.data)
+                    except ValueError:
+                        continue
+                    if isinstance(data, dict) and data.get('type') == 'resync':
+                        await self.stats_hub.resync(send)
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    print(f'WebSocket error: {ws.exception()}')
+        finally:
+            await self.stats_hub.unsubscribe(send)
         
         return ws
     
     def add_log(self, message):
-        """Add a log message to the buffer"""
-        timestamp = time.strftime('%H:%M:%S')
-        log_entry = f"[{timestamp}] {message}"
-        self.logs.append(log_entry)
-        if len(self.logs) > self.max_logs:
-            self.logs.pop(0)
+        """Add a log message to the buffer (timestamped when read)"""
+        self.logs.append(message)
     
     async def get_system_stats(self, request):
         """Get system resource usage"""
+        return web.json_response(self.collect_system_stats())
+
+    def collect_system_stats(self):
         try:
             import psutil
             
-            # Get CPU and memory usage
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            if self._process is None:
+                self._process = psutil.Process()
+                psutil.cpu_percent(interval=None)  # prime the non-blocking counter
+            
+            # CPU usage since the previous sample; never sleeps on the event loop
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             
             # Get process-specific stats
-            process = psutil.Process()
+            process = self._process
             process_memory = process.memory_info().rss / 1024 / 1024  # MB
             
             stats = {
@@ -2622,15 +2747,15 @@ class WebServer:
                     pipeline_time = clock.get_time() / Gst.SECOND
                     stats['pipeline_time'] = f"{pipeline_time:.1f} seconds"
                     
-            return web.json_response(stats)
+            return stats
             
         except ImportError:
-            return web.json_response({
+            return {
                 'error': 'psutil not installed',
                 'message': 'Install psutil for system stats: pip install psutil'
-            })
+            }
         except Exception as e:
-            return web.json_response({'error': str(e)})
+            return {'error': str(e)}
     
     async def get_devices(self, request):
         """Get available video and audio devices"""
@@ -2697,6 +2822,9 @@ class WebServer:
     
     async def get_ice_stats(self, request):
         """Get ICE connection statistics"""
+        return web.json_response(self.collect_ice_stats())
+
+    def collect_ice_stats(self):
         ice_stats = {
             'connections': [],
             'stun_server': 'stun://stun.cloudflare.com:3478',
@@ -2722,103 +2850,82 @@ class WebServer:
                     
                 ice_stats['connections'].append(conn_info)
                 
-        return web.json_response(ice_stats)
+        return ice_stats
+    
+    async def get_metrics(self, request):
+        """Prometheus text exposition of per-peer, recorder and process metrics"""
+        return web.Response(text=self.client.metrics.render(), headers={'Content-Type': METRICS_CONTENT_TYPE})
     
     async def get_hls_streams(self, request):
-        """Get list of available HLS streams"""
-        import glob
-        hls_streams = []
-        
-        # Find all .m3u8 files in current directory
-        for playlist in glob.glob("*.m3u8"):
-            # Get file info
-            stat = os.stat(playlist)
-            
-            # Extract stream info from filename
-            # Format: room_streamid_timestamp.m3u8
-            parts = playlist.replace('.m3u8', '').split('_')
-            
-            stream_info = {
-                'filename': playlist,
-                'url': f'/hls/{playlist}',
-                'size': stat.st_size,
-                'modified': stat.st_mtime,
-                'segments': []
-            }
-            
-            # Try to parse room and stream ID
-            if len(parts) >= 3:
-                stream_info['room'] = parts[0]
-                stream_info['stream_id'] = parts[1]
-                stream_info['timestamp'] = parts[2]
-            
-            # Check if playlist has EXT-X-ENDLIST (is complete)
-            try:
-                with open(playlist, 'r') as f:
-                    content = f.read()
-                    stream_info['is_complete'] = '#EXT-X-ENDLIST' in content
-                    stream_info['has_segments'] = '#EXTINF:' in content
-            except:
-                stream_info['is_complete'] = False
-                stream_info['has_segments'] = False
-            
-            # Count segments
-            base_name = playlist.replace('.m3u8', '')
-            segments = glob.glob(f"{base_name}_*.ts")
-            stream_info['segment_count'] = len(segments)
-            
-            # Check if still recording (recently modified)
-            import time
-            current_time = time.time()
-            
-            # Check both playlist and most recent segment modification times
-            time_since_playlist_modified = current_time - stat.st_mtime
-            
-            # Find most recent segment modification time
-            most_recent_segment_time = 0
-            if segments:
-                for segment in segments:
-                    sink = None
-                    try:
-                        seg_mtime = os.stat(segment).st_mtime
-                        if seg_mtime > most_recent_segment_time:
-                            most_recent_segment_time = seg_mtime
-                    except:
-                        pass
-            
-            # Use the most recent modification time (playlist or segment)
-            most_recent_activity = max(stat.st_mtime, most_recent_segment_time) if most_recent_segment_time else stat.st_mtime
-            time_since_activity = current_time - most_recent_activity
-            
-            # Determine status based on activity and completion
-            if time_since_activity < 10:  # Activity in last 10 seconds
-                stream_info['status'] = 'recording'
-            elif time_since_activity < 60 and not stream_info['is_complete']:  # Activity in last minute and no ENDLIST
-                stream_info['status'] = 'live'
-            elif not stream_info['is_complete'] and stream_info['has_segments']:
-                # Has segments but no ENDLIST and no recent activity
-                stream_info['status'] = 'incomplete'
-            else:
-                stream_info['status'] = 'complete'
-                
-            hls_streams.append(stream_info)
-            
-        # Sort by modification time (newest first)
-        hls_streams.sort(key=lambda x: x['modified'], reverse=True)
-        
-        return web.json_response(hls_streams)
+        """Get list of available HLS streams
+
+        Query parameters: ``status``, ``room``, ``stream_id`` filter the
+        list; ``offset`` and ``limit`` page it. The total number of matches
+        is returned in the ``X-Total-Count`` header.
+        """
+        try:
+            offset = int(request.query.get('offset', 0))
+            limit = int(request.query.get('limit', 0)) or None
+        except ValueError:
+            return web.json_response({'error': 'offset and limit must be integers'}, status=400)
+        status = request.query.get('status')
+        if status and status not in HLS_STREAM_STATUSES:
+            return web.json_response({'error': f'unknown status {status}'}, status=400)
+
+        loop = asyncio.get_running_loop()
+        hls_streams, total = await loop.run_in_executor(
+            None,
+            lambda: self.hls_catalog.query(
+                status=status,
+                room=request.query.get('room'),
+                stream_id=request.query.get('stream_id'),
+                offset=offset,
+                limit=limit,
+            ),
+        )
+        return web.json_response(hls_streams, headers={'X-Total-Count': str(total)})
     
     async def serve_hls_file(self, request):
-        """Serve HLS files with proper headers"""
+        """Serve HLS files with proper headers, ETag revalidation, Range and a small memory cache"""
         filename = request.match_info['filename']
         
         # Security check - only allow .m3u8 and .ts files
         if not (filename.endswith('.m3u8') or filename.endswith('.ts')):
             return web.Response(status=403, text='Forbidden')
+
+        # Segments and parts are only cacheable once the playlist lists them;
+        # until then the file may still be growing
+        listed = False
+        playlist = media_playlist(filename) if filename.endswith('.ts') else None
+        if playlist is not None and os.path.exists(playlist):
+            # LL-HLS: hold a request for the preload-hinted part until it is listed
+            text = await self.playlist_watcher.wait_until(
+                playlist,
+                lambda text: media_status(text, filename) != MEDIA_HINTED,
+                lambda text: 3 * playlist_target_duration(text),
+            )
+            listed = text is not None and media_status(text, filename) == MEDIA_LISTED
             
         # Check if file exists
         if not os.path.exists(filename):
             return web.Response(status=404, text='Not Found')
+
+        # LL-HLS blocking playlist reload
+        if filename.endswith('.m3u8') and '_HLS_msn' in request.query:
+            try:
+                msn = int(request.query['_HLS_msn'])
+                part = int(request.query['_HLS_part']) if '_HLS_part' in request.query else None
+            except ValueError:
+                return web.Response(status=400, text='Bad Request')
+            if msn < 0 or (part is not None and part < 0):
+                return web.Response(status=400, text='Bad Request')
+            text = await self.playlist_watcher.wait_until(
+                filename,
+                lambda text: blocking_reload_ready(text, msn, part),
+                lambda text: 3 * playlist_target_duration(text),
+            )
+            if text is None:
+                return web.Response(status=503, text='Playlist update timed out')
             
         # Set appropriate content type
         if filename.endswith('.m3u8'):
@@ -2834,19 +2941,34 @@ class WebServer:
             }
         else:  # .ts files
             content_type = 'video/mp2t'
-            # Cache segments
+            # Cache finished segments; revalidate anything not listed yet
             headers = {
-                'Cache-Control': 'public, max-age=3600',
+                'Cache-Control': 'public, max-age=3600' if listed else 'no-cache',
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type'
             }
             
-        # Read and serve file
         try:
-            with open(filename, 'rb') as f:
-                content = f.read()
+            st = os.stat(filename)
+            headers['ETag'] = file_etag(st)
+            if etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+                return web.Response(status=304, headers=headers)
+
+            # Range requests and files too large for the cache go out via sendfile
+            if 'Range' in request.headers or st.st_size > self.hls_cache.max_entry_bytes:
+                headers['Content-Type'] = content_type
+                return web.FileResponse(filename, headers=headers)
+
+            content = self.hls_cache.get(filename, st)
+            if content is None:
+                loop = asyncio.get_running_loop()
+                content, st = await loop.run_in_executor(None, read_file, filename)
+                self.hls_cache.put(filename, st, content)
+                headers['ETag'] = file_etag(st)
             return web.Response(body=content, content_type=content_type, headers=headers)
+        except FileNotFoundError:
+            return web.Response(status=404, text='Not Found')
         except Exception as e:
             return web.Response(status=500, text=str(e))
     
@@ -2872,6 +2994,8 @@ class WebServer:
     
     async def stop(self):
         """Stop the web server"""
+        await self.stats_hub.stop()
+        await self.playlist_watcher.close()
         if self.runner:
             try:
                 await asyncio.wait_for(self.runner.cleanup(), timeout=2.0)
@@ -2883,6 +3007,20 @@ class WebServer:
             finally:
                 self.runner = None
 
+def print_recorder_log(level: str, message: str):
+    """Print a log line received from a recorder subprocess."""
+    # Rate-limit per recorder: messages are prefixed with "[stream_id]" / "[worker pid]"
+    key = ('recorder', level, message.partition(']')[0])
+    if level == 'error':
+        printc(message, "F00", ERROR, key)
+    elif level == 'warning':
+        printc(message, "FF0", WARNING, key)
+    elif level == 'debug':
+        printc(message, "77F", DEBUG, key)
+    else:
+        printc(message, "77F", INFO, key)
+
+
 class WebRTCSubprocessManager:
     """Manages WebRTC subprocesses with IPC communication"""
     
@@ -2893,14 +3031,15 @@ class WebRTCSubprocessManager:
         self.stdin = None
         self.stdout = None
         self.reader_task = None
+        self.log_reader = None
+        self.log_task = None
         self.session_id = None
         self.message_handlers = {}
         self.running = False
         
-    async def start(self):
-        """Start the WebRTC subprocess"""
-        # Prepare configuration
-        config = {
+    def _child_config(self) -> Dict[str, Any]:
+        """Configuration sent to the recorder as its first message."""
+        return {
             'stream_id': self.stream_id,
             'mode': self.config.get('mode', 'view'),
             'room': self.config.get('room'),
@@ -2913,51 +3052,54 @@ class WebRTCSubprocessManager:
             'record_audio': self.config.get('record_audio', False),  # Pass audio recording flag
             'use_hls': self.config.get('use_hls', False),  # Pass HLS flag
             'use_splitmuxsink': self.config.get('use_splitmuxsink', False),  # Pass splitmuxsink flag
+            'single_file': self.config.get('single_file', False),  # Mux video and audio into one file
+            'hls_playlist_type': self.config.get('hls_playlist_type', 'live'),
+            'hls_window': self.config.get('hls_window', 6),
+            'hls_part_duration': self.config.get('hls_part_duration', 0),
             'room_ndi': self.config.get('room_ndi', False),  # Pass NDI mode flag
             'ndi_name': self.config.get('ndi_name'),  # Pass NDI stream name
             'ndi_direct': self.config.get('ndi_direct', True),  # Default to direct mode
             'password': self.config.get('password'),  # Pass password for decryption
             'salt': self.config.get('salt', ''),  # Pass salt for decryption
         }
-        
-        # Start subprocess
+
+    def _subprocess_script(self) -> str:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         # Choose subprocess script based on recording format
         # Choose subprocess based on configuration
         if self.config.get('test_mode', False):
             # Use test subprocess
             printc(f"[{self.stream_id}] Using test subprocess with mux_format={self.config.get('mux_format', 'webm')}", "0F0")
-            subprocess_script = os.path.join(script_dir, 'webrtc_subprocess_test.py')
+            return os.path.join(script_dir, 'webrtc_subprocess_test.py')
         elif self.config.get('use_mkv', False):
             # Use MKV subprocess only if explicitly requested
             printc(f"[{self.stream_id}] Using MKV recording with audio/video muxing", "0F0")
-            subprocess_script = os.path.join(script_dir, 'webrtc_subprocess_mkv.py')
+            return os.path.join(script_dir, 'webrtc_subprocess_mkv.py')
         elif self.config.get('use_hls', False):
             # HLS recording
             printc(f"[{self.stream_id}] Using HLS recording format", "0F0")
-            subprocess_script = os.path.join(script_dir, 'webrtc_subprocess_glib.py')
+            return os.path.join(script_dir, 'webrtc_subprocess_glib.py')
         else:
             printc(f"[{self.stream_id}] Using standard WebM/MP4 recording", "0F0")
-            subprocess_script = os.path.join(script_dir, 'webrtc_subprocess_glib.py')
-        cmd = [sys.executable, subprocess_script]
-        self.process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+            return os.path.join(script_dir, 'webrtc_subprocess_glib.py')
+
+    async def start(self):
+        """Start the WebRTC subprocess"""
+        config = self._child_config()
+        subprocess_script = self._subprocess_script()
+        self.process, self.log_reader = await spawn_framed_subprocess(sys.executable, subprocess_script)
         
         self.stdin = self.process.stdin
         self.stdout = self.process.stdout
         self.running = True
         
         # Send configuration as first message (expected by subprocess)
-        config_line = json.dumps(config) + '\n'
-        self.stdin.write(config_line.encode())
+        self.stdin.write(encode_control(config))
         await self.stdin.drain()
         
         # Start reading messages
         self.reader_task = asyncio.create_task(self._read_messages())
+        self.log_task = asyncio.create_task(self._read_logs())
         self.stderr_task = asyncio.create_task(self._read_stderr())
         
         # Wait for ready signal
@@ -2976,25 +3118,39 @@ class WebRTCSubprocessManager:
     async def send_message(self, msg: Dict[str, Any]):
         """Send message to subprocess"""
         if self.stdin and not self.stdin.is_closing():
-            data = json.dumps(msg) + '\n'
-            self.stdin.write(data.encode())
+            self.stdin.write(encode_control(msg))
             await self.stdin.drain()
             
     async def _read_messages(self):
-        """Read messages from subprocess"""
+        """Read control frames from subprocess"""
         while self.running and self.stdout:
             try:
-                line = await self.stdout.readline()
-                if not line:
+                frame = await read_frame(self.stdout)
+                if frame is None:
                     break
-                    
-                msg = json.loads(line.decode().strip())
-                await self._handle_message(msg)
-                
-            except json.JSONDecodeError:
-                continue
+                kind, msg = frame
+                if kind == KIND_CONTROL:
+                    await self._handle_message(msg)
+                elif kind == KIND_LOG:
+                    print_recorder_log(*msg)
+            except ValueError as e:
+                printc(f"[{self.stream_id}] Invalid IPC frame: {e}", "F00")
+                break
             except Exception as e:
                 printc(f"[{self.stream_id}] Error reading message: {e}", "F00")
+
+    async def _read_logs(self):
+        """Read the subprocess log pipe, kept apart so SDP/ICE never wait behind logs"""
+        while self.log_reader:
+            try:
+                frame = await read_frame(self.log_reader)
+            except ValueError as e:
+                printc(f"[{self.stream_id}] Invalid log frame: {e}", "F00")
+                break
+            if frame is None:
+                break
+            if frame[0] == KIND_LOG:
+                print_recorder_log(*frame[1])
                 
     async def _read_stderr(self):
         """Read stderr from subprocess"""
@@ -3015,14 +3171,7 @@ class WebRTCSubprocessManager:
         
         # Built-in handlers
         if msg_type == 'log':
-            level = msg.get('level', 'info')
-            message = msg.get('message', '')
-            if level == 'error':
-                printc(message, "F00")
-            elif level == 'warning':
-                printc(message, "FF0")
-            else:
-                printc(message, "77F")
+            print_recorder_log(msg.get('level', 'info'), msg.get('message', ''))
                 
         elif msg_type in self.message_handlers:
             handler = self.message_handlers[msg_type]
@@ -3070,9 +3219,318 @@ class WebRTCSubprocessManager:
             except asyncio.CancelledError:
                 pass
 
+        if self.log_task:
+            # The log pipe closes once the child exits; drain what is left.
+            try:
+                await asyncio.wait_for(self.log_task, timeout=1.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+
         printc(f"[{self.stream_id}] Subprocess stopped", "77F")
 
 
+class RecorderWorker:
+    """A long-lived ``webrtc_subprocess_glib.py --worker`` process hosting several recorders.
+
+    Messages to and from a hosted recorder carry its ``stream_id``; messages
+    without one belong to the worker itself.
+    """
+
+    def __init__(self, worker_id: int, script: str, on_exit=None):
+        self.worker_id = worker_id
+        self.script = script
+        self.on_exit = on_exit
+        self.process = None
+        self.log_reader = None
+        self.reader_task = None
+        self.log_task = None
+        self.stderr_task = None
+        self.sessions: Dict[str, "PooledRecorderSession"] = {}
+        self.alive = False
+        self._worker_ready = None
+
+    @property
+    def load(self) -> int:
+        return len(self.sessions)
+
+    async def start(self, timeout: float = 15.0) -> bool:
+        self.process, self.log_reader = await spawn_framed_subprocess(sys.executable, self.script, '--worker')
+        self._worker_ready = asyncio.Event()
+        self.reader_task = asyncio.create_task(self._read_messages())
+        self.log_task = asyncio.create_task(self._read_logs())
+        self.stderr_task = asyncio.create_task(self._read_stderr())
+        try:
+            await asyncio.wait_for(self._worker_ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            printc(f"[worker {self.worker_id}] Recorder worker failed to start", "F00")
+            await self.stop()
+            return False
+        if not self.alive:
+            printc(f"[worker {self.worker_id}] Recorder worker exited during start-up", "F00")
+            return False
+        printc(f"[worker {self.worker_id}] Recorder worker ready (pid {self.process.pid})", "77F")
+        return True
+
+    async def send(self, msg: Dict[str, Any]) -> bool:
+        if not self.alive or not self.process or self.process.stdin.is_closing():
+            return False
+        self.process.stdin.write(encode_control(msg))
+        await self.process.stdin.drain()
+        return True
+
+    async def _read_messages(self):
+        try:
+            while self.process and self.process.stdout:
+                try:
+                    frame = await read_frame(self.process.stdout)
+                except ValueError as e:
+                    printc(f"[worker {self.worker_id}] Invalid IPC frame: {e}", "F00")
+                    break
+                if frame is None:
+                    break
+                kind, msg = frame
+                if kind == KIND_LOG:
+                    print_recorder_log(*msg)
+                    continue
+                try:
+                    await self._dispatch(msg)
+                except Exception as e:
+                    printc(f"[worker {self.worker_id}] Error handling message: {e}", "F00")
+        finally:
+            self._exited()
+
+    async def _read_logs(self):
+        while self.log_reader:
+            try:
+                frame = await read_frame(self.log_reader)
+            except ValueError as e:
+                printc(f"[worker {self.worker_id}] Invalid log frame: {e}", "F00")
+                break
+            if frame is None:
+                break
+            if frame[0] == KIND_LOG:
+                print_recorder_log(*frame[1])
+
+    async def _read_stderr(self):
+        while self.process and self.process.stderr:
+            try:
+                line = await self.process.stderr.readline()
+                if not line:
+                    break
+                error_msg = line.decode().strip()
+                if error_msg:
+                    printc(f"[worker {self.worker_id}] STDERR: {error_msg}", "F70")
+            except Exception as e:
+                printc(f"[worker {self.worker_id}] Error reading stderr: {e}", "F00")
+                break
+
+    async def _dispatch(self, msg: Dict[str, Any]):
+        stream_id = msg.get('stream_id')
+        if stream_id is None:
+            if msg.get('type') == 'worker_ready':
+                self.alive = True
+                self._worker_ready.set()
+            return
+        session = self.sessions.get(stream_id)
+        if session is not None:
+            await session._handle_message(msg)
+
+    def _exited(self):
+        was_alive = self.alive
+        self.alive = False
+        if self._worker_ready is not None:
+            self._worker_ready.set()
+        for session in list(self.sessions.values()):
+            session._worker_exited()
+        self.sessions.clear()
+        if was_alive and self.on_exit:
+            self.on_exit(self)
+
+    async def stop(self, timeout: float = 6.0):
+        """Ask the worker to finalize its recorders and exit, escalating if needed."""
+        if self.process and self.process.returncode is None:
+            await self.send({"type": "shutdown"})
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.process.terminate()
+                try:
+                    await asyncio.wait_for(self.process.wait(), timeout=3.0)
+                except asyncio.TimeoutError:
+                    self.process.kill()
+                    await self.process.wait()
+        if self.log_task:
+            try:
+                await asyncio.wait_for(self.log_task, timeout=1.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        for task in (self.reader_task, self.stderr_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._exited()
+
+
+class RecorderWorkerPool:
+    """Assigns room recorders to a few shared GLib worker processes.
+
+    Each worker pays the interpreter, GI and plugin registry start-up cost
+    once. New streams go to the least-loaded worker with room; one idle
+    worker is kept warm so a stream that needs a fresh worker can start
+    recording without waiting for a process to boot.
+    """
+
+    def __init__(self, script: str, streams_per_worker: int = 4, spare_workers: int = 1):
+        self.script = script
+        self.streams_per_worker = max(1, int(streams_per_worker))
+        self.spare_workers = max(0, int(spare_workers))
+        self.workers: List[RecorderWorker] = []
+        self._worker_ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+        self._warm_task = None
+        self._closed = False
+
+    def _idle_workers(self) -> List[RecorderWorker]:
+        return [worker for worker in self.workers if worker.alive and worker.load == 0]
+
+    def _pick_worker(self) -> Optional[RecorderWorker]:
+        # Fill busy workers before touching the idle spare.
+        busy = [w for w in self.workers if w.alive and 0 < w.load < self.streams_per_worker]
+        if busy:
+            return min(busy, key=lambda worker: worker.load)
+        idle = self._idle_workers()
+        return idle[0] if idle else None
+
+    async def _spawn_worker(self) -> Optional[RecorderWorker]:
+        worker = RecorderWorker(next(self._worker_ids), self.script, on_exit=self._worker_exited)
+        self.workers.append(worker)
+        if await worker.start():
+            return worker
+        if worker in self.workers:
+            self.workers.remove(worker)
+        return None
+
+    def _worker_exited(self, worker: RecorderWorker):
+        if worker in self.workers:
+            self.workers.remove(worker)
+        if not self._closed:
+            printc(f"[worker {worker.worker_id}] Recorder worker exited", "FF0")
+            self.warm()
+
+    def warm(self):
+        """Start a spare worker in the background if none is idle."""
+        if self._closed or self.spare_workers <= 0:
+            return
+        if self._warm_task and not self._warm_task.done():
+            return
+        if len(self._idle_workers()) >= self.spare_workers:
+            return
+        self._warm_task = asyncio.create_task(self._warm())
+
+    async def _warm(self):
+        async with self._lock:
+            if not self._closed and len(self._idle_workers()) < self.spare_workers:
+                await self._spawn_worker()
+
+    async def assign(self, session: "PooledRecorderSession") -> Optional[RecorderWorker]:
+        async with self._lock:
+            if self._closed:
+                return None
+            worker = self._pick_worker() or await self._spawn_worker()
+            if worker is not None:
+                worker.sessions[session.stream_id] = session
+        self.warm()
+        return worker
+
+    async def release(self, session: "PooledRecorderSession"):
+        worker = session.worker
+        if worker is None or worker.sessions.get(session.stream_id) is not session:
+            return
+        del worker.sessions[session.stream_id]
+        if worker.load == 0 and not self._closed and len(self._idle_workers()) > self.spare_workers:
+            # Keep one warm spare; retire the rest.
+            self.workers.remove(worker)
+            worker.on_exit = None
+            await worker.stop()
+
+    async def close(self):
+        self._closed = True
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+            try:
+                await self._warm_task
+            except asyncio.CancelledError:
+                pass
+        workers, self.workers = self.workers, []
+        if workers:
+            await asyncio.gather(
+                *(worker.stop(timeout=6.0 + 3.0 * worker.load) for worker in workers),
+                return_exceptions=True,
+            )
+
+
+class PooledRecorderSession(WebRTCSubprocessManager):
+    """A recorder hosted by a ``RecorderWorkerPool`` worker instead of its own process."""
+
+    def __init__(self, stream_id: str, config: Dict[str, Any], pool: RecorderWorkerPool):
+        super().__init__(stream_id, config)
+        self.pool = pool
+        self.worker = None
+        self._stopped = None
+
+    async def start(self):
+        """Start the recorder inside a pooled worker"""
+        self._stopped = asyncio.Event()
+        ready_event = asyncio.Event()
+        self.message_handlers['ready'] = lambda msg: ready_event.set()
+        self.message_handlers['stopped'] = lambda msg: self._stopped.set()
+
+        self.worker = await self.pool.assign(self)
+        if self.worker is None:
+            printc(f"[{self.stream_id}] No recorder worker available", "F00")
+            return False
+        self.running = True
+        await self.worker.send({"type": "start", "stream_id": self.stream_id, "config": self._child_config()})
+
+        try:
+            await asyncio.wait_for(ready_event.wait(), timeout=5.0)
+            printc(f"[{self.stream_id}] Recorder ready in worker {self.worker.worker_id}", "0F0")
+            return True
+        except asyncio.TimeoutError:
+            printc(f"[{self.stream_id}] Recorder failed to start", "F00")
+            await self.stop()
+            return False
+
+    async def send_message(self, msg: Dict[str, Any]):
+        """Send message to this stream's recorder"""
+        if self.running and self.worker is not None:
+            await self.worker.send(dict(msg, stream_id=self.stream_id))
+
+    def _worker_exited(self):
+        if self.running:
+            printc(f"[{self.stream_id}] Recorder worker exited unexpectedly", "F00")
+        self.running = False
+        if self._stopped:
+            self._stopped.set()
+
+    async def stop(self):
+        """Stop the recorder and return its slot to the pool"""
+        if self.running and self.worker is not None and self.worker.alive:
+            await self.send_message({"type": "stop"})
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=6.0)
+            except asyncio.TimeoutError:
+                printwarn(f"[{self.stream_id}] Recorder did not confirm shutdown")
+        self.running = False
+        if self.worker is not None:
+            await self.pool.release(self)
+            self.worker = None
+        printc(f"[{self.stream_id}] Recorder stopped", "77F")
+
+
 class WebRTCClient:
     def _get_gst_property_if_available(self, element, prop_name: str) -> Tuple[Any, bool]:
         """Try to read a GStreamer property; return (value, available_flag)."""
@@ -3313,6 +3771,8 @@ class WebRTCClient:
         self.room_name = params.room
         self.room_hashcode = None
         self.multiviewer = params.multiviewer
+        self.encoder_ladder = getattr(params, 'encoder_ladder_rungs', None) or []
+        self.encoder_ladder_codec = getattr(params, 'encoder_ladder_codec', None)
         self.stretch_display = getattr(params, 'stretch_display', False)
         self.cleanup_lock = asyncio.Lock()  # Prevent concurrent cleanup
         self.pipeline_lock = threading.Lock()  # Thread-safe pipeline operations
@@ -3336,6 +3796,7 @@ class WebRTCClient:
         self.v4l2sink_remote_map = {}
         self.filesink = None
         self.framebuffer = params.framebuffer
+        self.framebuffer_socket = getattr(params, 'framebuffer_socket', None)
         self.midi = params.midi
         self.nored = params.nored
         self.force_red = getattr(params, 'force_red', False)
@@ -3356,9 +3817,7 @@ class WebRTCClient:
         self.noaudio = params.noaudio
         self.novideo = params.novideo
         self.audio = getattr(params, 'audio', False)  # Audio recording flag
-        self.counter = 0
-        self.shared_memory = False
-        self.trigger_socket = False
+        self.frame_ring = None
 
         self.processing = False
         self.buffer = params.buffer
@@ -3371,6 +3830,14 @@ class WebRTCClient:
         self.socketout = params.socketout
         self.socketport = params.socketport
         self.socket = None
+        self.ice_batcher = IceCandidateBatcher(self._schedule_on_loop)
+        # Prometheus metrics served at /metrics by the web server
+        self.metrics = MetricsRegistry()
+        self.peer_metrics = PeerMetrics(self.metrics)
+        self._init_process_metrics()
+        self.socket_host = getattr(params, 'socket_host', '127.0.0.1')
+        self.socket_path = getattr(params, 'socket_path', None)
+        self.socket_format = getattr(params, 'socket_format', 'raw')
         self.splashscreen_idle = getattr(params, 'splashscreen_idle', None)
         self.splashscreen_connecting = getattr(params, 'splashscreen_connecting', None)
         self.display_selector = None
@@ -3492,14 +3959,29 @@ class WebRTCClient:
         # HLS recording options
         self.use_hls = getattr(params, 'hls', False)
         self.use_splitmux = getattr(params, 'hls_splitmux', False)
+        self.hls_playlist_type = getattr(params, 'hls_playlist_type', 'live') or 'live'
+        self.hls_window = max(0, int(getattr(params, 'hls_window', 6)))
+        self.hls_part_duration = 0.0
+        if getattr(params, 'll_hls', False):
+            self.hls_part_duration = min(max(float(getattr(params, 'hls_part_duration', 0.333)), 0.1), 2.0)
+            if self.use_splitmux:
+                printwarn("--ll-hls uses the built-in segmenter; ignoring --hls-splitmux")
+                self.use_splitmux = False
+        
+        # Mux room recordings' video and audio into one file
+        self.record_single_file = getattr(params, 'record_single_file', False)
+        if self.record_single_file and (self.use_hls or self.room_ndi or self.noaudio):
+            printwarn("--record-single-file only applies to plain room recording with audio; ignoring it")
+            self.record_single_file = False
         
         # Subprocess managers for room recording
         self.subprocess_managers = {}  # stream_id -> WebRTCSubprocessManager
-        self.room_streams = {}  # Track room streams
-        self.room_streams_lock = asyncio.Lock()
-        self.uuid_to_stream_id = {} # Maps an incoming peer's UUID to a specific stream_id we requested
-        self.stream_id_to_uuid = {} # Reverse mapping: stream_id -> UUID
-        self.session_to_stream = {} # Maps session ID to stream ID
+        self.recorder_streams_per_worker = max(0, int(getattr(params, 'recorder_streams_per_worker', 4) or 0))
+        self.recorder_pool = None  # RecorderWorkerPool for room recording
+        # Room streams indexed by peer UUID, stream ID and session; also routes
+        # an incoming peer's offer/ICE to the recorder for the stream we requested
+        self.room_registry = RoomRegistry()
+        self.room_registry.subscribe(self._on_room_stream_event)
         
         # Enable multiviewer when room NDI is active
         if self.room_ndi:
@@ -3512,6 +3994,7 @@ class WebRTCClient:
         self.ice_queue = asyncio.Queue()  # Thread-safe ICE queue
         self.ice_processor_task = None
         self.event_loop = None  # Will be set when event loop is available
+        self._heartbeat_scheduler = None
         
         try:
             if self.password:
@@ -3574,6 +4057,16 @@ class WebRTCClient:
     def _join_gpio_active_state(self, room_gpio):
         return room_gpio.LOW if self.join_gpio_active_low else room_gpio.HIGH
 
+    def _register_peer_heartbeat(self, ping, stats):
+        """Hand a peer's ping/get-stats callbacks to the shared scheduler; returns a cancellable handle."""
+        loop = getattr(self, "event_loop", None)
+        if not loop or loop.is_closed():
+            printwarn("Signaling loop unavailable; peer heartbeat disabled")
+            return None
+        if self._heartbeat_scheduler is None or self._heartbeat_scheduler.loop is not loop:
+            self._heartbeat_scheduler = HeartbeatScheduler(loop, log=printwarn)
+        return self._heartbeat_scheduler.register(ping, stats)
+
     def _queue_background_task(self, coro, label: str):
         """Run a background coroutine and surface failures in logs."""
         try:
@@ -4391,6 +4884,81 @@ class WebRTCClient:
             repaired += "\r\n"
         return repaired
 
+    def _schedule_on_loop(self, delay, callback):
+        """Run ``callback`` on the signaling loop after ``delay`` seconds; callable from any thread."""
+        loop = getattr(self, "event_loop", None)
+        if not loop or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(loop.call_later, delay, callback)
+
+    def _queue_ice_candidate(self, client, direction, mlineindex, candidate):
+        self.ice_batcher.add(
+            (client['UUID'], client['session'], direction),
+            {'session': client['session'], 'type': direction, 'UUID': client['UUID']},
+            {'candidate': candidate, 'sdpMLineIndex': mlineindex},
+            self.sendMessage,
+        )
+
+    def _discard_ice_batches(self, client):
+        for direction in ('local', 'remote'):
+            self.ice_batcher.discard((client.get('UUID'), client.get('session'), direction))
+
+    def _init_process_metrics(self):
+        m = self.metrics
+        self._metric_peers = m.gauge('rn_peers', 'Connected WebRTC peers handled in this process.')
+        self._metric_recorders = m.gauge('rn_recorders', 'Active recorder subprocess sessions.')
+        self._metric_room_streams = m.gauge('rn_room_streams', 'Tracked room streams by lifecycle state.', ('state',))
+        self._metric_pipeline = m.gauge('rn_pipeline_active', '1 while the main GStreamer pipeline exists.')
+        self._metric_target_bitrate = m.gauge('rn_encoder_target_kbps', 'Shared encoder target bitrate.')
+        self._metric_ice_messages = m.counter('rn_ice_messages_sent_total', 'Batched ICE candidate messages sent.')
+        self._metric_ice_candidates = m.counter('rn_ice_candidates_sent_total', 'ICE candidates sent.')
+        self._metric_log_dropped = m.counter('rn_log_lines_dropped_total', 'Console log lines dropped because output was too slow.')
+        m.add_collector(self._collect_process_metrics)
+
+    def _collect_process_metrics(self):
+        self._metric_peers.set(len(self.clients))
+        self._metric_recorders.set(len(self.subprocess_managers))
+        for state, count in self.room_registry.counts().items():
+            self._metric_room_streams.set(count, state=state)
+        self._metric_pipeline.set(1 if self.pipe else 0)
+        self._metric_target_bitrate.set(self.bitrate if not self.streamin else None)
+        self._metric_ice_messages.set_total(self.ice_batcher.messages_sent)
+        self._metric_ice_candidates.set_total(self.ice_batcher.candidates_sent)
+        self._metric_log_dropped.set_total(LOG.writer.dropped)
+
+    def _record_peer_metrics(self, client, snapshot, is_receive, bitrate):
+        latency = client.get('_latency_applied')
+        if latency is None and is_receive:
+            latency = self.buffer
+        encoder_bitrate = None
+        if not is_receive:
+            encoder_bitrate = self.bitrate
+            if self.encoder_ladder:
+                rung = client.get('_ladder_rung', 0)
+                if 0 <= rung < len(self.encoder_ladder):
+                    encoder_bitrate = self.encoder_ladder[rung].bitrate
+        self.peer_metrics.record(
+            client.get('UUID', ''),
+            client.get('streamID') or self.stream_id or '',
+            'view' if is_receive else 'publish',
+            snapshot.summary(is_receive),
+            bitrate=bitrate,
+            loss_ratio=client.get('_last_packet_loss'),
+            fec_active=client.get('_fec_active'),
+            rtx_active=client.get('_rtx_active'),
+            jitter_buffer=latency,
+            encoder_bitrate=encoder_bitrate,
+            pings_outstanding=client.get('ping'),
+        )
+
+    def _record_recorder_metrics(self, stream_id, msg):
+        """Record receive stats relayed by a recorder subprocess"""
+        summary = msg.get('stats')
+        if not isinstance(summary, dict):
+            return
+        peer = self.room_registry.uuid_for(stream_id) or stream_id
+        self.peer_metrics.record(peer, stream_id, 'recorder', summary)
+
     def sendMessage(self, msg): # send message to wss
         if not isinstance(msg, dict):
             typeName = type(msg).__name__
@@ -4439,12 +5007,7 @@ class WebRTCClient:
             except Exception as e:
                 try:
                     if self.password:
-                        if "candidate" in msg:
-                            msg['candidate'], msg['vector'] = encrypt_message(msg['candidate'], self.password+self.salt)
-                        if "candidates" in msg:
-                            msg['candidates'], msg['vector'] = encrypt_message(msg['candidates'], self.password+self.salt)
-                        if "description" in msg:
-                            msg['description'], msg['vector'] = encrypt_message(msg['description'], self.password+self.salt)
+                        encrypt_fields(msg, self.password+self.salt)
                             
                     msgJSON = json.dumps(msg)
                     await self.conn.send(msgJSON)
@@ -4455,12 +5018,7 @@ class WebRTCClient:
         else:
             try:
                 if self.password:
-                    if "candidate" in msg:
-                        msg['candidate'], msg['vector'] = encrypt_message(msg['candidate'], self.password+self.salt)
-                    if "candidates" in msg:
-                        msg['candidates'], msg['vector'] = encrypt_message(msg['candidates'], self.password+self.salt)
-                    if "description" in msg:
-                        msg['description'], msg['vector'] = encrypt_message(msg['description'], self.password+self.salt)
+                    encrypt_fields(msg, self.password+self.salt)
                         
                 msgJSON = json.dumps(msg)
                 await self.conn.send(msgJSON)
@@ -4469,58 +5027,66 @@ class WebRTCClient:
                 printwarn(get_exception_info(e))
 
     def setup_socket(self):
-        import socket
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind(('0.0.0.0', int(self.socketport)))
-        
+        self.socket = FrameSender(self.socket_host, int(self.socketport), unix_path=self.socket_path)
+        target = self.socket_path or f"udp://{self.socket_host}:{self.socketport}"
+        printc(f"   Socket frames ({self.socket_format}): {target}", "0F0")
+
     def on_new_socket_sample(self, sink):
         sample = sink.emit("pull-sample")
-        if sample:
+        if sample and self.socket:
             buffer = sample.get_buffer()
-            caps = sample.get_caps()
-            height = caps.get_structure(0).get_value("height")
-            width = caps.get_structure(0).get_value("width")
-            
-            _, map_info = buffer.map(Gst.MapFlags.READ)
-            frame_data = map_info.data
-            
-            # Send frame size
-            self.socket.sendto(struct.pack('!III', width, height, len(frame_data)), ('127.0.0.1', int(self.socketport)))
-            print("Sending")
-            # Send frame data in chunks
-            chunk_size = 65507  # Maximum safe UDP packet size
-            for i in range(0, len(frame_data), chunk_size):
-                chunk = frame_data[i:i+chunk_size]
-                self.socket.sendto(chunk, ('127.0.0.1', int(self.socketport)))
-            
-            buffer.unmap(map_info)
+            structure = sample.get_caps().get_structure(0)
+            height = structure.get_value("height")
+            width = structure.get_value("width")
+            success, map_info = buffer.map(Gst.MapFlags.READ)
+            if success:
+                try:
+                    self.socket.send(map_info.data, width, height, SOCKET_CODECS[self.socket_format])
+                finally:
+                    buffer.unmap(map_info)
         return Gst.FlowReturn.OK
     
+    def on_framebuffer_caps(self, pad, _pspec):
+        """Publish negotiated caps for shmsink readers; shmsink itself does not carry them."""
+        caps = pad.get_current_caps()
+        if not caps:
+            return
+        structure = caps.get_structure(0)
+        framerate = None
+        ok, num, den = structure.get_fraction("framerate")
+        if ok:
+            framerate = f"{num}/{den}"
+        try:
+            write_caps_file(
+                self.framebuffer_socket,
+                structure.get_int("width").value,
+                structure.get_int("height").value,
+                structure.get_string("format") or "BGR",
+                framerate,
+            )
+        except OSError as E:
+            printwarn(f"Could not write framebuffer caps file: {E}")
+
     def new_sample(self, sink):
         if self.processing:
             return False
         self.processing = True
         try :
             sample = sink.emit("pull-sample")
-            if sample:
+            if sample and self.frame_ring:
                 buffer = sample.get_buffer()
-                caps = sample.get_caps()
-                height = int(caps.get_structure(0).get_int("height").value)
-                width = int(caps.get_structure(0).get_int("width").value)
-                frame_data = buffer.extract_dup(0, buffer.get_size())
-                np_frame_data = np.frombuffer(frame_data, dtype=np.uint8).reshape(height, width, 3)
-                print(np.shape(np_frame_data), np_frame_data[0,0,:])
-
-                frame_shape = (1080 * 1920 * 3)
-                frame_buffer = np.ndarray(frame_shape+5, dtype=np.uint8, buffer=self.shared_memory.buf)
-                frame_buffer[5:5+width*height*3] = np_frame_data.flatten(order='K') # K means order as how ordered in memory
-                frame_buffer[0] = width//255
-                frame_buffer[1] = width%255
-                frame_buffer[2] = height//255
-                frame_buffer[3] = height%255
-                frame_buffer[4] = self.counter%255
-                self.counter+=1
-                self.trigger_socket.sendto(b"update", ("127.0.0.1", 12345))
+                structure = sample.get_caps().get_structure(0)
+                height = int(structure.get_int("height").value)
+                width = int(structure.get_int("width").value)
+                fmt = structure.get_string("format") or "BGR"
+                success, map_info = buffer.map(Gst.MapFlags.READ)
+                if success:
+                    try:
+                        pts = buffer.pts if buffer.pts != Gst.CLOCK_TIME_NONE else None
+                        # Single copy: mapped GstBuffer -> shared-memory slot
+                        self.frame_ring.write(map_info.data, width, height, map_info.size // height, fmt, pts)
+                    finally:
+                        buffer.unmap(map_info)
 
         except Exception as E:
             printwarn(get_exception_info(E))
@@ -4553,6 +5119,8 @@ class WebRTCClient:
             printc(f"   📹 HLS recording configured:", "0F0")
             printc(f"      Playlist: {base_filename}.m3u8", "0F0")
             printc(f"      Segments: {base_filename}_*.ts", "0F0")
+            if getattr(self, 'hls_part_duration', 0):
+                printwarn("   --ll-hls applies to --record-room recordings; this playlist uses regular segments")
             self.hls_base_filename = base_filename
         else:
             printc("❌ Failed to create HLS sink", "F00")
@@ -7351,8 +7919,8 @@ class WebRTCClient:
                 
                 if client and client_uuid:
                     # Add streamID to client if not present
-                    if 'streamID' not in client and client_uuid in self.room_streams:
-                        client['streamID'] = self.room_streams[client_uuid]['streamID']
+                    if 'streamID' not in client and client_uuid in self.room_registry:
+                        client['streamID'] = self.room_registry.stream_id_for(client_uuid)
                     
                     self.on_new_stream_room(client, pad)
                     return
@@ -7676,8 +8244,9 @@ class WebRTCClient:
                    pass
                 elif self.socketout:
                     print("SOCKET VIDEO OUT")
+                    encode = "jpegenc quality=85" if self.socket_format == "jpeg" else "video/x-raw,format=BGR"
                     out = Gst.parse_bin_from_description(
-                        "queue ! rtph264depay ! h264parse ! avdec_h264 ! videoconvert ! video/x-raw,format=BGR ! appsink name=appsink emit-signals=true", True)
+                        f"queue ! rtph264depay ! h264parse ! avdec_h264 ! videoconvert ! {encode} ! queue max-size-buffers=2 leaky=downstream ! appsink name=appsink emit-signals=true", True)
                     self.pipe.add(out)
                     out.sync_state_with_parent()
                     sink = out.get_static_pad('sink')
@@ -7798,10 +8367,15 @@ class WebRTCClient:
                     
                 elif self.framebuffer: ## send raw data to ffmpeg or something I guess, using the stdout?
                     print("APP SINK OUT")
+                    if self.framebuffer_socket:
+                        # Native sink: frames never pass through Python
+                        frame_sink = f"shmsink name=framesink socket-path={self.framebuffer_socket} shm-size={DEFAULT_SHM_SIZE} wait-for-connection=false sync=false async=false"
+                    else:
+                        frame_sink = "appsink name=appsink"
                     if "VP8" in name:
-                        out = Gst.parse_bin_from_description("queue ! rtpvp8depay ! queue max-size-buffers=0 max-size-time=0 ! decodebin ! videoconvert ! video/x-raw,format=BGR ! queue max-size-buffers=2 leaky=downstream ! appsink name=appsink", True)
+                        out = Gst.parse_bin_from_description(f"queue ! rtpvp8depay ! queue max-size-buffers=0 max-size-time=0 ! decodebin ! videoconvert ! video/x-raw,format=BGR ! queue max-size-buffers=2 leaky=downstream ! {frame_sink}", True)
                     elif "H264" in name:
-                        out = Gst.parse_bin_from_description("queue ! rtph264depay ! h264parse ! queue max-size-buffers=0 max-size-time=0 ! openh264dec ! videoconvert ! video/x-raw,format=BGR ! queue max-size-buffers=2 leaky=downstream ! appsink name=appsink", True)
+                        out = Gst.parse_bin_from_description(f"queue ! rtph264depay ! h264parse ! queue max-size-buffers=0 max-size-time=0 ! openh264dec ! videoconvert ! video/x-raw,format=BGR ! queue max-size-buffers=2 leaky=downstream ! {frame_sink}", True)
                     
                     self.pipe.add(out)
                     out.sync_state_with_parent()
@@ -7930,13 +8504,15 @@ class WebRTCClient:
                             return False
                         GLib.timeout_add(1000, show_recording_status)
 
-                if self.framebuffer:
-                    frame_shape = (1080, 1920, 3)
-                    size = np.prod(frame_shape) + 5  # frame bytes + 5-byte header
-                    self.shared_memory = shared_memory.SharedMemory(create=True, size=size, name='psm_raspininja_streamid')
-                    self.trigger_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) # we don't bind, as the reader will be binding
-                    print("*************")
-                    print(self.shared_memory)
+                if self.framebuffer and self.framebuffer_socket:
+                    framesink = self.pipe.get_by_name('framesink')
+                    if framesink:
+                        framesink.get_static_pad('sink').connect("notify::caps", self.on_framebuffer_caps)
+                        printc(f"   Raw frames: shmsink socket '{self.framebuffer_socket}' (caps in {caps_path(self.framebuffer_socket)})", "0F0")
+                elif self.framebuffer:
+                    if not self.frame_ring:
+                        self.frame_ring = FrameRingWriter()
+                        printc(f"   Raw frames: shared-memory ring '{self.frame_ring.name}' ({self.frame_ring.slots} slots)", "0F0")
                     appsink = self.pipe.get_by_name('appsink')
                     appsink.set_property("emit-signals", True)
                     appsink.connect("new-sample", self.new_sample)
@@ -8204,10 +8780,12 @@ class WebRTCClient:
             return
 
         atee = self.pipe.get_by_name('audiotee')
-        vtee = self.pipe.get_by_name('videotee')
+        vtee = client.get('qv_tee') or self.pipe.get_by_name('videotee')
         stale_webrtc = self.pipe.get_by_name(uuid)
         stale_qa = self.pipe.get_by_name(f"qa-{uuid}")
         stale_qv = self.pipe.get_by_name(f"qv-{uuid}")
+        stale_pay = self.pipe.get_by_name(f"pay-{uuid}")
+        client['_ladder_pending'] = None
         self._release_multiviewer_tee_branch(
             client, 'qa_tee_pad', atee, stale_qa
         )
@@ -8218,16 +8796,140 @@ class WebRTCClient:
             f"qa-{uuid}", downstream=stale_webrtc
         )
         self._remove_pipeline_element_by_name(
-            f"qv-{uuid}", downstream=stale_webrtc
+            f"qv-{uuid}", downstream=stale_pay or stale_webrtc
+        )
+        self._remove_pipeline_element_by_name(
+            f"pay-{uuid}", downstream=stale_webrtc
         )
         self._remove_pipeline_element_by_name(uuid)
         client['qa'] = None
         client['qv'] = None
+        client['qv_pay'] = None
         client['qa_tee_pad'] = None
         client['qv_tee_pad'] = None
+        client['qv_tee'] = None
         # Keep the Python reference alive for already-queued GStreamer callbacks.
         # The client generation is detached from self.clients before it can be reused.
 
+    def _update_viewer_ladder_rung(self, client, loss_value, snapshot):
+        """Move one viewer between encoder-ladder rungs instead of changing the shared encoder."""
+        current = client.get('_ladder_rung', 0)
+        available_kbps = None
+        pair = snapshot.selected_candidate_pair() if snapshot is not None else None
+        if pair is not None and pair.available_outgoing_bitrate:
+            available_kbps = pair.available_outgoing_bitrate / 1000.0
+        now = time.time()
+        target = select_ladder_rung(
+            self.encoder_ladder,
+            current,
+            loss_value,
+            available_kbps,
+            now,
+            client.get('_ladder_switch_time', 0.0),
+        )
+        if target != current and not client.get('_ladder_pending'):
+            self._switch_viewer_ladder_rung(client, target)
+
+    def _release_tee_pad_later(self, tee, pad):
+        """Release a tee request pad off the streaming thread that is probing it."""
+        def _release():
+            try:
+                tee.release_request_pad(pad)
+            except Exception as exc:
+                printwarn(f"Failed to release tee request pad: {exc}")
+
+        threading.Thread(target=_release, daemon=True).start()
+
+    def _switch_viewer_ladder_rung(self, client, target):
+        """Relink a viewer's video queue to another rung tee on that rung's next keyframe."""
+        if not self.pipe or not self._client_is_current(client):
+            return False
+        rung = self.encoder_ladder[target]
+        new_tee = self.pipe.get_by_name(rung.tee_name)
+        queue = client.get('qv')
+        if new_tee is None or queue is None:
+            return False
+        sink_pad = queue.get_static_pad('sink')
+        new_pad = request_pad_compat(new_tee, 'src_%u')
+        if new_pad is None or sink_pad is None:
+            printwarn(f"Failed to request {rung.label} ladder pad for viewer")
+            return False
+
+        old_tee = client.get('qv_tee')
+        old_pad = client.get('qv_tee_pad')
+        client['_ladder_pending'] = target
+        client['_ladder_pending_since'] = time.time()
+        direction = "down" if target > client.get('_ladder_rung', 0) else "up"
+        # The keyframe probe and the timeout race from different threads;
+        # whichever claims the switch first owns new_pad.
+        claim_lock = threading.Lock()
+        claimed = []
+
+        def _claim():
+            with claim_lock:
+                if claimed:
+                    return False
+                claimed.append(True)
+                return True
+
+        def _on_new_rung_buffer(pad, info):
+            buffer = info.get_buffer()
+            if client.get('_ladder_pending') != target or not self._client_is_current(client):
+                if _claim():
+                    GLib.source_remove(switch_timer)
+                    self._release_tee_pad_later(new_tee, pad)
+                return Gst.PadProbeReturn.REMOVE
+            if buffer is None or buffer.has_flags(Gst.BufferFlags.DELTA_UNIT):
+                return Gst.PadProbeReturn.DROP
+            if not _claim():
+                return Gst.PadProbeReturn.REMOVE
+            GLib.source_remove(switch_timer)
+            # Keyframe on the new rung: hand the viewer's queue over to it.
+            if old_pad is not None:
+                try:
+                    old_pad.unlink(sink_pad)
+                except Exception:
+                    pass
+            if pad.link(sink_pad) != Gst.PadLinkReturn.OK:
+                printwarn(f"Failed to switch viewer to {rung.label} rendition")
+                if old_pad is not None:
+                    old_pad.link(sink_pad)
+                client['_ladder_pending'] = None
+                self._release_tee_pad_later(new_tee, pad)
+                return Gst.PadProbeReturn.REMOVE
+            if old_pad is not None and old_tee is not None:
+                self._release_tee_pad_later(old_tee, old_pad)
+            client['qv_tee'] = new_tee
+            client['qv_tee_pad'] = pad
+            client['_ladder_rung'] = target
+            client['_ladder_switch_time'] = time.time()
+            client['_ladder_pending'] = None
+            printc(f"   🎚️ Viewer moved {direction} to {rung.label} ({rung.bitrate} kbps) rendition", "0AF")
+            return Gst.PadProbeReturn.REMOVE
+
+        def _on_switch_timeout():
+            if _claim():
+                new_pad.remove_probe(probe_id)
+                self._release_tee_pad_later(new_tee, new_pad)
+                if client.get('_ladder_pending') == target:
+                    client['_ladder_pending'] = None
+                    waited = time.time() - client.get('_ladder_pending_since', time.time())
+                    printwarn(f"No keyframe on {rung.label} rung after {waited:.1f}s; viewer stays on its rendition")
+            return False
+
+        switch_timer = GLib.timeout_add(int(LADDER_KEYFRAME_TIMEOUT * 1000), _on_switch_timeout)
+        probe_id = new_pad.add_probe(Gst.PadProbeType.BUFFER, _on_new_rung_buffer)
+        try:
+            new_pad.send_event(
+                Gst.Event.new_custom(
+                    Gst.EventType.CUSTOM_UPSTREAM,
+                    Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true"),
+                )
+            )
+        except Exception as exc:
+            printwarn(f"Failed to request keyframe on {rung.label} rung: {exc}")
+        return True
+
     def _add_multiviewer_element(self, client, key, element, description):
         """Add and immediately track a dynamic element so failures remain recoverable."""
         if element is None:
@@ -8460,14 +9162,20 @@ class WebRTCClient:
                 return
             if " TCP " in candidate: ##  I Can revisit another time, but for now, this isn't needed: TODO: optimize
                 return
-            icemsg = {'candidates': [{'candidate': candidate, 'sdpMLineIndex': mlineindex}], 'session':client['session'], 'type':'local', 'UUID':client['UUID']}
-            self.sendMessage(icemsg)
+            self._queue_ice_candidate(client, 'local', mlineindex, candidate)
 
         def send_ice_remote_candidate_message(_, mlineindex, candidate):
             if not self._client_is_current(client):
                 return
-            icemsg = {'candidates': [{'candidate': candidate, 'sdpMLineIndex': mlineindex}], 'session':client['session'], 'type':'remote', 'UUID':client['UUID']}
-            self.sendMessage(icemsg)
+            self._queue_ice_candidate(client, 'remote', mlineindex, candidate)
+
+        def on_ice_gathering_state(element, _pspec):
+            if not self._client_is_current(client):
+                return
+            if element.get_property('ice-gathering-state') == GstWebRTC.WebRTCICEGatheringState.COMPLETE:
+                # Nothing more is coming; do not wait out the batching window
+                for direction in ('local', 'remote'):
+                    self.ice_batcher.flush((client['UUID'], client['session'], direction))
 
         def on_signaling_state(p1, p2):
             # Signaling state changed
@@ -8510,8 +9218,7 @@ class WebRTCClient:
 
                 if client['timer'] == None:
                     client['ping'] = 0
-                    client['timer'] = threading.Timer(3, pingTimer)
-                    client['timer'].start()
+                    client['timer'] = self._register_peer_heartbeat(pingTimer, request_stats)
 
             elif state >= 4: # closed/failed
                 printc("\n🚫 Peer disconnected", "F77")
@@ -8534,13 +9241,11 @@ class WebRTCClient:
         def pingTimer():
             if not self._client_is_current(client):
                 print(f"Client {client['UUID']} was replaced, stopping pingTimer")
-                return
+                return False
 
             if not client['send_channel']:
-                client['timer'] = threading.Timer(3, pingTimer)
-                client['timer'].start()
                 print("data channel not setup yet")
-                return
+                return True
 
             if "ping" not in client:
                 client['ping'] = 0
@@ -8556,21 +9261,23 @@ class WebRTCClient:
                     printwarn(get_exception_info(e))
 
                     print("PING FAILED")
-                client['timer'] = threading.Timer(3, pingTimer)
-                client['timer'].start()
+                return True
 
-                promise = Gst.Promise.new_with_change_func(on_stats, client['webrtc'], None) # check stats
-                client['webrtc'].emit('get-stats', None, promise)
+            printc("NO HEARTBEAT", "F44")
+            if self.view:
+                print("Viewer heartbeat timeout; restarting peer connection")
+                client['ping'] = 0
+            self.stop_pipeline(client['UUID'], expected_client=client)
+            return False
 
-            else:
-                printc("NO HEARTBEAT", "F44")
-                if self.view:
-                    print("Viewer heartbeat timeout; restarting peer connection")
-                    client['ping'] = 0
-                    self.stop_pipeline(client['UUID'], expected_client=client)
-                    return
-                else:
-                    self.stop_pipeline(client['UUID'], expected_client=client)
+        def request_stats():
+            # Stats are only useful once the peer is exchanging heartbeats.
+            if not self._client_is_current(client) or not client['send_channel']:
+                return
+            if client.get('ping', 0) >= 10 or not client.get('webrtc'):
+                return
+            promise = Gst.Promise.new_with_change_func(on_stats, client['webrtc'], None) # check stats
+            client['webrtc'].emit('get-stats', None, promise)
 
         def on_data_channel(webrtc, channel):
             if not self._client_is_current(client):
@@ -8825,8 +9532,9 @@ class WebRTCClient:
             if not self._client_is_current(client):
                 return
             stats_reply = promise.get_reply()
-            stats_text = stats_reply.to_string()
-            stats_text = stats_text.replace("\\", "")
+            if stats_reply is None:
+                return
+            snapshot = parse_webrtc_stats(stats_reply)
 
             is_receive = client.get("direction") == "receive"
             current_time = time.time()
@@ -8834,145 +9542,14 @@ class WebRTCClient:
             if "_last_full_stats_log" not in client:
                 client["_last_full_stats_log"] = 0
 
-            def extract_counter(text: str, token: str) -> Optional[int]:
-                if not text:
-                    return None
-                if token in text:
-                    try:
-                        segment = text.split(token, 1)[1]
-                        return int(segment.split(",")[0].split(";")[0].strip())
-                    except Exception:
-                        pass
-                base_key = token.split("=", 1)[0] if "=" in token else token
-                if base_key:
-                    pattern = rf"{re.escape(base_key)}\s*=\s*\([^)]*\)\s*(\d+)"
-                    match = re.search(pattern, text)
-                    if match:
-                        try:
-                            return int(match.group(1))
-                        except Exception:
-                            pass
-                    fallback_pattern = rf"{re.escape(base_key)}\s*=\s*(\d+)"
-                    match = re.search(fallback_pattern, text)
-                    if match:
-                        try:
-                            return int(match.group(1))
-                        except Exception:
-                            pass
-                return None
-
-            def extract_section(text: str, patterns) -> str:
-                for pattern in patterns:
-                    if pattern in text:
-                        try:
-                            return text.split(pattern, 1)[1].split("rtp-", 1)[0]
-                        except Exception:
-                            return ""
-                return ""
-
-            def extract_counter_from_section(section: str, tokens) -> Optional[int]:
-                if not section:
-                    return None
-                for token in tokens:
-                    value = extract_counter(section, token)
-                    if value is not None:
-                        return value
-                return None
+            video_bytes_total = snapshot.kind_bytes("video", is_receive)
+            audio_bytes_total = snapshot.kind_bytes("audio", is_receive)
+            frame_width, frame_height = snapshot.frame_size()
 
-            def extract_int_from_section(section: str, pattern: str) -> Optional[int]:
-                if not section:
-                    return None
-                match = re.search(pattern, section)
-                if match:
-                    try:
-                        return int(match.group(1))
-                    except Exception:
-                        return None
-                return None
-
-            def extract_float_value(text: str, token: str) -> Optional[float]:
-                if not text:
-                    return None
-                patterns = []
-                if "=" in token:
-                    patterns.append(rf"{re.escape(token)}\s*([0-9]+(?:\.[0-9]+)?)")
-                    base_key = token.split("=", 1)[0]
-                else:
-                    base_key = token
-                if base_key:
-                    patterns.extend(
-                        [
-                            rf"{re.escape(base_key)}\s*=\s*\([^)]*\)\s*([0-9]+(?:\.[0-9]+)?)",
-                            rf"{re.escape(base_key)}\s*=\s*([0-9]+(?:\.[0-9]+)?)",
-                        ]
-                    )
-                for pattern in patterns:
-                    match = re.search(pattern, text)
-                    if match:
-                        try:
-                            return float(match.group(1))
-                        except Exception:
-                            continue
-                return None
-
-            video_patterns = [
-                "kind=(string)video",
-                "kind = (string) video",
-                "kind=(string) video",
-                "kind =(string)video",
-                "media-type=\"video\"",
-                "media-type='video'",
-            ]
-            audio_patterns = [
-                "kind=(string)audio",
-                "kind = (string) audio",
-                "kind=(string) audio",
-                "kind =(string)audio",
-                "media-type=\"audio\"",
-                "media-type='audio'",
-            ]
-            counter_tokens = ["bytes-received=(guint64)", "bytes-sent=(guint64)"]
-
-            video_section = extract_section(stats_text, video_patterns)
-            audio_section = extract_section(stats_text, audio_patterns)
-            video_bytes_total = extract_counter_from_section(video_section, counter_tokens)
-            audio_bytes_total = extract_counter_from_section(audio_section, counter_tokens)
-
-            frame_width = extract_int_from_section(video_section, r"frame-width=\(gint\)\s*(\d+)")
-            if frame_width is None:
-                frame_width = extract_int_from_section(video_section, r"frame_width=\(gint\)\s*(\d+)")
-            if frame_width is None:
-                match = re.search(r"frame[-_]width=\([^)]*\)\s*(\d+)", stats_text)
-                if match:
-                    try:
-                        frame_width = int(match.group(1))
-                    except Exception:
-                        frame_width = None
-
-            frame_height = extract_int_from_section(video_section, r"frame-height=\(gint\)\s*(\d+)")
-            if frame_height is None:
-                frame_height = extract_int_from_section(video_section, r"frame_height=\(gint\)\s*(\d+)")
-            if frame_height is None:
-                match = re.search(r"frame[-_]height=\([^)]*\)\s*(\d+)", stats_text)
-                if match:
-                    try:
-                        frame_height = int(match.group(1))
-                    except Exception:
-                        frame_height = None
-
-            bytes_token = "bytes-received=(guint64)" if is_receive else "bytes-sent=(guint64)"
-            packets_token = "packets-received=(guint64)" if is_receive else "packets-sent=(guint64)"
-            bytes_total = extract_counter(stats_text, bytes_token)
-            if bytes_total is None:
-                alt_bytes = "bytes-sent=(guint64)" if bytes_token.startswith("bytes-received") else "bytes-received=(guint64)"
-                bytes_total = extract_counter(stats_text, alt_bytes)
+            bytes_total = snapshot.total_bytes(is_receive)
             if bytes_total is None:
                 bytes_total = 0
-
-            packets_total = extract_counter(stats_text, packets_token)
-            if packets_total is None:
-                alt_packets = "packets-sent=(guint64)" if packets_token.startswith("packets-received") else "packets-received=(guint64)"
-                packets_total = extract_counter(stats_text, alt_packets)
+            packets_total = snapshot.total_packets(is_receive)
             if packets_total is None:
                 packets_total = 0
 
@@ -9079,45 +9656,8 @@ class WebRTCClient:
             raw_fraction: Optional[float] = None
             residual_fraction: Optional[float] = None
 
-            fraction_tokens = [
-                "fraction-lost=(double)",
-                "fraction_lost=(double)",
-                "fractionLost=(double)",
-                "fraction-lost",
-            ]
-            for token in fraction_tokens:
-                rtcp_loss_fraction = extract_float_value(video_section, token)
-                if rtcp_loss_fraction is not None:
-                    break
-            if rtcp_loss_fraction is None:
-                for token in fraction_tokens:
-                    rtcp_loss_fraction = extract_float_value(stats_text, token)
-                    if rtcp_loss_fraction is not None:
-                        break
-
-            loss_tokens = [
-                "packets-lost=(guint64)",
-                "packets_lost=(guint64)",
-                "packetsLost=(guint64)",
-                "packets-lost",
-            ]
-            recv_tokens = [
-                "packets-received=(guint64)",
-                "packets_received=(guint64)",
-                "packetsReceived=(guint64)",
-                "packets-received",
-            ]
-
-            lost_packets_total = extract_counter_from_section(video_section, loss_tokens)
-            recv_packets_total = extract_counter_from_section(video_section, recv_tokens)
-            if lost_packets_total is None:
-                lost_packets_total = extract_counter(stats_text, "packets-lost=(guint64)")
-                if lost_packets_total is None:
-                    lost_packets_total = extract_counter(stats_text, "packets-lost")
-            if recv_packets_total is None:
-                recv_packets_total = extract_counter(stats_text, "packets-received=(guint64)")
-                if recv_packets_total is None:
-                    recv_packets_total = extract_counter(stats_text, "packets-received")
+            rtcp_loss_fraction = snapshot.first_value("fraction_lost")
+            lost_packets_total, recv_packets_total = snapshot.loss_counters()
 
             if (
                 isinstance(lost_packets_total, int)
@@ -9137,20 +9677,9 @@ class WebRTCClient:
                     loss_value = counter_loss_fraction
                 client["_last_counter_loss"] = counter_loss_fraction
 
-            def _extract_int(pattern: str) -> Optional[int]:
-                match = re.search(pattern, stats_text)
-                if match:
-                    try:
-                        return int(match.group(1))
-                    except Exception:
-                        return None
-                return None
-
-            repaired_total = _extract_int(r"packets-repaired\s*=\s*\([^)]*\)\s*(\d+)")
-            fec_total = _extract_int(r"fec-packets-recovered\s*=\s*\([^)]*\)\s*(\d+)")
-            if fec_total is None:
-                fec_total = _extract_int(r"fec-recovered-packets\s*=\s*\([^)]*\)\s*(\d+)")
-            rtx_total = _extract_int(r"retransmitted-packets-received\s*=\s*\([^)]*\)\s*(\d+)")
+            repaired_total = snapshot.first_value("packets_repaired")
+            fec_total = snapshot.first_value("fec_packets_recovered")
+            rtx_total = snapshot.first_value("retransmitted_packets_received")
 
             fec_delta = None
             if isinstance(fec_total, int):
@@ -9624,7 +10153,10 @@ class WebRTCClient:
                 ):
                     client["_last_packet_loss_display"] = packet_loss_display
 
-            if loss_value is not None and not is_receive:
+            if loss_value is not None and not is_receive and self.encoder_ladder:
+                if self.multiviewer and not self.noqos:
+                    self._update_viewer_ladder_rung(client, loss_value, snapshot)
+            elif loss_value is not None and not is_receive:
                 skip_bitrate_adjustment = False
                 if " vp8enc " in self.pipeline:
                     skip_bitrate_adjustment = True
@@ -9658,6 +10190,8 @@ class WebRTCClient:
                             printc(f"   └─ Increasing bitrate to {int(bitrate)} kbps (good connection)", "0F0")
                             self.set_encoder_bitrate(client, int(bitrate))
 
+            self._record_peer_metrics(client, snapshot, is_receive, bitrate_calc)
+
         # Debug encoder setup for VP8
         if " vp8enc " in self.pipeline:
             printc("   └─ VP8 encoder detected in pipeline", "77F")
@@ -9813,6 +10347,10 @@ class WebRTCClient:
 
             atee = self.pipe.get_by_name('audiotee')
             vtee = self.pipe.get_by_name('videotee')
+            if self.encoder_ladder:
+                # Viewers start on the top rendition and step down on loss.
+                client['_ladder_rung'] = 0
+                client['_ladder_switch_time'] = time.time()
 
             if vtee is not None:
                 qv_name = f"qv-{uuid}"
@@ -9820,10 +10358,27 @@ class WebRTCClient:
                 if not self._add_multiviewer_element(client, 'qv', qv, f"video queue {qv_name}"):
                     self._cleanup_multiviewer_client_elements(client)
                     return
-                if not Gst.Element.link(qv, webrtc):
+                video_sink = webrtc
+                if self.encoder_ladder:
+                    # Rung tees carry encoded frames; each viewer payloads its own
+                    # copy so RTP sequence numbers survive rung switches.
+                    pay = Gst.parse_bin_from_description(
+                        ladder_payloader_description(self.encoder_ladder_codec), True
+                    )
+                    pay.set_name(f"pay-{uuid}")
+                    if not self._add_multiviewer_element(client, 'qv_pay', pay, f"video payloader pay-{uuid}"):
+                        self._cleanup_multiviewer_client_elements(client)
+                        return
+                    if not Gst.Element.link(pay, webrtc):
+                        printwarn(f"Failed to link pay-{uuid} to webrtcbin {uuid}")
+                        self._cleanup_multiviewer_client_elements(client)
+                        return
+                    video_sink = pay
+                if not Gst.Element.link(qv, video_sink):
                     printwarn(f"Failed to link {qv_name} to webrtcbin {uuid}")
                     self._cleanup_multiviewer_client_elements(client)
                     return
+                client['qv_tee'] = vtee
                 pending_tee_branches.append(
                     ('qv_tee_pad', vtee, qv, qv_name)
                 )
@@ -9863,6 +10418,7 @@ class WebRTCClient:
 
         try:
             client['webrtc'].connect('notify::ice-connection-state', on_ice_connection_state)
+            client['webrtc'].connect('notify::ice-gathering-state', on_ice_gathering_state)
             client['webrtc'].connect('notify::connection-state', on_connection_state)
             client['webrtc'].connect('notify::signaling-state', on_signaling_state)
 
@@ -9876,7 +10432,8 @@ class WebRTCClient:
             def _on_pad_added(webrtc_element, pad):
                 if not self._client_is_current(client):
                     return
-                print(f"[webrtc] Pad added: {pad.get_name()} caps={pad.get_current_caps().to_string() if pad.get_current_caps() else 'None'}")
+                if LOG.enabled(DEBUG):
+                    printdebug(f"[webrtc] Pad added: {pad.get_name()} caps={pad.get_current_caps().to_string() if pad.get_current_caps() else 'None'}")
                 self.on_incoming_stream(webrtc_element, pad)
 
             client['webrtc'].connect('pad-added', _on_pad_added)
@@ -9911,7 +10468,7 @@ class WebRTCClient:
             self.pipe.set_state(Gst.State.PLAYING)
             
         client['webrtc'].sync_state_with_parent()
-        for queue_key in ('qv', 'qa'):
+        for queue_key in ('qv_pay', 'qv', 'qa'):
             queue = client.get(queue_key)
             if queue is not None:
                 queue.sync_state_with_parent()
@@ -9929,27 +10486,54 @@ class WebRTCClient:
             
 
 
+    @staticmethod
+    def _room_recorder_files(recorder):
+        """Every file a room recorder has written, oldest first."""
+        fragments = recorder.get('fragments')
+        if fragments is not None and fragments.files:
+            return list(fragments.files)
+        return [recorder['recording_file']] if recorder.get('recording_file') else []
+
+    def _build_passthrough_recording(self, encoding_name, base, sink_name, on_rollover=None):
+        """Depayload VP8/VP9 straight into a muxer; returns ``(bin, FragmentLog)``.
+
+        A mid-stream resolution change starts a new file at the next
+        keyframe (see recording_rollover) instead of failing the muxer.
+        """
+        _depay, mux_factory, extension = PASSTHROUGH_FORMATS[encoding_name]
+        fragments = FragmentLog(base, extension, on_rollover)
+        if Gst.ElementFactory.find('splitmuxsink') is None:
+            printwarn("splitmuxsink not available; a resolution change will end this recording")
+            description = passthrough_description(encoding_name, sink_name, fragments.next_location(0))
+            return Gst.parse_bin_from_description(description, True), fragments
+
+        out = Gst.parse_bin_from_description(passthrough_description(encoding_name, sink_name), True)
+        splitmux = out.get_by_name(sink_name)
+        mux = Gst.ElementFactory.make(mux_factory, None)
+        mux.set_property('streamable', True)
+        splitmux.set_property('muxer', mux)
+        splitmux.connect('format-location', lambda _sink, fragment_id: fragments.next_location(fragment_id))
+        return out, fragments
+
     def setup_recording_pipeline(self, pad, name):
         """Set up proper recording pipeline for incoming stream"""
         print("RECORDING MODE ACTIVATED")
         timestamp = str(int(time.time()))
+        recording_bin = None
         
         try:
             # Determine codec and create appropriate pipeline
             if "VP8" in name or "vp8" in name.lower():
-                # VP8 recording - decode and re-encode to handle resolution changes
-                filename = f"{self.record}_{timestamp}.webm"
-                pipeline_str = (
-                    "queue name=rec_queue max-size-buffers=0 max-size-time=0 ! "
-                    "rtpvp8depay ! "
-                    "vp8dec ! "
-                    "videoscale ! "
-                    "video/x-raw,width=1280,height=720 ! "
-                    "vp8enc deadline=1 cpu-used=4 ! "
-                    "matroskamux name=mux streamable=true ! "
-                    f"filesink location={filename}"
+                # VP8 recording - depayload straight to WebM, new file on resolution change
+                def on_rollover(location):
+                    self.recording_files.append(location)
+                    printc(f"📐 Resolution changed - continuing in {location}", "77F")
+
+                recording_bin, fragments = self._build_passthrough_recording(
+                    'VP8', f"{self.record}_{timestamp}", 'rec_sink', on_rollover
                 )
-                print(f"Recording VP8 to: {filename} (flexible resolution)")
+                filename = fragments.first
+                print(f"Recording VP8 to: {filename} (no transcoding)")
                 
             elif "H264" in name or "h264" in name.lower():
                 # H264 can go directly to MPEG-TS
@@ -9964,14 +10548,15 @@ class WebRTCClient:
                 print(f"Recording H264 to: {filename}")
                 
             elif "VP9" in name or "vp9" in name.lower():
-                # VP9 to MKV
-                filename = f"{self.record}_{timestamp}.mkv"
-                pipeline_str = (
-                    "queue name=rec_queue ! "
-                    "rtpvp9depay ! "
-                    "matroskamux ! "
-                    f"filesink location={filename}"
+                # VP9 to MKV, new file on resolution change
+                def on_rollover(location):
+                    self.recording_files.append(location)
+                    printc(f"📐 Resolution changed - continuing in {location}", "77F")
+
+                recording_bin, fragments = self._build_passthrough_recording(
+                    'VP9', f"{self.record}_{timestamp}", 'rec_sink', on_rollover
                 )
+                filename = fragments.first
                 print(f"Recording VP9 to: {filename}")
                 
             else:
@@ -9979,7 +10564,8 @@ class WebRTCClient:
                 return False
             
             # Create recording bin
-            recording_bin = Gst.parse_bin_from_description(pipeline_str, True)
+            if recording_bin is None:
+                recording_bin = Gst.parse_bin_from_description(pipeline_str, True)
             
             # Add to pipeline
             self.pipe.add(recording_bin)
@@ -10337,6 +10923,8 @@ class WebRTCClient:
                 
             # Always remove from clients dict, even if cleanup failed
             self.clients.pop(UUID, None)
+            self._discard_ice_batches(client)
+            self.peer_metrics.remove(peer=UUID)
 
             if self.view:
                 if self.display_remote_map:
@@ -10454,7 +11042,8 @@ class WebRTCClient:
             'webrtc': None,
             'filesink': None,
             'recording': False,
-            'recording_file': None,
+            'recording_file': None,  # file being written now
+            'fragments': None,  # FragmentLog of every VP8/VP9 part
             'start_time': None,
             'ice_candidates': []  # Store candidates to send later
         }
@@ -10637,6 +11226,8 @@ class WebRTCClient:
         """Monitor ICE gathering state"""
         state = webrtc.get_property('ice-gathering-state')
         printc(f"[{recorder['stream_id']}] ICE gathering state: {state.value_name}", "77F")
+        if state == GstWebRTC.WebRTCICEGatheringState.COMPLETE and recorder.get('session_id'):
+            self.ice_batcher.flush(('room', recorder['session_id'], 'local'))
     
     def _on_room_data_channel(self, webrtc, channel, recorder):
         """Handle data channel for room recording"""
@@ -10671,41 +11262,31 @@ class WebRTCClient:
             printc(f"[{stream_id}]    📦 Direct copy (no transcoding)", "0F0")
             printc(f"[{stream_id}]    📁 Output: {recording_file}", "0FF")
             printc(f"[{stream_id}]    📐 Format: MPEG-TS container", "77F")
-        elif encoding_name == 'VP8':
-            # VP8 recording - decode and re-encode to handle resolution changes
-            recording_file = f"{self.record}_{stream_id}_{timestamp}.webm"
-            pipeline_str = (
-                f"queue max-size-buffers=0 max-size-time=0 ! "
-                f"rtpvp8depay ! "
-                f"vp8dec ! "
-                f"videoscale ! "
-                f"video/x-raw,width=1280,height=720 ! "
-                f"vp8enc deadline=1 cpu-used=4 ! "
-                f"matroskamux streamable=true ! "
-                f"filesink name=filesink_{stream_id} location={recording_file}"
-            )
-            printc(f"[{stream_id}] 🎥 ROOM VIDEO RECORDING [{encoding_name}]", "0F0")
-            printc(f"[{stream_id}]    🔄 Transcoding VP8 → VP8 (for resolution stability)", "FF0")
-            printc(f"[{stream_id}]    📁 Output: {recording_file}", "0FF")
-            printc(f"[{stream_id}]    📐 Resolution: 1280x720", "77F")
-            printc(f"[{stream_id}]    📐 Format: WebM container", "77F")
-        elif encoding_name == 'VP9':
-            recording_file = f"{self.record}_{stream_id}_{timestamp}.mkv"
-            pipeline_str = (
-                f"queue ! rtpvp9depay ! matroskamux ! "
-                f"filesink name=filesink_{stream_id} location={recording_file}"
-            )
+        elif encoding_name in PASSTHROUGH_FORMATS:
+            # VP8/VP9 - direct copy; a resolution change starts a new file at the next keyframe
+            def on_rollover(location):
+                recorder['recording_file'] = location
+                printc(f"[{stream_id}] 📐 Resolution changed - continuing in {location}", "77F")
+
+            recording_base = f"{self.record}_{stream_id}_{timestamp}"
+            recording_file = fragment_location(recording_base, PASSTHROUGH_FORMATS[encoding_name][2], 0)
+            pipeline_str = None
             printc(f"[{stream_id}] 🎥 ROOM VIDEO RECORDING [{encoding_name}]", "0F0")
             printc(f"[{stream_id}]    📦 Direct copy (no transcoding)", "0F0")
             printc(f"[{stream_id}]    📁 Output: {recording_file}", "0FF")
-            printc(f"[{stream_id}]    📐 Format: Matroska (MKV) container", "77F")
+            printc(f"[{stream_id}]    📐 Format: {'WebM' if encoding_name == 'VP8' else 'Matroska (MKV)'} container", "77F")
         else:
             printc(f"[{stream_id}] Unknown codec: {encoding_name}", "F00")
             return
         
         # Create bin from description
         try:
-            out = Gst.parse_bin_from_description(pipeline_str, True)
+            if pipeline_str is None:
+                out, recorder['fragments'] = self._build_passthrough_recording(
+                    encoding_name, recording_base, f"filesink_{stream_id}", on_rollover
+                )
+            else:
+                out = Gst.parse_bin_from_description(pipeline_str, True)
             if not out:
                 printc(f"[{stream_id}] ❌ Failed to create recording bin", "F00")
                 return
@@ -10739,14 +11320,7 @@ class WebRTCClient:
             recorder['start_time'] = time.time()
             printc(f"[{stream_id}] ✅ Recording active - writing to disk", "0F0")
             
-            # Update room_streams to show recording status
-            async def update_status():
-                async with self.room_streams_lock:
-                    for uuid, stream_info in self.room_streams.items():
-                        if stream_info.get('streamID') == stream_id:
-                            stream_info['recording'] = True
-                            break
-            asyncio.create_task(update_status())
+            self.room_registry.set_stream_state(stream_id, STATE_RECORDING)
         else:
             printc(f"[{stream_id}] ❌ Failed to link recording pipeline: {link_result}", "F00")
             # Debug info
@@ -10768,22 +11342,15 @@ class WebRTCClient:
                 printc(f"[{stream_id}] Stopping pipeline", "F77")
                 recorder['pipe'].set_state(Gst.State.NULL)
             
+            # Keep its files (every part) for the recording summary
+            self.recording_files.extend(self._room_recorder_files(recorder))
+
             # Remove from recorders
             del self.room_recorders[stream_id]
             printc(f"[{stream_id}] Removed from recorders", "F77")
         
-        # Remove from room_streams
-        async with self.room_streams_lock:
-            # Find UUID by stream_id
-            uuid_to_remove = None
-            for uuid, stream_info in self.room_streams.items():
-                if stream_info.get('streamID') == stream_id:
-                    uuid_to_remove = uuid
-                    break
-            
-            if uuid_to_remove:
-                del self.room_streams[uuid_to_remove]
-                printc(f"[{stream_id}] Removed from room streams", "F77")
+        if self.room_registry.remove_stream(stream_id):
+            printc(f"[{stream_id}] Removed from room streams", "F77")
     
     async def _process_ice_candidates(self):
         """Process ICE candidates from room recorders"""
@@ -10796,16 +11363,17 @@ class WebRTCClient:
                     session_id = self.room_recorders[stream_id].get('session_id')
                 
                 if session_id:  # Only send if we have a session
-                    await self.sendMessageAsync({
-                        'candidates': [{
-                            'candidate': candidate,
-                            'sdpMLineIndex': mlineindex
-                        }],
-                        'session': session_id,
-                        'type': 'local',  # We're sending OUR candidates, so type is 'local'
-                        'UUID': self.puuid
-                    })
-                    printc(f"[{stream_id}] Sent ICE candidate with session {session_id[:10]}...", "77F")
+                    def send_bundle(msg, stream_id=stream_id, session_id=session_id):
+                        asyncio.ensure_future(self.sendMessageAsync(msg))
+                        printc(f"[{stream_id}] Sent {len(msg['candidates'])} ICE candidate(s) with session {session_id[:10]}...", "77F")
+
+                    self.ice_batcher.add(
+                        ('room', session_id, 'local'),
+                        # We're sending OUR candidates, so type is 'local'
+                        {'session': session_id, 'type': 'local', 'UUID': self.puuid},
+                        {'candidate': candidate, 'sdpMLineIndex': mlineindex},
+                        send_bundle,
+                    )
                 else:
                     # Re-queue if no session yet
                     printc(f"[{stream_id}] No session yet, re-queueing ICE candidate", "FF0")
@@ -11102,11 +11670,14 @@ class WebRTCClient:
                 await self.cleanup_subprocess_managers()
             
             # Report recorded files if any
-            if self.recording_files:
+            recorded_files = list(self.recording_files)
+            for recorder in list(self.room_recorders.values()):
+                recorded_files.extend(self._room_recorder_files(recorder))
+            if recorded_files:
                 print("\n" + "="*60)
                 print("Recording Summary:")
                 total_size = 0
-                for f in self.recording_files:
+                for f in recorded_files:
                     if os.path.exists(f):
                         size = os.path.getsize(f)
                         total_size += size
@@ -11251,12 +11822,10 @@ class WebRTCClient:
                         self.clients[UUID]['session'] = msg['session']
                         # In room recording mode, update session mapping
                         if self.room_recording and msg['session']:
-                            # Check if this session should be mapped to a stream
-                            for stream_id in self.subprocess_managers.keys():
-                                if self.stream_id_to_uuid.get(stream_id) == UUID:
-                                    self.session_to_stream[msg['session']] = stream_id
-                                    printc(f"[Room Recording] Mapped session {msg['session']} to stream {stream_id} (from client session update)", "77F")
-                                    break
+                            stream_id = self.room_registry.stream_id_for(UUID)
+                            if stream_id in self.subprocess_managers:
+                                self.room_registry.set_session(UUID, msg['session'])
+                                printc(f"[Room Recording] Mapped session {msg['session']} to stream {stream_id} (from client session update)", "77F")
                     elif self.clients[UUID]['session'] != msg['session']:
                         # In room recording mode, different streams may have different sessions
                         if self.room_recording:
@@ -11299,12 +11868,15 @@ class WebRTCClient:
                         if self.room_recording:
                             # In room recording mode, this offer is for a stream we requested.
                             # We need to route it to the correct subprocess.
-                            stream_id = self.uuid_to_stream_id.get(UUID)
+                            stream_id = self.room_registry.stream_id_for(UUID)
                             # Get session ID from message or from client data
                             session_id = msg.get('session') or self.clients.get(UUID, {}).get('session')
 
                             if stream_id and stream_id in self.subprocess_managers:
                                 printc(f"[Subprocess] Routing offer for UUID {UUID} to stream {stream_id} (session: {session_id})", "0F0")
+                                if session_id:
+                                    self.room_registry.set_session(UUID, session_id)
+                                self.room_registry.set_state(UUID, STATE_CONNECTED)
                                 await self.handle_subprocess_offer(stream_id, sdp_data['sdp'], session_id)
                                 continue # Message handled, skip further processing
                             else:
@@ -11349,7 +11921,7 @@ class WebRTCClient:
                         candidates = [candidates]
 
                     if self.room_recording or self.single_stream_recording:
-                        stream_id = self.uuid_to_stream_id.get(UUID)
+                        stream_id = self.room_registry.stream_id_for(UUID)
                         if stream_id and stream_id in self.subprocess_managers:
                             # Route to the correct subprocess
                             printc(f"[Subprocess] Routing {len(candidates)} ICE candidate(s) for UUID {UUID} to stream {stream_id}", "77F")
@@ -11370,20 +11942,17 @@ class WebRTCClient:
                             await self.start_pipeline(UUID)
                     elif msg['request'] == 'cleanup' or msg['request'] == 'bye':
                         # Handle cleanup for recording
-                        if (self.room_recording or self.room_ndi or self.room_monitor) and UUID in self.room_streams:
+                        if (self.room_recording or self.room_ndi or self.room_monitor) and UUID in self.room_registry:
                             await self.cleanup_room_stream(UUID)
-                        elif self.single_stream_recording and UUID in self.uuid_to_stream_id:
+                        elif self.single_stream_recording and UUID in self.room_registry:
                             # Clean up single-stream recording subprocess
-                            stream_id = self.uuid_to_stream_id[UUID]
+                            stream_id = self.room_registry.stream_id_for(UUID)
                             printc(f"🧹 Cleaning up single-stream recording for {stream_id}", "F77")
                             if stream_id in self.subprocess_managers:
                                 manager = self.subprocess_managers[stream_id]
                                 await manager.stop()
                                 del self.subprocess_managers[stream_id]
-                            if UUID in self.uuid_to_stream_id:
-                                del self.uuid_to_stream_id[UUID]
-                            if stream_id in self.stream_id_to_uuid:
-                                del self.stream_id_to_uuid[stream_id]
+                            self.room_registry.remove(UUID)
                     elif msg['request'] == "play":
                         # Play request received
                         if 'streamID' in msg:
@@ -11483,6 +12052,9 @@ class WebRTCClient:
         )
         if self.room_recording or self.room_ndi:
             printc("🚀 Room recording mode - will record all streams", "0F0")
+            if self.room_recording and self.recorder_streams_per_worker > 0 and not getattr(self, 'test_mode', False):
+                # Boot a recorder worker while the play requests go out.
+                self._get_recorder_pool().warm()
             
             # Start ICE processor if not running
             if not self.ice_processor_task:
@@ -11516,16 +12088,13 @@ class WebRTCClient:
         elif self.room_monitor:
             printc("👀 Room monitor mode - tracking room join/leave events", "0AF")
             tracked = 0
-            async with self.room_streams_lock:
-                for member in room_list:
-                    if 'streamID' not in member:
-                        continue
-                    stream_id = member['streamID']
-                    uuid = member.get('UUID') or f"room_member_{stream_id}"
-
-                    if stream_id in [s['streamID'] for s in self.room_streams.values()]:
-                        continue
-                    self.room_streams[uuid] = {'streamID': stream_id, 'recording': False}
+            for member in room_list:
+                if 'streamID' not in member:
+                    continue
+                stream_id = member['streamID']
+                uuid = member.get('UUID') or f"room_member_{stream_id}"
+                _stream, created = self.room_registry.track(uuid, stream_id)
+                if created:
                     tracked += 1
 
             printc(f"Room monitor primed with {tracked} currently active stream(s)", "77F")
@@ -11540,22 +12109,10 @@ class WebRTCClient:
                     if self.stream_filter and stream_id not in self.stream_filter:
                         continue
                         
-                    # Track this stream (thread-safe)
-                    async with self.room_streams_lock:
-                        # Check if stream already exists
-                        existing_stream = False
-                        for existing_uuid, stream_info in self.room_streams.items():
-                            if stream_info.get('streamID') == stream_id:
-                                printc(f"⚠️  Stream {stream_id} already tracked (uuid: {existing_uuid})", "FF0")
-                                existing_stream = True
-                                break
-                        
-                        if not existing_stream:
-                            self.room_streams[uuid] = {
-                                'streamID': stream_id,
-                                'recording': False,
-                                'stats': {}
-                            }
+                    # Track this stream
+                    existing, created = self.room_registry.track(uuid, stream_id)
+                    if not created:
+                        printc(f"⚠️  Stream {stream_id} already tracked (uuid: {existing.uuid})", "FF0")
                     
                     # For non-room-recording mode, just play the first stream
                     if self.streamin and not self.room_recording:
@@ -11578,9 +12135,7 @@ class WebRTCClient:
         })
         
         # Mark this stream as pending connection
-        async with self.room_streams_lock:
-            if stream_uuid in self.room_streams:
-                self.room_streams[stream_uuid]['connection_requested'] = True
+        self.room_registry.set_state(stream_uuid, STATE_REQUESTED)
     
     async def create_subprocess_recorder(self, stream_id, uuid=None, request_play=True):
         """Create a subprocess recorder for a stream. The UUID is the key for routing."""
@@ -11594,15 +12149,14 @@ class WebRTCClient:
         # to the stream we are about to request. When the peer sends its offer,
         # we'll know which subprocess to route it to.
         if uuid:
-             self.uuid_to_stream_id[uuid] = stream_id
-             self.stream_id_to_uuid[stream_id] = uuid  # Add reverse mapping
+             self.room_registry.assign(uuid, stream_id)
              printc(f"[Subprocess] Mapping UUID {uuid} to stream {stream_id}", "77F")
              
              # Also map the stream ID without hash suffix for encrypted messages
              # Stream IDs in encrypted messages often come without the hash suffix
              if len(stream_id) > 8:  # Likely has a hash suffix
                  base_stream_id = stream_id[:-6] if len(stream_id) > 12 else stream_id[:8]
-                 self.stream_id_to_uuid[base_stream_id] = uuid
+                 self.room_registry.add_alias(uuid, base_stream_id)
                  printc(f"[Subprocess] Also mapping base stream ID {base_stream_id} to UUID {uuid}", "77F")
         
         default_turn = self._get_default_turn_server()
@@ -11635,6 +12189,10 @@ class WebRTCClient:
             'use_mkv': False,  # Don't use MKV subprocess for now as it has issues
             'use_hls': self.use_hls if hasattr(self, 'use_hls') else False,  # Use HLS recording
             'use_splitmuxsink': self.use_splitmux if hasattr(self, 'use_splitmux') else False,  # Use splitmuxsink
+            'single_file': self.record_single_file,  # One .mkv with video and audio
+            'hls_playlist_type': self.hls_playlist_type,
+            'hls_window': self.hls_window,
+            'hls_part_duration': self.hls_part_duration,
             'mux_format': getattr(self, 'mux_format', 'webm'),  # Default to webm
             'test_mode': getattr(self, 'test_mode', False),  # Enable test mode
             'room_ndi': self.room_ndi,  # Pass NDI mode flag
@@ -11649,11 +12207,15 @@ class WebRTCClient:
         if self.use_hls:
             printc(f"[{stream_id}] Using HLS recording format (audio+video muxing)", "0FF")
 
-        manager = WebRTCSubprocessManager(stream_id, config)
+        if self._use_recorder_pool(config):
+            manager = PooledRecorderSession(stream_id, config, self._get_recorder_pool())
+        else:
+            manager = WebRTCSubprocessManager(stream_id, config)
         manager.on_message('sdp', lambda msg: asyncio.create_task(self.send_subprocess_sdp(stream_id, msg)))
         manager.on_message('ice', lambda msg: asyncio.create_task(self.send_subprocess_ice(stream_id, msg)))
         manager.on_message('connection_state', lambda msg: printc(f"[{stream_id}] State: {msg.get('state', 'N/A')}", "77F"))
         manager.on_message('ice_state', lambda msg: printc(f"[{stream_id}] ICE: {msg.get('state', 'N/A')}", "77F"))
+        manager.on_message('stats', lambda msg: self._record_recorder_metrics(stream_id, msg))
         
         if await manager.start():
             self.subprocess_managers[stream_id] = manager
@@ -11670,17 +12232,29 @@ class WebRTCClient:
                 printc(f"[{stream_id}] Subprocess started for the incoming offer.", "0F0")
         else:
             printc(f"[{stream_id}] ❌ Failed to start subprocess.", "F00")
-            if uuid and uuid in self.uuid_to_stream_id:
-                del self.uuid_to_stream_id[uuid] # Clean up failed mapping
-                if stream_id in self.stream_id_to_uuid:
-                    del self.stream_id_to_uuid[stream_id] # Clean up reverse mapping
+            if uuid and self.room_registry.stream_id_for(uuid) == stream_id:
+                self.room_registry.remove(uuid) # Clean up failed mapping
+
+    def _use_recorder_pool(self, config):
+        """Room recorders share pooled GLib workers unless disabled or using another script."""
+        return (
+            self.room_recording
+            and self.recorder_streams_per_worker > 0
+            and not config.get('test_mode')
+            and not config.get('use_mkv')
+        )
+
+    def _get_recorder_pool(self):
+        if self.recorder_pool is None:
+            script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'webrtc_subprocess_glib.py')
+            self.recorder_pool = RecorderWorkerPool(script, self.recorder_streams_per_worker)
+        return self.recorder_pool
 
     async def route_single_stream_recording_offer(self, stream_id, uuid, offer_sdp, session_id):
         """Start a recorder for an offer that has already been received."""
         await self.create_subprocess_recorder(stream_id, uuid, request_play=False)
 
-        self.uuid_to_stream_id[uuid] = stream_id
-        self.stream_id_to_uuid[stream_id] = uuid
+        self.room_registry.assign(uuid, stream_id)
 
         if stream_id not in self.subprocess_managers:
             return False
@@ -11695,11 +12269,7 @@ class WebRTCClient:
         sdp = msg.get('sdp')
         session_id = msg.get('session_id')
         
-        uuid = None
-        for u, sid in self.uuid_to_stream_id.items():
-            if sid == stream_id:
-                uuid = u
-                break
+        uuid = self.room_registry.uuid_for(stream_id)
 
         if not uuid:
             printc(f"[{stream_id}] ❌ Cannot send SDP answer. No UUID mapping found.", "F00")
@@ -11725,26 +12295,19 @@ class WebRTCClient:
         sdp_m_line_index = msg.get('sdpMLineIndex', 0)
         session_id = msg.get('session_id')
         
-        uuid = None
-        for u, sid in self.uuid_to_stream_id.items():
-            if sid == stream_id:
-                uuid = u
-                break
+        uuid = self.room_registry.uuid_for(stream_id)
         
         if not uuid:
             printc(f"[{stream_id}] ❌ Cannot send ICE. No UUID mapping found.", "F00")
             return
 
         #printc(f"[{stream_id}] Sending ICE candidate to peer {uuid}", "77F")
-        await self.sendMessageAsync({
-            "candidates": [{
-                "candidate": candidate,
-                "sdpMLineIndex": sdp_m_line_index
-            }],
-            "UUID": uuid,
-            "session": session_id,
-            "type": "remote" # This might need to be 'local' depending on server expectation
-        })
+        self.ice_batcher.add(
+            (uuid, session_id, 'remote'),
+            {"UUID": uuid, "session": session_id, "type": "remote"}, # This might need to be 'local' depending on server expectation
+            {"candidate": candidate, "sdpMLineIndex": sdp_m_line_index},
+            lambda bundle: asyncio.ensure_future(self.sendMessageAsync(bundle)),
+        )
         
     async def handle_subprocess_offer(self, stream_id, offer_sdp, session_id):
         """Forward offer to subprocess"""
@@ -11782,7 +12345,17 @@ class WebRTCClient:
             printc(f"Stopping subprocess: {stream_id}", "77F")
             await manager.stop()
         self.subprocess_managers.clear()
+        if self.recorder_pool:
+            await self.recorder_pool.close()
+            self.recorder_pool = None
     
+    def _on_room_stream_event(self, event, stream):
+        """Log room stream lifecycle changes; joins and leaves are logged where they happen."""
+        if event == EVENT_STATE:
+            printc(f"[Room] {stream.stream_id} is now {stream.state} ({len(self.room_registry)} tracked)", "77F")
+        elif event == EVENT_LEFT:
+            self.peer_metrics.remove(stream=stream.stream_id, role='recorder')
+
     async def handle_new_room_stream(self, stream_id, uuid, source="event"):
         """Handle a new stream that has joined the room by starting a recorder for it."""
         if self.stream_filter and stream_id not in self.stream_filter:
@@ -11795,11 +12368,10 @@ class WebRTCClient:
 
         printc(f"New peer '{uuid}' with stream '{stream_id}' joined room via {source}.", "7FF")
         
-        async with self.room_streams_lock:
-            if stream_id in [s['streamID'] for s in self.room_streams.values()]:
-                 printc(f"[{stream_id}] ⚠️ Already tracking this stream. Ignoring.", "FF0")
-                 return
-            self.room_streams[uuid] = {'streamID': stream_id, 'recording': False}
+        _stream, created = self.room_registry.track(uuid, stream_id)
+        if not created:
+            printc(f"[{stream_id}] ⚠️ Already tracking this stream. Ignoring.", "FF0")
+            return
 
         if self.room_join_notifications_enabled:
             self._queue_background_task(
@@ -11870,10 +12442,7 @@ class WebRTCClient:
         pad.link(sink)
         
         client['video_recording'] = True
-        # Update room stream status (no async context in sync function)
-        # This is OK since GStreamer callbacks are serialized
-        if client['UUID'] in self.room_streams:
-            self.room_streams[client['UUID']]['recording'] = True
+        self.room_registry.set_state(client['UUID'], STATE_RECORDING)
         printc(f"Recording video for stream {stream_id}", "7F7")
     
     def setup_room_audio_recording(self, client, pad, name):
@@ -12081,10 +12650,13 @@ class WebRTCClient:
                     duration = int(time.time() - recorder['start_time'])
                     status = f"Recording ({duration}s)"
                     
-                    # Get file size if available
-                    if recorder.get('recording_file') and os.path.exists(recorder['recording_file']):
-                        size = os.path.getsize(recorder['recording_file'])
+                    # Get file size if available, over every part after resolution changes
+                    files = [f for f in self._room_recorder_files(recorder) if os.path.exists(f)]
+                    if files:
+                        size = sum(os.path.getsize(f) for f in files)
                         status += f" - {size:,} bytes"
+                        if len(files) > 1:
+                            status += f" in {len(files)} files"
                 else:
                     status = "Connecting..."
                 
@@ -12220,16 +12792,11 @@ class WebRTCClient:
     
     async def cleanup_room_stream(self, uuid):
         """Clean up resources for a disconnected room stream"""
-        async with self.room_streams_lock:
-            if uuid not in self.room_streams:
-                return
-                
-            stream_info = self.room_streams[uuid]
-            stream_id = stream_info['streamID']
-            printc(f"Cleaning up stream {stream_id}", "F77")
-            
-            # Remove from tracking
-            del self.room_streams[uuid]
+        stream_info = self.room_registry.remove(uuid)
+        if stream_info is None:
+            return
+        stream_id = stream_info.stream_id
+        printc(f"Cleaning up stream {stream_id}", "F77")
             
         # Clean up any recording pipelines
         if uuid in self.clients:
@@ -12270,6 +12837,8 @@ class WebRTCClient:
 
             # Remove from clients
             del self.clients[uuid]
+            self._discard_ice_batches(client)
+            self.peer_metrics.remove(peer=uuid)
 
 def check_plugins(needed, require=False):
     if isinstance(needed, str):
@@ -12907,6 +13476,37 @@ def normalize_video_codec_preferences(args):
         args.h264 = True
 
 
+def configure_encoder_ladder(args) -> None:
+    """Resolve --encoder-ladder into rungs, or disable it when the pipeline cannot host one."""
+    args.encoder_ladder_rungs = None
+    args.encoder_ladder_codec = None
+    spec = getattr(args, "encoder_ladder", None)
+    if not spec:
+        return
+    if not getattr(args, "multiviewer", False):
+        printwarn("--encoder-ladder only applies with --multiviewer; ignoring it")
+        return
+    unsupported = [
+        name
+        for name in ("vp9", "aom", "av1", "rav1e", "qsv", "h265", "rpicam", "z1passthru", "filesrc2", "novideo", "rtmp")
+        if getattr(args, name, False)
+    ]
+    if unsupported:
+        printwarn(f"--encoder-ladder is not available with --{unsupported[0].replace('_', '-')}; using a single encoder")
+        return
+    try:
+        heights = parse_ladder_heights(spec)
+    except ValueError as exc:
+        printwarn(f"Ignoring --encoder-ladder: {exc}")
+        return
+    rungs = build_encoder_ladder(args.width, args.height, args.bitrate, heights)
+    if len(rungs) < 2:
+        printwarn("--encoder-ladder needs at least two distinct rung heights below the capture size")
+        return
+    args.encoder_ladder_rungs = rungs
+    args.encoder_ladder_codec = "vp8" if getattr(args, "vp8", False) else "h264"
+
+
 def should_default_pi5_to_x264(args):
     """Use x264 on Pi 5 only when no explicit software/alternate codec was chosen."""
     explicit_alternative = any(
@@ -13004,6 +13604,7 @@ async def main():
     parser.add_argument('--nvidia', action='store_true', help='Creates a pipeline optimised for nvidia hardware.')
     parser.add_argument('--rpi', action='store_true', help='Creates a pipeline optimised for raspberry pi hardware encoder. Note: RPi5 has no hardware encoder and will automatically fall back to software encoding (x264). With official Pi cameras on older images, --rpicam may perform better.')
     parser.add_argument('--multiviewer', action='store_true', help='Allows for multiple viewers to watch a single encoded stream; will use more CPU and bandwidth.')
+    parser.add_argument('--encoder-ladder', type=str, nargs='?', const='1080,720,360', default=None, metavar='HEIGHTS', help='With --multiviewer: encode 2-3 renditions (default "1080,720,360") from one capture and move each viewer to the rung its packet loss allows, instead of lowering the bitrate for everyone. Software H264 (x264) or VP8 (--vp8) only.')
     parser.add_argument('--webserver', type=int, metavar='PORT', help='Enable web interface on specified port (e.g., --webserver 8080) for monitoring stats, logs, and controls.')
     parser.add_argument('--noqos', action='store_true', help='Do not try to automatically reduce video bitrate if packet loss gets too high. The default will reduce the bitrate if needed.')
     parser.add_argument('--nored', action='store_true', help='Disable error correction redundency for transmitted video. This may reduce the bandwidth used by half, but it will be more sensitive to packet loss')
@@ -13031,6 +13632,8 @@ async def main():
     parser.add_argument('--save', action='store_true', help='Save a copy of the outbound stream to disk. Publish Live + Store the video.')
     parser.add_argument('--record-room', action='store_true', help='Record all streams in a room to separate files. Requires --room parameter.')
     parser.add_argument('--record-streams', type=str, help='Comma-separated list of stream IDs to record from a room. Optional filter for --record-room.')
+    parser.add_argument('--record-single-file', action='store_true', help='With --record-room, mux each participant\'s video and Opus audio into one synchronized .mkv file instead of separate video and _audio files.')
+    parser.add_argument('--recorder-streams-per-worker', type=int, default=4, help='Room recorders hosted by each shared recorder worker process (default: 4). Use 0 to start one process per stream.')
     parser.add_argument('--room-monitor', action='store_true', help='Join a room in monitor-only mode (no play/publish). Useful for room-join alerts.')
     parser.add_argument('--join-webhook', type=str, help='POST room-join events as JSON to this webhook URL.')
     parser.add_argument('--join-postapi', type=str, help='POST room-join events using VDO.Ninja postapi format ({update:{...}}).')
@@ -13043,6 +13646,10 @@ async def main():
     parser.add_argument('--audio', action='store_true', help='Deprecated flag (audio recording is now enabled by default). Use --noaudio to disable audio recording.')
     parser.add_argument('--hls', action='store_true', help='Use HLS format for recording instead of WebM/MP4. Includes audio+video muxing and creates .m3u8 playlists.')
     parser.add_argument('--hls-splitmux', action='store_true', help='Use splitmuxsink for HLS recording (recommended) instead of hlssink.')
+    parser.add_argument('--hls-playlist-type', choices=['live', 'event', 'vod'], default='live', help='HLS playlist type: live (sliding window), event (keeps every segment) or vod (event while recording, VOD when finished). Default: live.')
+    parser.add_argument('--hls-window', type=int, default=6, help='Segments kept in a live HLS playlist (default: 6, 0 keeps all).')
+    parser.add_argument('--ll-hls', action='store_true', help='Low-Latency HLS for room recordings: adds partial segments, preload hints and blocking playlist reload (_HLS_msn/_HLS_part) on the web server.')
+    parser.add_argument('--hls-part-duration', type=float, default=0.333, help='LL-HLS partial segment duration in seconds (default: 0.333). Used with --ll-hls.')
     parser.add_argument('--room-ndi', action='store_true', help='Relay all room streams to NDI as separate sources. Requires --room parameter. Uses direct mode by default (separate audio/video streams).')
     parser.add_argument('--ndi-combine', action='store_true', help='Use NDI combiner for audio/video muxing (WARNING: Known to freeze after ~1500 buffers). Default is direct mode with separate streams.')
     parser.add_argument('--midi', action='store_true', help='Transparent MIDI bridge mode; no video or audio.')
@@ -13052,6 +13659,7 @@ async def main():
     parser.add_argument('--ndiout',  type=str, help='VDO.Ninja to NDI output; requires the NDI Gstreamer plugin installed')
     parser.add_argument('--fdsink',  type=str, help='VDO.Ninja to the stdout pipe; common for piping data between command line processes')
     parser.add_argument('--framebuffer', type=str, help='Receive a VDO.Ninja stream as raw BGR frames in shared memory; this is not an HDMI device selector')
+    parser.add_argument('--framebuffer-socket', type=str, default=None, help='With --framebuffer, deliver frames through a native GStreamer shmsink at this Unix socket path (read with shm_frames.ShmFrameReader or shmsrc) instead of the Python-fed ring')
     parser.add_argument('--v4l2sink', type=str, default=None, help='Viewer output to V4L2 device; requires --view STREAMID (accepts device index or path)')
     parser.add_argument('--v4l2sink-width', type=int, default=1280, help='V4L2 sink output width (default: 1280)')
     parser.add_argument('--v4l2sink-height', type=int, default=720, help='V4L2 sink output height (default: 720)')
@@ -13059,6 +13667,8 @@ async def main():
     parser.add_argument('--v4l2sink-format', type=str, default='YUY2', help='V4L2 sink output format (default: YUY2)')
     parser.add_argument('--v4l2sink-io-mode', type=int, default=0, help='V4L2 sink I/O mode (default: 0/auto; use 1 for rw)')
     parser.add_argument('--debug', action='store_true', help='Show added debug information from Gsteamer and other aspects of the app')
+    parser.add_argument('--log-level', type=str.lower, choices=sorted(LEVELS, key=LEVELS.get), default=None, help='Console log level (default: info, or debug with --debug)')
+    parser.add_argument('--log-rate', type=float, default=20.0, help='Max console lines per second from any one log statement after a burst of 100; excess lines are summarized (0 disables, default: 20)')
     parser.add_argument('--buffer',  type=int, default=200, help='The jitter buffer latency in milliseconds; default is 200ms, minimum is 10ms. (gst +v1.18)')
     parser.add_argument('--auto-view-buffer', action='store_true', help='Viewer mode: dynamically raise jitter buffer latency when packet loss is detected (opt-in).')
     parser.add_argument('--password', type=str, nargs='?', default="someEncryptionKey123", required=False, const='', help='Specify a custom password. If setting to false, password/encryption will be disabled.')
@@ -13070,6 +13680,9 @@ async def main():
     parser.add_argument('--clockstamp', action='store_true',  help='Add a clock overlay to the video output, if possible')
     parser.add_argument('--socketport', type=str, default=12345, help='Output video frames to a socket; specify the port number')
     parser.add_argument('--socketout', type=str, help='Output video frames to a socket; specify the stream ID')
+    parser.add_argument('--socket-host', type=str, default='127.0.0.1', help='Destination host for --socketout UDP frames (default: 127.0.0.1)')
+    parser.add_argument('--socket-path', type=str, default=None, help='Send --socketout frames over this Unix stream socket instead of UDP')
+    parser.add_argument('--socket-format', type=str, choices=['raw', 'jpeg'], default='raw', help='Frame format for --socketout: raw BGR or JPEG (default: raw)')
     parser.add_argument('--stun-server', type=str, help='STUN server URL (stun://hostname:port), or false to disable STUN')
     parser.add_argument('--turn-server', type=str, help='TURN server URL (turn(s)://username:password@host:port)')
     parser.add_argument('--ice-transport-policy', type=str, choices=['all', 'relay'], default='all', help='ICE transport policy (all or relay)')
@@ -13099,7 +13712,11 @@ async def main():
         validate_receiver_output_args(args)
     except ValueError as exc:
         parser.error(str(exc))
-    
+
+    log_level = args.log_level or ('debug' if args.debug else 'info')
+    LOG.configure(level=LEVELS[log_level], rate=max(0.0, args.log_rate))
+    LOG.start(capture_stdout=True)
+
     if args.force_h264_profile and not args.force_h264_profile_id:
         alias = args.force_h264_profile.strip().lower()
         mapped = H264_PROFILE_ALIASES.get(alias)
@@ -13243,7 +13860,7 @@ async def main():
     elif args.socketout:
         args.streamin = args.socketout
     elif args.framebuffer:
-        if not np:
+        if not np and not args.framebuffer_socket:
             print("You must install Numpy for this to work.\npip3 install numpy")
             sys.exit()
         
@@ -13544,6 +14161,7 @@ async def main():
             args.novideo = True
 
         normalize_video_codec_preferences(args)
+        configure_encoder_ladder(args)
 
         if args.vp9 and not check_plugins(["vp9enc", "rtpvp9pay"], True):
             print("VP9 publishing requires the vp9enc and rtpvp9pay GStreamer elements")
@@ -14071,6 +14689,7 @@ async def main():
                                 f'! video/x-raw,framerate=(fraction){args.framerate}/1'
                             )
 
+            ladder_active = False
             if args.filesrc2:
                 pass
             elif v4l2_h264_passthrough:
@@ -14079,6 +14698,17 @@ async def main():
                 pass
             elif args.pipein and args.pipein != "auto" and args.pipein != "raw": # We are doing a pass-thru with this pip # We are doing a pass-thru with this pipee
                 pass
+            elif args.encoder_ladder_rungs:
+                ladder_overlay = "" if timestampOverlay and timestampOverlay in pipeline_video_converter else timestampOverlay
+                pipeline_video_input += f'{pipeline_video_converter} ! videoconvert{ladder_overlay} ! video/x-raw,format=I420'
+                pipeline_video_input += build_encoder_ladder_fragment(
+                    args.encoder_ladder_rungs,
+                    args.encoder_ladder_codec,
+                    args.framerate,
+                )
+                ladder_active = True
+                rung_summary = ", ".join(f"{rung.label}@{rung.bitrate}kbps" for rung in args.encoder_ladder_rungs)
+                printc(f"   🎚️ Encoder ladder ({args.encoder_ladder_codec.upper()}): {rung_summary}", "0AF")
             elif args.h264:
                 print("h264 preferred codec is ", h264)
                 if h264 == "vtenc_h264_hw":
@@ -14173,7 +14803,15 @@ async def main():
                     # Keep normal queue before encoder
                     pipeline_video_input += f' ! videoconvert{timestampOverlay} ! queue max-size-buffers=10 ! vp8enc deadline=1 target-bitrate={args.bitrate}000 name="encoder" {saveVideo} ! rtpvp8pay ! application/x-rtp,media=video,encoding-name=VP8,payload=96'
 
+            if args.encoder_ladder_rungs and not ladder_active:
+                printwarn("This video source is passed through without re-encoding; --encoder-ladder disabled")
+                args.encoder_ladder_rungs = None
+
             redundancy_fragment, redundancy_config = build_publisher_redundancy_fragment(args)
+            if ladder_active:
+                # RED/ULPFEC wraps RTP, but ladder rungs carry encoded frames;
+                # webrtcbin still negotiates its own FEC per viewer.
+                redundancy_fragment = ""
             if redundancy_fragment:
                 if redundancy_config and not getattr(args, "_publisher_redundancy_noted", False):
                     args._publisher_redundancy_noted = True
@@ -14186,7 +14824,9 @@ async def main():
                     )
                 pipeline_video_input += redundancy_fragment
 
-            if args.multiviewer:
+            if ladder_active:
+                pass
+            elif args.multiviewer:
                 pipeline_video_input += ' ! tee name=videotee '
             else:
                 if args.lowlatency:
@@ -14425,9 +15065,7 @@ async def main():
         else:
             webserver = WebServer(args.webserver, c)
             await webserver.start()
-            # Set global reference for logging
-            global _webserver_instance
-            _webserver_instance = webserver
+            LOG.web_log = webserver.add_log
     
     # Setup signal handlers for graceful shutdown
     shutdown_event = asyncio.Event()
@@ -14471,6 +15109,7 @@ async def main():
 
     def _force_exit_due_to_timeout():
         printc("\n❌ Shutdown timeout reached, forcing exit.", "F00")
+        LOG.flush()
         os._exit(1)
 
     # Track if we're already shutting down
@@ -14488,9 +15127,11 @@ async def main():
                 force_exit_handle[0] = timer
         elif shutdown_count[0] == 2:
             printc("\n⚠️  Second interrupt, forcing shutdown...", "F00")
+            LOG.flush()
             os._exit(1)
         else:
             printc("\n❌ Force exiting...", "F00")
+            LOG.flush()
             os._exit(1)
     
     # Set up signal handlers
@@ -14531,6 +15172,7 @@ async def main():
         await asyncio.wait_for(c.cleanup_pipeline(), timeout=10)
     except asyncio.TimeoutError:
         printc("\n❌ Cleanup timed out; forcing exit.", "F00")
+        LOG.flush()
         os._exit(1)
     
     # Stop web server if running
@@ -14558,9 +15200,16 @@ async def main():
     # Web server already stopped above
     
     disableLEDs()
-    if c.shared_memory:
-        c.shared_memory.close()
-        c.shared_memory.unlink()
+    if c.frame_ring:
+        c.frame_ring.close()
+    if c.socket:
+        c.socket.close()
+    if c.framebuffer_socket:
+        try:
+            os.remove(caps_path(c.framebuffer_socket))
+        except OSError:
+            pass
+    LOG.stop()
     sys.exit(0)
     return
 
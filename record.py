@@ -15,7 +15,9 @@ from fastapi import FastAPI, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 import uvicorn
-import whisper
+
+from process_supervisor import ProcessSupervisor, QueueFull
+from transcription import DEFAULT_MODEL, TranscriptionService, TranscriptionSession
 
 
 logging.basicConfig(level=logging.INFO)
@@ -23,17 +25,25 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
-model = whisper.load_model("medium")
+# The Whisper model loads on the first transcription job, not at startup
+transcriber = TranscriptionService(DEFAULT_MODEL)
 
 PROJECT_DIR = Path(__file__).resolve().parent
 TRANSCRIPT_DIR = Path.cwd().resolve() / "stt"
 PUBLISH_SCRIPT = PROJECT_DIR / "publish.py"
 RECORD_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
 PROCESS_TIMEOUT_SECONDS = 3600
+MAX_RECORDINGS = 8
+MAX_QUEUED_RECORDINGS = 100
+
+# record ID -> live TranscriptionSession
+transcriptions = {}
+transcriptions_lock = threading.Lock()
 
-# PID -> (process, start time, record ID)
-processes = {}
-processes_lock = threading.Lock()
+# job ID -> the job's TranscriptionSession, until the job ends
+job_sessions = {}
+# job ID -> task finishing the job's transcription once publish.py has exited
+job_results = {}
 
 
 def validate_record_id(record: str) -> str:
@@ -45,40 +55,32 @@ def validate_record_id(record: str) -> str:
     return record
 
 
-def start_publish_process(room: str, record: str) -> subprocess.Popen:
+def publish_command(room: str, record: str) -> list:
     validate_record_id(record)
-    process = subprocess.Popen(
-        [sys.executable, str(PUBLISH_SCRIPT), "--room", room, "--record", record, "--novideo"],
-        cwd=Path.cwd(),
-    )
-    with processes_lock:
-        processes[process.pid] = (process, time.time(), record)
-    return process
+    return [sys.executable, str(PUBLISH_SCRIPT), "--room", room, "--record", record, "--novideo"]
 
 
-def terminate_process(process: subprocess.Popen, timeout: float = 10.0) -> None:
-    if process.poll() is not None:
-        return
-    process.terminate()
-    try:
-        process.wait(timeout=timeout)
-    except subprocess.TimeoutExpired:
-        process.kill()
-        process.wait()
+def start_publish_process(room: str, record: str) -> subprocess.Popen:
+    """Start publish.py directly, outside the supervisor (command-line use)."""
+    return subprocess.Popen(publish_command(room, record), cwd=Path.cwd())
 
 
-def claim_recording_process(process_pid: int, record: str) -> subprocess.Popen | None:
-    with processes_lock:
-        process_info = processes.get(process_pid)
-        if not process_info or process_info[2] != record:
-            return None
-        del processes[process_pid]
-        return process_info[0]
+def find_recording_job(record: str, job_id: int | None = None, process_pid: int | None = None):
+    """The supervised job for ``record``, by job ID or, for older clients, by PID."""
+    if job_id is not None:
+        job = supervisor.get(job_id)
+    elif process_pid is not None:
+        job = supervisor.find(record=record, pid=process_pid)
+    else:
+        job = None
+    if job is None or job.record != record:
+        return None
+    return job
 
 
-def find_audio_file(record: str) -> Path | None:
+def find_audio_file(record: str, since: float = 0.0) -> Path | None:
     validate_record_id(record)
-    matches = list(Path.cwd().glob(f"{record}_*_audio.ts"))
+    matches = [path for path in Path.cwd().glob(f"{record}_*_audio.ts") if path.stat().st_mtime >= since]
     return max(matches, key=lambda path: path.stat().st_mtime, default=None)
 
 
@@ -88,26 +90,107 @@ def transcript_path(record: str) -> Path:
     return TRANSCRIPT_DIR / f"{record}_speech.txt"
 
 
-def monitor_processes() -> None:
-    while True:
-        current_time = time.time()
-        expired = []
-        with processes_lock:
-            for pid, process_info in list(processes.items()):
-                process, start_time, _record = process_info
-                if process.poll() is not None:
-                    del processes[pid]
-                elif current_time - start_time > PROCESS_TIMEOUT_SECONDS:
-                    expired.append(process)
-                    del processes[pid]
-        for process in expired:
-            logger.info("Terminating process with PID: %d due to timeout", process.pid)
-            terminate_process(process)
-        time.sleep(60)
+def start_transcription(record: str, language: str | None = None) -> TranscriptionSession:
+    """Transcribe the recording's audio as it is written; replaces any earlier transcript."""
+    transcript_file = transcript_path(record)
+    transcript_file.write_text("", encoding="utf-8")
+    started = time.time()
+    session = TranscriptionSession(
+        transcriber,
+        lambda: find_audio_file(record, since=started - 1),
+        transcript_file,
+        language=language,
+    ).start()
+    with transcriptions_lock:
+        previous = transcriptions.pop(record, None)
+        transcriptions[record] = session
+    if previous is not None:
+        previous.finish(timeout=0)
+    return session
+
+
+def claim_transcription(record: str, session: TranscriptionSession | None = None) -> TranscriptionSession | None:
+    """Remove the live session for ``record`` (only if it is ``session``, when given)."""
+    with transcriptions_lock:
+        if session is not None and transcriptions.get(record) is not session:
+            return None
+        return transcriptions.pop(record, None)
+
+
+def active_transcription(record: str) -> TranscriptionSession | None:
+    with transcriptions_lock:
+        return transcriptions.get(record)
+
+
+def finish_transcription(record: str, language: str | None, session: TranscriptionSession | None = None) -> dict:
+    """Finish the live session for ``record`` (or transcribe the whole file if there is none)."""
+    if session is None:
+        session = claim_transcription(record)
+    else:
+        claim_transcription(record, session)
+    if session is not None:
+        speech = session.finish(language)
+        audio_file = session.audio_path
+        if audio_file is None:
+            logger.error("No audio file found for record ID: %s", record)
+            return {"error": f"No audio file found for record ID: {record}"}
+        if session.error is not None:
+            logger.error("Failed to transcribe audio file: %s", session.error)
+            return {"error": f"Failed to transcribe audio file: {session.error}"}
+        logger.info("Transcription completed for record ID: %s", record)
+        transcript_file = session.transcript_path
+    else:
+        audio_file = find_audio_file(record)
+        if audio_file is None:
+            logger.error("No audio file found for record ID: %s", record)
+            return {"error": f"No audio file found for record ID: {record}"}
+
+        logger.info("Transcribing audio file: %s", audio_file)
+        try:
+            speech = transcriber.transcribe_file(audio_file, language)
+            logger.info("Transcription completed for record ID: %s", record)
+        except Exception as exc:
+            logger.error("Failed to transcribe audio file: %s", exc)
+            return {"error": f"Failed to transcribe audio file: {exc}"}
+
+        transcript_file = transcript_path(record)
+        transcript_file.write_text(speech, encoding="utf-8")
+    logger.info("Transcription saved to: %s", transcript_file)
+
+    audio_file.unlink(missing_ok=True)
+    logger.info("Audio file %s removed.", audio_file)
+    return {"transcription": speech}
+
+
+def recording_finished(job) -> None:
+    """Supervisor exit handler: finish the transcription however publish.py ended.
+
+    A timed-out or crashed recording isn't stopped through /stop, so its
+    session would otherwise stay live and keep its audio file forever.
+    """
+    session = job_sessions.pop(job.id, None)
+    if session is None:
+        return
+    logger.info("publish.py job %d for record ID %s %s", job.id, job.record, job.state)
+    job_results[job.id] = asyncio.ensure_future(asyncio.to_thread(finish_transcription, job.record, None, session))
+    # Results are kept while the supervisor still lists the job
+    for job_id in [job_id for job_id in job_results if supervisor.get(job_id) is None]:
+        del job_results[job_id]
+
 
+# publish.py children: started in request order, at most MAX_RECORDINGS at once
+supervisor = ProcessSupervisor(
+    max_running=MAX_RECORDINGS,
+    timeout=PROCESS_TIMEOUT_SECONDS,
+    max_queued=MAX_QUEUED_RECORDINGS,
+    on_exit=recording_finished,
+    log=logger.warning,
+)
 
-monitor_thread = threading.Thread(target=monitor_processes, daemon=True)
-monitor_thread.start()
+
+@app.on_event("shutdown")
+async def stop_recordings():
+    await supervisor.shutdown()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -120,9 +203,15 @@ async def index(request: Request, room: str = "", record: str = ""):
 
 
 @app.api_route("/rec", methods=["GET", "POST"])
-async def start_recording(request: Request, room: str = Form(None), record: str = Form(None)):
+async def start_recording(
+    request: Request,
+    room: str = Form(None),
+    record: str = Form(None),
+    language: str = Form(None),
+):
     room = room or request.query_params.get("room")
     record = record or request.query_params.get("record")
+    language = language or request.query_params.get("language") or None
     if not room or not record:
         raise HTTPException(status_code=400, detail="Room and record parameters must not be empty")
 
@@ -133,55 +222,67 @@ async def start_recording(request: Request, room: str = Form(None), record: str
 
     logger.info("Starting recording for room: %s with record ID: %s", room, record)
     # Inherit output so logs reach the terminal or systemd journal without blocking a pipe.
-    process = start_publish_process(room, record)
-    logger.info("Started publish.py process with PID: %d", process.pid)
+    try:
+        job = supervisor.submit(publish_command(room, record), record=record, cwd=Path.cwd())
+    except QueueFull as exc:
+        logger.warning("Recording request for %s rejected: %s", record, exc)
+        raise HTTPException(status_code=503, detail="Too many recordings queued; try again later") from exc
+    logger.info("Queued publish.py job %d for record ID: %s", job.id, record)
+    job_sessions[job.id] = start_transcription(record, language)
 
     return templates.TemplateResponse(
         "recording.html",
-        {"request": request, "room": room, "record": record, "process_pid": process.pid},
+        {
+            "request": request,
+            "room": room,
+            "record": record,
+            "job_id": job.id,
+            "language": language or "",
+        },
     )
 
 
 @app.post("/stop")
 async def stop_recording(
     record: str = Form(...),
-    process_pid: int = Form(...),
     language: str = Form(...),
+    job_id: int = Form(None),
+    process_pid: int = Form(None),
 ):
     try:
         record = validate_record_id(record)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    logger.info("Stopping recording for record ID: %s with process PID: %d", record, process_pid)
-    process = claim_recording_process(process_pid, record)
-    if process is None:
+    job = find_recording_job(record, job_id, process_pid)
+    if job is None:
         raise HTTPException(status_code=404, detail="Recording process not found")
 
-    await asyncio.to_thread(terminate_process, process)
-    logger.info("Stopped publish.py process with PID: %d", process_pid)
+    session = job_sessions.get(job.id)
+    if session is not None and language:
+        session.language = language
+    logger.info("Stopping recording for record ID: %s (job %d, state %s)", record, job.id, job.state)
+    await supervisor.stop(job.id)
+    logger.info("Stopped publish.py job %d: %s", job.id, job.state)
 
-    audio_file = find_audio_file(record)
-    if audio_file is None:
-        logger.error("No audio file found for record ID: %s", record)
-        return {"error": f"No audio file found for record ID: {record}"}
+    # The exit handler has started finishing the transcription
+    result = job_results.pop(job.id, None)
+    if result is None:
+        return await asyncio.to_thread(finish_transcription, record, language)
+    return await result
 
-    logger.info("Transcribing audio file: %s", audio_file)
-    try:
-        result = await asyncio.to_thread(model.transcribe, str(audio_file), language=language)
-        speech = result["text"]
-        logger.info("Transcription completed for record ID: %s", record)
-    except Exception as exc:
-        logger.error("Failed to transcribe audio file: %s", exc)
-        return {"error": f"Failed to transcribe audio file: {exc}"}
 
-    transcript_file = transcript_path(record)
-    transcript_file.write_text(speech, encoding="utf-8")
-    logger.info("Transcription saved to: %s", transcript_file)
+@app.get("/jobs")
+async def list_jobs():
+    return supervisor.status()
 
-    audio_file.unlink()
-    logger.info("Audio file %s removed.", audio_file)
-    return {"transcription": speech}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int):
+    job = supervisor.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return supervisor.describe(job)
 
 
 @app.get("/stt")
@@ -191,6 +292,11 @@ async def get_transcription(id: str):
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+    session = active_transcription(id)
+    if session is not None:
+        # Still recording: return the text so far; it is published to IPFS once finished
+        return {"transcription": session.text, "partial": True}
+
     if not transcript_file.exists():
         logger.error("No transcription file found for record ID: %s", id)
         return JSONResponse(
@@ -232,26 +338,7 @@ def stop_recording_cli(record: str, process_pid: int, language: str):
     logger.info("Stopping recording for record ID: %s with process PID: %d", record, process_pid)
     os.kill(process_pid, signal.SIGTERM)
     logger.info("Stopped publish.py process with PID: %d", process_pid)
-
-    audio_file = find_audio_file(record)
-    if audio_file is None:
-        logger.error("No audio file found for record ID: %s", record)
-        return {"error": f"No audio file found for record ID: {record}"}
-
-    logger.info("Transcribing audio file: %s", audio_file)
-    try:
-        speech = model.transcribe(str(audio_file), language=language)["text"]
-        logger.info("Transcription completed for record ID: %s", record)
-    except Exception as exc:
-        logger.error("Failed to transcribe audio file: %s", exc)
-        return {"error": f"Failed to transcribe audio file: {exc}"}
-
-    transcript_file = transcript_path(record)
-    transcript_file.write_text(speech, encoding="utf-8")
-    logger.info("Transcription saved to: %s", transcript_file)
-    audio_file.unlink()
-    logger.info("Audio file %s removed.", audio_file)
-    return {"transcription": speech}
+    return finish_transcription(record, language)
 
 
 if __name__ == "__main__":
@@ -263,7 +350,17 @@ if __name__ == "__main__":
     parser.add_argument("--stop", action="store_true", help="Stop the recording.")
     parser.add_argument("--pid", type=int, help="Process PID to stop.")
     parser.add_argument("--language", type=str, default="en", help="Transcription language.")
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL, help="Whisper model, loaded on first use.")
+    parser.add_argument("--stt-workers", type=int, default=1, help="Transcription jobs run concurrently across recordings.")
+    parser.add_argument("--max-recordings", type=int, default=MAX_RECORDINGS, help="publish.py processes run at once; later requests wait in a queue.")
+    parser.add_argument("--max-queued", type=int, default=MAX_QUEUED_RECORDINGS, help="Recording requests allowed to wait before /rec returns 503.")
+    parser.add_argument("--recording-timeout", type=float, default=PROCESS_TIMEOUT_SECONDS, help="Seconds a recording may run before it is stopped.")
     args = parser.parse_args()
+    supervisor.max_running = max(1, args.max_recordings)
+    supervisor.max_queued = max(0, args.max_queued)
+    supervisor.timeout = args.recording_timeout
+    transcriber.model_name = args.model
+    transcriber.max_workers = max(1, args.stt_workers)
 
     if args.room and args.record and not args.stop:
         pid = start_recording_cli(args.room, args.record)
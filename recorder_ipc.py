@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    msgpack = None
+    HAS_MSGPACK = False
+
+
+# Frame header: kind, payload codec, payload length (network byte order).
+FRAME_HEADER = struct.Struct("!BBI")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+KIND_CONTROL = 1  # SDP, ICE, state and lifecycle messages
+KIND_LOG = 2  # level byte + UTF-8 text
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+CODEC_TEXT = 2
+
+LOG_LEVELS = ("debug", "info", "warning", "error")
+_LOG_LEVEL_INDEX = {name: index for index, name in enumerate(LOG_LEVELS)}
+
+# Pipe writes up to PIPE_BUF bytes are atomic, so a non-blocking log write
+# either lands whole or not at all and never tears a frame.
+LOG_FRAME_LIMIT = 4096
+
+LOG_FD_ARG = "--ipc-log-fd"
+
+
+def encode_control(msg: Dict[str, Any], use_msgpack: bool = HAS_MSGPACK) -> bytes:
+    if use_msgpack and HAS_MSGPACK:
+        payload = msgpack.packb(msg, use_bin_type=True)
+        codec = CODEC_MSGPACK
+    else:
+        payload = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+        codec = CODEC_JSON
+    if len(payload) > MAX_FRAME_BYTES:
+        raise ValueError(f"control message too large ({len(payload)} bytes)")
+    return FRAME_HEADER.pack(KIND_CONTROL, codec, len(payload)) + payload
+
+
+def encode_log(level: str, message: str) -> bytes:
+    text = message.encode("utf-8", "replace")
+    room = LOG_FRAME_LIMIT - FRAME_HEADER.size - 1
+    if len(text) > room:
+        text = text[: room - 3] + b"..."
+    payload = bytes((_LOG_LEVEL_INDEX.get(level, 1),)) + text
+    return FRAME_HEADER.pack(KIND_LOG, CODEC_TEXT, len(payload)) + payload
+
+
+def decode_payload(kind: int, codec: int, payload: bytes) -> Any:
+    """Return a dict for control frames and ``(level, text)`` for log frames."""
+    if kind == KIND_LOG:
+        level_index = payload[0] if payload else 1
+        level = LOG_LEVELS[level_index] if level_index < len(LOG_LEVELS) else "info"
+        return level, payload[1:].decode("utf-8", "replace")
+    if codec == CODEC_MSGPACK:
+        if not HAS_MSGPACK:
+            raise ValueError("received a msgpack frame but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(payload.decode("utf-8"))
+    raise ValueError(f"unknown control codec {codec}")
+
+
+class FrameDecoder:
+    """Incremental decoder for byte chunks read from a pipe."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, Any]]:
+        """Buffer ``data`` and return every frame that is now complete."""
+        self._buffer += data
+        frames = []
+        frame = self.next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self.next_frame()
+        return frames
+
+    def next_frame(self) -> Optional[Tuple[int, Any]]:
+        if len(self._buffer) < FRAME_HEADER.size:
+            return None
+        kind, codec, length = FRAME_HEADER.unpack_from(self._buffer)
+        if length > MAX_FRAME_BYTES:
+            raise ValueError(f"frame length {length} exceeds limit")
+        end = FRAME_HEADER.size + length
+        if len(self._buffer) < end:
+            return None
+        payload = bytes(self._buffer[FRAME_HEADER.size:end])
+        del self._buffer[:end]
+        return kind, decode_payload(kind, codec, payload)
+
+
+def read_control_frame(fd: int, decoder: FrameDecoder) -> Optional[Dict[str, Any]]:
+    """Block until one control frame arrives on ``fd``; later bytes stay in ``decoder``."""
+    while True:
+        frame = decoder.next_frame()
+        while frame is not None:
+            if frame[0] == KIND_CONTROL:
+                return frame[1]
+            frame = decoder.next_frame()
+        data = os.read(fd, 65536)
+        if not data:
+            return None
+        decoder._buffer += data
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Tuple[int, Any]]:
+    """Read one frame from an asyncio stream; ``None`` at EOF."""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        kind, codec, length = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_BYTES:
+            raise ValueError(f"frame length {length} exceeds limit")
+        payload = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        return None
+    return kind, decode_payload(kind, codec, payload)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.last = clock()
+
+    def allow(self) -> bool:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class ChildChannel:
+    """Child side of the IPC: framed control messages plus a rate-limited log pipe.
+
+    Control frames are written blocking so SDP/ICE are never lost. Log
+    frames go to their own non-blocking descriptor; lines over the rate
+    limit or that would block are dropped and summarised later. Each
+    stream and level has its own budget, so one noisy stream in a pooled
+    worker can't hide another's warnings. Errors bypass the rate limit.
+    """
+
+    MAX_LIMITERS = 1024
+
+    def __init__(
+        self,
+        control_fd: int,
+        log_fd: Optional[int] = None,
+        log_rate: float = 50.0,
+        log_burst: float = 200.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.control_fd = control_fd
+        self.log_fd = log_fd if log_fd is not None else control_fd
+        if log_fd is not None:
+            os.set_blocking(log_fd, False)
+        self.log_rate = log_rate
+        self.log_burst = log_burst
+        self.clock = clock
+        # (stream ID, level) -> token bucket / lines dropped since the last delivered one
+        self._limiters: Dict[Tuple[Optional[str], str], TokenBucket] = {}
+        self._suppressed: Dict[Tuple[Optional[str], str], int] = {}
+        self._control_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def send(self, msg: Dict[str, Any]) -> None:
+        frame = encode_control(msg)
+        with self._control_lock:
+            _write_all(self.control_fd, frame)
+
+    @property
+    def suppressed(self) -> int:
+        with self._log_lock:
+            return sum(self._suppressed.values())
+
+    def log(self, level: str, message: str, stream_id: Optional[str] = None) -> bool:
+        key = (stream_id, level)
+        with self._log_lock:
+            if level != "error" and not self._limiter(key).allow():
+                self._drop(key)
+                return False
+            dropped = self._suppressed.get(key, 0)
+            if dropped:
+                prefix = f"[{stream_id}] " if stream_id else ""
+                note = encode_log("warning", f"{prefix}{dropped} log line(s) suppressed by rate limit")
+                if not self._write_log(note):
+                    self._drop(key)
+                    return False
+                del self._suppressed[key]
+            if not self._write_log(encode_log(level, message)):
+                self._drop(key)
+                return False
+            return True
+
+    def _limiter(self, key: Tuple[Optional[str], str]) -> TokenBucket:
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            if len(self._limiters) >= self.MAX_LIMITERS:
+                self._limiters.clear()
+            limiter = self._limiters[key] = TokenBucket(self.log_rate, self.log_burst, self.clock)
+        return limiter
+
+    def _drop(self, key: Tuple[Optional[str], str]) -> None:
+        self._suppressed[key] = self._suppressed.get(key, 0) + 1
+
+    def _write_log(self, frame: bytes) -> bool:
+        if self.log_fd == self.control_fd:
+            with self._control_lock:
+                _write_all(self.control_fd, frame)
+            return True
+        try:
+            os.write(self.log_fd, frame)
+        except BlockingIOError:
+            return False
+        return True
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def parse_log_fd(argv: List[str]) -> Optional[int]:
+    if LOG_FD_ARG in argv:
+        index = argv.index(LOG_FD_ARG)
+        if index + 1 < len(argv):
+            return int(argv[index + 1])
+    return None
+
+
+async def spawn_framed_subprocess(*cmd: str) -> Tuple[asyncio.subprocess.Process, asyncio.StreamReader]:
+    """Start a child with piped stdio plus a dedicated log pipe; return it and the log reader."""
+    read_fd, write_fd = os.pipe()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd, LOG_FD_ARG, str(write_fd),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            pass_fds=(write_fd,),
+        )
+    except Exception:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+
+    loop = asyncio.get_running_loop()
+    log_reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(log_reader),
+        os.fdopen(read_fd, "rb", buffering=0),
+    )
+    return process, log_reader
@@ -0,0 +1,72 @@
+"""Transcode-free VP8/VP9 recording that rolls over to a new file on resolution changes.
+
+Matroska/WebM muxers refuse new video caps once the header is written,
+so a sender switching resolution used to kill the recording; the old
+workaround decoded, scaled to 1280x720 and re-encoded every frame. Here
+the depayloaded stream goes straight into ``splitmuxsink`` with no size
+or time limit. When the muxer rejects new caps, splitmuxsink closes the
+current file and opens the next one at the following keyframe. The first
+file keeps the usual name; later ones get ``_part2``, ``_part3`` and so on.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+# encoding name -> (depayloader, muxer factory, file extension)
+PASSTHROUGH_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    "VP8": ("rtpvp8depay", "webmmux", "webm"),
+    "VP9": ("rtpvp9depay", "matroskamux", "mkv"),
+}
+
+
+def fragment_location(base: str, extension: str, fragment_id: int) -> str:
+    """File name of fragment ``fragment_id`` (0-based) of a recording."""
+    if fragment_id <= 0:
+        return f"{base}.{extension}"
+    return f"{base}_part{fragment_id + 1}.{extension}"
+
+
+def passthrough_description(encoding_name: str, sink_name: str, location: Optional[str] = None) -> str:
+    """``parse_bin_from_description`` text for a passthrough recording bin.
+
+    Without ``location`` the bin ends in a splitmuxsink named ``sink_name``
+    whose ``muxer`` and ``format-location`` handler the caller sets up.
+    With ``location`` it writes one file through a plain streamable muxer,
+    for GStreamer builds without splitmuxsink.
+    """
+    depay, mux, _extension = PASSTHROUGH_FORMATS[encoding_name.upper()]
+    head = f"queue max-size-buffers=0 max-size-time=0 ! {depay} ! "
+    if location is None:
+        return head + f"splitmuxsink name={sink_name} max-size-time=0 max-size-bytes=0"
+    return head + f"{mux} streamable=true ! filesink name={sink_name} location={location}"
+
+
+class FragmentLog:
+    """Files written by one passthrough recording.
+
+    :meth:`next_location` is the splitmuxsink ``format-location`` handler;
+    it runs on the streaming thread. ``on_rollover`` is called with each
+    file after the first.
+    """
+
+    def __init__(self, base: str, extension: str, on_rollover: Optional[Callable[[str], None]] = None):
+        self.base = base
+        self.extension = extension
+        self.on_rollover = on_rollover
+        self.files: List[str] = []
+
+    @property
+    def first(self) -> str:
+        return fragment_location(self.base, self.extension, 0)
+
+    @property
+    def current(self) -> str:
+        return self.files[-1] if self.files else self.first
+
+    def next_location(self, fragment_id: int) -> str:
+        location = fragment_location(self.base, self.extension, fragment_id)
+        self.files.append(location)
+        if fragment_id > 0 and self.on_rollover is not None:
+            self.on_rollover(location)
+        return location
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Lifecycle of a room stream, in order
+STATE_LISTED = "listed"  # seen in the room listing or a join event
+STATE_REQUESTED = "requested"  # play request sent / recorder started
+STATE_CONNECTED = "connected"  # peer session known, offer routed
+STATE_RECORDING = "recording"  # media is being written
+STREAM_STATES = (STATE_LISTED, STATE_REQUESTED, STATE_CONNECTED, STATE_RECORDING)
+
+EVENT_JOINED = "joined"
+EVENT_STATE = "state"
+EVENT_LEFT = "left"
+
+Listener = Callable[[str, "RoomStream"], None]
+
+
+class RoomStream:
+    """One room member that publishes a stream."""
+
+    __slots__ = ("uuid", "stream_id", "session", "state", "aliases", "info", "joined_at", "updated_at")
+
+    def __init__(self, uuid: str, stream_id: str, state: str, now: float):
+        self.uuid = uuid
+        self.stream_id = stream_id
+        self.session: Optional[str] = None
+        self.state = state
+        self.aliases: List[str] = []
+        self.info: Dict[str, Any] = {}
+        self.joined_at = now
+        self.updated_at = now
+
+    @property
+    def recording(self) -> bool:
+        return self.state == STATE_RECORDING
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "uuid": self.uuid,
+            "streamID": self.stream_id,
+            "session": self.session,
+            "state": self.state,
+            "recording": self.recording,
+            "joined_at": self.joined_at,
+            "updated_at": self.updated_at,
+            **self.info,
+        }
+
+
+class RoomRegistry:
+    """Room streams indexed by peer UUID, stream ID (and aliases) and session.
+
+    Every lookup and update is O(1), so joins and leaves in rooms with
+    hundreds of members stay cheap. Methods are thread-safe (GStreamer
+    callbacks update recording state off the event loop). Listeners get
+    ``(event, stream)`` for joins, state changes and leaves; they run
+    outside the lock and must not raise.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._by_uuid: Dict[str, RoomStream] = {}
+        self._by_stream: Dict[str, str] = {}
+        self._by_session: Dict[str, str] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.RLock()
+        self.joined = 0
+        self.left = 0
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def _emit(self, event: str, stream: RoomStream) -> None:
+        for listener in list(self._listeners):
+            listener(event, stream)
+
+    def track(self, uuid: str, stream_id: str, state: str = STATE_LISTED) -> Tuple[RoomStream, bool]:
+        """Start tracking ``stream_id`` for ``uuid``; returns ``(stream, created)``.
+
+        A stream ID already tracked for another peer is left alone and
+        that peer's entry is returned with ``created`` False.
+        """
+        with self._lock:
+            owner = self._by_stream.get(stream_id)
+            if owner is not None:
+                return self._by_uuid[owner], False
+            replaced = self._remove(uuid)
+            stream = self._insert(uuid, stream_id, state)
+        self._announce(stream, replaced)
+        return stream, True
+
+    def assign(self, uuid: str, stream_id: str, state: str = STATE_REQUESTED) -> RoomStream:
+        """Route ``stream_id`` to ``uuid``, taking it over from any previous peer.
+
+        The state only ever moves forward for an existing entry.
+        """
+        with self._lock:
+            existing = self._by_uuid.get(uuid)
+            if existing is not None and existing.stream_id == stream_id:
+                if STREAM_STATES.index(state) <= STREAM_STATES.index(existing.state):
+                    return existing
+                existing.state = state
+                existing.updated_at = self.clock()
+                advanced = True
+            else:
+                advanced = False
+                previous = self._by_stream.get(stream_id)
+                replaced = [self._remove(previous), self._remove(uuid)]
+                stream = self._insert(uuid, stream_id, state)
+        if advanced:
+            self._emit(EVENT_STATE, existing)
+            return existing
+        self._announce(stream, *replaced)
+        return stream
+
+    def _announce(self, stream: RoomStream, *replaced: Optional[RoomStream]) -> None:
+        for old in replaced:
+            if old is not None:
+                self._emit(EVENT_LEFT, old)
+        self._emit(EVENT_JOINED, stream)
+
+    def _insert(self, uuid: str, stream_id: str, state: str) -> RoomStream:
+        stream = RoomStream(uuid, stream_id, state, self.clock())
+        self._by_uuid[uuid] = stream
+        self._by_stream[stream_id] = uuid
+        self.joined += 1
+        return stream
+
+    def _remove(self, uuid: Optional[str]) -> Optional[RoomStream]:
+        stream = self._by_uuid.pop(uuid, None) if uuid is not None else None
+        if stream is None:
+            return None
+        for stream_id in [stream.stream_id, *stream.aliases]:
+            if self._by_stream.get(stream_id) == uuid:
+                del self._by_stream[stream_id]
+        if stream.session and self._by_session.get(stream.session) == uuid:
+            del self._by_session[stream.session]
+        self.left += 1
+        return stream
+
+    def add_alias(self, uuid: str, alias: str) -> None:
+        """Also resolve ``alias`` (e.g. the stream ID without its hash suffix) to ``uuid``."""
+        with self._lock:
+            stream = self._by_uuid.get(uuid)
+            if stream is None or alias == stream.stream_id or self._by_stream.get(alias, uuid) != uuid:
+                return
+            self._by_stream[alias] = uuid
+            if alias not in stream.aliases:
+                stream.aliases.append(alias)
+
+    def set_session(self, uuid: str, session: str) -> Optional[RoomStream]:
+        with self._lock:
+            stream = self._by_uuid.get(uuid)
+            if stream is None or stream.session == session:
+                return stream
+            if stream.session and self._by_session.get(stream.session) == uuid:
+                del self._by_session[stream.session]
+            stream.session = session
+            self._by_session[session] = uuid
+            stream.updated_at = self.clock()
+        return stream
+
+    def set_state(self, uuid: str, state: str) -> Optional[RoomStream]:
+        if state not in STREAM_STATES:
+            raise ValueError(f"unknown room stream state {state!r}")
+        with self._lock:
+            stream = self._by_uuid.get(uuid)
+            if stream is None or stream.state == state:
+                return stream
+            stream.state = state
+            stream.updated_at = self.clock()
+        self._emit(EVENT_STATE, stream)
+        return stream
+
+    def set_stream_state(self, stream_id: str, state: str) -> Optional[RoomStream]:
+        uuid = self.uuid_for(stream_id)
+        return self.set_state(uuid, state) if uuid is not None else None
+
+    def remove(self, uuid: str) -> Optional[RoomStream]:
+        with self._lock:
+            stream = self._remove(uuid)
+        if stream is not None:
+            self._emit(EVENT_LEFT, stream)
+        return stream
+
+    def remove_stream(self, stream_id: str) -> Optional[RoomStream]:
+        with self._lock:
+            uuid = self._by_stream.get(stream_id)
+            stream = self._remove(uuid) if uuid is not None else None
+        if stream is not None:
+            self._emit(EVENT_LEFT, stream)
+        return stream
+
+    def get(self, uuid: str) -> Optional[RoomStream]:
+        return self._by_uuid.get(uuid)
+
+    def by_stream(self, stream_id: str) -> Optional[RoomStream]:
+        with self._lock:
+            uuid = self._by_stream.get(stream_id)
+            return self._by_uuid.get(uuid) if uuid is not None else None
+
+    def by_session(self, session: str) -> Optional[RoomStream]:
+        with self._lock:
+            uuid = self._by_session.get(session)
+            return self._by_uuid.get(uuid) if uuid is not None else None
+
+    def stream_id_for(self, uuid: str) -> Optional[str]:
+        stream = self._by_uuid.get(uuid)
+        return stream.stream_id if stream is not None else None
+
+    def uuid_for(self, stream_id: str) -> Optional[str]:
+        return self._by_stream.get(stream_id)
+
+    def has_stream(self, stream_id: str) -> bool:
+        return stream_id in self._by_stream
+
+    def streams(self) -> List[RoomStream]:
+        with self._lock:
+            return list(self._by_uuid.values())
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tracked streams per lifecycle state."""
+        result = {state: 0 for state in STREAM_STATES}
+        for stream in self.streams():
+            result[stream.state] += 1
+        return result
+
+    def __contains__(self, uuid: object) -> bool:
+        return uuid in self._by_uuid
+
+    def __len__(self) -> int:
+        return len(self._by_uuid)
+
+    def __iter__(self) -> Iterator[RoomStream]:
+        return iter(self.streams())
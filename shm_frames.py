@@ -0,0 +1,213 @@
+"""Client for frames published by GStreamer's ``shmsink`` (``--framebuffer-socket``).
+
+``shmsink`` copies each buffer into a POSIX shared-memory area and
+announces it over a Unix socket; readers map the area once and get every
+later frame as an offset into it, so nothing is copied or handled in
+Python on the publishing side. The wire format is the one ``shmsrc``
+speaks (gst-plugins-bad ``sys/shm/shmpipe.c``): a native ``CommandBuffer``
+struct per message, followed by the area path for ``NEW_SHM_AREA``.
+
+``shmsink`` does not carry caps, so the publisher keeps a small JSON
+sidecar (``<socket>.caps``) with the negotiated width, height and format,
+rewritten whenever caps change.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import json
+import mmap
+import os
+import socket
+import tempfile
+from typing import Dict, Optional
+
+COMMAND_NEW_SHM_AREA = 1
+COMMAND_CLOSE_SHM_AREA = 2
+COMMAND_NEW_BUFFER = 3
+COMMAND_ACK_BUFFER = 4
+
+CAPS_SUFFIX = ".caps"
+# Room for a few 1080p BGR frames; tmpfs only backs the pages shmsink touches
+DEFAULT_SHM_SIZE = 1920 * 1080 * 3 * 4
+
+
+class _NewShmArea(ctypes.Structure):
+    _fields_ = [("size", ctypes.c_size_t), ("path_size", ctypes.c_uint)]
+
+
+class _Buffer(ctypes.Structure):
+    _fields_ = [("offset", ctypes.c_ulong), ("bsize", ctypes.c_ulong), ("payload_size", ctypes.c_ulong)]
+
+
+class _AckBuffer(ctypes.Structure):
+    _fields_ = [("offset", ctypes.c_ulong)]
+
+
+class _Payload(ctypes.Union):
+    _fields_ = [("new_shm_area", _NewShmArea), ("buffer", _Buffer), ("ack_buffer", _AckBuffer)]
+
+
+class CommandBuffer(ctypes.Structure):
+    """``struct CommandBuffer`` with the platform's native sizes and alignment."""
+
+    _fields_ = [("type", ctypes.c_uint), ("area_id", ctypes.c_int), ("payload", _Payload)]
+
+
+COMMAND_SIZE = ctypes.sizeof(CommandBuffer)
+
+
+def caps_path(socket_path: str) -> str:
+    return socket_path + CAPS_SUFFIX
+
+
+def write_caps_file(socket_path: str, width: int, height: int, fmt: str, framerate: Optional[str] = None) -> None:
+    """Atomically (re)write the caps sidecar next to ``socket_path``."""
+    info = {"width": int(width), "height": int(height), "format": fmt}
+    if framerate:
+        info["framerate"] = framerate
+    target = caps_path(socket_path)
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(target) or ".")
+    try:
+        with os.fdopen(fd, "w") as handle:
+            json.dump(info, handle)
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ShmFrame:
+    """One frame inside a shmsink area. ``data`` is a zero-copy view.
+
+    The view is only valid until :meth:`release`, which hands the memory
+    back to the sink; copy it (``bytes(frame.data)``) to keep it longer.
+    Frames work as context managers that release on exit.
+    """
+
+    __slots__ = ("data", "width", "height", "stride", "format", "_reader", "_area_id", "_offset")
+
+    def __init__(self, reader: "ShmFrameReader", area_id: int, offset: int, data: memoryview, caps: Dict):
+        self._reader = reader
+        self._area_id = area_id
+        self._offset = offset
+        self.data = data
+        self.width = int(caps.get("width", 0))
+        self.height = int(caps.get("height", 0))
+        self.format = caps.get("format", "BGR")
+        self.stride = len(data) // self.height if self.height else 0
+
+    def to_numpy(self):
+        """Return a ``(height, width, channels)`` uint8 view without copying (needs numpy)."""
+        import numpy as np
+
+        channels = 4 if len(self.format) == 4 else 3
+        rows = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.stride)
+        return rows[:, : self.width * channels].reshape(self.height, self.width, channels)
+
+    def release(self) -> None:
+        if self._reader is None:
+            return
+        self.data.release()
+        self._reader._ack(self._area_id, self._offset)
+        self._reader = None
+
+    def __enter__(self) -> "ShmFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class ShmFrameReader:
+    """Connect to a ``shmsink`` socket and receive frames as :class:`ShmFrame`."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self._areas: Dict[int, mmap.mmap] = {}
+        self._caps: Dict = {}
+        self._caps_mtime: Optional[int] = None
+
+    def _recv_exact(self, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = self.sock.recv(size)
+            if not chunk:
+                raise ConnectionError("shmsink closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _open_area(self, area_id: int, path: str, size: int) -> None:
+        fd = os.open(f"/dev/shm/{path.lstrip('/')}", os.O_RDONLY)
+        try:
+            self._areas[area_id] = mmap.mmap(fd, size, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+
+    def _close_area(self, area_id: int) -> None:
+        area = self._areas.pop(area_id, None)
+        if area is not None:
+            try:
+                area.close()
+            except BufferError:
+                pass  # a frame view is still held; the mapping goes away with it
+
+    def caps(self) -> Dict:
+        """Current caps from the sidecar file, re-read only when it changes."""
+        try:
+            mtime = os.stat(caps_path(self.socket_path)).st_mtime_ns
+        except OSError:
+            return self._caps
+        if mtime != self._caps_mtime:
+            try:
+                with open(caps_path(self.socket_path), "r") as handle:
+                    self._caps = json.load(handle)
+                self._caps_mtime = mtime
+            except (OSError, ValueError):
+                pass
+        return self._caps
+
+    def read(self) -> ShmFrame:
+        """Block for the next frame; raises ``socket.timeout`` or ``ConnectionError``."""
+        while True:
+            command = CommandBuffer.from_buffer_copy(self._recv_exact(COMMAND_SIZE))
+            if command.type == COMMAND_NEW_SHM_AREA:
+                area = command.payload.new_shm_area
+                path = self._recv_exact(area.path_size).split(b"\0", 1)[0].decode()
+                self._open_area(command.area_id, path, area.size)
+            elif command.type == COMMAND_CLOSE_SHM_AREA:
+                self._close_area(command.area_id)
+            elif command.type == COMMAND_NEW_BUFFER:
+                buffer = command.payload.buffer
+                area = self._areas.get(command.area_id)
+                if area is None:
+                    self._ack(command.area_id, buffer.offset)
+                    continue
+                view = memoryview(area)[buffer.offset:buffer.offset + buffer.payload_size]
+                return ShmFrame(self, command.area_id, buffer.offset, view, self.caps())
+
+    def _ack(self, area_id: int, offset: int) -> None:
+        command = CommandBuffer(type=COMMAND_ACK_BUFFER, area_id=area_id)
+        command.payload.ack_buffer.offset = offset
+        try:
+            self.sock.sendall(bytes(command))
+        except OSError:
+            pass  # sink went away; nothing left to acknowledge
+
+    def close(self) -> None:
+        for area_id in list(self._areas):
+            self._close_area(area_id)
+        self.sock.close()
+
+    def __enter__(self) -> "ShmFrameReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,98 @@
+"""AES-CBC encryption of VDO.Ninja signaling payloads.
+
+Compatible with the website's ``password`` mode: the key is SHA-256 of
+password + salt, the payload is JSON, PKCS#7 padded, and both ciphertext
+and IV travel as lowercase hex. Keys (and the AES objects built from
+them) are cached per phrase, so a burst of ICE messages only pays for
+the cipher itself.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+BLOCK_SIZE = 16
+ENCRYPTED_FIELDS = ("candidate", "candidates", "description")
+
+_BACKEND = default_backend()
+
+
+@functools.lru_cache(maxsize=32)
+def generate_key(phrase: str) -> bytes:
+    return hashlib.sha256(phrase.encode()).digest()
+
+
+@functools.lru_cache(maxsize=32)
+def _algorithm(phrase: str) -> algorithms.AES:
+    return algorithms.AES(generate_key(phrase))
+
+
+def to_hex_string(byte_data: bytes) -> str:
+    return byte_data.hex()
+
+
+def to_byte_array(hex_str: str) -> bytes:
+    return bytes.fromhex(hex_str)
+
+
+def pad_message(data: bytes) -> bytes:
+    pad = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return data + bytes((pad,)) * pad
+
+
+def unpad_message(padded_message: bytes) -> Optional[bytes]:
+    if not padded_message or len(padded_message) % BLOCK_SIZE:
+        return None
+    pad = padded_message[-1]
+    if not 1 <= pad <= BLOCK_SIZE or padded_message[-pad:] != bytes((pad,)) * pad:
+        return None
+    return padded_message[:-pad]
+
+
+def _encrypt(plaintext: bytes, phrase: str, iv: bytes) -> str:
+    encryptor = Cipher(_algorithm(phrase), modes.CBC(iv), backend=_BACKEND).encryptor()
+    return (encryptor.update(pad_message(plaintext)) + encryptor.finalize()).hex()
+
+
+def encrypt_message(message: Any, phrase: str) -> Tuple[str, str]:
+    """Encrypt ``message`` (JSON-encoded first) and return ``(ciphertext_hex, iv_hex)``."""
+    iv = os.urandom(BLOCK_SIZE)
+    return _encrypt(json.dumps(message).encode("utf-8"), phrase, iv), iv.hex()
+
+
+def encrypt_fields(msg: Dict[str, Any], phrase: str, fields: Iterable[str] = ENCRYPTED_FIELDS) -> Dict[str, Any]:
+    """Encrypt each signaling field present in ``msg`` in place, sharing one ``vector``.
+
+    The protocol carries a single ``vector`` per message, so every field
+    is encrypted under the same IV. A candidate bundle (``candidates``)
+    is one JSON document and therefore one cipher operation.
+    """
+    iv = None
+    for field in fields:
+        if field in msg:
+            if iv is None:
+                iv = os.urandom(BLOCK_SIZE)
+            msg[field] = _encrypt(json.dumps(msg[field]).encode("utf-8"), phrase, iv)
+    if iv is not None:
+        msg["vector"] = iv.hex()
+    return msg
+
+
+def decrypt_message(encrypted_data: str, iv: str, phrase: str) -> Optional[str]:
+    """Return the decrypted JSON text, or None if the data, IV or password do not match."""
+    try:
+        ciphertext = bytes.fromhex(encrypted_data)
+        decryptor = Cipher(_algorithm(phrase), modes.CBC(bytes.fromhex(iv)), backend=_BACKEND).decryptor()
+        unpadded_message = unpad_message(decryptor.update(ciphertext) + decryptor.finalize())
+        if unpadded_message is None:
+            return None
+        return unpadded_message.decode("utf-8")
+    except (TypeError, UnicodeDecodeError, ValueError):
+        return None
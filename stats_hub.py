@@ -0,0 +1,186 @@
+"""Push dashboard stats to websocket subscribers from one shared sampler.
+
+A :class:`StatsHub` samples once per interval, but only while at least
+one dashboard is connected, and broadcasts one JSON message per tick to
+every subscriber. New subscribers first get a ``snapshot`` with the full
+state. After that they get ``delta`` messages with only the keys that
+changed; nested dicts are diffed recursively and lists are replaced
+whole. Keys that disappeared are listed as paths under ``removed``, so a
+stat whose value is genuinely ``null`` survives. Deltas carry absolute values,
+so applying one twice is harmless. Messages are serialized once
+per tick, so ten open dashboards cost the same sampling and encoding
+work as one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+DEFAULT_INTERVAL = 2.0
+SEND_TIMEOUT = 5.0
+
+Snapshot = Dict[str, Any]
+Sampler = Callable[[], Union[Snapshot, Awaitable[Snapshot]]]
+Send = Callable[[str], Awaitable[Any]]
+KeyPath = List[str]
+
+
+def diff_snapshot(previous: Snapshot, current: Snapshot) -> Tuple[Snapshot, List[KeyPath]]:
+    """Return ``(changes, removed)`` that turn ``previous`` into ``current`` (see module docstring)."""
+    changes: Snapshot = {}
+    removed: List[KeyPath] = []
+    _diff(previous, current, changes, removed, [])
+    return changes, removed
+
+
+def _diff(previous: Snapshot, current: Snapshot, changes: Snapshot, removed: List[KeyPath], path: KeyPath) -> None:
+    for key, value in current.items():
+        if key not in previous:
+            changes[key] = value
+            continue
+        old = previous[key]
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested: Snapshot = {}
+            _diff(old, value, nested, removed, path + [key])
+            if nested:
+                changes[key] = nested
+        elif value != old:
+            changes[key] = value
+    for key in previous:
+        if key not in current:
+            removed.append(path + [key])
+
+
+def apply_delta(state: Snapshot, changes: Snapshot, removed: List[KeyPath] = ()) -> Snapshot:
+    """Apply a :func:`diff_snapshot` result to ``state`` in place (used by tests and Python clients)."""
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(state.get(key), dict):
+            apply_delta(state[key], value)
+        else:
+            state[key] = value
+    for path in removed:
+        target: Any = state
+        for key in path[:-1]:
+            target = target.get(key) if isinstance(target, dict) else None
+        if isinstance(target, dict):
+            target.pop(path[-1], None)
+    return state
+
+
+class StatsHub:
+    """Fan out sampled stats (and extra events such as log lines) to subscribers."""
+
+    def __init__(
+        self,
+        sample: Sampler,
+        interval: float = DEFAULT_INTERVAL,
+        send_timeout: float = SEND_TIMEOUT,
+        log: Callable[[str], None] = print,
+    ):
+        self.sample = sample
+        self.interval = interval
+        self.send_timeout = send_timeout
+        self.log = log
+        self.samples_taken = 0
+        self._state: Optional[Snapshot] = None
+        self._subscribers: Set[Send] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._extras: List[Callable[[], Optional[Snapshot]]] = []
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def add_extra(self, collect: Callable[[], Optional[Snapshot]]) -> None:
+        """Call ``collect()`` every tick; a non-empty result is broadcast as its own message."""
+        self._extras.append(collect)
+
+    async def subscribe(self, send: Send) -> None:
+        """Register ``send`` and give it a full snapshot; starts the sampler if needed."""
+        if self._state is None or self._task is None:
+            await self._take_sample()
+        self._subscribers.add(send)
+        if not await self._send(send, self._encode("snapshot", stats=self._state)):
+            await self.unsubscribe(send)
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def unsubscribe(self, send: Send) -> None:
+        self._subscribers.discard(send)
+        if not self._subscribers:
+            await self.stop()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._state = None
+
+    async def resync(self, send: Send) -> None:
+        if self._state is not None:
+            await self._send(send, self._encode("snapshot", stats=self._state))
+
+    async def tick(self) -> None:
+        """Sample once and broadcast the delta and any extras."""
+        previous = self._state or {}
+        await self._take_sample()
+        messages = []
+        changes, removed = diff_snapshot(previous, self._state)
+        if removed:
+            messages.append(self._encode("delta", changes=changes, removed=removed))
+        elif changes:
+            messages.append(self._encode("delta", changes=changes))
+        for collect in self._extras:
+            extra = collect()
+            if extra:
+                messages.append(json.dumps(extra, default=str))
+        for message in messages:
+            await self.broadcast(message)
+
+    async def broadcast(self, message: str) -> None:
+        subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        results = await asyncio.gather(*(self._send(send, message) for send in subscribers))
+        for send, ok in zip(subscribers, results):
+            if not ok:
+                self._subscribers.discard(send)
+
+    async def _take_sample(self) -> None:
+        result = self.sample()
+        if inspect.isawaitable(result):
+            result = await result
+        self._state = result
+        self.samples_taken += 1
+
+    @staticmethod
+    def _encode(kind: str, **fields: Any) -> str:
+        return json.dumps({"type": kind, **fields}, default=str)
+
+    async def _send(self, send: Send, message: str) -> bool:
+        try:
+            await asyncio.wait_for(send(message), timeout=self.send_timeout)
+            return True
+        except (asyncio.TimeoutError, ConnectionError, RuntimeError):
+            return False
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            if not self._subscribers:
+                break
+            try:
+                await self.tick()
+            except Exception as exc:
+                # Keep sampling: open dashboards have turned their REST polling off
+                self.log(f"Dashboard stats update failed: {exc}")
+        self._task = None
+        self._state = None
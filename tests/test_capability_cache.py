@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from capability_cache import CapabilityCache, capability_fingerprint
+
+
+class CapabilityCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "capabilities.json")
+        self.fingerprint = {"kernel": "6.6.1", "gstreamer": "GStreamer 1.22.0", "devices": [["/dev/video11", 20491, "enc"]]}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_results_persist_across_instances(self):
+        probe = MagicMock(return_value=[True, "ok"])
+        self.assertEqual(CapabilityCache(self.path, self.fingerprint).get_or_probe("probe:enc", probe), [True, "ok"])
+
+        cache = CapabilityCache(self.path, dict(self.fingerprint))
+        self.assertEqual(cache.get_or_probe("probe:enc", probe), [True, "ok"])
+        probe.assert_called_once_with()
+
+    def test_fingerprint_change_discards_entries(self):
+        CapabilityCache(self.path, self.fingerprint).store("probe:enc", True)
+
+        changed = dict(self.fingerprint, kernel="6.6.2")
+        cache = CapabilityCache(self.path, changed)
+        self.assertEqual(cache.lookup("probe:enc"), (False, None))
+
+        with open(self.path, "w") as handle:
+            handle.write("not json")
+        self.assertEqual(CapabilityCache(self.path, self.fingerprint).entries, {})
+
+    def test_revalidation_updates_changed_hits(self):
+        CapabilityCache(self.path, self.fingerprint).store("probe:enc", [True, "ok"])
+        cache = CapabilityCache(self.path, self.fingerprint)
+        cache.get_or_probe("probe:enc", lambda: (False, "driver error"))
+
+        self.assertEqual(cache.revalidate(), {"probe:enc": ([True, "ok"], [False, "driver error"])})
+        self.assertEqual(cache.revalidate(), {})
+        with open(self.path) as handle:
+            self.assertEqual(json.load(handle)["entries"]["probe:enc"], [False, "driver error"])
+
+    def test_device_probes_are_not_revalidated(self):
+        CapabilityCache(self.path, self.fingerprint).store("probe:v4l2h264enc", [True, "ok"])
+        cache = CapabilityCache(self.path, self.fingerprint)
+        busy = MagicMock(return_value=[False, "Device or resource busy"])
+
+        self.assertEqual(cache.get_or_probe("probe:v4l2h264enc", busy, revalidate=False), [True, "ok"])
+        self.assertEqual(cache.revalidate(), {})
+        busy.assert_not_called()
+        self.assertEqual(CapabilityCache(self.path, self.fingerprint).lookup("probe:v4l2h264enc"), (True, [True, "ok"]))
+
+    def test_failed_device_probe_is_probed_again(self):
+        def succeeded(result):
+            return bool(result[0])
+
+        busy = MagicMock(return_value=[False, "probe timed out before EOS"])
+        cache = CapabilityCache(self.path, self.fingerprint)
+        self.assertEqual(cache.get_or_probe("probe:v4l2h264enc", busy, revalidate=False, cacheable=succeeded), [False, "probe timed out before EOS"])
+        self.assertEqual(cache.lookup("probe:v4l2h264enc"), (False, None))
+
+        ok = MagicMock(return_value=[True, "ok"])
+        cache = CapabilityCache(self.path, self.fingerprint)
+        self.assertEqual(cache.get_or_probe("probe:v4l2h264enc", ok, revalidate=False, cacheable=succeeded), [True, "ok"])
+        ok.assert_called_once_with()
+        self.assertEqual(CapabilityCache(self.path, self.fingerprint).lookup("probe:v4l2h264enc"), (True, [True, "ok"]))
+
+    def test_failure_stored_by_older_cache_is_probed_again(self):
+        CapabilityCache(self.path, self.fingerprint).store("probe:v4l2jpegdec", [False, "Device or resource busy"])
+        cache = CapabilityCache(self.path, self.fingerprint)
+        still_busy = MagicMock(return_value=[False, "Device or resource busy"])
+
+        cache.get_or_probe("probe:v4l2jpegdec", still_busy, revalidate=False, cacheable=lambda result: result[0])
+
+        still_busy.assert_called_once_with()
+        self.assertEqual(CapabilityCache(self.path, self.fingerprint).lookup("probe:v4l2jpegdec"), (False, None))
+
+    def test_fingerprint_is_json_round_trippable(self):
+        fingerprint = capability_fingerprint("GStreamer 1.22.0")
+
+        self.assertEqual(json.loads(json.dumps(fingerprint)), fingerprint)
+        self.assertEqual(fingerprint["gstreamer"], "GStreamer 1.22.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import asyncio
 import tempfile
 import unittest
 from pathlib import Path
@@ -69,5 +70,82 @@ class CombineRecordingDiscoveryTests(unittest.TestCase):
             )
 
 
+def probe(codec_type, start_time, codec_name):
+    return {"streams": [{"codec_type": codec_type, "codec_name": codec_name, "start_time": start_time}]}
+
+
+class CombineCommandTests(unittest.TestCase):
+    def test_h264_is_stream_copied_when_in_sync(self):
+        cmd, strategy = combine_recordings.build_ffmpeg_command(
+            "v.ts", "a.webm", "out.mp4", probe("video", "1.400000", "h264"), probe("audio", "1.400000", "opus")
+        )
+
+        self.assertEqual(cmd[:6], ["ffmpeg", "-y", "-i", "v.ts", "-i", "a.webm"])
+        self.assertIn("-c:v copy", " ".join(cmd))
+        self.assertNotIn("libx264", cmd)
+        self.assertIn("copy video", strategy)
+
+    def test_late_audio_offsets_copied_video_input(self):
+        cmd, _strategy = combine_recordings.build_ffmpeg_command(
+            "v.ts", "a.webm", "out.mp4", probe("video", "1.0", "h264"), probe("audio", "1.5", "opus")
+        )
+
+        self.assertEqual(cmd[2:6], ["-itsoffset", "0.500", "-i", "v.ts"])
+        self.assertNotIn("setpts", " ".join(cmd))
+        self.assertIn("-c:v copy", " ".join(cmd))
+
+    def test_late_video_delays_audio_with_filter(self):
+        cmd, _strategy = combine_recordings.build_ffmpeg_command(
+            "v.ts", "a.webm", "out.mp4", probe("video", "2.25", "h264"), probe("audio", "2.0", "opus")
+        )
+
+        self.assertIn("[1:a]adelay=250|250[delayed]", cmd)
+        self.assertIn("-c:v copy", " ".join(cmd))
+
+    def test_vp8_and_reencode_flag_use_libx264(self):
+        for video_info, copy_video in ((probe("video", "1.0", "vp8"), True), (probe("video", "1.0", "h264"), False)):
+            cmd, strategy = combine_recordings.build_ffmpeg_command(
+                "v.webm", "a.webm", "out.mp4", video_info, probe("audio", "1.5", "opus"), copy_video
+            )
+            self.assertIn("libx264", cmd)
+            self.assertIn("[0:v]setpts=PTS+0.5/TB[delayed_video]", cmd)
+            self.assertNotIn("-itsoffset", cmd)
+            self.assertIn("re-encode video", strategy)
+
+    def test_missing_probe_data_defaults_to_zero_start(self):
+        self.assertEqual(combine_recordings.stream_start_time(None), 0.0)
+        self.assertEqual(combine_recordings.stream_start_time({"streams": [{"codec_type": "video", "start_time": "N/A"}]}), 0.0)
+
+
+class CombinePairsTests(unittest.TestCase):
+    def test_pairs_run_through_bounded_pool(self):
+        running = 0
+        peak = 0
+        calls = []
+
+        async def fake_combine(video_file, audio_file, output_file, copy_video=True, log=print):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            calls.append(output_file.name)
+            return True
+
+        original = combine_recordings.combine_files
+        combine_recordings.combine_files = fake_combine
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                pairs = [(Path(directory, f"cam{i}_1700000000.ts"), Path(directory, f"cam{i}_1700000000_audio.webm")) for i in range(5)]
+                Path(directory, "combined_cam0_1700000000.mp4").touch()
+                count = asyncio.run(combine_recordings.combine_pairs(pairs, directory, jobs=2))
+        finally:
+            combine_recordings.combine_files = original
+
+        self.assertEqual(count, 4)
+        self.assertEqual(peak, 2)
+        self.assertNotIn("combined_cam0_1700000000.mp4", calls)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -107,6 +107,12 @@ class DisplaySelectionTests(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "expects a VDO.Ninja stream ID"):
             publish.validate_receiver_output_args(args)
 
+    def test_framebuffer_socket_requires_framebuffer(self):
+        args = SimpleNamespace(view="illinois-tv", framebuffer=None, framebuffer_socket="/tmp/frames.sock")
+
+        with self.assertRaisesRegex(ValueError, "only applies to --framebuffer"):
+            publish.validate_receiver_output_args(args)
+
     def test_viewer_retry_delays_must_be_finite(self):
         for value in (float("nan"), float("inf"), float("-inf")):
             with self.subTest(value=value):
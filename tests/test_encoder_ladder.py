@@ -0,0 +1,65 @@
+import unittest
+
+from encoder_ladder import (
+    LADDER_HOLD_SECONDS,
+    build_encoder_ladder,
+    build_encoder_ladder_fragment,
+    parse_ladder_heights,
+    select_ladder_rung,
+)
+
+
+class EncoderLadderTests(unittest.TestCase):
+    def test_parse_heights_defaults_and_sorts(self):
+        self.assertEqual(parse_ladder_heights(None), [1080, 720, 360])
+        self.assertEqual(parse_ladder_heights("360p,720"), [720, 360])
+        with self.assertRaises(ValueError):
+            parse_ladder_heights("720")
+        with self.assertRaises(ValueError):
+            parse_ladder_heights("1080,720,480,360")
+
+    def test_rungs_scale_resolution_and_bitrate(self):
+        rungs = build_encoder_ladder(1920, 1080, 4000, [1080, 720, 360])
+
+        self.assertEqual([(rung.width, rung.height) for rung in rungs], [(1920, 1080), (1280, 720), (640, 360)])
+        self.assertEqual(rungs[0].bitrate, 4000)
+        self.assertTrue(rungs[0].bitrate > rungs[1].bitrate > rungs[2].bitrate)
+        self.assertEqual([rung.tee_name for rung in rungs], ["videotee", "videotee_1", "videotee_2"])
+
+    def test_rungs_above_source_height_collapse(self):
+        rungs = build_encoder_ladder(1280, 720, 2500, [1080, 720, 360])
+
+        self.assertEqual([rung.height for rung in rungs], [720, 360])
+
+    def test_fragment_has_one_encoder_and_tee_per_rung(self):
+        rungs = build_encoder_ladder(1280, 720, 2500, [720, 360])
+        fragment = build_encoder_ladder_fragment(rungs, "h264", 30)
+
+        self.assertTrue(fragment.startswith(" ! tee name=laddersrc"))
+        self.assertIn("x264enc name=ladderenc0", fragment)
+        self.assertIn("x264enc name=ladderenc1", fragment)
+        self.assertIn("tee name=videotee allow-not-linked=true", fragment)
+        self.assertIn("tee name=videotee_1 allow-not-linked=true", fragment)
+        self.assertIn("vp8enc", build_encoder_ladder_fragment(rungs, "vp8", 30))
+        with self.assertRaises(ValueError):
+            build_encoder_ladder_fragment(rungs, "av1", 30)
+
+    def test_select_rung_steps_down_on_loss_and_bandwidth(self):
+        rungs = build_encoder_ladder(1920, 1080, 4000, [1080, 720, 360])
+
+        self.assertEqual(select_ladder_rung(rungs, 0, 0.08, None, 100.0, 99.0), 1)
+        self.assertEqual(select_ladder_rung(rungs, 2, 0.5, None, 100.0, 0.0), 2)
+        self.assertEqual(select_ladder_rung(rungs, 0, 0.0, rungs[2].bitrate + 1, 100.0, 99.0), 2)
+
+    def test_select_rung_steps_up_only_after_hold(self):
+        rungs = build_encoder_ladder(1920, 1080, 4000, [1080, 720, 360])
+        now = 1000.0
+
+        self.assertEqual(select_ladder_rung(rungs, 2, 0.0, None, now, now - 1.0), 2)
+        self.assertEqual(select_ladder_rung(rungs, 2, 0.0, None, now, now - LADDER_HOLD_SECONDS), 1)
+        self.assertEqual(select_ladder_rung(rungs, 2, 0.03, None, now, 0.0), 2)
+        self.assertEqual(select_ladder_rung(rungs, 1, 0.0, rungs[0].bitrate, now, 0.0), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import struct
+import unittest
+
+from frame_ring import (
+    RING_HEADER_SIZE,
+    FrameRingClosed,
+    FrameRingReader,
+    FrameRingWriter,
+)
+
+
+class FrameRingTests(unittest.TestCase):
+    def setUp(self):
+        self.name = f"rn_test_ring_{os.getpid()}"
+        self.writer = FrameRingWriter(self.name, slots=3, capacity=64)
+        self.reader = FrameRingReader(self.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def test_reader_gets_latest_complete_frame_with_header(self):
+        self.writer.write(b"\x01" * 48, 4, 4, fmt="BGR", pts=1000)
+        self.writer.write(b"\x02" * 48, 4, 4, stride=12, fmt="BGR")
+
+        frame = self.reader.read(timeout=0)
+        self.assertEqual((frame.number, frame.width, frame.height, frame.stride), (2, 4, 4, 12))
+        self.assertEqual(frame.format, "BGR")
+        self.assertIsNone(frame.pts)
+        self.assertEqual(frame.data, b"\x02" * 48)
+        self.assertIsNone(self.reader.read(timeout=0))
+
+    def test_slot_being_written_is_not_returned(self):
+        number = self.writer.write(b"\x03" * 48, 4, 4, pts=5)
+        offset = RING_HEADER_SIZE + (number % self.writer.slots) * (64 + 64)
+        sequence = struct.unpack_from("<Q", self.writer.shm.buf, offset)[0]
+        struct.pack_into("<Q", self.writer.shm.buf, offset, sequence + 1)
+
+        self.assertIsNone(self.reader.read(timeout=0.01))
+
+        struct.pack_into("<Q", self.writer.shm.buf, offset, sequence + 2)
+        self.assertEqual(self.reader.read(timeout=0).pts, 5)
+
+    def test_larger_frame_replaces_ring(self):
+        self.writer.write(b"\x04" * 1000, 20, 10)
+
+        with self.assertRaises(FrameRingClosed):
+            self.reader.read(timeout=0)
+        self.reader.close()
+        self.reader = FrameRingReader.open(self.name, timeout=1)
+        frame = self.reader.read(timeout=0)
+        self.assertEqual((frame.number, len(frame.data), frame.stride), (1, 1000, 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
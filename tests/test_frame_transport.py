@@ -0,0 +1,109 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from frame_transport import (
+    CHUNK_HEADER,
+    CODEC_JPEG,
+    FrameAssembler,
+    FrameReceiver,
+    FrameSender,
+    pack_header,
+    parse_header,
+)
+
+
+def chunks(frame_id, data, chunk_size, width=4, height=2):
+    count = -(-len(data) // chunk_size)
+    for index in range(count):
+        offset = index * chunk_size
+        header = parse_header(pack_header(0, frame_id, index, count, offset, len(data), width, height))
+        yield header, data[offset:offset + chunk_size]
+
+
+class FrameAssemblerTests(unittest.TestCase):
+    def test_out_of_order_chunks_complete_a_frame(self):
+        assembler = FrameAssembler()
+        parts = list(chunks(1, bytes(range(24)), 10))
+
+        self.assertIsNone(assembler.add(*parts[2]))
+        self.assertIsNone(assembler.add(*parts[0]))
+        frame = assembler.add(*parts[1])
+
+        self.assertEqual((frame.frame_id, frame.width, frame.height, frame.stride), (1, 4, 2, 12))
+        self.assertEqual(frame.data, bytes(range(24)))
+
+    def test_incomplete_frame_is_dropped_when_a_newer_one_completes(self):
+        assembler = FrameAssembler()
+        first = list(chunks(1, b"a" * 20, 10))
+        second = list(chunks(2, b"b" * 20, 10))
+
+        assembler.add(*first[0])
+        assembler.add(*second[0])
+        self.assertEqual(assembler.add(*second[1]).frame_id, 2)
+        self.assertIsNone(assembler.add(*first[1]))  # too late
+        self.assertEqual(assembler.frames_dropped, 1)
+        self.assertEqual(assembler.frames_completed, 1)
+
+    def test_frame_ids_wrap_around(self):
+        assembler = FrameAssembler()
+        for frame_id in (0xFFFFFFFF, 0):
+            for header, chunk in chunks(frame_id, b"x" * 8, 8):
+                self.assertEqual(assembler.add(header, chunk).frame_id, frame_id)
+        self.assertEqual(assembler.frames_dropped, 0)
+
+    def test_foreign_datagrams_are_ignored(self):
+        self.assertIsNone(parse_header(b"hello"))
+        self.assertIsNone(parse_header(b"XX" + bytes(CHUNK_HEADER.size)))
+
+
+class FrameTransportTests(unittest.TestCase):
+    def round_trip(self, receiver, sender, frames):
+        received = []
+        thread = threading.Thread(target=lambda: received.extend(receiver.receive() for _ in frames))
+        thread.start()
+        for data in frames:
+            self.assertTrue(sender.send(data, 160, 100, CODEC_JPEG))
+        thread.join()
+        return received
+
+    def test_udp_sendmmsg_and_fallback(self):
+        receiver = FrameReceiver("127.0.0.1", 0, timeout=5)
+        self.addCleanup(receiver.close)
+        port = receiver.sock.getsockname()[1]
+        for use_sendmmsg in (True, False):
+            with self.subTest(use_sendmmsg=use_sendmmsg):
+                sender = FrameSender("127.0.0.1", port, chunk_size=1000, use_sendmmsg=use_sendmmsg)
+                self.addCleanup(sender.close)
+                data = os.urandom(4500)
+
+                frames = self.round_trip(receiver, sender, [data, data[::-1]])
+
+                self.assertEqual([frame.data for frame in frames], [data, data[::-1]])
+                self.assertEqual(frames[0].codec, "jpeg")
+
+    def test_unix_stream(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "frames.sock")
+        receiver = FrameReceiver(unix_path=path, timeout=5)
+        self.addCleanup(receiver.close)
+        sender = FrameSender(unix_path=path)
+        self.addCleanup(sender.close)
+
+        frames = self.round_trip(receiver, sender, [b"\x01" * 100000, b"\x02" * 10])
+
+        self.assertEqual([len(frame.data) for frame in frames], [100000, 10])
+        self.assertEqual((frames[1].width, frames[1].height), (160, 100))
+
+    def test_unix_sender_drops_frames_without_receiver(self):
+        sender = FrameSender(unix_path=os.path.join(tempfile.gettempdir(), f"rn-missing-{os.getpid()}.sock"))
+
+        self.assertFalse(sender.send(b"data", 2, 2))
+        self.assertEqual(sender.frames_dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
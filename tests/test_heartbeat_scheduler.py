@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+from heartbeat_scheduler import HeartbeatScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class HeartbeatSchedulerTests(unittest.TestCase):
+    def make_scheduler(self, **kwargs):
+        clock = FakeClock()
+        scheduler = HeartbeatScheduler(None, clock=clock, **kwargs)
+        return scheduler, clock
+
+    def test_pings_due_together_are_sent_in_one_wakeup(self):
+        scheduler, clock = self.make_scheduler()
+        pings = []
+        scheduler.register(lambda: pings.append("a"))
+        clock.now += 0.02
+        scheduler.register(lambda: pings.append("b"))
+
+        clock.now += 3.0
+        scheduler.tick()
+
+        self.assertEqual(pings, ["a", "b"])
+
+    def test_ping_returning_false_unregisters_peer(self):
+        scheduler, clock = self.make_scheduler()
+        scheduler.register(lambda: False)
+
+        clock.now += 3.0
+        self.assertIsNone(scheduler.tick())
+        self.assertEqual(len(scheduler), 0)
+
+    def test_cancelled_handle_stops_callbacks(self):
+        scheduler, clock = self.make_scheduler()
+        pings = []
+        handle = scheduler.register(lambda: pings.append(1))
+        handle.cancel()
+
+        clock.now += 3.0
+        scheduler.tick()
+
+        self.assertEqual(pings, [])
+
+    def test_stats_requests_are_staggered_across_peers(self):
+        scheduler, clock = self.make_scheduler(max_stats_per_second=2.0)
+        stats = []
+        for index in range(4):
+            scheduler.register(lambda: True, lambda index=index: stats.append((index, clock.now)))
+
+        clock.now += 3.0
+        while len(stats) < 4:
+            delay = scheduler.tick()
+            clock.now += delay
+
+        times = [when for _index, when in stats]
+        self.assertEqual(times, sorted(times))
+        self.assertTrue(all(later - earlier >= 0.5 for earlier, later in zip(times, times[1:])))
+
+    def test_stats_interval_grows_with_peer_count(self):
+        scheduler, _clock = self.make_scheduler(max_stats_per_second=4.0, max_stats_interval=15.0)
+
+        self.assertEqual(scheduler.stats_interval_for(1), 3.0)
+        self.assertEqual(scheduler.stats_interval_for(40), 10.0)
+        self.assertEqual(scheduler.stats_interval_for(200), 15.0)
+
+    def test_scheduler_runs_on_event_loop(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            scheduler = HeartbeatScheduler(loop, ping_interval=0.01, stats_interval=0.01)
+            fired = asyncio.Event()
+            scheduler.register(lambda: fired.set())
+            await asyncio.wait_for(fired.wait(), timeout=1.0)
+            scheduler.close()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from hls_cache import HlsFileCache, etag_matches, file_etag, read_file
+
+
+class HlsFileCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as handle:
+            handle.write(data)
+        return path
+
+    def test_entries_are_dropped_when_the_writer_changes_the_file(self):
+        cache = HlsFileCache()
+        path = self.write("room_00000.ts", b"a" * 188)
+        body, st = read_file(path)
+        cache.put(path, st, body)
+
+        self.assertEqual(cache.get(path, os.stat(path)), body)
+        with open(path, "ab") as handle:
+            handle.write(b"b" * 188)
+        self.assertIsNone(cache.get(path, os.stat(path)))
+        self.assertEqual(len(cache), 0)
+
+        playlist = self.write("room.m3u8", b"#EXTM3U\n")
+        cache.put(playlist, os.stat(playlist), b"#EXTM3U\n")
+        replacement = self.write("next.m3u8", b"#EXTM3U\n")
+        os.replace(replacement, playlist)
+        self.assertIsNone(cache.get(playlist, os.stat(playlist)))
+
+    def test_segments_are_evicted_lru_without_touching_playlists(self):
+        cache = HlsFileCache(max_segments=2, max_entry_bytes=1024)
+        playlist = self.write("room.m3u8", b"#EXTM3U\n")
+        cache.put(playlist, os.stat(playlist), b"#EXTM3U\n")
+        segments = [self.write(f"room_{index:05d}.ts", bytes([index]) * 10) for index in range(3)]
+        for segment in segments[:2]:
+            cache.put(segment, os.stat(segment), read_file(segment)[0])
+        cache.get(segments[0], os.stat(segments[0]))
+        cache.put(segments[2], os.stat(segments[2]), read_file(segments[2])[0])
+
+        self.assertIsNotNone(cache.get(segments[0], os.stat(segments[0])))
+        self.assertIsNone(cache.get(segments[1], os.stat(segments[1])))
+        self.assertIsNotNone(cache.get(playlist, os.stat(playlist)))
+        self.assertFalse(cache.put(segments[1], os.stat(segments[1]), b"x" * 2048))
+
+        cache.invalidate(playlist)
+        self.assertIsNone(cache.get(playlist, os.stat(playlist)))
+
+    def test_etag_matching(self):
+        path = self.write("room_00000.ts", b"a")
+        etag = file_etag(os.stat(path))
+
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(f'"other", W/{etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches('"other"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from hls_catalog import HlsCatalog
+from hls_playlist import HlsPlaylist
+
+
+class HlsCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.now = 1_000_000.0
+        self.catalog = HlsCatalog(self.tmp.name, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def playlist(self, name, segments, finished=False, mtime=None):
+        playlist = HlsPlaylist(os.path.join(self.tmp.name, name), window=2)
+        base = name[: -len(".m3u8")]
+        for index in range(segments):
+            path = os.path.join(self.tmp.name, f"{base}_{index:05d}.ts")
+            open(path, "wb").close()
+            os.utime(path, (mtime or self.now, mtime or self.now))
+            playlist.add_segment(path, 5.0)
+        if finished:
+            playlist.finish()
+        if mtime is not None:
+            os.utime(playlist.path, (mtime, mtime))
+        return playlist
+
+    def test_streams_are_indexed_with_status_and_counts(self):
+        self.playlist("room_cam1_100.m3u8", 5)
+        self.playlist("room_cam2_50.m3u8", 3, finished=True, mtime=self.now - 3600)
+        self.playlist("other_cam3_10.m3u8", 2, mtime=self.now - 3600)
+
+        streams, total = self.catalog.query()
+
+        self.assertEqual(total, 3)
+        by_name = {stream["filename"]: stream for stream in streams}
+        self.assertEqual(by_name["room_cam1_100.m3u8"]["status"], "recording")
+        self.assertEqual(by_name["room_cam1_100.m3u8"]["segment_count"], 5)
+        self.assertEqual(by_name["room_cam2_50.m3u8"]["status"], "complete")
+        self.assertEqual(by_name["other_cam3_10.m3u8"]["status"], "incomplete")
+        self.assertEqual(by_name["room_cam1_100.m3u8"]["stream_id"], "cam1")
+
+    def test_filtering_and_paging(self):
+        self.playlist("room_cam1_100.m3u8", 1)
+        self.playlist("room_cam2_50.m3u8", 1, finished=True, mtime=self.now - 3600)
+        self.playlist("other_cam3_10.m3u8", 1, finished=True, mtime=self.now - 7200)
+
+        page, total = self.catalog.query(room="room")
+        self.assertEqual(total, 2)
+        self.assertEqual([stream["filename"] for stream in page], ["room_cam1_100.m3u8", "room_cam2_50.m3u8"])
+
+        page, total = self.catalog.query(status="complete", offset=1, limit=1)
+        self.assertEqual(total, 2)
+        self.assertEqual([stream["filename"] for stream in page], ["other_cam3_10.m3u8"])
+
+    def test_changes_are_picked_up_after_the_refresh_interval(self):
+        playlist = self.playlist("room_cam1_100.m3u8", 1)
+        self.catalog.query()
+
+        playlist.add_segment("room_cam1_100_00001.ts", 5.0)
+        self.playlist("room_cam2_200.m3u8", 1)
+        self.assertEqual(self.catalog.query()[1], 1)
+
+        self.now += self.catalog.min_interval
+        streams, total = self.catalog.query(stream_id="cam1")
+        self.assertEqual(streams[0]["segment_count"], 2)
+        self.assertEqual(self.catalog.query()[1], 2)
+
+        os.remove(playlist.path)
+        self.now += self.catalog.min_interval
+        self.assertEqual(self.catalog.query()[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
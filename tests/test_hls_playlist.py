@@ -0,0 +1,177 @@
+import os
+import tempfile
+import unittest
+
+from hls_playlist import (
+    MEDIA_HINTED,
+    MEDIA_LISTED,
+    MEDIA_UNLISTED,
+    HlsPlaylist,
+    KeyframeSegmenter,
+    PartSplitter,
+    blocking_reload_ready,
+    media_playlist,
+    media_status,
+    playlist_position,
+)
+
+
+class HlsPlaylistTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "room_stream.m3u8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path) as handle:
+            return handle.read()
+
+    def test_live_playlist_slides_and_uses_measured_durations(self):
+        playlist = HlsPlaylist(self.path, target_duration=5.0, window=2)
+        playlist.add_segment("/rec/room_stream_00000.ts", 4.96)
+        playlist.add_segment("/rec/room_stream_00001.ts", 6.2)
+        playlist.add_segment("/rec/room_stream_00002.ts", 5.04)
+
+        text = self.read()
+        self.assertIn("#EXT-X-MEDIA-SEQUENCE:1\n", text)
+        self.assertIn("#EXT-X-TARGETDURATION:7\n", text)
+        self.assertIn("#EXTINF:6.200,\nroom_stream_00001.ts\n", text)
+        self.assertNotIn("room_stream_00000.ts", text)
+        self.assertNotIn("ENDLIST", text)
+        self.assertEqual(os.listdir(self.tmp.name), ["room_stream.m3u8"])
+
+    def test_unchanged_playlist_is_not_rewritten(self):
+        playlist = HlsPlaylist(self.path)
+        playlist.add_segment("a_00000.ts", 5.0)
+
+        self.assertFalse(playlist.write())
+        self.assertFalse(playlist.add_segment("a_00000.ts", 5.0))
+        self.assertEqual(len(playlist), 1)
+
+    def test_vod_playlist_is_event_until_finished(self):
+        playlist = HlsPlaylist(self.path, playlist_type="vod", window=2)
+        for index in range(3):
+            playlist.add_segment(f"a_{index:05d}.ts", 5.0)
+        self.assertIn("#EXT-X-PLAYLIST-TYPE:EVENT\n", self.read())
+        self.assertIn("a_00000.ts", self.read())
+
+        playlist.finish()
+
+        text = self.read()
+        self.assertIn("#EXT-X-PLAYLIST-TYPE:VOD\n", text)
+        self.assertTrue(text.endswith("#EXT-X-ENDLIST\n"))
+        self.assertFalse(playlist.add_segment("a_00003.ts", 5.0))
+
+    def test_unknown_playlist_type_is_rejected(self):
+        with self.assertRaises(ValueError):
+            HlsPlaylist(self.path, playlist_type="rolling")
+
+
+
+class KeyframeSegmenterTests(unittest.TestCase):
+    def test_requests_keyframe_before_boundary_and_cuts_on_it(self):
+        segmenter = KeyframeSegmenter(5.0, keyframe_lead=0.5)
+
+        self.assertEqual(segmenter.observe(10.0, True), (False, None))
+        self.assertEqual(segmenter.observe(14.0, False), (False, None))
+        self.assertEqual(segmenter.observe(14.6, False), (True, None))
+        self.assertEqual(segmenter.observe(14.8, False), (False, None))
+        self.assertEqual(segmenter.observe(15.2, False), (False, None))
+        self.assertEqual(segmenter.observe(15.4, True), (False, 5.4))
+        self.assertEqual(segmenter.segment_start, 15.4)
+
+    def test_waits_for_keyframe_and_re_requests(self):
+        segmenter = KeyframeSegmenter(2.0, keyframe_lead=0.5)
+        segmenter.observe(0.0, True)
+
+        self.assertEqual(segmenter.observe(1.5, True), (True, None))
+        self.assertEqual(segmenter.observe(3.0, False), (False, None))
+        self.assertEqual(segmenter.observe(3.5, False), (True, None))
+        self.assertEqual(segmenter.observe(3.6, True), (False, 3.6))
+
+    def test_requested_cut_happens_at_next_keyframe(self):
+        segmenter = KeyframeSegmenter(5.0)
+        segmenter.observe(0.0, True)
+        segmenter.request_cut()
+
+        self.assertEqual(segmenter.observe(1.0, False), (False, None))
+        self.assertEqual(segmenter.observe(1.2, True), (False, 1.2))
+        self.assertEqual(segmenter.observe(2.0, True), (False, None))
+
+
+
+class LowLatencyHlsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "room_stream.m3u8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parts_preload_hint_and_expiry(self):
+        playlist = HlsPlaylist(self.path, target_duration=2.0, part_target=0.5, part_window=1)
+        playlist.add_part("room_stream.part00000.0.ts", 0.5, True, preload_hint="room_stream.part00000.1.ts")
+        playlist.add_part("room_stream.part00000.1.ts", 0.5, preload_hint="room_stream.part00000.2.ts")
+
+        text = playlist.render()
+        self.assertIn("#EXT-X-VERSION:6", text)
+        self.assertIn("#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,PART-HOLD-BACK=1.500", text)
+        self.assertIn("#EXT-X-PART-INF:PART-TARGET=0.500", text)
+        self.assertIn('#EXT-X-PART:DURATION=0.500,URI="room_stream.part00000.0.ts",INDEPENDENT=YES', text)
+        self.assertTrue(text.endswith('#EXT-X-PRELOAD-HINT:TYPE=PART,URI="room_stream.part00000.2.ts"\n'))
+        self.assertEqual(playlist_position(text), (0, 2))
+
+        playlist.add_segment("room_stream_00000.ts", 1.0)
+        playlist.add_segment("room_stream_00001.ts", 2.0)
+        self.assertEqual(
+            playlist.pop_expired_parts(),
+            [os.path.join(self.tmp.name, "room_stream.part00000.0.ts"), os.path.join(self.tmp.name, "room_stream.part00000.1.ts")],
+        )
+        self.assertNotIn("part00000", playlist.render().split("#EXT-X-PRELOAD-HINT")[0])
+
+        playlist.finish()
+        self.assertNotIn("EXT-X-PRELOAD-HINT", playlist.render())
+
+    def test_blocking_reload_readiness(self):
+        playlist = HlsPlaylist(self.path, target_duration=2.0, part_target=0.5)
+        playlist.add_segment("room_stream_00000.ts", 2.0)
+        playlist.add_part("room_stream.part00001.0.ts", 0.5, True)
+        text = playlist.render()
+
+        self.assertTrue(blocking_reload_ready(text, 0))
+        self.assertFalse(blocking_reload_ready(text, 1))
+        self.assertTrue(blocking_reload_ready(text, 1, 0))
+        self.assertFalse(blocking_reload_ready(text, 1, 1))
+        self.assertTrue(blocking_reload_ready(text + "#EXT-X-ENDLIST\n", 5))
+
+    def test_media_status_tells_listed_from_hinted(self):
+        playlist = HlsPlaylist(self.path, target_duration=2.0, part_target=0.5)
+        playlist.add_segment("room_stream_00000.ts", 2.0)
+        playlist.add_part("room_stream.part00001.0.ts", 0.5, True, preload_hint="room_stream.part00001.1.ts")
+        text = playlist.render()
+
+        self.assertEqual(media_status(text, "room_stream_00000.ts"), MEDIA_LISTED)
+        self.assertEqual(media_status(text, "./room_stream.part00001.0.ts"), MEDIA_LISTED)
+        self.assertEqual(media_status(text, "room_stream.part00001.1.ts"), MEDIA_HINTED)
+        self.assertEqual(media_status(text, "room_stream_00001.ts"), MEDIA_UNLISTED)
+
+        self.assertEqual(media_playlist("hls/room_stream_00000.ts"), os.path.join("hls", "room_stream.m3u8"))
+        self.assertEqual(media_playlist("room_stream.part00001.1.ts"), "room_stream.m3u8")
+        self.assertIsNone(media_playlist("room_stream.ts"))
+
+    def test_part_splitter_stays_within_target(self):
+        splitter = PartSplitter(0.5)
+        cuts = [splitter.observe(index / 30.0) for index in range(31)]
+        durations = [duration for duration in cuts if duration is not None]
+
+        self.assertTrue(durations)
+        self.assertTrue(all(duration <= 0.5 + 1e-9 for duration in durations))
+        part_start = splitter.part_start
+        self.assertAlmostEqual(splitter.restart(1.1), 1.1 - part_start)
+        self.assertEqual(splitter.part_start, 1.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from hls_playlist import write_atomic
+from hls_watcher import PlaylistWatcher
+
+
+class PlaylistWatcherTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "room_stream.m3u8")
+        write_atomic(self.path, "#EXTM3U\n")
+        self.watcher = PlaylistWatcher(poll_interval=0.01, linger=0.05)
+
+    async def asyncTearDown(self):
+        await self.watcher.close()
+        self.tmp.cleanup()
+
+    def wait_for(self, marker, timeout=5.0):
+        return self.watcher.wait_until(self.path, lambda text: marker in text, lambda text: timeout)
+
+    async def test_waiters_share_one_poller_and_wake_on_change(self):
+        waiters = [asyncio.ensure_future(self.wait_for("seg1")) for _ in range(20)]
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.watcher.watching, 1)
+        self.assertFalse(any(waiter.done() for waiter in waiters))
+
+        write_atomic(self.path, "#EXTM3U\nseg1.ts\n")
+        results = await asyncio.wait_for(asyncio.gather(*waiters), 5)
+
+        self.assertEqual(results, ["#EXTM3U\nseg1.ts\n"] * 20)
+        self.assertEqual(self.watcher.reads, 2)
+
+    async def test_ready_playlist_returns_at_once(self):
+        self.assertEqual(await self.wait_for("#EXTM3U"), "#EXTM3U\n")
+
+    async def test_timeout_and_missing_playlist_return_none(self):
+        self.assertIsNone(await self.wait_for("seg1", timeout=0.05))
+        missing = os.path.join(self.tmp.name, "other.m3u8")
+        self.assertIsNone(await self.watcher.wait_until(missing, lambda text: True, lambda text: 5.0))
+
+    async def test_poller_stops_after_linger(self):
+        await self.wait_for("#EXTM3U")
+        for _ in range(100):
+            if not self.watcher.watching:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.watcher.watching, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from ice_batcher import IceCandidateBatcher
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, delay, callback):
+        self.calls.append((delay, callback))
+
+    def run(self, max_delay=None):
+        calls, self.calls = self.calls, []
+        for delay, callback in calls:
+            if max_delay is None or delay <= max_delay:
+                callback()
+            else:
+                self.calls.append((delay, callback))
+
+
+def candidate(n):
+    return {"candidate": f"candidate:{n} 1 UDP 2015363327 192.168.1.{n} 5000 typ host", "sdpMLineIndex": 0}
+
+
+class IceCandidateBatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = FakeScheduler()
+        self.batcher = IceCandidateBatcher(self.scheduler, window=0.03, max_batch=4)
+        self.sent = []
+        self.envelope = {"UUID": "peer", "session": "s1", "type": "local"}
+
+    def add(self, n, key=("peer", "s1", "local")):
+        self.batcher.add(key, self.envelope, candidate(n), self.sent.append)
+
+    def test_candidates_within_the_window_share_one_message(self):
+        for n in range(3):
+            self.add(n)
+
+        self.assertEqual([delay for delay, _ in self.scheduler.calls], [0.03])
+        self.assertEqual(self.sent, [])
+        self.scheduler.run()
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.sent[0]["candidates"], [candidate(0), candidate(1), candidate(2)])
+        self.assertEqual(self.sent[0]["session"], "s1")
+        self.assertNotIn("candidates", self.envelope)
+
+    def test_full_batch_and_flush_send_immediately(self):
+        for n in range(4):
+            self.add(n)
+        self.add(4, key=("peer", "s1", "remote"))
+        self.batcher.flush(("peer", "s1", "remote"))
+
+        self.scheduler.run(max_delay=0)
+
+        self.assertEqual([len(msg["candidates"]) for msg in self.sent], [4, 1])
+        self.assertEqual(self.batcher.pending(("peer", "s1", "remote")), 0)
+        self.scheduler.run()  # expired window timers find nothing left
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual((self.batcher.messages_sent, self.batcher.candidates_sent), (2, 5))
+
+    def test_stale_window_timer_does_not_cut_next_batch_short(self):
+        for n in range(4):
+            self.add(n)
+        self.scheduler.run(max_delay=0)  # first batch flushed early as full
+        _delay, stale_timer = self.scheduler.calls.pop(0)
+        self.add(4)
+
+        stale_timer()  # the first batch's window timer fires
+        self.assertEqual([len(msg["candidates"]) for msg in self.sent], [4])
+        self.assertEqual(self.batcher.pending(("peer", "s1", "local")), 1)
+
+        self.scheduler.run()  # the second batch's own timer
+        self.assertEqual([len(msg["candidates"]) for msg in self.sent], [4, 1])
+
+    def test_discarded_peer_sends_nothing(self):
+        self.add(1)
+        self.batcher.discard(("peer", "s1", "local"))
+        self.scheduler.run()
+        self.assertEqual(self.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
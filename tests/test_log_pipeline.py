@@ -0,0 +1,181 @@
+import io
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+from log_pipeline import (
+    DEBUG,
+    ERROR,
+    INFO,
+    WARNING,
+    LogPipeline,
+    LogRing,
+    LogWriter,
+    RateLimiter,
+    ansi_color,
+    strip_ansi,
+)
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SlowStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+class AnsiTests(unittest.TestCase):
+    def test_ansi_color_matches_legacy_mapping(self):
+        self.assertEqual(ansi_color("FF0"), "\033[38;5;226m")
+        self.assertEqual(ansi_color("#00ff00"), "\033[38;5;46m")
+        self.assertEqual(ansi_color("bogus"), "bogus")
+
+    def test_strip_ansi(self):
+        self.assertEqual(strip_ansi("\033[38;5;226mwarn\033[0m"), "warn")
+        self.assertEqual(strip_ansi("plain"), "plain")
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_burst_then_rate_and_reports_suppressed(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+
+        results = [limiter.allow("site")[0] for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertTrue(limiter.allow("other")[0])
+
+        clock.now = 0.5
+        self.assertEqual(limiter.allow("site"), (True, 2))
+        self.assertEqual(limiter.allow("site"), (False, 0))
+
+    def test_zero_rate_disables_limiting(self):
+        limiter = RateLimiter(rate=0, burst=1)
+        self.assertTrue(all(limiter.allow("site")[0] for _ in range(1000)))
+
+
+class LogRingTests(unittest.TestCase):
+    def test_keeps_most_recent_entries(self):
+        ring = LogRing(maxlen=3, clock=lambda: 0.0)
+        for i in range(5):
+            ring.append(f"line {i}")
+
+        self.assertEqual(len(ring), 3)
+        tail = ring.tail(2)
+        self.assertEqual([entry.split("] ", 1)[1] for entry in tail], ["line 3", "line 4"])
+        self.assertTrue(tail[0].startswith("["))
+        self.assertEqual(ring.tail(0), [])
+
+    def test_since_returns_lines_after_cursor(self):
+        ring = LogRing(maxlen=3, clock=lambda: 0.0)
+        cursor = ring.cursor
+        ring.append("a")
+        ring.append("b")
+
+        cursor, lines = ring.since(cursor)
+        self.assertEqual([line.split("] ", 1)[1] for line in lines], ["a", "b"])
+        self.assertEqual(ring.since(cursor), (cursor, []))
+
+        for i in range(5):
+            ring.append(str(i))
+        cursor, lines = ring.since(cursor)
+        self.assertEqual([line.split("] ", 1)[1] for line in lines], ["2", "3", "4"])
+
+
+class LogWriterTests(unittest.TestCase):
+    def test_synchronous_until_started(self):
+        stream = io.StringIO()
+        writer = LogWriter(stream)
+        writer.write("hello")
+        self.assertEqual(stream.getvalue(), "hello\n")
+
+    def test_background_writer_preserves_order(self):
+        stream = io.StringIO()
+        writer = LogWriter(stream)
+        writer.start()
+        try:
+            for i in range(200):
+                writer.write(str(i))
+        finally:
+            writer.stop()
+        self.assertEqual(stream.getvalue().split(), [str(i) for i in range(200)])
+
+    def test_slow_stream_does_not_block_callers_and_drops_oldest(self):
+        stream = SlowStream()
+        writer = LogWriter(stream, max_pending=10)
+        writer.start()
+        try:
+            writer.write("first")
+            for i in range(50):
+                writer.write(f"line {i}")
+            self.assertGreater(writer.dropped, 0)
+        finally:
+            stream.release.set()
+            writer.stop()
+        output = stream.getvalue()
+        self.assertIn("lines dropped", output)
+        self.assertIn("line 49", output)
+
+    def test_captured_prints_keep_their_place(self):
+        stream = io.StringIO()
+        with patch.object(sys, "stdout", stream):
+            writer = LogWriter()
+            writer.start(capture_stdout=True)
+            try:
+                writer.write("first")
+                print("second")
+                writer.write("third")
+                print("partial", end="")
+            finally:
+                writer.stop()
+            self.assertIs(sys.stdout, stream)
+        self.assertEqual(stream.getvalue(), "first\nsecond\nthird\npartial\n")
+
+    def test_unencodable_text_is_replaced(self):
+        raw = io.BytesIO()
+        stream = io.TextIOWrapper(raw, encoding="ascii")
+        LogWriter(stream).write("camera \U0001f4f7 ready")
+        self.assertEqual(raw.getvalue(), b"camera ? ready\n")
+
+
+class LogPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.web = []
+        self.pipeline = LogPipeline(level=INFO, limiter=RateLimiter(rate=1, burst=2, clock=FakeClock()), writer=LogWriter(self.stream))
+        self.pipeline.web_log = self.web.append
+
+    def test_level_filter(self):
+        self.assertFalse(self.pipeline.emit("noise", level=DEBUG, key="a"))
+        self.assertTrue(self.pipeline.emit("warn", "FF0", WARNING, key="b"))
+        self.assertEqual(self.stream.getvalue(), "\033[38;5;226mwarn\033[0m\n")
+        self.assertEqual(self.web, ["warn"])
+
+    def test_rate_limit_per_key_then_summary(self):
+        for _ in range(5):
+            self.pipeline.emit("spam", key="site")
+        self.pipeline.emit("other", key="elsewhere")
+        self.pipeline.limiter.clock.now = 10
+        self.pipeline.emit("spam again", level=ERROR, key="site")
+
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(lines, ["spam", "spam", "other", "[log] 3 similar lines suppressed", "spam again"])
+
+    def test_non_string_messages(self):
+        self.pipeline.emit(ValueError("boom"), key="x")
+        self.assertEqual(self.stream.getvalue(), "boom\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+
+from metrics_exporter import MetricsRegistry, PeerMetrics
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render_counter_and_gauge_with_escaped_labels(self):
+        counter = self.registry.counter("rn_test_total", "A counter.", ("peer",))
+        gauge = self.registry.gauge("rn_test_gauge", "A gauge.")
+        counter.inc(peer='a"b')
+        counter.inc(2, peer='a"b')
+        gauge.set(1.5)
+
+        self.assertEqual(
+            self.registry.render(),
+            "# HELP rn_test_total A counter.\n"
+            "# TYPE rn_test_total counter\n"
+            'rn_test_total{peer="a\\"b"} 3\n'
+            "# HELP rn_test_gauge A gauge.\n"
+            "# TYPE rn_test_gauge gauge\n"
+            "rn_test_gauge 1.5\n",
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("rn_rtt_seconds", "RTT.", ("peer",), buckets=(0.1, 0.5))
+        for value in (0.05, 0.3, 0.3, 2.0):
+            histogram.observe(value, peer="p")
+
+        lines = self.registry.render().splitlines()
+
+        self.assertIn('rn_rtt_seconds_bucket{peer="p",le="0.1"} 1', lines)
+        self.assertIn('rn_rtt_seconds_bucket{peer="p",le="0.5"} 3', lines)
+        self.assertIn('rn_rtt_seconds_bucket{peer="p",le="+Inf"} 4', lines)
+        self.assertIn('rn_rtt_seconds_count{peer="p"} 4', lines)
+        self.assertIn('rn_rtt_seconds_sum{peer="p"} 2.65', lines)
+
+    def test_gauge_none_removes_series_and_empty_metrics_are_omitted(self):
+        gauge = self.registry.gauge("rn_value", "Value.", ("peer",))
+        gauge.set(3, peer="p")
+        gauge.set(None, peer="p")
+        self.assertEqual(self.registry.render(), "")
+
+    def test_label_mismatch_and_duplicate_registration_raise(self):
+        gauge = self.registry.gauge("rn_value", "Value.", ("peer",))
+        with self.assertRaises(ValueError):
+            gauge.set(1)
+        self.assertIs(self.registry.gauge("rn_value", "Value.", ("peer",)), gauge)
+        with self.assertRaises(ValueError):
+            self.registry.counter("rn_value", "Value.", ("peer",))
+
+    def test_collectors_run_on_render(self):
+        gauge = self.registry.gauge("rn_peers", "Peers.")
+        peers = []
+        self.registry.add_collector(lambda: gauge.set(len(peers)))
+        peers.extend(["a", "b"])
+        self.assertIn("rn_peers 2", self.registry.render())
+
+
+class PeerMetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.metrics = PeerMetrics(self.registry)
+
+    def summary(self, **overrides):
+        summary = {
+            "bytes": 5000,
+            "packets": 90,
+            "video_bytes": 4000,
+            "audio_bytes": 1000,
+            "packets_lost": 3,
+            "packets_received": None,
+            "fraction_lost": 0.02,
+            "jitter": None,
+            "round_trip_time": 0.04,
+            "fec_packets_recovered": None,
+            "retransmitted_packets_received": 7,
+            "frame_width": 1280,
+            "frame_height": 720,
+            "video_codec": "H264",
+        }
+        summary.update(overrides)
+        return summary
+
+    def test_record_publish_peer(self):
+        self.metrics.record("uuid-1", "cam", "publish", self.summary(), bitrate=2500, fec_active=True, encoder_bitrate=3000)
+        labels = {"peer": "uuid-1", "stream": "cam", "role": "publish"}
+
+        self.assertEqual(self.metrics.bytes.value(kind="video", **labels), 4000)
+        self.assertEqual(self.metrics.packets_lost.value(**labels), 3)
+        self.assertEqual(self.metrics.rtx_received.value(**labels), 7)
+        self.assertIsNone(self.metrics.fec_recovered.value(**labels))
+        self.assertEqual(self.metrics.bitrate.value(**labels), 2500)
+        self.assertEqual(self.metrics.loss_ratio.value(**labels), 0.02)
+        self.assertEqual(self.metrics.fec_active.value(**labels), 1.0)
+        self.assertEqual(self.metrics.frame_height.value(**labels), 720)
+        self.assertEqual(self.metrics.samples.value(**labels), 1)
+        self.assertIn('rn_peer_round_trip_seconds_count{peer="uuid-1",stream="cam",role="publish"} 1', self.registry.render())
+
+    def test_explicit_loss_ratio_wins_and_negative_loss_is_clamped(self):
+        self.metrics.record("p", "s", "view", self.summary(packets_lost=-2), loss_ratio=0.1)
+        labels = {"peer": "p", "stream": "s", "role": "view"}
+        self.assertEqual(self.metrics.loss_ratio.value(**labels), 0.1)
+        self.assertEqual(self.metrics.packets_lost.value(**labels), 0)
+
+    def test_remove_by_peer_or_recorder_stream(self):
+        self.metrics.record("viewer", "cam", "publish", self.summary())
+        self.metrics.record("member", "guest", "recorder", self.summary())
+
+        self.metrics.remove(stream="guest", role="recorder")
+        render = self.registry.render()
+        self.assertNotIn('stream="guest"', render)
+        self.assertIn('peer="viewer"', render)
+
+        self.metrics.remove(peer="viewer")
+        self.assertEqual(self.registry.render(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 import threading
+from unittest.mock import MagicMock, patch
 
 import publish
+from encoder_ladder import LADDER_KEYFRAME_TIMEOUT, LadderRung
 
 
 class FakePad:
@@ -24,6 +26,16 @@ class FakePad:
     def get_peer(self):
         return self.peer
 
+    def add_probe(self, mask, callback):
+        self.probe = callback
+        return 7
+
+    def remove_probe(self, probe_id):
+        self.removed_probes = getattr(self, "removed_probes", []) + [probe_id]
+
+    def send_event(self, event):
+        return True
+
 
 class FakeElement:
     def __init__(self, name):
@@ -243,6 +255,53 @@ class MultiviewerCleanupTests(unittest.TestCase):
 
         self.assertIs(owner.clients[uuid], replacement)
 
+    def start_ladder_switch(self, glib):
+        uuid = "viewer-ladder"
+        self.queue = FakeElement(f"qv-{uuid}")
+        self.rung_tee = FakeElement("videotee_1")
+        owner = self.make_client(FakePipeline([self.queue, self.rung_tee]))
+        owner.encoder_ladder = [LadderRung(0, 1920, 1080, 4000), LadderRung(1, 1280, 720, 2500)]
+        client = {"UUID": uuid, "qv": self.queue, "_ladder_rung": 0}
+        owner.clients = {uuid: client}
+        owner._release_tee_pad_later = lambda tee, pad: tee.release_request_pad(pad)
+        glib.timeout_add.return_value = 99
+
+        self.assertTrue(owner._switch_viewer_ladder_rung(client, 1))
+        self.assertEqual(client["_ladder_pending"], 1)
+        return client, self.rung_tee.requested_pads[0]
+
+    def test_ladder_switch_without_keyframe_times_out(self):
+        with patch.object(publish, "GLib") as glib:
+            client, pad = self.start_ladder_switch(glib)
+            delay, on_timeout = glib.timeout_add.call_args[0]
+            self.assertEqual(delay, int(LADDER_KEYFRAME_TIMEOUT * 1000))
+
+            self.assertFalse(on_timeout())
+            self.assertIsNone(client["_ladder_pending"])
+            self.assertEqual(pad.removed_probes, [7])
+            self.assertEqual(self.rung_tee.released_pads, [pad])
+
+            # A keyframe that was already in flight doesn't link or release again
+            self.assertEqual(pad.probe(pad, MagicMock()), publish.Gst.PadProbeReturn.REMOVE)
+            glib.source_remove.assert_not_called()
+        self.assertEqual(self.rung_tee.released_pads, [pad])
+        self.assertIsNone(self.queue.get_static_pad("sink").get_peer())
+        self.assertEqual(client["_ladder_rung"], 0)
+
+    def test_keyframe_cancels_the_switch_timeout(self):
+        keyframe = MagicMock()
+        keyframe.get_buffer.return_value.has_flags.return_value = False
+
+        with patch.object(publish, "GLib") as glib:
+            client, pad = self.start_ladder_switch(glib)
+            self.assertEqual(pad.probe(pad, keyframe), publish.Gst.PadProbeReturn.REMOVE)
+            glib.source_remove.assert_called_once_with(99)
+
+            _delay, on_timeout = glib.timeout_add.call_args[0]
+            self.assertFalse(on_timeout())  # already dispatched: nothing to undo
+        self.assertEqual(client["_ladder_rung"], 1)
+        self.assertIs(self.queue.get_static_pad("sink").get_peer(), pad)
+        self.assertEqual(self.rung_tee.released_pads, [])
 
 if __name__ == "__main__":
     unittest.main()
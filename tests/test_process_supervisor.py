@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import time
+import unittest
+
+from process_supervisor import EXITED, FAILED, QUEUED, RUNNING, STOPPED, TIMED_OUT, ProcessSupervisor, QueueFull
+
+
+def sleeper(seconds):
+    return [sys.executable, "-c", f"import time; time.sleep({seconds})"]
+
+
+class ProcessSupervisorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_admits_at_most_max_running_in_order(self):
+        supervisor = ProcessSupervisor(max_running=2)
+        jobs = [supervisor.submit(sleeper(0.2), record=f"rec{i}") for i in range(4)]
+        self.assertEqual((supervisor.running, supervisor.queued), (2, 2))
+        self.assertEqual([supervisor.position(job) for job in jobs], [None, None, 1, 2])
+
+        await asyncio.gather(*(job.task for job in jobs))
+        self.assertEqual([job.state for job in jobs], [EXITED] * 4)
+        self.assertEqual([job.returncode for job in jobs], [0] * 4)
+        # The queued pair only started once the first pair had been reaped
+        self.assertGreaterEqual(min(job.started_at for job in jobs[2:]), min(job.ended_at for job in jobs[:2]))
+        self.assertEqual((supervisor.running, supervisor.queued), (0, 0))
+
+    async def test_timeout_counts_from_start(self):
+        supervisor = ProcessSupervisor(max_running=1, stop_grace=1)
+        first = supervisor.submit(sleeper(0.3))
+        second = supervisor.submit(sleeper(30), timeout=0.2)
+        started = time.monotonic()
+        await second.task
+        self.assertEqual(first.state, EXITED)
+        self.assertEqual(second.state, TIMED_OUT)
+        self.assertNotEqual(second.returncode, 0)
+        self.assertLess(time.monotonic() - started, 5)
+
+    async def test_exit_handler_sees_every_finished_job(self):
+        finished = []
+        supervisor = ProcessSupervisor(max_running=1, stop_grace=1, on_exit=lambda job: finished.append((job.record, job.state)))
+        timed_out = supervisor.submit(sleeper(30), record="a", timeout=0.1)
+        queued = supervisor.submit(sleeper(30), record="b")
+        await timed_out.task
+        while queued.state != RUNNING:
+            await asyncio.sleep(0.01)
+        await supervisor.stop(queued.id)
+        exited = supervisor.submit([sys.executable, "-c", "pass"], record="c")
+        await exited.task
+
+        self.assertEqual(finished, [("a", TIMED_OUT), ("b", STOPPED), ("c", EXITED)])
+
+    async def test_stop_queued_and_running_jobs(self):
+        supervisor = ProcessSupervisor(max_running=1, stop_grace=1)
+        running = supervisor.submit(sleeper(30), record="a")
+        queued = supervisor.submit(sleeper(30), record="b")
+        while running.state != RUNNING:
+            await asyncio.sleep(0.01)
+
+        await supervisor.stop(queued.id)
+        self.assertEqual(queued.state, STOPPED)
+        self.assertIsNone(queued.pid)
+        self.assertIs(supervisor.find(record="a", pid=running.pid), running)
+
+        await supervisor.stop(running.id)
+        self.assertEqual(running.state, STOPPED)
+        self.assertIsNotNone(running.returncode)
+        self.assertIsNone(supervisor.find(record="a"))
+        self.assertEqual(supervisor.running, 0)
+
+    async def test_queue_limit_and_status(self):
+        supervisor = ProcessSupervisor(max_running=1, max_queued=1)
+        supervisor.submit(sleeper(30))
+        waiting = supervisor.submit(sleeper(30))
+        with self.assertRaises(QueueFull):
+            supervisor.submit(sleeper(30))
+
+        status = supervisor.status()
+        self.assertEqual((status["running"], status["queued"]), (1, 1))
+        self.assertEqual(status["jobs"][1]["state"], QUEUED)
+        self.assertEqual(status["jobs"][1]["position"], 1)
+        self.assertEqual(supervisor.describe(waiting)["id"], waiting.id)
+        await supervisor.shutdown()
+        self.assertEqual({job["state"] for job in supervisor.status()["jobs"]}, {STOPPED})
+
+    async def test_spawn_failure_frees_slot(self):
+        supervisor = ProcessSupervisor(max_running=1, history=1)
+        broken = supervisor.submit(["/nonexistent/publish"])
+        after = supervisor.submit([sys.executable, "-c", "pass"])
+        await asyncio.gather(broken.task, after.task)
+        self.assertEqual(broken.state, FAILED)
+        self.assertTrue(broken.error)
+        self.assertEqual(after.state, EXITED)
+        # Only the newest finished job is kept
+        self.assertIsNone(supervisor.get(broken.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
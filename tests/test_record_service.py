@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from process_supervisor import TIMED_OUT, ProcessSupervisor
+from transcription import TranscriptionService
+
+try:
+    import fastapi  # noqa: F401
+    import uvicorn  # noqa: F401
+except ImportError:  # record.py is the optional web service; CI doesn't install its dependencies
+    record = None
+else:
+    import record
+
+
+@unittest.skipUnless(record is not None, "needs fastapi and uvicorn")
+class RecordingLifecycleTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.saved = (record.supervisor, record.transcriber, record.TRANSCRIPT_DIR)
+        record.TRANSCRIPT_DIR = Path(self.tmp.name, "stt")
+        record.transcriber = TranscriptionService(load_model=lambda name: object(), transcribe=lambda model, audio, language: "")
+        record.supervisor = ProcessSupervisor(max_running=2, stop_grace=1, on_exit=record.recording_finished)
+
+    async def asyncTearDown(self):
+        await record.supervisor.shutdown()
+        record.supervisor, record.transcriber, record.TRANSCRIPT_DIR = self.saved
+        record.job_sessions.clear()
+        record.job_results.clear()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def start(self, record_id, timeout):
+        job = record.supervisor.submit([sys.executable, "-c", "import time; time.sleep(30)"], record=record_id, timeout=timeout)
+        record.job_sessions[job.id] = record.start_transcription(record_id, "en")
+        return job
+
+    async def test_timed_out_recording_finishes_its_transcription(self):
+        job = self.start("lesson1", timeout=0.2)
+        self.assertIsNotNone(record.active_transcription("lesson1"))
+
+        await job.task
+        self.assertEqual(job.state, TIMED_OUT)
+        result = await asyncio.wait_for(record.job_results[job.id], 10)
+
+        self.assertEqual(result, {"error": "No audio file found for record ID: lesson1"})
+        self.assertIsNone(record.active_transcription("lesson1"))
+        self.assertNotIn(job.id, record.job_sessions)
+
+        # A late /stop gets the same outcome instead of a second transcription
+        stopped = await record.stop_recording(record="lesson1", language="en", job_id=job.id, process_pid=None)
+        self.assertEqual(stopped, result)
+
+    async def test_newer_session_for_the_same_record_is_left_alone(self):
+        first = self.start("lesson2", timeout=0.2)
+        second = self.start("lesson2", timeout=30)
+
+        await first.task
+        await asyncio.wait_for(record.job_results[first.id], 10)
+
+        self.assertIs(record.active_transcription("lesson2"), record.job_sessions[second.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
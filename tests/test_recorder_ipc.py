@@ -0,0 +1,139 @@
+import asyncio
+import os
+import unittest
+
+from recorder_ipc import (
+    KIND_CONTROL,
+    KIND_LOG,
+    LOG_FRAME_LIMIT,
+    ChildChannel,
+    FrameDecoder,
+    encode_control,
+    encode_log,
+    read_control_frame,
+    read_frame,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecorderIPCTests(unittest.TestCase):
+    def test_decoder_handles_frames_split_across_reads(self):
+        data = encode_control({"type": "ice", "candidate": "c"}) + encode_log("warning", "slow")
+        decoder = FrameDecoder()
+
+        frames = decoder.feed(data[:5]) + decoder.feed(data[5:13]) + decoder.feed(data[13:])
+
+        self.assertEqual(frames, [(KIND_CONTROL, {"type": "ice", "candidate": "c"}), (KIND_LOG, ("warning", "slow"))])
+
+    def test_log_frames_fit_in_one_atomic_pipe_write(self):
+        frame = encode_log("info", "x" * 10000)
+
+        self.assertLessEqual(len(frame), LOG_FRAME_LIMIT)
+        level, text = FrameDecoder().feed(frame)[0][1]
+        self.assertEqual(level, "info")
+        self.assertTrue(text.endswith("..."))
+
+    def test_read_control_frame_leaves_later_frames_buffered(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            os.write(write_fd, encode_control({"stream_id": "a"}) + encode_control({"type": "sdp"}))
+            decoder = FrameDecoder()
+
+            self.assertEqual(read_control_frame(read_fd, decoder), {"stream_id": "a"})
+            self.assertEqual(decoder.feed(b""), [(KIND_CONTROL, {"type": "sdp"})])
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def test_log_channel_is_rate_limited_and_reports_suppressed_lines(self):
+        control_read, control_write = os.pipe()
+        log_read, log_write = os.pipe()
+        clock = FakeClock()
+        try:
+            channel = ChildChannel(control_write, log_write, log_rate=1.0, log_burst=2.0, clock=clock)
+            results = [channel.log("info", f"line {index}") for index in range(5)]
+            self.assertTrue(channel.log("error", "always delivered"))
+            clock.now += 1.0
+            channel.log("info", "after refill")
+            channel.send({"type": "ready"})
+
+            logs = [payload for _kind, payload in FrameDecoder().feed(os.read(log_read, 65536))]
+            control = FrameDecoder().feed(os.read(control_read, 65536))
+        finally:
+            for fd in (control_read, control_write, log_read, log_write):
+                os.close(fd)
+
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(
+            logs,
+            [
+                ("info", "line 0"),
+                ("info", "line 1"),
+                ("error", "always delivered"),
+                ("warning", "3 log line(s) suppressed by rate limit"),
+                ("info", "after refill"),
+            ],
+        )
+        self.assertEqual(control, [(KIND_CONTROL, {"type": "ready"})])
+
+    def test_log_budget_is_per_stream_and_level(self):
+        log_read, log_write = os.pipe()
+        clock = FakeClock()
+        try:
+            channel = ChildChannel(os.dup(1), log_write, log_rate=1.0, log_burst=2.0, clock=clock)
+            noisy = [channel.log("info", "[a] spam", "a") for _ in range(5)]
+            self.assertTrue(channel.log("info", "[b] still heard", "b"))
+            self.assertTrue(channel.log("warning", "[a] warning", "a"))
+            clock.now += 1.0
+            self.assertTrue(channel.log("info", "[a] after refill", "a"))
+
+            logs = [payload for _kind, payload in FrameDecoder().feed(os.read(log_read, 65536))]
+        finally:
+            os.close(channel.control_fd)
+            os.close(log_read)
+            os.close(log_write)
+
+        self.assertEqual(noisy, [True, True, False, False, False])
+        self.assertEqual(
+            logs[2:],
+            [
+                ("info", "[b] still heard"),
+                ("warning", "[a] warning"),
+                ("warning", "[a] 3 log line(s) suppressed by rate limit"),
+                ("info", "[a] after refill"),
+            ],
+        )
+        self.assertEqual(channel.suppressed, 0)
+
+    def test_full_log_pipe_drops_instead_of_blocking(self):
+        log_read, log_write = os.pipe()
+        try:
+            channel = ChildChannel(os.dup(1), log_write, log_rate=1e9, log_burst=1e9)
+            delivered = [channel.log("info", "x" * 1000) for _ in range(200)]
+        finally:
+            os.close(channel.control_fd)
+            os.close(log_read)
+            os.close(log_write)
+
+        self.assertIn(False, delivered)
+        self.assertGreater(channel.suppressed, 0)
+
+    def test_async_reader_returns_none_at_eof(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(encode_control({"type": "ready"}))
+            reader.feed_eof()
+            return await read_frame(reader), await read_frame(reader)
+
+        self.assertEqual(asyncio.run(run()), ((KIND_CONTROL, {"type": "ready"}), None))
+
+
+if __name__ == "__main__":
+    unittest.main()
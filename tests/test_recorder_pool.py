@@ -0,0 +1,143 @@
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import MagicMock, patch
+
+import publish
+import webrtc_subprocess_glib
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAKE_WORKER = textwrap.dedent(
+    """
+    import os
+    import sys
+
+    sys.path.insert(0, {root!r})
+    from recorder_ipc import ChildChannel, FrameDecoder, parse_log_fd
+
+    channel = ChildChannel(1, parse_log_fd(sys.argv))
+    decoder = FrameDecoder()
+    channel.send({{"type": "worker_ready"}})
+    while True:
+        data = os.read(0, 65536)
+        if not data:
+            break
+        for _kind, msg in decoder.feed(data):
+            if msg.get("type") == "shutdown":
+                sys.exit(0)
+            if msg.get("type") == "start":
+                channel.log("info", "starting " + msg["stream_id"])
+                channel.send({{"type": "ready", "stream_id": msg["stream_id"]}})
+            elif msg.get("type") == "stop":
+                channel.send({{"type": "stopped", "stream_id": msg["stream_id"]}})
+            elif msg.get("type") == "sdp":
+                channel.send({{"type": "sdp", "stream_id": msg["stream_id"], "sdp_type": "answer", "sdp": "v=0"}})
+    """
+).format(root=REPO_ROOT)
+
+
+class RecorderWorkerPoolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        handle, self.script = tempfile.mkstemp(suffix=".py")
+        with os.fdopen(handle, "w") as script:
+            script.write(FAKE_WORKER)
+
+    def tearDown(self):
+        os.unlink(self.script)
+
+    async def test_streams_share_workers_and_a_spare_is_kept_warm(self):
+        pool = publish.RecorderWorkerPool(self.script, streams_per_worker=2)
+        sessions = [publish.PooledRecorderSession(f"stream{index}", {}, pool) for index in range(3)]
+        try:
+            for session in sessions:
+                self.assertTrue(await session.start())
+            if pool._warm_task:
+                await pool._warm_task
+
+            self.assertIs(sessions[0].worker, sessions[1].worker)
+            self.assertIsNot(sessions[0].worker, sessions[2].worker)
+            self.assertEqual(sorted(worker.load for worker in pool.workers), [0, 1, 2])
+        finally:
+            for session in sessions:
+                await session.stop()
+            await pool.close()
+
+    async def test_messages_are_routed_to_their_session(self):
+        pool = publish.RecorderWorkerPool(self.script, spare_workers=0)
+        session = publish.PooledRecorderSession("camera", {}, pool)
+        answers = []
+        session.on_message("sdp", answers.append)
+        try:
+            self.assertTrue(await session.start())
+            await session.send_message({"type": "sdp", "sdp_type": "offer", "sdp": "v=0"})
+            while not answers:
+                await publish.asyncio.sleep(0.01)
+        finally:
+            await session.stop()
+            await pool.close()
+
+        self.assertEqual(answers[0]["stream_id"], "camera")
+        self.assertEqual(answers[0]["sdp_type"], "answer")
+        self.assertEqual(pool.workers, [])
+
+
+class RecorderWorkerHostTests(unittest.TestCase):
+    def make_host(self):
+        host = webrtc_subprocess_glib.RecorderWorkerHost.__new__(webrtc_subprocess_glib.RecorderWorkerHost)
+        host.handlers = {}
+        host.running = True
+        host.channel = MagicMock()
+        host.main_loop = MagicMock()
+        host.send = MagicMock()
+        return host
+
+    def test_start_and_route_by_stream_id(self):
+        host = self.make_host()
+        handler = MagicMock(stream_id="camera")
+
+        with patch("webrtc_subprocess_glib.GLibWebRTCHandler", return_value=handler) as factory:
+            host.handle_message({"type": "start", "stream_id": "camera", "config": {"room": "r"}})
+        host.handle_message({"type": "ice", "stream_id": "camera", "candidate": "c"})
+
+        factory.assert_called_once_with({"room": "r", "stream_id": "camera"}, host=host)
+        handler.send_message.assert_called_once_with({"type": "ready"})
+        handler.handle_message.assert_called_once_with({"type": "ice", "stream_id": "camera", "candidate": "c"})
+
+    def test_finished_recorder_reports_stopped(self):
+        host = self.make_host()
+        handler = MagicMock(stream_id="camera")
+        host.handlers["camera"] = handler
+
+        host.handler_finished(handler)
+
+        self.assertEqual(host.handlers, {})
+        host.send.assert_called_once_with({"type": "stopped", "stream_id": "camera"})
+
+    def test_shutdown_waits_for_recorders_to_finalize(self):
+        host = self.make_host()
+        handler = MagicMock(stream_id="camera")
+        host.handlers["camera"] = handler
+
+        host.shutdown()
+        handler.shutdown.assert_called_once_with()
+        host.main_loop.quit.assert_not_called()
+
+        host.handler_finished(handler)
+        host.main_loop.quit.assert_called_once_with()
+
+    def test_worker_flag_runs_worker_host(self):
+        with (
+            patch.object(sys, "argv", ["webrtc_subprocess_glib.py", "--worker"]),
+            patch("webrtc_subprocess_glib.run_worker") as run_worker,
+        ):
+            webrtc_subprocess_glib.main()
+
+        run_worker.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from recording_rollover import (
+    FragmentLog,
+    fragment_location,
+    passthrough_description,
+)
+
+
+class FragmentLocationTests(unittest.TestCase):
+    def test_first_fragment_keeps_plain_name(self):
+        self.assertEqual(fragment_location("rec_abc_1700000000", "webm", 0), "rec_abc_1700000000.webm")
+        self.assertEqual(fragment_location("rec_abc_1700000000", "webm", 1), "rec_abc_1700000000_part2.webm")
+        self.assertEqual(fragment_location("rec", "mkv", 4), "rec_part5.mkv")
+
+
+class PassthroughDescriptionTests(unittest.TestCase):
+    def test_vp8_goes_to_splitmuxsink_without_transcoding(self):
+        description = passthrough_description("VP8", "rec_sink")
+        self.assertIn("rtpvp8depay ! splitmuxsink name=rec_sink", description)
+        self.assertIn("max-size-time=0 max-size-bytes=0", description)
+        for element in ("vp8dec", "vp8enc", "videoscale"):
+            self.assertNotIn(element, description)
+
+    def test_fallback_writes_single_file(self):
+        description = passthrough_description("vp9", "filesink_abc", "out.mkv")
+        self.assertTrue(description.endswith("rtpvp9depay ! matroskamux streamable=true ! filesink name=filesink_abc location=out.mkv"))
+
+
+class FragmentLogTests(unittest.TestCase):
+    def test_tracks_files_and_reports_rollovers(self):
+        rolled = []
+        fragments = FragmentLog("rec_abc_1", "webm", rolled.append)
+        self.assertEqual(fragments.current, "rec_abc_1.webm")
+
+        self.assertEqual(fragments.next_location(0), "rec_abc_1.webm")
+        self.assertEqual(rolled, [])
+        self.assertEqual(fragments.next_location(1), "rec_abc_1_part2.webm")
+
+        self.assertEqual(rolled, ["rec_abc_1_part2.webm"])
+        self.assertEqual(fragments.files, ["rec_abc_1.webm", "rec_abc_1_part2.webm"])
+        self.assertEqual(fragments.current, "rec_abc_1_part2.webm")
+
+
+if __name__ == "__main__":
+    unittest.main()
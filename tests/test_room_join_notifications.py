@@ -3,7 +3,6 @@
 Unit tests for room join notification behavior.
 """
 
-import asyncio
 import os
 import sys
 import unittest
@@ -14,6 +13,7 @@ from unittest.mock import AsyncMock
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import publish
+from room_registry import RoomRegistry
 
 
 class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
@@ -92,8 +92,7 @@ class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
     async def test_handle_new_room_stream_tracks_and_notifies_in_monitor_mode(self):
         client = publish.WebRTCClient.__new__(publish.WebRTCClient)
         client.stream_filter = None
-        client.room_streams = {}
-        client.room_streams_lock = asyncio.Lock()
+        client.room_registry = RoomRegistry()
         client.room_join_notifications_enabled = True
         client.room_recording = False
         client.room_ndi = False
@@ -109,16 +108,15 @@ class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
 
         await client.handle_new_room_stream("stream_1", "uuid_1", source="joinroom")
 
-        self.assertIn("uuid_1", client.room_streams)
-        self.assertEqual(client.room_streams["uuid_1"]["streamID"], "stream_1")
+        self.assertIn("uuid_1", client.room_registry)
+        self.assertEqual(client.room_registry.stream_id_for("uuid_1"), "stream_1")
         self.assertIn("room join notify stream_1", queued_labels)
         client.create_subprocess_recorder.assert_not_awaited()
 
     async def test_handle_new_room_stream_triggers_recorder_when_room_recording(self):
         client = publish.WebRTCClient.__new__(publish.WebRTCClient)
         client.stream_filter = None
-        client.room_streams = {}
-        client.room_streams_lock = asyncio.Lock()
+        client.room_registry = RoomRegistry()
         client.room_join_notifications_enabled = False
         client.room_recording = True
         client.room_ndi = False
@@ -131,8 +129,8 @@ class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
     async def test_handle_new_room_stream_ignores_duplicate_stream(self):
         client = publish.WebRTCClient.__new__(publish.WebRTCClient)
         client.stream_filter = None
-        client.room_streams = {"existing_uuid": {"streamID": "dup_stream", "recording": False}}
-        client.room_streams_lock = asyncio.Lock()
+        client.room_registry = RoomRegistry()
+        client.room_registry.track("existing_uuid", "dup_stream")
         client.room_join_notifications_enabled = True
         client.room_recording = True
         client.room_ndi = False
@@ -144,7 +142,8 @@ class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
 
         client._queue_background_task.assert_not_called()
         client.create_subprocess_recorder.assert_not_awaited()
-        self.assertNotIn("new_uuid", client.room_streams)
+        self.assertNotIn("new_uuid", client.room_registry)
+        self.assertEqual(client.room_registry.uuid_for("dup_stream"), "existing_uuid")
 
     async def test_handle_room_listing_monitor_mode_tracks_current_streams(self):
         client = publish.WebRTCClient.__new__(publish.WebRTCClient)
@@ -152,8 +151,7 @@ class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
         client.room_ndi = False
         client.room_monitor = True
         client.stream_filter = None
-        client.room_streams = {}
-        client.room_streams_lock = asyncio.Lock()
+        client.room_registry = RoomRegistry()
 
         room_list = [
             {"UUID": "u1", "streamID": "s1"},
@@ -163,9 +161,9 @@ class TestRoomJoinNotifications(unittest.IsolatedAsyncioTestCase):
 
         await client.handle_room_listing(room_list)
 
-        self.assertEqual(len(client.room_streams), 2)
-        self.assertEqual(client.room_streams["u1"]["streamID"], "s1")
-        self.assertEqual(client.room_streams["u2"]["streamID"], "s2")
+        self.assertEqual(len(client.room_registry), 2)
+        self.assertEqual(client.room_registry.stream_id_for("u1"), "s1")
+        self.assertEqual(client.room_registry.stream_id_for("u2"), "s2")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+import unittest
+
+from room_registry import (
+    EVENT_JOINED,
+    EVENT_LEFT,
+    EVENT_STATE,
+    STATE_CONNECTED,
+    STATE_LISTED,
+    STATE_RECORDING,
+    STATE_REQUESTED,
+    RoomRegistry,
+)
+
+
+class RoomRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = RoomRegistry(clock=lambda: 100.0)
+        self.events = []
+        self.registry.subscribe(lambda event, stream: self.events.append((event, stream.uuid, stream.state)))
+
+    def test_track_indexes_uuid_and_stream(self):
+        stream, created = self.registry.track("u1", "s1")
+
+        self.assertTrue(created)
+        self.assertEqual(stream.state, STATE_LISTED)
+        self.assertIn("u1", self.registry)
+        self.assertEqual(self.registry.stream_id_for("u1"), "s1")
+        self.assertEqual(self.registry.uuid_for("s1"), "u1")
+        self.assertIs(self.registry.by_stream("s1"), stream)
+        self.assertEqual(self.events, [(EVENT_JOINED, "u1", STATE_LISTED)])
+
+    def test_track_does_not_steal_stream_from_other_peer(self):
+        self.registry.track("u1", "s1")
+
+        stream, created = self.registry.track("u2", "s1")
+
+        self.assertFalse(created)
+        self.assertEqual(stream.uuid, "u1")
+        self.assertNotIn("u2", self.registry)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_assign_takes_over_stream_and_only_advances_state(self):
+        self.registry.track("room_member_s1", "s1")
+
+        stream = self.registry.assign("u1", "s1")
+
+        self.assertEqual(stream.state, STATE_REQUESTED)
+        self.assertNotIn("room_member_s1", self.registry)
+        self.assertEqual(self.registry.uuid_for("s1"), "u1")
+
+        self.registry.set_state("u1", STATE_RECORDING)
+        self.assertEqual(self.registry.assign("u1", "s1").state, STATE_RECORDING)
+        self.assertIn((EVENT_LEFT, "room_member_s1", STATE_LISTED), self.events)
+
+    def test_alias_and_session_lookups_are_cleared_on_remove(self):
+        self.registry.assign("u1", "camera123abc")
+        self.registry.add_alias("u1", "camera")
+        self.registry.set_session("u1", "sess-1")
+
+        self.assertEqual(self.registry.uuid_for("camera"), "u1")
+        self.assertEqual(self.registry.by_session("sess-1").stream_id, "camera123abc")
+
+        removed = self.registry.remove("u1")
+
+        self.assertEqual(removed.stream_id, "camera123abc")
+        self.assertIsNone(self.registry.uuid_for("camera"))
+        self.assertIsNone(self.registry.uuid_for("camera123abc"))
+        self.assertIsNone(self.registry.by_session("sess-1"))
+        self.assertIsNone(self.registry.remove("u1"))
+
+    def test_alias_owned_by_other_peer_is_kept(self):
+        self.registry.track("u1", "camera")
+        self.registry.track("u2", "camera123abc")
+
+        self.registry.add_alias("u2", "camera")
+
+        self.assertEqual(self.registry.uuid_for("camera"), "u1")
+
+    def test_set_stream_state_emits_state_event_and_counts(self):
+        self.registry.track("u1", "s1")
+        self.registry.track("u2", "s2")
+        self.events.clear()
+
+        self.registry.set_stream_state("s2", STATE_CONNECTED)
+        self.registry.set_stream_state("s2", STATE_CONNECTED)
+        self.registry.set_stream_state("missing", STATE_RECORDING)
+
+        self.assertEqual(self.events, [(EVENT_STATE, "u2", STATE_CONNECTED)])
+        self.assertEqual(self.registry.counts()[STATE_LISTED], 1)
+        self.assertEqual(self.registry.counts()[STATE_CONNECTED], 1)
+        self.assertFalse(self.registry.get("u2").recording)
+
+    def test_unknown_state_is_rejected(self):
+        self.registry.track("u1", "s1")
+        with self.assertRaises(ValueError):
+            self.registry.set_state("u1", "paused")
+
+    def test_remove_stream_by_stream_id(self):
+        self.registry.track("u1", "s1")
+
+        self.assertEqual(self.registry.remove_stream("s1").uuid, "u1")
+        self.assertFalse(self.registry.has_stream("s1"))
+        self.assertEqual((self.registry.joined, self.registry.left), (1, 1))
+
+    def test_large_room_join_and_leave(self):
+        for i in range(500):
+            self.registry.track(f"u{i}", f"s{i}")
+        for i in range(0, 500, 2):
+            self.registry.remove(f"u{i}")
+
+        self.assertEqual(len(self.registry), 250)
+        self.assertEqual(self.registry.uuid_for("s499"), "u499")
+        self.assertIsNone(self.registry.uuid_for("s498"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import mmap
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from shm_frames import (
+    COMMAND_ACK_BUFFER,
+    COMMAND_CLOSE_SHM_AREA,
+    COMMAND_NEW_BUFFER,
+    COMMAND_NEW_SHM_AREA,
+    COMMAND_SIZE,
+    CommandBuffer,
+    ShmFrameReader,
+    write_caps_file,
+)
+
+
+def command(kind, area_id, **fields):
+    cmd = CommandBuffer(type=kind, area_id=area_id)
+    if kind == COMMAND_NEW_SHM_AREA:
+        cmd.payload.new_shm_area.size = fields["size"]
+        cmd.payload.new_shm_area.path_size = fields["path_size"]
+    elif kind == COMMAND_NEW_BUFFER:
+        cmd.payload.buffer.offset = fields["offset"]
+        cmd.payload.buffer.bsize = fields["size"]
+        cmd.payload.buffer.payload_size = fields["size"]
+    return bytes(cmd)
+
+
+@unittest.skipUnless(os.path.isdir("/dev/shm"), "needs /dev/shm")
+class ShmFrameReaderTests(unittest.TestCase):
+    """Plays the shmsink side of the shmpipe protocol against the reader."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "frames.sock")
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(1)
+        self.area_name = f"/rn_test_shmpipe.{os.getpid()}"
+        self.area_path = "/dev/shm" + self.area_name
+        with open(self.area_path, "wb") as handle:
+            handle.truncate(4096)
+        fd = os.open(self.area_path, os.O_RDWR)
+        self.area = mmap.mmap(fd, 4096)
+        os.close(fd)
+        self.reader = None
+
+    def tearDown(self):
+        if self.reader:
+            self.reader.close()
+        self.area.close()
+        os.unlink(self.area_path)
+        self.server.close()
+        self.tmp.cleanup()
+
+    def connect(self):
+        accepted = {}
+        thread = threading.Thread(target=lambda: accepted.setdefault("conn", self.server.accept()[0]))
+        thread.start()
+        self.reader = ShmFrameReader(self.socket_path, timeout=2)
+        thread.join()
+        conn = accepted["conn"]
+        self.addCleanup(conn.close)
+        path = self.area_name.encode() + b"\0"
+        conn.sendall(command(COMMAND_NEW_SHM_AREA, 7, size=4096, path_size=len(path)) + path)
+        return conn
+
+    def test_frames_are_zero_copy_views_and_acknowledged(self):
+        write_caps_file(self.socket_path, 4, 2, "BGR", "30/1")
+        conn = self.connect()
+        self.area[128:152] = bytes(range(24))
+        conn.sendall(command(COMMAND_NEW_BUFFER, 7, offset=128, size=24))
+
+        frame = self.reader.read()
+        self.assertEqual((frame.width, frame.height, frame.stride, frame.format), (4, 2, 12, "BGR"))
+        self.assertEqual(bytes(frame.data), bytes(range(24)))
+        self.area[128] = 99
+        self.assertEqual(frame.data[0], 99)
+
+        frame.release()
+        ack = CommandBuffer.from_buffer_copy(conn.recv(COMMAND_SIZE))
+        self.assertEqual((ack.type, ack.area_id, ack.payload.ack_buffer.offset), (COMMAND_ACK_BUFFER, 7, 128))
+
+    def test_caps_changes_are_picked_up(self):
+        write_caps_file(self.socket_path, 4, 2, "BGR")
+        conn = self.connect()
+        conn.sendall(command(COMMAND_NEW_BUFFER, 7, offset=0, size=24))
+        with self.reader.read() as frame:
+            self.assertEqual(frame.width, 4)
+
+        write_caps_file(self.socket_path, 2, 2, "BGRx")
+        os.utime(self.socket_path + ".caps", ns=(1, 1))
+        conn.sendall(command(COMMAND_NEW_BUFFER, 7, offset=64, size=16))
+        with self.reader.read() as frame:
+            self.assertEqual((frame.width, frame.format, frame.stride), (2, "BGRx", 8))
+
+    def test_closed_area_and_disconnect(self):
+        conn = self.connect()
+        conn.sendall(command(COMMAND_CLOSE_SHM_AREA, 7) + command(COMMAND_NEW_BUFFER, 7, offset=0, size=8))
+        ack = None
+
+        def close_after_ack():
+            nonlocal ack
+            ack = CommandBuffer.from_buffer_copy(conn.recv(COMMAND_SIZE))
+            conn.shutdown(socket.SHUT_RDWR)
+
+        thread = threading.Thread(target=close_after_ack)
+        thread.start()
+        with self.assertRaises(ConnectionError):
+            self.reader.read()
+        thread.join()
+        self.assertEqual(ack.type, COMMAND_ACK_BUFFER)
+
+
+if __name__ == "__main__":
+    unittest.main()
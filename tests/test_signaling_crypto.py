@@ -0,0 +1,61 @@
+import json
+import unittest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+import signaling_crypto
+from signaling_crypto import decrypt_message, encrypt_fields, encrypt_message, generate_key, unpad_message
+
+PHRASE = "someEXAMPLEpassword" + "vdo.ninja"
+
+
+def reference_decrypt(ciphertext_hex, iv_hex, phrase):
+    """Decrypt the way the original helpers (and the website) do."""
+    cipher = Cipher(algorithms.AES(generate_key(phrase)), modes.CBC(bytes.fromhex(iv_hex)), backend=default_backend())
+    decryptor = cipher.decryptor()
+    padded = decryptor.update(bytes.fromhex(ciphertext_hex)) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return (unpadder.update(padded) + unpadder.finalize()).decode("utf-8")
+
+
+class SignalingCryptoTests(unittest.TestCase):
+    def test_round_trip_matches_reference_format(self):
+        candidate = {"candidate": "candidate:1 1 UDP 2015363327 192.168.1.23 51234 typ host", "sdpMLineIndex": 0}
+
+        ciphertext, iv = encrypt_message(candidate, PHRASE)
+
+        self.assertEqual(len(iv), 32)
+        self.assertEqual(ciphertext, ciphertext.lower())
+        self.assertEqual(json.loads(reference_decrypt(ciphertext, iv, PHRASE)), candidate)
+        self.assertEqual(json.loads(decrypt_message(ciphertext, iv, PHRASE)), candidate)
+
+    def test_wrong_password_or_garbage_returns_none(self):
+        ciphertext, iv = encrypt_message({"type": "offer", "sdp": "v=0"}, PHRASE)
+
+        self.assertIsNone(decrypt_message(ciphertext, iv, "wrong" + PHRASE))
+        self.assertIsNone(decrypt_message("not hex", iv, PHRASE))
+        self.assertIsNone(decrypt_message(ciphertext[:-2], iv, PHRASE))
+        self.assertIsNone(unpad_message(b"\x00" * 16))
+
+    def test_fields_share_the_message_vector(self):
+        msg = {"UUID": "peer", "description": {"type": "answer"}, "candidates": [{"candidate": "a"}, {"candidate": "b"}]}
+
+        encrypt_fields(msg, PHRASE)
+
+        self.assertEqual(msg["UUID"], "peer")
+        self.assertEqual(json.loads(decrypt_message(msg["description"], msg["vector"], PHRASE)), {"type": "answer"})
+        self.assertEqual(len(json.loads(decrypt_message(msg["candidates"], msg["vector"], PHRASE))), 2)
+        self.assertNotIn("vector", encrypt_fields({"request": "play"}, PHRASE))
+
+    def test_key_is_derived_once_per_phrase(self):
+        signaling_crypto.generate_key.cache_clear()
+        for _ in range(5):
+            encrypt_message({"candidate": "x"}, PHRASE + "cache")
+        info = signaling_crypto.generate_key.cache_info()
+        self.assertEqual(info.misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import threading
 import unittest
 from io import StringIO
 from types import SimpleNamespace
@@ -5,6 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import publish
 import webrtc_subprocess_glib
+from room_registry import RoomRegistry
 
 
 class SingleStreamRecordingTests(unittest.TestCase):
@@ -39,7 +41,9 @@ class SingleStreamRecordingTests(unittest.TestCase):
         handler.run.side_effect = KeyboardInterrupt
 
         with (
-            patch("webrtc_subprocess_glib.sys.stdin", StringIO("{}\n")),
+            patch("webrtc_subprocess_glib.sys.stdin"),
+            patch("webrtc_subprocess_glib.open_child_channel"),
+            patch("webrtc_subprocess_glib.read_control_frame", return_value={}),
             patch("webrtc_subprocess_glib.sys.stderr", new_callable=StringIO) as stderr,
             patch("webrtc_subprocess_glib.GLibWebRTCHandler", return_value=handler),
         ):
@@ -49,12 +53,139 @@ class SingleStreamRecordingTests(unittest.TestCase):
         self.assertEqual(stderr.getvalue(), "")
 
 
+class RecordingFinalizeTests(unittest.TestCase):
+    def make_handler(self):
+        handler = webrtc_subprocess_glib.GLibWebRTCHandler.__new__(webrtc_subprocess_glib.GLibWebRTCHandler)
+        handler.pipe = MagicMock()
+        handler.recording_video = True
+        handler.recording_audio = False
+        handler.recording_video_queue = MagicMock()
+        handler.recording_audio_queue = None
+        handler.av_mux = None
+        handler._finalize_done = None
+        handler._finalize_timer = None
+        handler._finalize_watching = False
+        handler.log = MagicMock()
+        return handler
+
+    def test_finalize_waits_on_the_bus_without_blocking(self):
+        handler = self.make_handler()
+        done = MagicMock()
+        gst = webrtc_subprocess_glib.Gst
+        bus = handler.pipe.get_bus.return_value
+
+        with patch("webrtc_subprocess_glib.GLib") as glib:
+            glib.timeout_add.return_value = 42
+            self.assertTrue(handler.finalize_recordings(done))
+            bus.timed_pop_filtered.assert_not_called()
+            done.assert_not_called()
+
+            callback = bus.add_watch.call_args[0][1]
+            self.assertTrue(callback(bus, MagicMock(type=gst.MessageType.STATE_CHANGED)))
+            self.assertFalse(callback(bus, MagicMock(type=gst.MessageType.EOS)))
+
+        done.assert_called_once_with()
+        glib.source_remove.assert_called_once_with(42)
+        bus.remove_watch.assert_not_called()  # returning False removed it
+
+    def test_finalize_timeout_removes_the_watch(self):
+        handler = self.make_handler()
+        done = MagicMock()
+        bus = handler.pipe.get_bus.return_value
+
+        with patch("webrtc_subprocess_glib.GLib") as glib:
+            handler.finalize_recordings(done, timeout_seconds=3)
+            timeout, callback = glib.timeout_add.call_args[0]
+            self.assertEqual(timeout, 3000)
+            self.assertFalse(callback())
+
+        done.assert_called_once_with()
+        bus.remove_watch.assert_called_once_with()
+        glib.source_remove.assert_not_called()
+
+    def test_nothing_to_finalize_returns_false(self):
+        handler = self.make_handler()
+        handler.recording_video = False
+
+        self.assertFalse(handler.finalize_recordings(MagicMock()))
+
+
+class SingleFileRecordingTests(unittest.TestCase):
+    def make_handler(self, mux_pads):
+        handler = webrtc_subprocess_glib.GLibWebRTCHandler.__new__(webrtc_subprocess_glib.GLibWebRTCHandler)
+        handler.pipe = MagicMock()
+        handler.av_mux = MagicMock()
+        handler.av_mux_pads = dict(mux_pads)
+        handler.av_mux_lock = threading.Lock()
+        handler.log = MagicMock()
+        return handler
+
+    def test_single_file_only_for_plain_recording_with_audio(self):
+        def single_file(**config):
+            handler = webrtc_subprocess_glib.GLibWebRTCHandler(
+                dict({"stream_id": "cam", "single_file": True, "record_audio": True}, **config),
+                host=MagicMock(),
+            )
+            return handler.single_file
+
+        self.assertTrue(single_file())
+        self.assertFalse(single_file(use_hls=True))
+        self.assertFalse(single_file(room_ndi=True))
+        self.assertFalse(single_file(record_audio=False))
+        self.assertFalse(single_file(single_file=False))
+
+    def test_join_timeout_releases_only_the_unlinked_pad(self):
+        video_pad = MagicMock(**{"is_linked.return_value": True})
+        audio_pad = MagicMock(**{"is_linked.return_value": False})
+        handler = self.make_handler({"video": video_pad, "audio": audio_pad})
+
+        self.assertFalse(handler._release_unjoined_mux_pads())
+
+        handler.av_mux.release_request_pad.assert_called_once_with(audio_pad)
+        self.assertEqual(handler.av_mux_pads, {"video": video_pad})
+
+    def test_late_track_goes_to_a_fakesink(self):
+        handler = self.make_handler({"video": MagicMock()})
+        pad = MagicMock()
+        elements = [MagicMock(), MagicMock()]
+        fakesink = MagicMock()
+
+        with patch("webrtc_subprocess_glib.Gst.ElementFactory.make", return_value=fakesink) as make:
+            self.assertFalse(handler._link_to_av_mux("audio", pad, elements))
+
+        make.assert_called_once_with("fakesink", None)
+        pad.link.assert_called_once_with(fakesink.get_static_pad.return_value)
+        handler.pipe.add.assert_called_once_with(fakesink)
+        for element in elements:
+            element.link.assert_not_called()
+
+    def test_finalize_releases_the_missing_pad_before_eos(self):
+        audio_pad = MagicMock(**{"is_linked.return_value": False})
+        handler = self.make_handler({"audio": audio_pad})
+        handler.recording_video = True
+        handler.recording_audio = False
+        handler.recording_video_queue = MagicMock()
+        handler.recording_audio_queue = None
+        handler._finalize_done = None
+        handler._finalize_timer = None
+        handler._finalize_watching = False
+        order = []
+        handler.av_mux.release_request_pad.side_effect = lambda pad: order.append("release")
+        src_pad = handler.recording_video_queue.get_static_pad.return_value
+        src_pad.push_event.side_effect = lambda event: order.append("eos") or True
+
+        with patch("webrtc_subprocess_glib.GLib"):
+            self.assertTrue(handler.finalize_recordings(MagicMock()))
+
+        self.assertEqual(order, ["release", "eos"])
+        self.assertEqual(handler.av_mux_pads, {})
+
+
 class SingleStreamRecordingOfferTests(unittest.IsolatedAsyncioTestCase):
     async def test_existing_offer_starts_recorder_without_duplicate_play_request(self):
         client = SimpleNamespace(
             subprocess_managers={},
-            uuid_to_stream_id={},
-            stream_id_to_uuid={},
+            room_registry=RoomRegistry(),
         )
 
         async def start_recorder(stream_id, uuid, request_play=True):
@@ -73,8 +204,8 @@ class SingleStreamRecordingOfferTests(unittest.IsolatedAsyncioTestCase):
         )
 
         self.assertTrue(routed)
-        self.assertEqual(client.uuid_to_stream_id, {"peer-uuid": "camera-stream"})
-        self.assertEqual(client.stream_id_to_uuid, {"camera-stream": "peer-uuid"})
+        self.assertEqual(client.room_registry.stream_id_for("peer-uuid"), "camera-stream")
+        self.assertEqual(client.room_registry.uuid_for("camera-stream"), "peer-uuid")
         client.create_subprocess_recorder.assert_awaited_once_with(
             "camera-stream",
             "peer-uuid",
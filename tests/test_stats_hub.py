@@ -0,0 +1,161 @@
+import asyncio
+import json
+import unittest
+
+from stats_hub import StatsHub, apply_delta, diff_snapshot
+
+
+class DiffTests(unittest.TestCase):
+    def test_nested_changes_and_removals(self):
+        previous = {"stats": {"viewers": 1, "bitrate": "2000 kbps", "rtt": 20}, "system": {"cpu": "5%"}, "gone": 1}
+        current = {"stats": {"viewers": 2, "bitrate": "2000 kbps"}, "system": {"cpu": "5%"}, "ice": {"connections": []}}
+
+        changes, removed = diff_snapshot(previous, current)
+
+        self.assertEqual(changes, {"stats": {"viewers": 2}, "ice": {"connections": []}})
+        self.assertEqual(removed, [["stats", "rtt"], ["gone"]])
+        self.assertEqual(apply_delta(previous, changes, removed), current)
+
+    def test_none_values_are_kept(self):
+        previous = {"stats": {"fps": 30}}
+        current = {"stats": {"fps": None}}
+        changes, removed = diff_snapshot(previous, current)
+        self.assertEqual((changes, removed), ({"stats": {"fps": None}}, []))
+        self.assertEqual(apply_delta(previous, changes, removed), current)
+
+    def test_lists_are_replaced_whole(self):
+        changes, _removed = diff_snapshot({"viewers": [{"id": "a"}]}, {"viewers": [{"id": "a"}, {"id": "b"}]})
+        self.assertEqual(changes, {"viewers": [{"id": "a"}, {"id": "b"}]})
+        self.assertEqual(diff_snapshot({"a": {"b": 1}}, {"a": {"b": 1}}), ({}, []))
+
+
+class Subscriber:
+    def __init__(self, fail=False):
+        self.messages = []
+        self.fail = fail
+
+    async def __call__(self, message):
+        if self.fail:
+            raise ConnectionResetError("closed")
+        self.messages.append(json.loads(message))
+
+
+class StatsHubTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.viewers = 0
+        self.hub = StatsHub(self.sample, interval=3600)
+
+    async def asyncTearDown(self):
+        await self.hub.stop()
+
+    def sample(self):
+        return {"stats": {"viewers": self.viewers, "mode": "publish"}}
+
+    async def test_one_sample_per_tick_for_many_subscribers(self):
+        subscribers = [Subscriber() for _ in range(10)]
+        for subscriber in subscribers:
+            await self.hub.subscribe(subscriber)
+        samples_before = self.hub.samples_taken
+
+        self.viewers = 3
+        await self.hub.tick()
+
+        self.assertEqual(self.hub.samples_taken, samples_before + 1)
+        for subscriber in subscribers:
+            self.assertEqual(subscriber.messages[0]["type"], "snapshot")
+            self.assertEqual(subscriber.messages[-1], {"type": "delta", "changes": {"stats": {"viewers": 3}}})
+
+    async def test_unchanged_sample_sends_nothing(self):
+        subscriber = Subscriber()
+        await self.hub.subscribe(subscriber)
+        await self.hub.tick()
+        self.assertEqual(len(subscriber.messages), 1)
+
+    async def test_failed_subscriber_is_dropped(self):
+        good, bad = Subscriber(), Subscriber()
+        await self.hub.subscribe(good)
+        await self.hub.subscribe(bad)
+        bad.fail = True
+
+        self.viewers = 1
+        await self.hub.tick()
+
+        self.assertEqual(self.hub.subscribers, 1)
+        self.assertEqual(good.messages[-1]["changes"], {"stats": {"viewers": 1}})
+
+    async def test_sampler_runs_only_while_subscribed(self):
+        hub = StatsHub(self.sample, interval=0.01)
+        subscriber = Subscriber()
+        await hub.subscribe(subscriber)
+        self.viewers = 5
+        for _ in range(100):
+            if len(subscriber.messages) > 1:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(subscriber.messages[-1]["changes"], {"stats": {"viewers": 5}})
+
+        await hub.unsubscribe(subscriber)
+        taken = hub.samples_taken
+        await asyncio.sleep(0.05)
+        self.assertEqual(hub.samples_taken, taken)
+
+    async def test_failing_sample_does_not_stop_the_sampler(self):
+        errors = []
+        calls = 0
+
+        def sample():
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise RuntimeError("dictionary changed size during iteration")
+            return {"stats": {"viewers": calls}}
+
+        hub = StatsHub(sample, interval=0.01, log=errors.append)
+        subscriber = Subscriber()
+        await hub.subscribe(subscriber)
+        for _ in range(100):
+            if len(subscriber.messages) > 1:
+                break
+            await asyncio.sleep(0.01)
+        await hub.stop()
+
+        self.assertEqual(errors, ["Dashboard stats update failed: dictionary changed size during iteration"])
+        self.assertEqual(subscriber.messages[1], {"type": "delta", "changes": {"stats": {"viewers": 3}}})
+
+    async def test_removed_keys_are_listed(self):
+        subscriber = Subscriber()
+        self.viewers = None
+        await self.hub.subscribe(subscriber)
+        self.hub.sample = lambda: {"stats": {"viewers": None}}
+
+        await self.hub.tick()
+
+        self.assertEqual(subscriber.messages[-1], {"type": "delta", "changes": {}, "removed": [["stats", "mode"]]})
+
+    async def test_extras_are_broadcast(self):
+        lines = [["a", "b"]]
+        self.hub.add_extra(lambda: {"type": "logs", "messages": lines.pop()} if lines else None)
+        subscriber = Subscriber()
+        await self.hub.subscribe(subscriber)
+
+        await self.hub.tick()
+        await self.hub.tick()
+
+        self.assertEqual(subscriber.messages[1:], [{"type": "logs", "messages": ["a", "b"]}])
+
+    async def test_async_sampler_and_resync(self):
+        async def sample():
+            return {"stats": {"viewers": 7}}
+
+        hub = StatsHub(sample, interval=3600)
+        subscriber = Subscriber()
+        await hub.subscribe(subscriber)
+        await hub.resync(subscriber)
+        await hub.stop()
+
+        self.assertEqual([m["type"] for m in subscriber.messages], ["snapshot", "snapshot"])
+        self.assertEqual(subscriber.messages[0]["stats"], {"stats": {"viewers": 7}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import array
+import math
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from transcription import SAMPLE_RATE, AudioFollower, TranscriptionService, TranscriptionSession, VadSegmenter
+
+
+def pcm(seconds, amplitude=0):
+    count = int(SAMPLE_RATE * seconds)
+    samples = array.array("h", (int(amplitude * math.sin(i / 5)) for i in range(count)))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+class FakeFollower:
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.stopped = threading.Event()
+
+    def chunks(self):
+        yield from self._chunks
+        # Like ffmpeg -follow: wait for more data until stopped
+        self.stopped.wait(5)
+
+    def stop(self):
+        self.stopped.set()
+
+
+class VadSegmenterTests(unittest.TestCase):
+    def test_splits_utterances_at_pauses(self):
+        segmenter = VadSegmenter(min_silence_ms=300, padding_ms=60)
+        audio = pcm(1.0) + pcm(0.6, 8000) + pcm(0.5) + pcm(0.9, 8000) + pcm(0.1)
+
+        segments = []
+        for offset in range(0, len(audio), 3000):  # arbitrary chunking
+            segments.extend(segmenter.feed(audio[offset:offset + 3000]))
+        tail = segmenter.flush()
+
+        self.assertEqual(len(segments), 1)
+        self.assertAlmostEqual(segments[0].start, 0.93, places=2)
+        self.assertGreaterEqual(segments[0].end, 1.6)
+        self.assertIsNotNone(tail)
+        self.assertAlmostEqual(tail.start, 2.04, delta=0.031)
+        self.assertEqual(len(tail.pcm), round((tail.end - tail.start) * SAMPLE_RATE) * 2)
+
+    def test_drops_clicks_and_caps_length(self):
+        segmenter = VadSegmenter(min_silence_ms=300, max_segment_s=1.0)
+        self.assertEqual(segmenter.feed(pcm(0.5) + pcm(0.06, 8000) + pcm(0.5)), [])
+
+        segments = segmenter.feed(pcm(2.5, 8000))
+        self.assertEqual(len(segments), 2)
+        self.assertAlmostEqual(segments[0].end - segments[0].start, 1.0, delta=0.031)
+
+    def test_noise_floor_tracks_steady_background(self):
+        segmenter = VadSegmenter(threshold=100)
+        hum = pcm(0.03, 250)
+        self.assertTrue(segmenter.is_speech(hum))
+        for _ in range(500):
+            segmenter.is_speech(hum)
+        self.assertFalse(segmenter.is_speech(hum))
+        self.assertTrue(segmenter.is_speech(pcm(0.03, 8000)))
+
+
+class TranscriptionServiceTests(unittest.TestCase):
+    def test_model_loads_lazily_once(self):
+        loads = []
+        service = TranscriptionService("tiny", load_model=lambda name: loads.append(name) or "model", transcribe=lambda model, audio, language: f"{model}:{len(audio)}:{language}")
+        self.assertFalse(service.loaded)
+
+        results = [service.submit(b"\0\0" * n, "en") for n in (1, 2, 3)]
+        self.assertEqual([future.result(5) for future in results], ["model:2:en", "model:4:en", "model:6:en"])
+        self.assertEqual(loads, ["tiny"])
+        service.shutdown()
+
+    def test_concurrency_is_bounded(self):
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def transcribe(model, audio, language):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return "x"
+
+        service = TranscriptionService(max_workers=2, load_model=lambda name: object(), transcribe=transcribe)
+        futures = [service.submit(b"") for _ in range(6)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(peak, 2)
+        service.shutdown()
+
+
+class TranscriptionSessionTests(unittest.TestCase):
+    def test_appends_text_while_recording_and_finishes_tail(self):
+        with tempfile.TemporaryDirectory() as directory:
+            transcript = Path(directory, "rec_speech.txt")
+            audio_path = Path(directory, "rec_1_audio.ts")
+            spoken = iter(["hello there", "", "general kenobi"])
+            service = TranscriptionService(load_model=lambda name: object(), transcribe=lambda model, audio, language: next(spoken))
+            follower = FakeFollower([pcm(0.5, 8000), pcm(1.0), pcm(0.3, 8000) + pcm(1.0), pcm(0.5, 8000)])
+            found = []
+
+            def locate():
+                found.append(True)
+                return audio_path if len(found) > 1 else None
+
+            session = TranscriptionSession(
+                service, locate, transcript, language="en",
+                follower_factory=lambda path: follower, poll_interval=0.01, drain_seconds=0.01,
+            ).start()
+
+            deadline = time.time() + 5
+            while session.text != "hello there" and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(session.text, "hello there")
+            self.assertEqual(transcript.read_text(encoding="utf-8"), "hello there\n")
+
+            self.assertEqual(session.finish("fr", timeout=5), "hello there general kenobi")
+            self.assertTrue(session.done)
+            self.assertEqual(session.audio_path, audio_path)
+            self.assertEqual(transcript.read_text(encoding="utf-8"), "hello there\ngeneral kenobi\n")
+            service.shutdown()
+
+    def test_finish_without_audio_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            service = TranscriptionService(load_model=lambda name: self.fail("model loaded"))
+            session = TranscriptionSession(service, lambda: None, Path(directory, "t.txt"), poll_interval=0.01).start()
+            self.assertEqual(session.finish(timeout=5), "")
+            self.assertIsNone(session.audio_path)
+            self.assertFalse(service.loaded)
+
+
+class AudioFollowerTests(unittest.TestCase):
+    def test_command_follows_growing_file_as_16k_mono_pcm(self):
+        command = AudioFollower(Path("rec_audio.ts"), idle_timeout=2).command()
+        self.assertEqual(command[command.index("-follow") + 1], "1")
+        self.assertEqual(command[command.index("-rw_timeout") + 1], "2000000")
+        self.assertLess(command.index("-follow"), command.index("-i"))
+        self.assertEqual(command[-5:], ["-ar", "16000", "-f", "s16le", "-"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -68,6 +68,9 @@ class V4L2CaptureModeTests(unittest.TestCase):
 class V4L2JpegProbeTests(unittest.TestCase):
     def setUp(self):
         publish.v4l2_jpeg_decoder_usable.cache_clear()
+        patcher = patch.object(publish, "get_capability_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def tearDown(self):
         publish.v4l2_jpeg_decoder_usable.cache_clear()
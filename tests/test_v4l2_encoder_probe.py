@@ -1,12 +1,18 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
 import publish
+from capability_cache import CapabilityCache
 
 
 class V4L2EncoderProbeTests(unittest.TestCase):
     def setUp(self):
         publish.v4l2_h264_encoder_usable.cache_clear()
+        patcher = patch.object(publish, "get_capability_cache", return_value=None)
+        self.get_cache = patcher.start()
+        self.addCleanup(patcher.stop)
 
     def tearDown(self):
         publish.v4l2_h264_encoder_usable.cache_clear()
@@ -48,5 +54,21 @@ class V4L2EncoderProbeTests(unittest.TestCase):
         run_probe.assert_not_called()
 
 
+    @patch.object(publish, "gst_element_available", return_value=True)
+    @patch.object(publish, "_run_v4l2_h264_encoder_probe", return_value=(True, "ok"))
+    def test_cached_result_skips_frame_probe(self, run_probe, _available):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "capabilities.json")
+            self.get_cache.return_value = CapabilityCache(path, {"kernel": "test"})
+            with patch.object(publish, "RN_DISABLE_V4L2_ENCODER", False), patch.object(
+                publish, "RN_FORCE_V4L2_ENCODER", False
+            ):
+                self.assertTrue(publish.v4l2_h264_encoder_usable())
+                publish.v4l2_h264_encoder_usable.cache_clear()
+                self.get_cache.return_value = CapabilityCache(path, {"kernel": "test"})
+                self.assertTrue(publish.v4l2_h264_encoder_usable())
+        run_probe.assert_called_once_with()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,136 @@
+import json
+import unittest
+
+from webrtc_stats import parse_webrtc_stats
+
+
+class FakeEnum:
+    def __init__(self, nick):
+        self.value_nick = nick
+
+
+class FakeStructure:
+    """Minimal Gst.Structure stand-in exposing the accessors the engine uses."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.lookups = []
+
+    def n_fields(self):
+        return len(self.fields)
+
+    def nth_field_name(self, index):
+        return list(self.fields)[index]
+
+    def has_field(self, name):
+        return name in self.fields
+
+    def get_value(self, name):
+        self.lookups.append(name)
+        return self.fields.get(name)
+
+
+class WebRTCStatsEngineTests(unittest.TestCase):
+    def test_publisher_reply_exposes_outbound_and_remote_loss(self):
+        reply = FakeStructure(
+            {
+                "codec-stats-sink_0": FakeStructure(
+                    {"type": FakeEnum("codec"), "mime-type": "video/H264", "payload-type": 96}
+                ),
+                "rtp-outbound-stream-stats_1": FakeStructure(
+                    {
+                        "type": FakeEnum("outbound-rtp"),
+                        "codec-id": "codec-stats-sink_0",
+                        "bytes-sent": 4000,
+                        "packets-sent": 40,
+                    }
+                ),
+                "rtp-outbound-stream-stats_2": FakeStructure(
+                    {"type": FakeEnum("outbound-rtp"), "kind": "audio", "bytes-sent": 1000, "packets-sent": 50}
+                ),
+                "rtp-remote-inbound-stream-stats_1": FakeStructure(
+                    {
+                        "type": FakeEnum("remote-inbound-rtp"),
+                        "codec-id": "codec-stats-sink_0",
+                        "packets-lost": 3,
+                        "fraction-lost": 0.02,
+                    }
+                ),
+            }
+        )
+
+        snapshot = parse_webrtc_stats(reply)
+
+        self.assertEqual(snapshot.kind_bytes("video", False), 4000)
+        self.assertEqual(snapshot.kind_bytes("audio", False), 1000)
+        self.assertEqual(snapshot.total_bytes(False), 5000)
+        self.assertEqual(snapshot.total_packets(False), 90)
+        self.assertAlmostEqual(snapshot.first_value("fraction_lost"), 0.02)
+        self.assertEqual(snapshot.loss_counters(), (3, None))
+        self.assertEqual(snapshot.codec_name("video"), "H264")
+
+    def test_viewer_reply_reads_nested_jitterbuffer_fields(self):
+        reply = {
+            "rtp-inbound-stream-stats_7": {
+                "type": 2,
+                "kind": "video",
+                "bytes-received": 9000,
+                "packets-received": 95,
+                "frame-width": 1280,
+                "frame-height": 720,
+                "gst-rtpsource-stats": {"packets-lost": 5},
+            },
+        }
+
+        snapshot = parse_webrtc_stats(reply)
+
+        self.assertEqual(snapshot.total_bytes(True), 9000)
+        self.assertEqual(snapshot.frame_size(), (1280, 720))
+        self.assertEqual(snapshot.loss_counters(), (5, 95))
+
+    def test_unread_stat_types_are_not_converted(self):
+        transport = FakeStructure({"type": FakeEnum("transport"), "bytes-sent": 10})
+        reply = FakeStructure({"transport-stats_0": transport})
+
+        snapshot = parse_webrtc_stats(reply)
+
+        self.assertEqual(list(snapshot.rtp_streams()), [])
+        self.assertEqual(transport.lookups, ["type"])
+
+    def test_type_is_inferred_from_stat_id_when_missing(self):
+        snapshot = parse_webrtc_stats(
+            {"rtp-outbound-stream-stats_9": {"kind": "video", "bytes-sent": 12}}
+        )
+
+        self.assertEqual(snapshot.outbound[0].bytes, 12)
+        self.assertEqual(snapshot.total_bytes(True), 12)
+
+    def test_summary_is_json_safe_and_prefers_candidate_pair_rtt(self):
+        snapshot = parse_webrtc_stats(
+            {
+                "rtp-inbound-stream-stats_1": {
+                    "type": 2,
+                    "kind": "video",
+                    "bytes-received": 9000,
+                    "packets-received": 95,
+                    "packets-lost": 5,
+                    "jitter": 0.004,
+                    "round-trip-time": 0.2,
+                },
+                "candidate-pair_1": {"type": 11, "nominated": True, "current-round-trip-time": 0.03},
+            }
+        )
+
+        summary = snapshot.summary(is_receive=True)
+
+        self.assertEqual(json.loads(json.dumps(summary)), summary)
+        self.assertEqual(summary["bytes"], 9000)
+        self.assertEqual(summary["video_bytes"], 9000)
+        self.assertIsNone(summary["audio_bytes"])
+        self.assertEqual((summary["packets_lost"], summary["packets_received"]), (5, 95))
+        self.assertAlmostEqual(summary["jitter"], 0.004)
+        self.assertAlmostEqual(summary["round_trip_time"], 0.03)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Compare per-message cost of signaling encryption before and after the key cache."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+import sys
+import timeit
+from typing import Any, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cryptography.hazmat.backends import default_backend  # noqa: E402
+from cryptography.hazmat.primitives import padding  # noqa: E402
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes  # noqa: E402
+
+from signaling_crypto import decrypt_message, encrypt_fields, encrypt_message  # noqa: E402
+
+
+# Representative trickle candidate and a small offer, as sent by webrtcbin.
+CANDIDATE = {
+    "candidate": "candidate:1 1 UDP 2015363327 192.168.1.23 51234 typ host",
+    "sdpMLineIndex": 0,
+}
+DESCRIPTION = {
+    "type": "offer",
+    "sdp": "v=0\r\no=- 1 0 IN IP4 0.0.0.0\r\ns=-\r\nt=0 0\r\na=group:BUNDLE video0 audio1\r\n"
+    + "a=candidate:1 1 UDP 2015363327 192.168.1.23 51234 typ host\r\n" * 8,
+}
+PHRASE = "someEXAMPLEpassword" + "vdo.ninja"
+
+
+def legacy_encrypt_message(message: Any, phrase: str) -> Tuple[str, str]:
+    """The implementation publish.py used before signaling_crypto."""
+    message = json.dumps(message)
+    key = hashlib.sha256(phrase.encode()).digest()
+    iv = os.urandom(16)
+    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+    encryptor = cipher.encryptor()
+    padder = padding.PKCS7(algorithms.AES.block_size).padder()
+    padded_message = padder.update(message.encode("utf-8")) + padder.finalize()
+    encrypted_message = encryptor.update(padded_message) + encryptor.finalize()
+    return "".join(f"{b:02x}" for b in encrypted_message), "".join(f"{b:02x}" for b in iv)
+
+
+def legacy_decrypt_message(encrypted_data: str, iv: str, phrase: str):
+    key = hashlib.sha256(phrase.encode()).digest()
+    cipher = Cipher(algorithms.AES(key), modes.CBC(bytes.fromhex(iv)), backend=default_backend())
+    decryptor = cipher.decryptor()
+    decrypted = decryptor.update(bytes.fromhex(encrypted_data)) + decryptor.finalize()
+    unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+    return (unpadder.update(decrypted) + unpadder.finalize()).decode("utf-8")
+
+
+def per_message(func, iterations: int) -> float:
+    return timeit.timeit(func, number=iterations) / iterations * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--bundle", type=int, default=8, help="Candidates per bundled message")
+    args = parser.parse_args(argv)
+    n = args.iterations
+
+    bundle = [CANDIDATE] * args.bundle
+    ciphertext, iv = encrypt_message(DESCRIPTION, PHRASE)
+    assert legacy_decrypt_message(ciphertext, iv, PHRASE) == decrypt_message(*legacy_encrypt_message(DESCRIPTION, PHRASE), PHRASE)
+
+    rows = [
+        ("encrypt candidate", lambda: legacy_encrypt_message(CANDIDATE, PHRASE), lambda: encrypt_message(CANDIDATE, PHRASE)),
+        ("encrypt offer", lambda: legacy_encrypt_message(DESCRIPTION, PHRASE), lambda: encrypt_message(DESCRIPTION, PHRASE)),
+        ("decrypt offer", lambda: legacy_decrypt_message(ciphertext, iv, PHRASE), lambda: decrypt_message(ciphertext, iv, PHRASE)),
+        (
+            f"{args.bundle} candidates",
+            lambda: [legacy_encrypt_message(c, PHRASE) for c in bundle],
+            lambda: encrypt_fields({"candidates": bundle}, PHRASE),
+        ),
+    ]
+    print(f"{'operation':<20} {'before':>10} {'after':>10}   (us/message, {n} iterations)")
+    for label, before, after in rows:
+        print(f"{label:<20} {per_message(before, n):10.1f} {per_message(after, n):10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
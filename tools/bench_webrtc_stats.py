@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Compare the structured stats engine with the legacy text/regex parsing."""
+
+from __future__ import annotations
+
+import argparse
+import copy
+from pathlib import Path
+import re
+import sys
+import timeit
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from webrtc_stats import parse_webrtc_stats  # noqa: E402
+
+
+# Field layout recorded from a Pi 4 publisher (GStreamer 1.22) with one
+# viewer; numbers are representative, ids shortened.
+RECORDED_PUBLISHER_STATS: Dict[str, Any] = {
+    "codec-stats-sink_0": {
+        "type": ("GstWebRTCStatsType", "codec"),
+        "id": "codec-stats-sink_0",
+        "payload-type": ("guint", 96),
+        "clock-rate": ("guint", 90000),
+        "mime-type": "video/H264",
+    },
+    "codec-stats-sink_1": {
+        "type": ("GstWebRTCStatsType", "codec"),
+        "id": "codec-stats-sink_1",
+        "payload-type": ("guint", 111),
+        "clock-rate": ("guint", 48000),
+        "channels": ("guint", 2),
+        "mime-type": "audio/OPUS",
+    },
+    "rtp-outbound-stream-stats_3317346113": {
+        "type": ("GstWebRTCStatsType", "outbound-rtp"),
+        "ssrc": ("guint", 3317346113),
+        "codec-id": "codec-stats-sink_0",
+        "kind": "video",
+        "packets-sent": ("guint64", 912455),
+        "bytes-sent": ("guint64", 1032271133),
+        "remote-id": "rtp-remote-inbound-stream-stats_3317346113",
+        "gst-rtpsource-stats": {
+            "ssrc": ("guint", 3317346113),
+            "is-sender": ("gboolean", True),
+            "octets-sent": ("guint64", 1032271133),
+            "packets-sent": ("guint64", 912455),
+            "bitrate": ("guint64", 2451230),
+        },
+    },
+    "rtp-remote-inbound-stream-stats_3317346113": {
+        "type": ("GstWebRTCStatsType", "remote-inbound-rtp"),
+        "ssrc": ("guint", 3317346113),
+        "codec-id": "codec-stats-sink_0",
+        "kind": "video",
+        "packets-lost": ("gint64", 311),
+        "jitter": ("gdouble", 0.0021),
+        "fraction-lost": ("gdouble", 0.0117),
+        "round-trip-time": ("gdouble", 0.034),
+        "local-id": "rtp-outbound-stream-stats_3317346113",
+    },
+    "rtp-outbound-stream-stats_104224801": {
+        "type": ("GstWebRTCStatsType", "outbound-rtp"),
+        "ssrc": ("guint", 104224801),
+        "codec-id": "codec-stats-sink_1",
+        "kind": "audio",
+        "packets-sent": ("guint64", 190112),
+        "bytes-sent": ("guint64", 21932711),
+    },
+    "transport-stats_webrtctransport0": {
+        "type": ("GstWebRTCStatsType", "transport"),
+        "id": "transport-stats_webrtctransport0",
+    },
+    "ice-candidate-pair_0": {
+        "type": ("GstWebRTCStatsType", "candidate-pair"),
+        "local-candidate-id": "ice-candidate-local_0",
+        "remote-candidate-id": "ice-candidate-remote_3",
+    },
+}
+
+
+def _plain_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _plain_value(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return value[1]
+    return value
+
+
+def _render_value(value: Any) -> str:
+    if isinstance(value, dict):
+        fields = ", ".join(f"{key}={_render_value(item)}" for key, item in value.items())
+        return f'(structure)"application/x-webrtc-stats\\,\\ {fields}\\;"'
+    if isinstance(value, tuple):
+        type_name, raw = value
+        if isinstance(raw, bool):
+            raw = "true" if raw else "false"
+        return f"({type_name}){raw}"
+    return f"(string){value}"
+
+
+def render_gst_structure_text(stats: Dict[str, Any]) -> str:
+    """Approximate ``Gst.Structure.to_string()`` for the recorded fields."""
+    fields = ", ".join(f"{key}={_render_value(value)}" for key, value in stats.items())
+    return f"application/x-webrtc-stats, {fields};"
+
+
+def legacy_text_parse(stats_text: str, is_receive: bool = False) -> Dict[str, Optional[float]]:
+    """The text/regex extraction on_stats performed before the stats engine."""
+    stats_text = stats_text.replace("\\", "")
+
+    def extract_counter(text: str, token: str) -> Optional[int]:
+        if not text:
+            return None
+        if token in text:
+            try:
+                segment = text.split(token, 1)[1]
+                return int(segment.split(",")[0].split(";")[0].strip())
+            except Exception:
+                pass
+        base_key = token.split("=", 1)[0] if "=" in token else token
+        if base_key:
+            match = re.search(rf"{re.escape(base_key)}\s*=\s*\([^)]*\)\s*(\d+)", text)
+            if match:
+                return int(match.group(1))
+            match = re.search(rf"{re.escape(base_key)}\s*=\s*(\d+)", text)
+            if match:
+                return int(match.group(1))
+        return None
+
+    def extract_section(text: str, patterns) -> str:
+        for pattern in patterns:
+            if pattern in text:
+                return text.split(pattern, 1)[1].split("rtp-", 1)[0]
+        return ""
+
+    def extract_counter_from_section(section: str, tokens) -> Optional[int]:
+        if not section:
+            return None
+        for token in tokens:
+            value = extract_counter(section, token)
+            if value is not None:
+                return value
+        return None
+
+    def extract_int(text: str, pattern: str) -> Optional[int]:
+        match = re.search(pattern, text) if text else None
+        return int(match.group(1)) if match else None
+
+    def extract_float_value(text: str, token: str) -> Optional[float]:
+        if not text:
+            return None
+        patterns = []
+        if "=" in token:
+            patterns.append(rf"{re.escape(token)}\s*([0-9]+(?:\.[0-9]+)?)")
+            base_key = token.split("=", 1)[0]
+        else:
+            base_key = token
+        patterns.extend(
+            [
+                rf"{re.escape(base_key)}\s*=\s*\([^)]*\)\s*([0-9]+(?:\.[0-9]+)?)",
+                rf"{re.escape(base_key)}\s*=\s*([0-9]+(?:\.[0-9]+)?)",
+            ]
+        )
+        for pattern in patterns:
+            match = re.search(pattern, text)
+            if match:
+                return float(match.group(1))
+        return None
+
+    video_patterns = [
+        "kind=(string)video", "kind = (string) video", "kind=(string) video",
+        "kind =(string)video", "media-type=\"video\"", "media-type='video'",
+    ]
+    audio_patterns = [
+        "kind=(string)audio", "kind = (string) audio", "kind=(string) audio",
+        "kind =(string)audio", "media-type=\"audio\"", "media-type='audio'",
+    ]
+    counter_tokens = ["bytes-received=(guint64)", "bytes-sent=(guint64)"]
+    video_section = extract_section(stats_text, video_patterns)
+    audio_section = extract_section(stats_text, audio_patterns)
+    result: Dict[str, Optional[float]] = {
+        "video_bytes": extract_counter_from_section(video_section, counter_tokens),
+        "audio_bytes": extract_counter_from_section(audio_section, counter_tokens),
+    }
+    frame_width = extract_int(video_section, r"frame-width=\(gint\)\s*(\d+)")
+    if frame_width is None:
+        frame_width = extract_int(video_section, r"frame_width=\(gint\)\s*(\d+)")
+    if frame_width is None:
+        frame_width = extract_int(stats_text, r"frame[-_]width=\([^)]*\)\s*(\d+)")
+    frame_height = extract_int(video_section, r"frame-height=\(gint\)\s*(\d+)")
+    if frame_height is None:
+        frame_height = extract_int(video_section, r"frame_height=\(gint\)\s*(\d+)")
+    if frame_height is None:
+        frame_height = extract_int(stats_text, r"frame[-_]height=\([^)]*\)\s*(\d+)")
+    result["frame_size"] = (frame_width, frame_height)
+
+    bytes_token = "bytes-received=(guint64)" if is_receive else "bytes-sent=(guint64)"
+    packets_token = "packets-received=(guint64)" if is_receive else "packets-sent=(guint64)"
+    result["bytes"] = extract_counter(stats_text, bytes_token)
+    result["packets"] = extract_counter(stats_text, packets_token)
+
+    fraction_lost = None
+    for text in (video_section, stats_text):
+        for token in ("fraction-lost=(double)", "fraction_lost=(double)", "fractionLost=(double)", "fraction-lost"):
+            fraction_lost = extract_float_value(text, token)
+            if fraction_lost is not None:
+                break
+        if fraction_lost is not None:
+            break
+    result["fraction_lost"] = fraction_lost
+
+    loss_tokens = ["packets-lost=(guint64)", "packets_lost=(guint64)", "packetsLost=(guint64)", "packets-lost"]
+    recv_tokens = ["packets-received=(guint64)", "packets_received=(guint64)", "packetsReceived=(guint64)", "packets-received"]
+    lost = extract_counter_from_section(video_section, loss_tokens)
+    received = extract_counter_from_section(video_section, recv_tokens)
+    if lost is None:
+        lost = extract_counter(stats_text, "packets-lost=(guint64)")
+        if lost is None:
+            lost = extract_counter(stats_text, "packets-lost")
+    if received is None:
+        received = extract_counter(stats_text, "packets-received=(guint64)")
+        if received is None:
+            received = extract_counter(stats_text, "packets-received")
+    result["packets_lost"] = lost
+    result["packets_received"] = received
+
+    result["packets-repaired"] = extract_int(stats_text, r"packets-repaired\s*=\s*\([^)]*\)\s*(\d+)")
+    fec_total = extract_int(stats_text, r"fec-packets-recovered\s*=\s*\([^)]*\)\s*(\d+)")
+    if fec_total is None:
+        fec_total = extract_int(stats_text, r"fec-recovered-packets\s*=\s*\([^)]*\)\s*(\d+)")
+    result["fec-packets-recovered"] = fec_total
+    result["retransmitted-packets-received"] = extract_int(
+        stats_text, r"retransmitted-packets-received\s*=\s*\([^)]*\)\s*(\d+)"
+    )
+    return result
+
+
+def structured_parse(stats: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    snapshot = parse_webrtc_stats(stats)
+    lost, received = snapshot.loss_counters()
+    return {
+        "video_bytes": snapshot.kind_bytes("video", False),
+        "audio_bytes": snapshot.kind_bytes("audio", False),
+        "frame_size": snapshot.frame_size(),
+        "bytes": snapshot.total_bytes(False),
+        "packets": snapshot.total_packets(False),
+        "fraction_lost": snapshot.first_value("fraction_lost"),
+        "packets_lost": lost,
+        "packets_received": received,
+        "packets-repaired": snapshot.first_value("packets_repaired"),
+        "fec-packets-recovered": snapshot.first_value("fec_packets_recovered"),
+        "retransmitted-packets-received": snapshot.first_value("retransmitted_packets_received"),
+    }
+
+
+def build_multiviewer_dump(peers: int) -> Dict[str, Any]:
+    """Scale the recorded dump to the per-peer stat count of a busy multiviewer."""
+    stats: Dict[str, Any] = {}
+    for index in range(peers):
+        for key, value in RECORDED_PUBLISHER_STATS.items():
+            stats[f"{key}_{index}" if index else key] = copy.deepcopy(value)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--peers", type=int, default=1, help="Replicate the recorded entries to stress larger replies")
+    args = parser.parse_args(argv)
+
+    recorded = build_multiviewer_dump(max(1, args.peers))
+    stats_text = render_gst_structure_text(recorded)
+    stats_dict = _plain_value(recorded)
+
+    legacy = timeit.timeit(lambda: legacy_text_parse(stats_text), number=args.iterations)
+    structured = timeit.timeit(lambda: structured_parse(stats_dict), number=args.iterations)
+
+    print(f"stats reply: {len(recorded)} entries, {len(stats_text)} bytes of text")
+    print(f"legacy text/regex : {legacy / args.iterations * 1e6:8.1f} us/reply")
+    print(f"structured engine : {structured / args.iterations * 1e6:8.1f} us/reply")
+    print(f"legacy fields     : {legacy_text_parse(stats_text)}")
+    print(f"structured fields : {structured_parse(stats_dict)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,9 @@
 Combine async audio and video recordings with proper timestamp-based synchronization
 """
 
+import argparse
 import asyncio
 import os
-import sys
 import json
 from pathlib import Path
 
@@ -77,38 +77,17 @@ def discover_recording_pairs(directory='.', tolerance_seconds=5):
         pairs.append((video_path, audio_path))
     return pairs
 
-async def get_stream_start_time(filepath):
-    """Get the actual start time of the first frame/sample in a media file"""
-    cmd = await asyncio.create_subprocess_exec(
-        'ffprobe', '-v', 'quiet', '-print_format', 'json',
-        '-show_entries', 'stream=start_time,start_pts,time_base,codec_type',
-        filepath,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    stdout, _ = await cmd.communicate()
-    
-    if cmd.returncode == 0:
-        try:
-            data = json.loads(stdout.decode())
-            streams = data.get('streams', [])
-            
-            # Find the first video or audio stream
-            for stream in streams:
-                codec_type = stream.get('codec_type')
-                if codec_type in ['video', 'audio']:
-                    # Get the start time in seconds
-                    start_time = stream.get('start_time', '0')
-                    return float(start_time)
-        except Exception as e:
-            print(f"  Warning: Could not parse start time: {e}")
-    return 0.0
+# Video codecs that can be stream-copied into the MP4 output; others are re-encoded.
+MP4_COPY_CODECS = {'h264', 'hevc'}
+REENCODE_VIDEO = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '23']
+AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '192k']
+
 
 async def get_file_info(filepath):
-    """Get duration and codec info for a media file"""
+    """Probe format and streams of a media file with a single ffprobe call"""
     cmd = await asyncio.create_subprocess_exec(
         'ffprobe', '-v', 'quiet', '-print_format', 'json',
-        '-show_format', '-show_streams', filepath,
+        '-show_format', '-show_streams', str(filepath),
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE
     )
@@ -117,97 +96,100 @@ async def get_file_info(filepath):
     if cmd.returncode == 0:
         try:
             return json.loads(stdout.decode())
-        except:
+        except ValueError:
             pass
     return None
 
-async def combine_files(video_file, audio_file, output_file):
-    """Combine video and audio with proper timestamp-based sync"""
-    print(f"\nCombining:")
-    print(f"  Video: {video_file}")
-    print(f"  Audio: {audio_file}")
-    print(f"  Output: {output_file}")
-    
-    # Get stream start times
-    video_start = await get_stream_start_time(video_file)
-    audio_start = await get_stream_start_time(audio_file)
-    
-    print(f"  Video start time: {video_start:.3f}s")
-    print(f"  Audio start time: {audio_start:.3f}s")
-    
+
+def stream_start_time(info):
+    """Start time in seconds of the first video or audio stream in ffprobe output"""
+    for stream in (info or {}).get('streams', []):
+        if stream.get('codec_type') in ['video', 'audio']:
+            try:
+                return float(stream.get('start_time', '0'))
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+def video_codec(info):
+    for stream in (info or {}).get('streams', []):
+        if stream.get('codec_type') == 'video':
+            return stream.get('codec_name')
+    return None
+
+
+def build_ffmpeg_command(video_file, audio_file, output_file, video_info, audio_info, copy_video=True):
+    """Return ``(cmd, strategy)`` for merging a pair with timestamp-based sync.
+
+    Video is stream-copied when ``copy_video`` is set and its codec fits in
+    MP4; a late audio start is then compensated with ``-itsoffset`` on the
+    video input instead of a ``setpts`` filter, which would need a re-encode.
+    Audio is always encoded to AAC, so its delay or trim stays a filter.
+    """
+    copy = copy_video and video_codec(video_info) in MP4_COPY_CODECS
+    video_args = ['-c:v', 'copy'] if copy else REENCODE_VIDEO
+    mode = "copy video" if copy else "re-encode video"
+
     # Calculate the time difference
-    time_diff = video_start - audio_start
-    
-    # Build ffmpeg command
-    cmd = ['ffmpeg', '-y']
-    
-    # Input files
-    cmd.extend(['-i', video_file, '-i', audio_file])
-    
-    # Always use precise sync based on stream timestamps
+    time_diff = stream_start_time(video_info) - stream_start_time(audio_info)
+    video_input = ['-i', str(video_file)]
+    audio_input = ['-i', str(audio_file)]
+
     if abs(time_diff) < 0.001:  # Less than 1ms difference
-        print("  Strategy: Direct merge (streams already in sync)")
-        cmd.extend([
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '23',
-            '-c:a', 'aac',
-            '-b:a', '192k',
-            '-shortest'
-        ])
+        strategy = "Direct merge (streams already in sync)"
+        args = ['-map', '0:v', '-map', '1:a', *video_args, *AUDIO_ARGS, '-shortest']
     elif time_diff > 0:
         # Video starts later than audio - delay the audio
         delay_ms = int(time_diff * 1000)
-        print(f"  Strategy: Delaying audio by {delay_ms}ms to sync with video")
-        cmd.extend([
+        strategy = f"Delaying audio by {delay_ms}ms to sync with video"
+        args = [
             '-filter_complex', f'[1:a]adelay={delay_ms}|{delay_ms}[delayed]',
-            '-map', '0:v',
-            '-map', '[delayed]',
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '23',
-            '-c:a', 'aac',
-            '-b:a', '192k',
-            '-shortest'
-        ])
-    else:
-        # Audio starts later than video - delay the video or trim audio
-        delay_ms = int(abs(time_diff) * 1000)
-        print(f"  Strategy: Audio starts {delay_ms}ms after video")
-        
-        # For small delays, we can use setpts to delay video
-        if delay_ms < 5000:  # Less than 5 seconds
-            video_delay = abs(time_diff)
-            print(f"  Delaying video by {video_delay:.3f}s")
-            cmd.extend([
-                '-filter_complex', 
-                f'[0:v]setpts=PTS+{video_delay}/TB[delayed_video]',
-                '-map', '[delayed_video]',
-                '-map', '1:a',
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-crf', '23',
-                '-c:a', 'aac',
-                '-b:a', '192k',
-                '-shortest'
-            ])
+            '-map', '0:v', '-map', '[delayed]',
+            *video_args, *AUDIO_ARGS, '-shortest'
+        ]
+    elif abs(time_diff) < 5:
+        # Audio starts later than video - for small delays, delay the video
+        video_delay = abs(time_diff)
+        strategy = f"Audio starts {int(video_delay * 1000)}ms after video; delaying video by {video_delay:.3f}s"
+        if copy:
+            video_input = ['-itsoffset', f'{video_delay:.3f}', *video_input]
+            args = ['-map', '0:v', '-map', '1:a']
         else:
-            # For larger delays, trim the beginning of audio
-            trim_start = abs(time_diff)
-            print(f"  Trimming {trim_start:.3f}s from audio start")
-            cmd.extend([
-                '-filter_complex', f'[1:a]atrim=start={trim_start}[trimmed]',
-                '-map', '0:v',
-                '-map', '[trimmed]',
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-crf', '23',
-                '-c:a', 'aac',
-                '-b:a', '192k'
-            ])
+            args = [
+                '-filter_complex', f'[0:v]setpts=PTS+{video_delay}/TB[delayed_video]',
+                '-map', '[delayed_video]', '-map', '1:a'
+            ]
+        args += [*video_args, *AUDIO_ARGS, '-shortest']
+    else:
+        # For larger delays, trim the beginning of audio
+        trim_start = abs(time_diff)
+        strategy = f"Trimming {trim_start:.3f}s from audio start"
+        args = [
+            '-filter_complex', f'[1:a]atrim=start={trim_start}[trimmed]',
+            '-map', '0:v', '-map', '[trimmed]',
+            *video_args, *AUDIO_ARGS
+        ]
+
+    cmd = ['ffmpeg', '-y', *video_input, *audio_input, *args, str(output_file)]
+    return cmd, f"{strategy} ({mode})"
+
+
+async def combine_files(video_file, audio_file, output_file, copy_video=True, log=print):
+    """Combine video and audio with proper timestamp-based sync"""
+    log(f"\nCombining:")
+    log(f"  Video: {video_file}")
+    log(f"  Audio: {audio_file}")
+    log(f"  Output: {output_file}")
+    
+    # One probe per input supplies both start times and codecs
+    video_info, audio_info = await asyncio.gather(get_file_info(video_file), get_file_info(audio_file))
+    
+    log(f"  Video start time: {stream_start_time(video_info):.3f}s")
+    log(f"  Audio start time: {stream_start_time(audio_info):.3f}s")
     
-    # Output file
-    cmd.append(output_file)
+    cmd, strategy = build_ffmpeg_command(video_file, audio_file, output_file, video_info, audio_info, copy_video)
+    log(f"  Strategy: {strategy}")
     
     # Execute
     process = await asyncio.create_subprocess_exec(
@@ -219,36 +201,52 @@ async def combine_files(video_file, audio_file, output_file):
     
     if process.returncode == 0:
         size = os.path.getsize(output_file)
-        print(f"  ✅ Success! Output size: {size:,} bytes")
+        log(f"  ✅ Success! Output size: {size:,} bytes")
         
         # Verify output
         info = await get_file_info(output_file)
         if info:
             duration = info.get('format', {}).get('duration', 'unknown')
             streams = len(info.get('streams', []))
-            print(f"  Duration: {duration}s, Streams: {streams}")
+            log(f"  Duration: {duration}s, Streams: {streams}")
             
             # Check if both audio and video are present
             has_video = any(s.get('codec_type') == 'video' for s in info.get('streams', []))
             has_audio = any(s.get('codec_type') == 'audio' for s in info.get('streams', []))
             
             if has_video and has_audio:
-                print("  ✅ Both video and audio tracks present")
-                
-                # Verify sync by checking if streams start at the same time
-                output_start = await get_stream_start_time(output_file)
-                print(f"  Output start time: {output_start:.3f}s")
-                
-                return True
+                log("  ✅ Both video and audio tracks present")
+                log(f"  Output start time: {stream_start_time(info):.3f}s")
             else:
-                print(f"  ⚠️  Missing tracks - Video: {has_video}, Audio: {has_audio}")
+                log(f"  ⚠️  Missing tracks - Video: {has_video}, Audio: {has_audio}")
         
         return True
     else:
-        print(f"  ❌ Failed: {stderr.decode()[:200]}")
+        log(f"  ❌ Failed: {stderr.decode()[:200]}")
         return False
 
-async def main(directory='.'):
+async def combine_pairs(pairs, directory, jobs=None, copy_video=True):
+    """Combine pairs through a pool of at most ``jobs`` concurrent ffmpeg runs"""
+    directory = Path(directory)
+    semaphore = asyncio.Semaphore(max(1, jobs or os.cpu_count() or 1))
+
+    async def run(video_file, audio_file):
+        output_file = directory / f"combined_{video_file.stem}.mp4"
+        if output_file.exists():
+            print(f"Skipping {output_file} - already exists")
+            return False
+        async with semaphore:
+            # Buffer each pair's report so concurrent jobs don't interleave
+            lines = []
+            try:
+                return await combine_files(video_file, audio_file, output_file, copy_video, lines.append)
+            finally:
+                print("\n".join(lines))
+
+    results = await asyncio.gather(*(run(video, audio) for video, audio in pairs))
+    return sum(1 for success in results if success)
+
+async def main(directory='.', jobs=None, copy_video=True):
     """Find and combine matching audio/video pairs"""
     print("=== Combine Audio/Video Recordings (v2 - Timestamp-based sync) ===\n")
 
@@ -259,16 +257,8 @@ async def main(directory='.'):
 
     print(f"Found {len(pairs)} matching audio/video pair(s)\n")
 
-    combined_count = 0
     directory = Path(directory)
-    for video_file, audio_file in pairs:
-        output_file = directory / f"combined_{video_file.stem}.mp4"
-        if output_file.exists():
-            print(f"Skipping {output_file} - already exists")
-            continue
-        success = await combine_files(video_file, audio_file, output_file)
-        if success:
-            combined_count += 1
+    combined_count = await combine_pairs(pairs, directory, jobs, copy_video)
 
     print(f"\n=== Summary ===")
     print(f"Combined {combined_count} file pairs")
@@ -283,12 +273,17 @@ async def main(directory='.'):
     return combined_count
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description="Combine separately recorded audio and video files.")
+    parser.add_argument('files', nargs='*', metavar='FILE', help="video_file audio_file output_file (default: combine all pairs in the current directory)")
+    parser.add_argument('--jobs', type=int, default=None, help="Pairs to combine in parallel (default: CPU count)")
+    parser.add_argument('--reencode', action='store_true', help="Always re-encode video to H.264 instead of stream-copying it when possible")
+    args = parser.parse_args()
+
+    if args.files:
         # Allow specific file combination
-        if len(sys.argv) == 4:
-            asyncio.run(combine_files(sys.argv[1], sys.argv[2], sys.argv[3]))
-        else:
-            print("Usage: combine_recordings.py [video_file audio_file output_file]")
+        if len(args.files) != 3:
+            parser.error("expected video_file audio_file output_file")
+        asyncio.run(combine_files(*args.files, copy_video=not args.reencode))
     else:
         # Auto-combine all matching pairs
-        asyncio.run(main())
+        asyncio.run(main(jobs=args.jobs, copy_video=not args.reencode))
@@ -0,0 +1,344 @@
+"""Incremental speech-to-text for record.py.
+
+:class:`TranscriptionService` loads one Whisper model on first use,
+shares it between recordings, and runs transcription jobs on a bounded
+worker pool. :class:`TranscriptionSession` follows a recording's audio
+file while the recorder is still writing it, decoded to 16 kHz mono PCM
+by ffmpeg. :class:`VadSegmenter` cuts the PCM into utterances at pauses,
+and each utterance's text is appended to the transcript as soon as it
+is ready. The transcript can therefore be read while recording, and
+stopping only waits for the last utterance.
+"""
+
+from __future__ import annotations
+
+import array
+import collections
+import concurrent.futures
+import logging
+import math
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Deque, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "medium"
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # s16le mono
+FRAME_MS = 30
+
+
+class Segment(NamedTuple):
+    start: float  # seconds from the start of the audio
+    end: float
+    pcm: bytes
+
+
+class VadSegmenter:
+    """Energy-based voice activity detection over s16le mono PCM.
+
+    A frame is speech when its RMS exceeds ``threshold`` and three times
+    the tracked noise floor. An utterance ends after ``min_silence_ms``
+    of non-speech or at ``max_segment_s``; utterances with less than
+    ``min_speech_ms`` of speech are dropped as noise. ``padding_ms`` of
+    audio before the first speech frame is kept so onsets aren't clipped.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = FRAME_MS,
+        threshold: float = 300.0,
+        min_silence_ms: int = 700,
+        min_speech_ms: int = 250,
+        max_segment_s: float = 30.0,
+        padding_ms: int = 200,
+    ):
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * SAMPLE_WIDTH
+        self.threshold = threshold
+        self.noise_floor = 0.0
+        self.silence_frames = max(1, min_silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = max(1, int(max_segment_s * 1000 / frame_ms))
+        self._pending = b""
+        self._preroll: Deque[bytes] = collections.deque(maxlen=max(0, padding_ms // frame_ms))
+        self._frames: Optional[List[bytes]] = None
+        self._start_frame = 0
+        self._speech_frames = 0
+        self._silence_run = 0
+        self._frame_index = 0
+
+    def rms(self, frame: bytes) -> float:
+        samples = array.array("h")
+        samples.frombytes(frame)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return math.sqrt(sum(sample * sample for sample in samples) / len(samples)) if samples else 0.0
+
+    def is_speech(self, frame: bytes) -> bool:
+        level = self.rms(frame)
+        # The floor drops quickly in pauses and creeps up under steady background noise
+        rate = 0.1 if level < self.noise_floor else 0.001
+        self.noise_floor += (level - self.noise_floor) * rate
+        return level > max(self.threshold, self.noise_floor * 3)
+
+    def feed(self, pcm: bytes) -> List[Segment]:
+        """Add PCM; returns the utterances it completed."""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        segments = []
+        for offset in range(0, usable, self.frame_bytes):
+            segment = self._process(data[offset:offset + self.frame_bytes])
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> Optional[Segment]:
+        """Close the utterance in progress at end of stream."""
+        self._pending = b""
+        if self._frames is None:
+            return None
+        return self._close()
+
+    def _process(self, frame: bytes) -> Optional[Segment]:
+        index = self._frame_index
+        self._frame_index += 1
+        speech = self.is_speech(frame)
+        if self._frames is None:
+            if not speech:
+                self._preroll.append(frame)
+                return None
+            self._frames = list(self._preroll)
+            self._start_frame = index - len(self._preroll)
+            self._preroll.clear()
+            self._speech_frames = 0
+            self._silence_run = 0
+        self._frames.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+        if self._silence_run >= self.silence_frames or len(self._frames) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self) -> Optional[Segment]:
+        frames, self._frames = self._frames, None
+        if self._speech_frames < self.min_speech_frames:
+            return None
+        start = self._start_frame * self.frame_ms / 1000
+        return Segment(start, start + len(frames) * self.frame_ms / 1000, b"".join(frames))
+
+
+class AudioFollower:
+    """Decode a file that is still being written to 16 kHz mono PCM with ffmpeg.
+
+    ffmpeg's ``-follow`` keeps reading at end of file; it gives up after
+    ``idle_timeout`` seconds without new data, or when :meth:`stop` is called.
+    """
+
+    def __init__(self, path: Path, idle_timeout: float = 30.0, ffmpeg: str = "ffmpeg"):
+        self.path = Path(path)
+        self.idle_timeout = idle_timeout
+        self.ffmpeg = ffmpeg
+        self._process: Optional[subprocess.Popen] = None
+
+    def command(self) -> List[str]:
+        return [
+            self.ffmpeg, "-nostdin", "-loglevel", "error",
+            "-follow", "1", "-rw_timeout", str(int(self.idle_timeout * 1_000_000)),
+            "-i", str(self.path),
+            "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-",
+        ]
+
+    def chunks(self, size: int = SAMPLE_RATE * SAMPLE_WIDTH) -> Iterator[bytes]:
+        process = self._process = subprocess.Popen(self.command(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                data = process.stdout.read1(size)
+                if not data:
+                    break
+                yield data
+        finally:
+            self.stop()
+            process.wait()
+
+    def stop(self) -> None:
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+
+def _load_whisper(model_name: str) -> Any:
+    import whisper
+
+    return whisper.load_model(model_name)
+
+
+def _whisper_transcribe(model: Any, pcm: bytes, language: Optional[str]) -> str:
+    import numpy as np
+
+    audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    return model.transcribe(audio, language=language)["text"]
+
+
+class TranscriptionService:
+    """One lazily loaded model shared by all recordings, with a bounded job pool.
+
+    Nothing is loaded until the first job runs, so the web service starts
+    immediately. At most ``max_workers`` jobs use the model at once;
+    further jobs wait in the pool's queue.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        max_workers: int = 1,
+        load_model: Callable[[str], Any] = _load_whisper,
+        transcribe: Callable[[Any, bytes, Optional[str]], str] = _whisper_transcribe,
+    ):
+        self.model_name = model_name
+        self.max_workers = max(1, max_workers)
+        self._load_model = load_model
+        self._transcribe = transcribe
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    logger.info("Loading Whisper model: %s", self.model_name)
+                    self._model = self._load_model(self.model_name)
+        return self._model
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> concurrent.futures.Future:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stt")
+            return self._executor.submit(fn, *args)
+
+    def submit(self, pcm: bytes, language: Optional[str] = None) -> concurrent.futures.Future:
+        """Queue 16 kHz s16le mono PCM for transcription; the future yields its text."""
+        return self._submit(lambda: self._transcribe(self.model, pcm, language))
+
+    def transcribe_file(self, path: Path, language: Optional[str] = None) -> str:
+        """Transcribe a whole file in the pool (for recordings without a live session)."""
+        return self._submit(lambda: self.model.transcribe(str(path), language=language)["text"]).result()
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TranscriptionSession:
+    """Transcribe one recording while it is being written.
+
+    ``locate`` returns the recording's audio file once the recorder has
+    created it (or None). Text is appended to ``transcript_path`` one
+    utterance per line.
+    """
+
+    def __init__(
+        self,
+        service: TranscriptionService,
+        locate: Callable[[], Optional[Path]],
+        transcript_path: Path,
+        language: Optional[str] = None,
+        segmenter: Optional[VadSegmenter] = None,
+        follower_factory: Callable[[Path], AudioFollower] = AudioFollower,
+        poll_interval: float = 1.0,
+        drain_seconds: float = 2.0,
+    ):
+        self.service = service
+        self.locate = locate
+        self.transcript_path = Path(transcript_path)
+        self.language = language
+        self.segmenter = segmenter or VadSegmenter()
+        self.follower_factory = follower_factory
+        self.poll_interval = poll_interval
+        self.drain_seconds = drain_seconds
+        self.audio_path: Optional[Path] = None
+        self.error: Optional[BaseException] = None
+        self._texts: List[str] = []
+        self._lock = threading.Lock()
+        self._follower: Optional[AudioFollower] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stt-session", daemon=True)
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            return " ".join(self._texts)
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def start(self) -> "TranscriptionSession":
+        self._thread.start()
+        return self
+
+    def finish(self, language: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """Call once the recorder has stopped; transcribes what is left and returns the full text."""
+        if language:
+            self.language = language
+        self._stop.set()
+        self._stop_follower_later()
+        self._thread.join(timeout)
+        return self.text
+
+    def _stop_follower_later(self) -> None:
+        # Give ffmpeg a moment to read what the recorder wrote last
+        follower = self._follower
+        if follower is not None:
+            timer = threading.Timer(self.drain_seconds, follower.stop)
+            timer.daemon = True
+            timer.start()
+
+    def _run(self) -> None:
+        try:
+            path = self.locate()
+            while path is None and not self._stop.wait(self.poll_interval):
+                path = self.locate()
+            if path is None:
+                path = self.locate()
+                if path is None:
+                    return
+            self.audio_path = path
+            self._follower = self.follower_factory(path)
+            if self._stop.is_set():
+                self._stop_follower_later()
+            for chunk in self._follower.chunks():
+                for segment in self.segmenter.feed(chunk):
+                    self._transcribe(segment)
+            segment = self.segmenter.flush()
+            if segment is not None:
+                self._transcribe(segment)
+        except Exception as exc:
+            logger.error("Live transcription failed: %s", exc)
+            self.error = exc
+
+    def _transcribe(self, segment: Segment) -> None:
+        text = self.service.submit(segment.pcm, self.language).result().strip()
+        if not text:
+            return
+        with self._lock:
+            self._texts.append(text)
+            with self.transcript_path.open("a", encoding="utf-8") as transcript:
+                transcript.write(text + "\n")
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# GstWebRTCStatsType values, used when the enum arrives as a bare integer
+# (older PyGObject builds) instead of a GEnum carrying ``value_nick``.
+_STATS_TYPE_BY_VALUE = {
+    1: "codec",
+    2: "inbound-rtp",
+    3: "outbound-rtp",
+    4: "remote-inbound-rtp",
+    5: "remote-outbound-rtp",
+    6: "csrc",
+    7: "peer-connection",
+    8: "data-channel",
+    9: "stream",
+    10: "transport",
+    11: "candidate-pair",
+    12: "local-candidate",
+    13: "remote-candidate",
+    14: "certificate",
+}
+
+# webrtcbin stat ids, for structures that do not carry a usable "type" field.
+_STATS_TYPE_BY_ID_PREFIX = (
+    ("rtp-remote-inbound-stream-stats", "remote-inbound-rtp"),
+    ("rtp-remote-outbound-stream-stats", "remote-outbound-rtp"),
+    ("rtp-inbound-stream-stats", "inbound-rtp"),
+    ("rtp-outbound-stream-stats", "outbound-rtp"),
+    ("codec-stats", "codec"),
+    ("ice-candidate-pair", "candidate-pair"),
+    ("candidate-pair", "candidate-pair"),
+)
+
+
+def _stats_type_name(value: Any, stat_id: str) -> Optional[str]:
+    nick = getattr(value, "value_nick", None)
+    if isinstance(nick, str) and nick:
+        return nick
+    if isinstance(value, str) and value:
+        return value.lower().replace("_", "-")
+    if isinstance(value, int) and value in _STATS_TYPE_BY_VALUE:
+        return _STATS_TYPE_BY_VALUE[value]
+    for prefix, type_name in _STATS_TYPE_BY_ID_PREFIX:
+        if stat_id.startswith(prefix):
+            return type_name
+    return None
+
+
+def _iter_fields(structure: Any) -> Iterator[Tuple[str, Any]]:
+    """Yield (name, value) pairs from a Gst.Structure or a plain mapping."""
+    if isinstance(structure, dict):
+        yield from structure.items()
+        return
+    try:
+        count = structure.n_fields()
+    except Exception:
+        return
+    for index in range(count):
+        try:
+            name = structure.nth_field_name(index)
+            value = structure.get_value(name)
+        except Exception:
+            # Some GValue types (boxed arrays on old GI builds) cannot be
+            # converted; skip them instead of losing the whole reply.
+            continue
+        yield name, value
+
+
+def _is_structure(value: Any) -> bool:
+    return isinstance(value, dict) or callable(getattr(value, "n_fields", None))
+
+
+def _get_field(structure: Any, name: str) -> Any:
+    if isinstance(structure, dict):
+        return structure.get(name)
+    try:
+        if not structure.has_field(name):
+            return None
+        return structure.get_value(name)
+    except Exception:
+        return None
+
+
+class _FieldLookup:
+    """Field access for one stats entry.
+
+    Only the fields a stats class asks for are converted to Python values.
+    Nested gst-* sub-structures (jitterbuffer/rtpsource stats) are consulted
+    when the entry itself lacks a field, so the stream's own counters win.
+    """
+
+    __slots__ = ("structure", "_nested")
+
+    def __init__(self, structure: Any):
+        self.structure = structure
+        self._nested: Optional[List[Any]] = None
+
+    def get(self, *names: str) -> Any:
+        for name in names:
+            value = _get_field(self.structure, name)
+            if value is not None:
+                return value
+        if self._nested is None:
+            self._nested = [value for _name, value in _iter_fields(self.structure) if _is_structure(value)]
+        for child in self._nested:
+            for name in names:
+                value = _get_field(child, name)
+                if value is not None:
+                    return value
+        return None
+
+    def own(self, name: str) -> Any:
+        return _get_field(self.structure, name)
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    return None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+class RtpStreamStats:
+    """One inbound/outbound/remote-* RTP stream entry from a get-stats reply."""
+
+    __slots__ = (
+        "id",
+        "type",
+        "kind",
+        "ssrc",
+        "codec_id",
+        "bytes",
+        "packets",
+        "packets_lost",
+        "packets_received",
+        "fraction_lost",
+        "jitter",
+        "round_trip_time",
+        "frame_width",
+        "frame_height",
+        "packets_repaired",
+        "fec_packets_recovered",
+        "retransmitted_packets_received",
+    )
+
+    def __init__(self, stat_id: str, type_name: str, fields: _FieldLookup):
+        self.id = stat_id
+        self.type = type_name
+        kind = fields.own("kind") or fields.own("media-type")
+        self.kind = kind.lower() if isinstance(kind, str) and kind else None
+        self.ssrc = _as_int(fields.own("ssrc"))
+        codec_id = fields.own("codec-id")
+        self.codec_id = codec_id if isinstance(codec_id, str) else None
+        if type_name == "outbound-rtp":
+            self.bytes = _as_int(fields.own("bytes-sent"))
+            self.packets = _as_int(fields.own("packets-sent"))
+        else:
+            self.bytes = _as_int(fields.own("bytes-received"))
+            self.packets = _as_int(fields.own("packets-received"))
+        self.packets_lost = _as_int(fields.get("packets-lost", "packets_lost"))
+        self.packets_received = (
+            self.packets if type_name == "inbound-rtp" else _as_int(fields.own("packets-received"))
+        )
+        self.fraction_lost = _as_float(fields.get("fraction-lost", "fraction_lost"))
+        self.jitter = _as_float(fields.own("jitter"))
+        self.round_trip_time = _as_float(fields.own("round-trip-time"))
+        self.frame_width = _as_int(fields.own("frame-width"))
+        self.frame_height = _as_int(fields.own("frame-height"))
+        self.packets_repaired = _as_int(fields.own("packets-repaired"))
+        self.fec_packets_recovered = _as_int(
+            fields.own("fec-packets-recovered") or fields.own("fec-recovered-packets")
+        )
+        self.retransmitted_packets_received = _as_int(fields.own("retransmitted-packets-received"))
+
+
+class CandidatePairStats:
+    __slots__ = (
+        "id",
+        "local_candidate_id",
+        "remote_candidate_id",
+        "state",
+        "nominated",
+        "bytes_sent",
+        "bytes_received",
+        "current_round_trip_time",
+        "available_outgoing_bitrate",
+    )
+
+    def __init__(self, stat_id: str, fields: _FieldLookup):
+        self.id = stat_id
+        self.local_candidate_id = fields.own("local-candidate-id")
+        self.remote_candidate_id = fields.own("remote-candidate-id")
+        state = fields.own("state")
+        self.state = getattr(state, "value_nick", state)
+        nominated = fields.own("nominated")
+        self.nominated = nominated if isinstance(nominated, bool) else None
+        self.bytes_sent = _as_int(fields.own("bytes-sent"))
+        self.bytes_received = _as_int(fields.own("bytes-received"))
+        self.current_round_trip_time = _as_float(fields.own("current-round-trip-time"))
+        self.available_outgoing_bitrate = _as_float(fields.own("available-outgoing-bitrate"))
+
+
+class CodecStats:
+    __slots__ = ("id", "payload_type", "mime_type", "clock_rate", "channels")
+
+    def __init__(self, stat_id: str, fields: _FieldLookup):
+        self.id = stat_id
+        self.payload_type = _as_int(fields.own("payload-type"))
+        mime_type = fields.own("mime-type")
+        self.mime_type = mime_type if isinstance(mime_type, str) else None
+        self.clock_rate = _as_int(fields.own("clock-rate"))
+        self.channels = _as_int(fields.own("channels"))
+
+    @property
+    def kind(self) -> Optional[str]:
+        if self.mime_type and "/" in self.mime_type:
+            return self.mime_type.split("/", 1)[0].lower()
+        return None
+
+    @property
+    def name(self) -> Optional[str]:
+        if self.mime_type and "/" in self.mime_type:
+            return self.mime_type.split("/", 1)[1].upper()
+        return None
+
+
+class PeerStatsSnapshot:
+    """Typed view over one webrtcbin ``get-stats`` reply.
+
+    The reply is walked once; callers then read fields instead of searching
+    the structure's text serialisation.
+    """
+
+    __slots__ = (
+        "inbound",
+        "outbound",
+        "remote_inbound",
+        "remote_outbound",
+        "candidate_pairs",
+        "codecs",
+        "_video_first",
+    )
+
+    def __init__(self):
+        self.inbound: List[RtpStreamStats] = []
+        self.outbound: List[RtpStreamStats] = []
+        self.remote_inbound: List[RtpStreamStats] = []
+        self.remote_outbound: List[RtpStreamStats] = []
+        self.candidate_pairs: List[CandidatePairStats] = []
+        self.codecs: Dict[str, CodecStats] = {}
+        self._video_first: Optional[List[RtpStreamStats]] = None
+
+    def rtp_streams(self) -> Iterator[RtpStreamStats]:
+        yield from self.inbound
+        yield from self.outbound
+        yield from self.remote_inbound
+        yield from self.remote_outbound
+
+    def local_streams(self, is_receive: bool) -> List[RtpStreamStats]:
+        return self.inbound if is_receive else self.outbound
+
+    def stream(self, kind: str, is_receive: bool) -> Optional[RtpStreamStats]:
+        for entry in self.local_streams(is_receive):
+            if entry.kind == kind:
+                return entry
+        return None
+
+    def kind_bytes(self, kind: str, is_receive: bool) -> Optional[int]:
+        entry = self.stream(kind, is_receive) or self.stream(kind, not is_receive)
+        return entry.bytes if entry is not None else None
+
+    def total_bytes(self, is_receive: bool) -> Optional[int]:
+        return self._sum_local("bytes", is_receive)
+
+    def total_packets(self, is_receive: bool) -> Optional[int]:
+        return self._sum_local("packets", is_receive)
+
+    def _sum_local(self, attr: str, is_receive: bool) -> Optional[int]:
+        for streams in (self.local_streams(is_receive), self.local_streams(not is_receive)):
+            values = [getattr(entry, attr) for entry in streams if getattr(entry, attr) is not None]
+            if values:
+                return sum(values)
+        return None
+
+    def _streams_video_first(self) -> List[RtpStreamStats]:
+        if self._video_first is None:
+            streams = list(self.rtp_streams())
+            self._video_first = [entry for entry in streams if entry.kind == "video"]
+            self._video_first.extend(entry for entry in streams if entry.kind != "video")
+        return self._video_first
+
+    def first_value(self, attr: str) -> Any:
+        """Return ``attr`` from the first stream reporting it, video streams first."""
+        for entry in self._streams_video_first():
+            value = getattr(entry, attr)
+            if value is not None:
+                return value
+        return None
+
+    def frame_size(self) -> Tuple[Optional[int], Optional[int]]:
+        return self.first_value("frame_width"), self.first_value("frame_height")
+
+    def loss_counters(self) -> Tuple[Optional[int], Optional[int]]:
+        """Return (packets_lost, packets_received) from the same stream when possible."""
+        for entry in self._streams_video_first():
+            if entry.packets_lost is not None and entry.packets_received is not None:
+                return entry.packets_lost, entry.packets_received
+        return self.first_value("packets_lost"), self.first_value("packets_received")
+
+    def codec_name(self, kind: str = "video") -> Optional[str]:
+        for entry in self.rtp_streams():
+            if entry.kind != kind or not entry.codec_id:
+                continue
+            codec = self.codecs.get(entry.codec_id)
+            if codec is not None and codec.name:
+                return codec.name
+        return None
+
+    def selected_candidate_pair(self) -> Optional[CandidatePairStats]:
+        for pair in self.candidate_pairs:
+            if pair.nominated or pair.state == "succeeded":
+                return pair
+        return self.candidate_pairs[0] if self.candidate_pairs else None
+
+    def round_trip_time(self) -> Optional[float]:
+        """Current RTT in seconds: the selected candidate pair, else RTCP."""
+        pair = self.selected_candidate_pair()
+        if pair is not None and pair.current_round_trip_time is not None:
+            return pair.current_round_trip_time
+        return self.first_value("round_trip_time")
+
+    def summary(self, is_receive: bool) -> Dict[str, Any]:
+        """Plain counters and gauges for metrics export or IPC (JSON-safe, None when unknown)."""
+        packets_lost, packets_received = self.loss_counters()
+        width, height = self.frame_size()
+        return {
+            "bytes": self.total_bytes(is_receive),
+            "packets": self.total_packets(is_receive),
+            "video_bytes": self.kind_bytes("video", is_receive),
+            "audio_bytes": self.kind_bytes("audio", is_receive),
+            "packets_lost": packets_lost,
+            "packets_received": packets_received,
+            "fraction_lost": self.first_value("fraction_lost"),
+            "jitter": self.first_value("jitter"),
+            "round_trip_time": self.round_trip_time(),
+            "fec_packets_recovered": self.first_value("fec_packets_recovered"),
+            "retransmitted_packets_received": self.first_value("retransmitted_packets_received"),
+            "frame_width": width,
+            "frame_height": height,
+            "video_codec": self.codec_name("video"),
+        }
+
+
+def parse_webrtc_stats(reply: Any) -> PeerStatsSnapshot:
+    """Build a PeerStatsSnapshot from a get-stats reply (Gst.Structure or dict)."""
+    snapshot = PeerStatsSnapshot()
+    by_type = {
+        "inbound-rtp": snapshot.inbound,
+        "outbound-rtp": snapshot.outbound,
+        "remote-inbound-rtp": snapshot.remote_inbound,
+        "remote-outbound-rtp": snapshot.remote_outbound,
+    }
+    for stat_id, value in _iter_fields(reply):
+        if not _is_structure(value):
+            continue
+        type_name = _stats_type_name(_get_field(value, "type"), stat_id)
+        if type_name not in by_type and type_name not in ("candidate-pair", "codec"):
+            # Transport, certificate and ICE candidate entries are not read.
+            continue
+        fields = _FieldLookup(value)
+        if type_name in by_type:
+            by_type[type_name].append(RtpStreamStats(stat_id, type_name, fields))
+        elif type_name == "candidate-pair":
+            snapshot.candidate_pairs.append(CandidatePairStats(stat_id, fields))
+        elif type_name == "codec":
+            snapshot.codecs[stat_id] = CodecStats(stat_id, fields)
+
+    for entry in snapshot.rtp_streams():
+        if entry.kind is None and entry.codec_id in snapshot.codecs:
+            entry.kind = snapshot.codecs[entry.codec_id].kind
+    return snapshot
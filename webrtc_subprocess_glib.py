@@ -2,7 +2,10 @@
 """
 WebRTC Subprocess Handler using GLib Main Loop
 This runs as a subprocess and handles the GStreamer/WebRTC pipeline.
-It communicates with the parent process via stdin/stdout using JSON messages.
+It communicates with the parent process via stdin/stdout using framed
+messages (see recorder_ipc.py); log lines travel on a separate pipe.
+With --worker it hosts several recorders on one main loop for the room
+recorder pool.
 """
 
 import sys
@@ -11,7 +14,6 @@ import gi
 import time
 import threading
 import os
-import hashlib
 from typing import Optional, Dict, Any
 
 gi.require_version('Gst', '1.0')
@@ -21,11 +23,13 @@ from gi.repository import GstWebRTC
 gi.require_version('GstSdp', '1.0')
 from gi.repository import GstSdp
 
+from hls_playlist import HlsPlaylist, KeyframeSegmenter, PartSplitter
+from recorder_ipc import ChildChannel, FrameDecoder, KIND_CONTROL, parse_log_fd, read_control_frame
+from webrtc_stats import parse_webrtc_stats
+
 # Try to import cryptography for decryption support
 try:
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    from cryptography.hazmat.primitives import padding
-    from cryptography.hazmat.backends import default_backend
+    from signaling_crypto import decrypt_message
     HAS_CRYPTO = True
 except ImportError:
     HAS_CRYPTO = False
@@ -34,6 +38,11 @@ except ImportError:
 # Initialize GStreamer
 Gst.init(None)
 
+# Seconds between receive-stats reports relayed to the parent for /metrics
+STATS_REPORT_INTERVAL = 5
+# Seconds a single-file recording waits for its second track before writing one track only
+AV_MUX_JOIN_TIMEOUT = 5
+
 
 def filename_for_container(filename, extension):
     """Return a filename whose suffix matches the selected media container."""
@@ -44,6 +53,59 @@ def filename_for_container(filename, extension):
     return f"{root or filename}{expected_suffix}"
 
 
+def open_child_channel(argv) -> ChildChannel:
+    """Take over stdout for IPC frames; stray prints are sent to stderr instead."""
+    control_fd = os.dup(sys.stdout.fileno())
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return ChildChannel(control_fd, parse_log_fd(argv))
+
+
+def add_control_watch(decoder: FrameDecoder, on_message, on_eof, log):
+    """Dispatch framed control messages from stdin on the GLib main loop."""
+    fd = sys.stdin.fileno()
+
+    def dispatch(frames):
+        for kind, msg in frames:
+            if kind != KIND_CONTROL:
+                continue
+            try:
+                on_message(msg)
+            except Exception as e:
+                log(f"Error handling message: {e}", "error")
+
+    def on_data(channel, condition):
+        try:
+            data = os.read(fd, 65536)
+        except OSError as e:
+            log(f"Error reading stdin: {e}", "error")
+            data = b""
+        if not data:
+            log("EOF on stdin, shutting down")
+            on_eof()
+            return False
+        try:
+            dispatch(decoder.feed(data))
+        except ValueError as e:
+            log(f"Invalid IPC frame: {e}", "error")
+        return True
+
+    channel = GLib.IOChannel.unix_new(fd)
+    channel.set_encoding(None)
+    channel.set_buffered(False)
+    GLib.io_add_watch(channel, GLib.IO_IN | GLib.IO_HUP, on_data)
+    def drain_buffered():
+        # Frames that arrived together with the configuration are already buffered.
+        dispatch(decoder.feed(b""))
+        return False
+
+    GLib.idle_add(drain_buffered)
+    return channel
+
+
+def _valid_clock_time(value):
+    return value is not None and value != Gst.CLOCK_TIME_NONE
+
+
 def request_pad_compat(element, template_name):
     """Request a pad on both pre-1.20 and current GStreamer Python APIs."""
     if hasattr(element, "request_pad_simple"):
@@ -51,45 +113,18 @@ def request_pad_compat(element, template_name):
     return element.get_request_pad(template_name)
 
 
-# Decryption helper functions (if crypto is available)
-if HAS_CRYPTO:
-    def to_byte_array(hex_str):
-        return bytes.fromhex(hex_str)
-    
-    def generate_key(phrase):
-        return hashlib.sha256(phrase.encode()).digest()
-    
-    def unpad_message(padded_message):
-        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
-        try:
-            data = unpadder.update(padded_message) + unpadder.finalize()
-            return data
-        except ValueError as e:
-            print(f"Padding error: {e}")
-            return None
-    
-    def decrypt_message(encrypted_data, iv, phrase):
-        key = generate_key(phrase)
-        encrypted_data_bytes = to_byte_array(encrypted_data)
-        iv_bytes = to_byte_array(iv)
-        cipher = Cipher(algorithms.AES(key), modes.CBC(iv_bytes), backend=default_backend())
-        decryptor = cipher.decryptor()
-        try:
-            decrypted_padded_message = decryptor.update(encrypted_data_bytes) + decryptor.finalize()
-            unpadded_message = unpad_message(decrypted_padded_message)
-            if unpadded_message is not None:
-                return unpadded_message.decode('utf-8')
-            else:
-                return None
-        except (UnicodeDecodeError, ValueError) as e:
-            print(f"Error decoding message: {e}")
-            return None
-
-
 class GLibWebRTCHandler:
     """Handles WebRTC pipeline in a subprocess using GLib main loop"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        host: Optional["RecorderWorkerHost"] = None,
+        channel: Optional[ChildChannel] = None,
+        decoder: Optional[FrameDecoder] = None,
+    ):
+        self.host = host
+        self.channel = channel
         self.config = config
         self.stream_id = config.get('stream_id')
         self.mode = config.get('mode', 'view')
@@ -102,6 +137,14 @@ class GLibWebRTCHandler:
         self.ndi_direct = config.get('ndi_direct', False)  # Direct NDI mode flag
         self.use_hls = config.get('use_hls', False)
         self.use_splitmuxsink = config.get('use_splitmuxsink', False)  # Default to False - manual segmentation with better control
+        self.hls_playlist_type = config.get('hls_playlist_type') or 'live'
+        self.hls_window = config.get('hls_window', 6)
+        self.hls_part_duration = float(config.get('hls_part_duration') or 0)
+        if self.hls_part_duration > 0 and self.use_splitmuxsink:
+            # Partial segments come from the manual mpegtsmux segmenter
+            self.use_splitmuxsink = False
+        # Mux video and audio into one Matroska file (plain recording only)
+        self.single_file = bool(config.get('single_file')) and self.record_audio and not self.use_hls and not self.room_ndi
         self.password = config.get('password')
         self.salt = config.get('salt', '')
         
@@ -132,61 +175,48 @@ class GLibWebRTCHandler:
         self.video_filename = None
         self.audio_filename = None
         self._hls_setup_in_progress = False
+        self._stats_timer = None
+        self._shutdown_started = False
+        self._finalize_done = None
+        self._finalize_timer = None
+        self._finalize_watching = False
+        self.av_mux = None
+        self.av_mux_pads = {}
+        # Pads arrive on streaming threads while the join timeout runs on the main loop
+        self.av_mux_lock = threading.Lock()
+        self.av_filename = None
         
         # NDI state
         self.ndi_combiner = None
         self.ndi_sink = None
         
-        # Main loop
-        self.main_loop = GLib.MainLoop()
-        
-        # Setup stdin monitoring
-        self.setup_stdin_watch()
+        # Main loop and stdin are owned by the worker host when pooled
+        self.main_loop = None
+        if self.host is None:
+            self.main_loop = GLib.MainLoop()
+            self.setup_stdin_watch(decoder or FrameDecoder())
         
-    def setup_stdin_watch(self):
+    def setup_stdin_watch(self, decoder: FrameDecoder):
         """Setup monitoring of stdin for messages"""
-        # Create a channel for stdin
-        self.stdin_channel = GLib.IOChannel.unix_new(sys.stdin.fileno())
-        self.stdin_channel.set_encoding(None)
-        self.stdin_channel.set_buffered(False)
-        
-        # Add watch for stdin
-        GLib.io_add_watch(self.stdin_channel, GLib.IO_IN, self.on_stdin_data)
-        
-    def on_stdin_data(self, channel, condition):
-        """Handle data from stdin"""
-        try:
-            line = sys.stdin.readline()
-            if not line:
-                self.log("EOF on stdin, shutting down")
-                self.shutdown()
-                return False
-            
-            msg = json.loads(line.strip())
-            self.handle_message(msg)
-            
-        except json.JSONDecodeError as e:
-            self.log(f"Invalid JSON: {e}", "error")
-        except Exception as e:
-            self.log(f"Error handling stdin: {e}", "error")
-            
-        return True  # Continue watching
-        
+        self.stdin_channel = add_control_watch(decoder, self.handle_message, self.shutdown, self.log)
+
     def log(self, message: str, level: str = "info"):
         """Log message with level"""
-        log_entry = {
-            "type": "log",
-            "level": level,
-            "message": f"[{self.stream_id}] {message}"
-        }
-        sys.stdout.write(json.dumps(log_entry) + '\n')
-        sys.stdout.flush()
-        
+        text = f"[{self.stream_id}] {message}"
+        if self.host is not None:
+            self.host.channel.log(level, text, self.stream_id)
+        elif self.channel is not None:
+            self.channel.log(level, text, self.stream_id)
+        else:
+            sys.stderr.write(text + '\n')
+
     def send_message(self, msg: Dict[str, Any]):
         """Send message to parent process"""
-        sys.stdout.write(json.dumps(msg) + '\n')
-        sys.stdout.flush()
-        
+        if self.host is not None:
+            self.host.send(dict(msg, stream_id=self.stream_id))
+        else:
+            self.channel.send(msg)
+
     def handle_message(self, msg: Dict[str, Any]):
         """Handle message from parent process"""
         msg_type = msg.get('type')
@@ -282,43 +312,6 @@ class GLibWebRTCHandler:
         
         return '\n'.join(lines)
     
-    def create_hls_playlist(self):
-        """Create or update HLS m3u8 playlist file"""
-        try:
-            # Check how many segments exist
-            import glob
-            import os
-            pattern = f"{self.base_filename}_*.ts"
-            segments = sorted(glob.glob(pattern))
-            
-            playlist_content = "#EXTM3U\n"
-            playlist_content += "#EXT-X-VERSION:3\n"
-            playlist_content += "#EXT-X-TARGETDURATION:6\n"  # Slightly higher than segment duration
-            playlist_content += "#EXT-X-MEDIA-SEQUENCE:0\n\n"
-            
-            # Add all existing segments
-            for segment in segments:
-                segment_name = os.path.basename(segment)
-                # Assume 5 second duration for now
-                playlist_content += f"#EXTINF:5.0,\n{segment_name}\n"
-            
-            # Write playlist
-            with open(self.hls_playlist_path, 'w') as f:
-                f.write(playlist_content)
-                
-        except Exception as e:
-            self.log(f"Error creating HLS playlist: {e}", "error")
-    
-    def update_hls_playlist(self):
-        """Update HLS playlist with new segments"""
-        if hasattr(self, 'hls_playlist_path'):
-            self.create_hls_playlist()
-    
-    def update_hls_playlist_timer(self):
-        """Timer callback to update HLS playlist"""
-        self.update_hls_playlist()
-        return True  # Continue timer
-    
     def handle_offer(self, sdp_text: str):
         """Handle SDP offer"""
         try:
@@ -942,7 +935,7 @@ class GLibWebRTCHandler:
                         if hasattr(self, 'hlssink') and self.hlssink:
                             ret = self.hlssink.set_state(Gst.State.PLAYING)
                             ret_name = ret.value_name if hasattr(ret, 'value_name') else str(ret)
-                            self.log(f"   Filesink set_state(PLAYING): {ret_name}")
+                            self.log(f"   Multifilesink set_state(PLAYING): {ret_name}")
                         
                     # Wait for state changes to complete
                     timeout = 2 * Gst.SECOND
@@ -1130,7 +1123,6 @@ class GLibWebRTCHandler:
                 # Create M3U8 playlist for splitmuxsink
                 self.playlist_filename = f"{base_filename}.m3u8"
                 self.segment_duration = 5.0
-                self.segments = []
                 self.segment_counter = 0
                 self.write_m3u8_header()
                 
@@ -1143,9 +1135,6 @@ class GLibWebRTCHandler:
                         return False  # Don't repeat
                     return True  # Try again
                 
-                # Check for first segment after 1 second
-                GLib.timeout_add(1000, add_first_segment)
-                
                 # Connect to splitmuxsink's format-location signal to track segments
                 def on_format_location(splitmux, fragment_id):
                     return f"{base_filename}_{fragment_id:05d}.ts"
@@ -1159,11 +1148,13 @@ class GLibWebRTCHandler:
                 # Monitor when new files are created
                 def on_splitmux_sink_new_file(splitmux, fragment_id, sample):
                     # When a new segment starts, the previous one is complete
+                    buffer = sample.get_buffer() if sample else None
+                    duration = self._measure_segment_duration(buffer.pts if buffer else None)
                     if self.current_segment_id >= 0:
                         # Add the previous segment to playlist (it's now complete)
                         prev_filename = f"{base_filename}_{self.current_segment_id:05d}.ts"
                         self.log(f"   ✅ Previous segment complete: {prev_filename}")
-                        self.add_segment_to_playlist(prev_filename)
+                        self.add_segment_to_playlist(prev_filename, duration)
                     
                     # Update current segment ID
                     self.current_segment_id = fragment_id
@@ -1173,9 +1164,11 @@ class GLibWebRTCHandler:
                     self.hls_recording_active = True
                     
                 # Connect to the actual signal name
+                tracks_fragments = False
                 try:
                     # The signal is called 'format-location-full' for getting the filename
                     self.hlssink.connect('format-location-full', on_splitmux_sink_new_file)
+                    tracks_fragments = True
                 except:
                     pass
                     
@@ -1205,46 +1198,49 @@ class GLibWebRTCHandler:
                         self.last_segment_check = len(current_segments)
                     return True  # Keep timer running
                     
-                # Check every 2 seconds for new segments
-                GLib.timeout_add(2000, check_for_new_segments)
+                if not tracks_fragments:
+                    # No fragment signal: fall back to polling for segment files
+                    # (durations are then nominal rather than measured).
+                    GLib.timeout_add(1000, add_first_segment)
+                    GLib.timeout_add(2000, check_for_new_segments)
         else:
-            # For hlssink2, we'll use a different approach
-            # Create a regular filesink and handle segmentation manually
+            # Segment the mpegtsmux output ourselves: a pad probe cuts on
+            # keyframes and multifilesink opens the next file when it sees a
+            # downstream GstForceKeyUnit, so no element changes state.
             self.use_manual_segmentation = True
             self.segment_counter = 0
-            self.current_segment_start = None
+            self._hls_cut_count = 0
             
-            # Create initial filesink
-            self.hlssink = Gst.ElementFactory.make('filesink', None)
+            self.hlssink = Gst.ElementFactory.make('multifilesink', None)
             if self.hlssink:
                 segment_filename = f"{base_filename}_{self.segment_counter:05d}.ts"
-                self.hlssink.set_property('location', segment_filename)
+                self.hlssink.set_property('location', f"{base_filename}_%05d.ts")
+                self.hlssink.set_property('index', self.segment_counter)
+                Gst.util_set_object_arg(self.hlssink, 'next-file', 'key-unit-event')
+                self.hlssink.set_property('post-messages', False)
                 self.hlssink.set_property('sync', False)
                 self.hlssink.set_property('async', False)
                 
                 # Create M3U8 playlist
                 self.playlist_filename = f"{base_filename}.m3u8"
                 self.segment_duration = 5.0
-                self.segments = []
+                self.hls_segmenter = KeyframeSegmenter(self.segment_duration)
+                if self.hls_part_duration > 0:
+                    self.hls_parts = PartSplitter(self.hls_part_duration)
+                    self._hls_part_index = 0
+                    self._hls_part_file = None
+                    self._hls_part_independent = False
+                    self.log(f"   Low-latency HLS: {self.hls_part_duration:.3f}s partial segments")
                 self.write_m3u8_header()
                 
                 self.log(f"   Playlist: {self.playlist_filename}")
                 self.log(f"   First segment: {segment_filename}")
                 self.base_filename = base_filename
                 
-                # Set up segment rotation timer
-                def rotate_segment():
-                    if self.use_manual_segmentation:
-                        self.rotate_hls_segment()
-                    return True  # Keep timer running
-                    
-                # Rotate segments every 5 seconds
-                GLib.timeout_add(int(self.segment_duration * 1000), rotate_segment)
-                
                 # Also check for initial segment creation
                 def check_initial_segment():
                     if hasattr(self, 'hlssink') and self.hlssink:
-                        filename = self.hlssink.get_property('location')
+                        filename = segment_filename
                         if filename:
                             import os
                             if os.path.exists(filename):
@@ -1254,11 +1250,7 @@ class GLibWebRTCHandler:
                                     # Check if it's real data or just padding
                                     if size == 65800:
                                         self.log("   ⚠️  Segment size is exactly 65800 - might be empty TS padding")
-                                    # Add first segment to playlist if not already added
-                                    if hasattr(self, 'segment_counter') and self.segment_counter == 0:
-                                        if not hasattr(self, '_first_segment_added'):
-                                            self._first_segment_added = True
-                                            self.add_segment_to_playlist(filename)
+                                    # The segment is listed once rotation closes it
                                     return False  # Stop checking
                     return True  # Keep checking
                     
@@ -1294,6 +1286,12 @@ class GLibWebRTCHandler:
                     self._mux_output_count += 1
                     buffer = info.get_buffer()
                     if buffer:
+                        if _valid_clock_time(buffer.pts):
+                            if getattr(self, '_hls_segment_start_pts', None) is None:
+                                self._hls_segment_start_pts = buffer.pts
+                            self._mux_last_end_pts = buffer.pts
+                            if _valid_clock_time(buffer.duration):
+                                self._mux_last_end_pts += buffer.duration
                         if self._mux_first_buffer:
                             self._mux_first_buffer = False
                             self.log("   ✅ First buffer from mpegtsmux!")
@@ -1305,6 +1303,21 @@ class GLibWebRTCHandler:
                                 time_diff = (buffer.pts - self._mux_last_pts) / Gst.SECOND
                                 self.log(f"      Time since last log: {time_diff:.2f}s")
                         self._mux_last_pts = buffer.pts
+                        keyframe = not buffer.has_flags(Gst.BufferFlags.DELTA_UNIT)
+                        if getattr(self, 'hls_segmenter', None) and _valid_clock_time(buffer.pts):
+                            request, duration = self.hls_segmenter.observe(buffer.pts / Gst.SECOND, keyframe)
+                            if request:
+                                self.request_hls_keyframe()
+                            if duration is not None:
+                                if getattr(self, 'hls_parts', None):
+                                    self.cut_hls_part(self.hls_parts.restart(buffer.pts / Gst.SECOND), segment_end=True)
+                                self.cut_hls_segment(buffer.pts, duration)
+                            elif getattr(self, 'hls_parts', None):
+                                part_duration = self.hls_parts.observe(buffer.pts / Gst.SECOND)
+                                if part_duration is not None:
+                                    self.cut_hls_part(part_duration)
+                        if getattr(self, 'hls_parts', None):
+                            self.write_hls_part(buffer, keyframe)
                     return Gst.PadProbeReturn.OK
                 mux_src_pad.add_probe(Gst.PadProbeType.BUFFER, mux_probe_cb)
                 self.log("   ✅ Added probe to monitor mpegtsmux output")
@@ -1336,16 +1349,18 @@ class GLibWebRTCHandler:
         self.log("   ✅ HLS muxer ready for audio/video streams")
         
     def write_m3u8_header(self):
-        """Write initial M3U8 playlist header"""
+        """Create the playlist engine and publish the initial (empty) playlist"""
         if hasattr(self, 'playlist_filename'):
             try:
-                with open(self.playlist_filename, 'w') as f:
-                    f.write("#EXTM3U\n")
-                    f.write("#EXT-X-VERSION:3\n")
-                    f.write(f"#EXT-X-TARGETDURATION:{int(self.segment_duration)}\n")
-                    f.write("#EXT-X-MEDIA-SEQUENCE:0\n")
-                    f.write("\n")
-                self.log(f"   ✅ Created M3U8 playlist: {self.playlist_filename}")
+                self.hls_playlist = HlsPlaylist(
+                    self.playlist_filename,
+                    target_duration=self.segment_duration,
+                    playlist_type=self.hls_playlist_type,
+                    window=self.hls_window,
+                    part_target=self.hls_part_duration or None,
+                )
+                self.hls_playlist.write()
+                self.log(f"   ✅ Created M3U8 playlist: {self.playlist_filename} ({self.hls_playlist_type})")
                 # Mark recording as active for live updates
                 self.hls_recording_active = True
             except PermissionError as e:
@@ -1354,163 +1369,169 @@ class GLibWebRTCHandler:
                 # Disable manual segmentation if we can't write
                 self.use_manual_segmentation = False
                 
-    def add_segment_to_playlist(self, filename):
-        """Add a new segment to the M3U8 playlist"""
-        if hasattr(self, 'playlist_filename'):
-            try:
-                # Extract just the filename from the full path
-                import os
-                segment_name = os.path.basename(filename)
-                
-                # Check if this segment already exists
-                existing_segments = [s['filename'] for s in self.segments]
-                if segment_name in existing_segments:
-                    self.log(f"   ⚠️  Segment {segment_name} already in playlist, skipping duplicate")
-                    return
-                
-                # Add to segments list
-                self.segments.append({
-                    'filename': segment_name,
-                    'duration': self.segment_duration,
-                    'time_added': time.time()
-                })
-                
-                # Update the playlist
-                self.write_playlist()
-                
-                self.segment_counter += 1
-                
-                # Schedule next playlist update for live streaming
-                if not hasattr(self, '_playlist_updater_scheduled'):
-                    self._playlist_updater_scheduled = True
-                    self.schedule_playlist_updates()
-                    
-            except Exception as e:
-                self.log(f"   ❌ Error updating M3U8 playlist: {e}", "error")
+    def add_segment_to_playlist(self, filename, duration=None):
+        """Add a completed segment with its measured duration (seconds) to the playlist"""
+        playlist = getattr(self, 'hls_playlist', None)
+        if playlist is None:
+            return
+        try:
+            if filename in playlist:
+                self.log(f"   ⚠️  Segment {os.path.basename(filename)} already in playlist, skipping duplicate")
+                return
+            playlist.add_segment(filename, duration)
+            self.remove_expired_parts()
+        except Exception as e:
+            self.log(f"   ❌ Error updating M3U8 playlist: {e}", "error")
                 
     def write_playlist(self):
-        """Write the M3U8 playlist file with proper live stream markers"""
-        if not hasattr(self, 'playlist_filename'):
+        """Publish the playlist if its segment list changed"""
+        playlist = getattr(self, 'hls_playlist', None)
+        if playlist is None:
             return
-            
         try:
-            with open(self.playlist_filename, 'w') as f:
-                f.write("#EXTM3U\n")
-                f.write("#EXT-X-VERSION:3\n")
-                f.write(f"#EXT-X-TARGETDURATION:{int(self.segment_duration)}\n")
-                
-                # For live streams, we need to maintain a sliding window
-                # Keep only the last N segments for live streaming
-                max_segments = 6  # Keep last 6 segments in live playlist (30 seconds)
-                if len(self.segments) > max_segments:
-                    # Calculate media sequence offset
-                    sequence_offset = len(self.segments) - max_segments
-                    segments_to_write = self.segments[-max_segments:]
-                else:
-                    sequence_offset = 0
-                    segments_to_write = self.segments
-                
-                f.write(f"#EXT-X-MEDIA-SEQUENCE:{sequence_offset}\n")
-                f.write("\n")
-                
-                # Write segments
-                for segment in segments_to_write:
-                    f.write(f"#EXTINF:{segment['duration']:.3f},\n")
-                    f.write(f"{segment['filename']}\n")
-                    
-                # For live streams, we don't add ENDLIST
-                # The absence of ENDLIST indicates the stream is still live
-                
+            playlist.write()
         except Exception as e:
             self.log(f"   ❌ Error writing M3U8 playlist: {e}", "error")
-            
-    def schedule_playlist_updates(self):
-        """Schedule periodic playlist updates for live streaming"""
-        def update_playlist():
-            if hasattr(self, 'hls_recording_active') and self.hls_recording_active:
-                # Rewrite playlist to keep it fresh
-                self.write_playlist()
-                # Schedule next update
-                return True  # Continue scheduling
-            else:
-                self._playlist_updater_scheduled = False
-                return False  # Stop scheduling
-                
-        # Update playlist every 2 seconds for live streams
-        GLib.timeout_add(2000, update_playlist)
+
+    def _measure_segment_duration(self, boundary_pts):
+        """Return the length of the segment ending at ``boundary_pts`` and start timing the next one.
+
+        Durations come from buffer PTS; wall-clock time is used when the
+        pipeline did not provide timestamps.
+        """
+        start_pts = getattr(self, '_hls_segment_start_pts', None)
+        started_at = getattr(self, '_hls_segment_started_at', None)
+        now = time.monotonic()
+        self._hls_segment_start_pts = boundary_pts if _valid_clock_time(boundary_pts) else None
+        self._hls_segment_started_at = now
+        if _valid_clock_time(start_pts) and _valid_clock_time(boundary_pts) and boundary_pts > start_pts:
+            return (boundary_pts - start_pts) / Gst.SECOND
+        if started_at is not None:
+            return now - started_at
+        return None
+
+    def finish_hls_playlist(self):
+        """List the last open segment and end the playlist"""
+        playlist = getattr(self, 'hls_playlist', None)
+        if playlist is None or playlist.finished:
+            return
+        self.hls_recording_active = False
+        self.close_hls_part_file()
+        last_segment = None
+        if getattr(self, 'use_manual_segmentation', False) and getattr(self, 'base_filename', None):
+            last_segment = f"{self.base_filename}_{self.segment_counter:05d}.ts"
+        elif getattr(self, 'current_segment_id', -1) >= 0 and getattr(self, 'base_filename', None):
+            last_segment = f"{self.base_filename}_{self.current_segment_id:05d}.ts"
+        try:
+            if last_segment and os.path.exists(last_segment) and os.path.getsize(last_segment) > 0:
+                duration = self._measure_segment_duration(getattr(self, '_mux_last_end_pts', None))
+                playlist.add_segment(last_segment, duration)
+            playlist.finish()
+            self.remove_expired_parts()
+        except Exception as e:
+            self.log(f"   ❌ Error finishing M3U8 playlist: {e}", "error")
                 
-    def rotate_hls_segment(self):
-        """Rotate to a new HLS segment file"""
-        if not hasattr(self, 'use_manual_segmentation') or not self.use_manual_segmentation:
+    def _hls_part_path(self, segment, index):
+        return f"{self.base_filename}.part{segment:05d}.{index}.ts"
+
+    def write_hls_part(self, buffer, keyframe):
+        """Append one mpegtsmux output buffer to the current partial segment file
+
+        The part is written under a temporary name and renamed into place by
+        cut_hls_part, so the web server never serves a part that is still growing.
+        """
+        if self._hls_part_file is None:
+            try:
+                part_path = self._hls_part_path(self.segment_counter, self._hls_part_index)
+                self._hls_part_file = open(part_path + '.partial', 'wb')
+            except OSError as e:
+                self.log(f"   ❌ Cannot write HLS part, disabling low-latency output: {e}", "error")
+                self.hls_parts = None
+                return
+            self._hls_part_independent = keyframe
+        self._hls_part_file.write(buffer.extract_dup(0, buffer.get_size()))
+
+    def close_hls_part_file(self, keep=False):
+        """Close the partial segment being written; unless kept, its temporary file is removed"""
+        part_file = getattr(self, '_hls_part_file', None)
+        if part_file is not None:
+            self._hls_part_file = None
+            part_file.close()
+            if not keep:
+                try:
+                    os.unlink(part_file.name)
+                except OSError:
+                    pass
+
+    def cut_hls_part(self, duration, segment_end=False):
+        """Close the current partial segment and list it; runs in the streaming thread"""
+        if self._hls_part_file is None or not duration:
             return
-            
-        if not hasattr(self, 'hlssink') or not self.hlssink:
+        part_path = self._hls_part_path(self.segment_counter, self._hls_part_index)
+        temp_path = self._hls_part_file.name
+        self.close_hls_part_file(keep=True)
+        try:
+            os.replace(temp_path, part_path)
+        except OSError as e:
+            self.log(f"   ❌ Error publishing HLS part: {e}", "error")
             return
-            
-        # Check if HLS recording has actually started
-        if not hasattr(self, 'hls_recording_started') or not self.hls_recording_started:
-            self.log("   ⏸️  HLS recording not started yet, skipping rotation")
+        independent = self._hls_part_independent
+        if segment_end:
+            self._hls_part_index = 0
+            next_part = self._hls_part_path(self.segment_counter + 1, 0)
+        else:
+            self._hls_part_index += 1
+            next_part = self._hls_part_path(self.segment_counter, self._hls_part_index)
+
+        def list_part():
+            playlist = getattr(self, 'hls_playlist', None)
+            if playlist is not None:
+                try:
+                    playlist.add_part(part_path, duration, independent, preload_hint=next_part)
+                except Exception as e:
+                    self.log(f"   ❌ Error listing HLS part: {e}", "error")
+            return False
+
+        GLib.idle_add(list_part)
+
+    def remove_expired_parts(self):
+        """Delete partial segment files the playlist no longer lists"""
+        playlist = getattr(self, 'hls_playlist', None)
+        if playlist is None:
             return
-            
-        try:
-            # Check current state first
-            state_ret, state, pending = self.hlssink.get_state(0)
-            state_name = state.value_name if hasattr(state, 'value_name') else str(state)
-            
-            if state != Gst.State.PLAYING:
-                self.log(f"   ⚠️  HLS sink not in PLAYING state ({state_name}), skipping rotation")
-                return
-            
-            # Get the current segment filename before changing
-            old_filename = self.hlssink.get_property('location')
-            
-            # Check if current segment has data
-            import os
-            if old_filename and os.path.exists(old_filename):
-                size = os.path.getsize(old_filename)
-                if size > 0:
-                    # We have data, proceed with rotation
-                    self.segment_counter += 1
-                    new_segment_filename = f"{self.base_filename}_{self.segment_counter:05d}.ts"
-                    
-                    self.log(f"   🔄 Rotating HLS segment: {os.path.basename(old_filename)} ({size:,} bytes) -> {os.path.basename(new_segment_filename)}")
-                    
-                    # Set the filesink to NULL state
-                    self.hlssink.set_state(Gst.State.NULL)
-                    
-                    # Change location
-                    self.hlssink.set_property('location', new_segment_filename)
-                    
-                    # Set back to PLAYING
-                    self.hlssink.set_state(Gst.State.PLAYING)
-                    
-                    # Add the completed segment to playlist
-                    self.add_segment_to_playlist(old_filename)
-                    
-                    # Check if mux is stuck after audio was added
-                    if hasattr(self, '_mux_output_count'):
-                        if not hasattr(self, '_last_mux_check'):
-                            self._last_mux_check = self._mux_output_count
-                        elif self._mux_output_count == self._last_mux_check:
-                            self.log("   ⚠️  Mux appears stuck - no output since last rotation")
-                            # Try to unstick by requesting keyframe
-                            if hasattr(self, 'video_queue'):
-                                event = Gst.Event.new_custom(
-                                    Gst.EventType.CUSTOM_UPSTREAM,
-                                    Gst.Structure.new_empty("GstForceKeyUnit")
-                                )
-                                self.video_queue.send_event(event)
-                                self.log("   🔑 Sent force-keyframe to try unsticking mux")
-                        self._last_mux_check = self._mux_output_count
-                else:
-                    self.log("   ⏸️  Current segment is empty, waiting for data...")
-            else:
-                self.log("   ⏸️  No current segment file yet")
-                
-        except Exception as e:
-            self.log(f"   ❌ Error rotating HLS segment: {e}", "error")
-            import traceback
-            self.log(traceback.format_exc())
+        for path in playlist.pop_expired_parts():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def request_hls_keyframe(self):
+        """Ask upstream (and, through the depayloader, the sender) for a keyframe"""
+        video_queue = getattr(self, 'video_queue', None)
+        if video_queue is None:
+            return
+        structure = Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true")
+        video_queue.send_event(Gst.Event.new_custom(Gst.EventType.CUSTOM_UPSTREAM, structure))
+
+    def cut_hls_segment(self, pts, duration):
+        """Start a new segment file at the keyframe buffer ``pts``; runs in the streaming thread"""
+        closed_segment = f"{self.base_filename}_{self.segment_counter:05d}.ts"
+        self.segment_counter += 1
+        self._hls_cut_count += 1
+        structure = Gst.Structure.new_from_string(
+            f"GstForceKeyUnit, timestamp=(guint64){pts}, stream-time=(guint64){pts}, "
+            f"running-time=(guint64){pts}, all-headers=(boolean)true, count=(uint){self._hls_cut_count}"
+        )
+        self.hlssink.get_static_pad('sink').send_event(
+            Gst.Event.new_custom(Gst.EventType.CUSTOM_DOWNSTREAM, structure)
+        )
+        self._measure_segment_duration(pts)
+
+        def list_segment():
+            self.add_segment_to_playlist(closed_segment, duration)
+            return False
+
+        GLib.idle_add(list_segment)
         
     def setup_ndi_combiner(self):
         """Set up NDI sink combiner for audio/video multiplexing"""
@@ -1892,6 +1913,88 @@ class GLibWebRTCHandler:
         else:
             self.log("Could not determine pad type")
             
+    def _ensure_av_mux(self):
+        """Create the Matroska muxer and file shared by video and audio in single-file mode.
+
+        Both mux pads are requested up front because matroskamux cannot add
+        a track once its header is written; the header waits until each
+        pad has data, so a track that never arrives is released after
+        AV_MUX_JOIN_TIMEOUT. Both branches carry webrtcbin's RTP-derived
+        running time, so the file is in sync without any post-processing.
+        """
+        if self.av_mux is not None:
+            return True
+
+        mux = Gst.ElementFactory.make('matroskamux', None)
+        filesink = Gst.ElementFactory.make('filesink', None)
+        if not mux or not filesink:
+            self.log("Failed to create single-file muxer", "error")
+            return False
+        mux.set_property('streamable', True)
+
+        if self.record_file:
+            filename = filename_for_container(self.record_file, 'mkv')
+        else:
+            filename = f"{self.room}_{self.stream_id}_{int(time.time())}.mkv"
+        filesink.set_property('location', filename)
+
+        self.pipe.add(mux)
+        self.pipe.add(filesink)
+        if not mux.link(filesink):
+            self.log("Failed to link muxer to filesink", "error")
+            return False
+        self.av_mux_pads = {
+            'video': request_pad_compat(mux, 'video_%u'),
+            'audio': request_pad_compat(mux, 'audio_%u'),
+        }
+        mux.sync_state_with_parent()
+        filesink.sync_state_with_parent()
+
+        self.av_mux = mux
+        self.av_filename = filename
+        self.log(f"   📦 Single-file recording (video + audio): {filename}")
+        GLib.timeout_add_seconds(AV_MUX_JOIN_TIMEOUT, self._release_unjoined_mux_pads)
+        return True
+
+    def _link_to_av_mux(self, media, pad, elements):
+        """Add a depayloaded branch to the pipeline and link it to the shared muxer.
+
+        A track that shows up after its mux pad was released is discarded.
+        """
+        with self.av_mux_lock:
+            if not self._ensure_av_mux():
+                return False
+            mux_pad = self.av_mux_pads.get(media)
+            if mux_pad is None or mux_pad.is_linked():
+                self.log(f"   ⚠️  {media.capitalize()} arrived after the recording started without it; not recording it", "warning")
+                fakesink = Gst.ElementFactory.make('fakesink', None)
+                self.pipe.add(fakesink)
+                fakesink.sync_state_with_parent()
+                pad.link(fakesink.get_static_pad('sink'))
+                return False
+
+            # Linked before the lock is released, so the join timeout can't take the pad
+            for element in elements:
+                self.pipe.add(element)
+            for upstream, downstream in zip(elements, elements[1:]):
+                if not upstream.link(downstream):
+                    self.log(f"Failed to link {media} recording elements", "error")
+                    return False
+            if elements[-1].get_static_pad('src').link(mux_pad) != Gst.PadLinkReturn.OK:
+                self.log(f"Failed to link {media} to the single-file muxer", "error")
+                return False
+            return True
+
+    def _release_unjoined_mux_pads(self):
+        """Let the muxer write the tracks it has when the other one never arrived."""
+        with self.av_mux_lock:
+            for media, mux_pad in list(self.av_mux_pads.items()):
+                if mux_pad is not None and not mux_pad.is_linked():
+                    self.log(f"   ⚠️  No {media} after {AV_MUX_JOIN_TIMEOUT}s; recording without it", "warning")
+                    self.av_mux.release_request_pad(mux_pad)
+                    del self.av_mux_pads[media]
+        return False
+
     def handle_video_pad(self, pad):
         """Handle video pad - set up recording"""
         if self.use_hls and self._hls_setup_in_progress:
@@ -2097,6 +2200,11 @@ class GLibWebRTCHandler:
                 if not all([queue, depay, h264parse]):
                     self.log("Failed to create HLS elements for H264", "error")
                     return
+        elif self.single_file:
+            # Single-file mode - the shared muxer is created by whichever pad arrives first
+            if not all([queue, depay]) or (encoding_name == 'H264' and not h264parse):
+                self.log("Failed to create recording elements", "error")
+                return
         else:
             # Recording mode
             filesink = Gst.ElementFactory.make('filesink', None)
@@ -2528,6 +2636,11 @@ class GLibWebRTCHandler:
             
             GLib.timeout_add(3000, check_hls_status)  # Check after 3 seconds
                 
+        elif self.single_file:
+            elements = [queue, depay, h264parse] if encoding_name == 'H264' else [queue, depay]
+            if not self._link_to_av_mux('video', pad, elements):
+                return
+            filename = self.av_filename
         else:
             # Recording mode
             # Set output filename
@@ -2744,6 +2857,8 @@ class GLibWebRTCHandler:
                     self.log("      Using internal mux (splitmuxsink)")
                 if hasattr(self, 'hlssink') and self.hlssink:
                     self.log("      Sink element exists: YES")
+        elif self.single_file:
+            self.log("   ℹ️  Audio will be muxed with video into one Matroska file")
         else:
             # For non-HLS, just record audio alongside video in separate files
             self.log("   ℹ️  Audio recording is currently saved separately from video")
@@ -2916,27 +3031,14 @@ class GLibWebRTCHandler:
                             if hasattr(self, 'hls_video_connected') and self.hls_video_connected:
                                 self.log("   🔄 Audio joining existing video stream")
                                 
-                                self.log("   🔄 Audio joining video stream - forcing segment rotation")
-                                
-                                # When audio joins, we need to handle timestamp synchronization
-                                self.log("   ⌚ Synchronizing timestamps for audio/video muxing")
+                                self.log("   🔄 Audio joining video stream - cutting segment at next keyframe")
                                 
-                                # Don't send flush events - they can disrupt the mux
-                                # Instead, let mpegtsmux handle timestamp synchronization internally
-                                    
-                                # Then rotate segment and force keyframe
-                                if hasattr(self, 'rotate_hls_segment'):
-                                    # First, complete the current video-only segment
-                                    self.rotate_hls_segment()
-                                    
-                                    # Force a keyframe on video to ensure clean start
-                                    if hasattr(self, 'video_queue'):
-                                        event = Gst.Event.new_custom(
-                                            Gst.EventType.CUSTOM_UPSTREAM,
-                                            Gst.Structure.new_empty("GstForceKeyUnit")
-                                        )
-                                        self.video_queue.send_event(event)
-                                        self.log("   🔑 Sent force-keyframe for clean segment start")
+                                # Let mpegtsmux handle timestamp synchronization internally;
+                                # end the video-only segment on the next keyframe
+                                if getattr(self, 'hls_segmenter', None):
+                                    self.hls_segmenter.request_cut()
+                                    self.request_hls_keyframe()
+                                    self.log("   🔑 Sent force-keyframe for clean segment start")
                     else:
                         self.log("Failed to link audio to mpegtsmux", "error")
                         return
@@ -2990,6 +3092,29 @@ class GLibWebRTCHandler:
             if hasattr(self, 'base_filename'):
                 self.audio_filename = self.base_filename
             
+        elif self.single_file:
+            if not all([queue, depay, opusparse]):
+                self.log("Failed to create audio elements", "error")
+                return
+            elements = [queue, depay, opusparse]
+            if not self._link_to_av_mux('audio', pad, elements):
+                return
+
+            # Sync states
+            for element in elements:
+                element.sync_state_with_parent()
+
+            # Link pad to queue
+            sink_pad = queue.get_static_pad('sink')
+            if pad.link(sink_pad) != Gst.PadLinkReturn.OK:
+                self.log("Failed to link audio pad to queue", "error")
+                return
+
+            self.log("   ✅ Audio recording pipeline connected and running")
+            self.recording_audio = True
+            self.audio_filename = self.av_filename
+            self.recording_audio_queue = queue
+            
         else:
             # Non-HLS mode - save OPUS directly without transcoding
             filesink = Gst.ElementFactory.make('filesink', None)
@@ -3080,6 +3205,7 @@ class GLibWebRTCHandler:
             self.log("ICE connection established successfully")
             # Request video/audio through data channel
             self.request_media()
+            self.start_stats_reports()
             
             # Debug: Check if we have any sink pads
             self.log("DEBUG: Checking webrtcbin pads after ICE connected")
@@ -3106,16 +3232,56 @@ class GLibWebRTCHandler:
             except Exception as e:
                 self.log(f"ERROR checking pads: {e}", "error")
         
+    def start_stats_reports(self):
+        """Relay webrtcbin receive stats to the parent every STATS_REPORT_INTERVAL seconds"""
+        if self._stats_timer is None:
+            self._stats_timer = GLib.timeout_add_seconds(STATS_REPORT_INTERVAL, self.report_stats)
+
+    def report_stats(self):
+        if not self.running or not self.webrtc:
+            self._stats_timer = None
+            return False
+        promise = Gst.Promise.new_with_change_func(self.on_stats_reply, None)
+        self.webrtc.emit('get-stats', None, promise)
+        return True
+
+    def on_stats_reply(self, promise, _user_data):
+        if not self.running:
+            return
+        try:
+            reply = promise.get_reply()
+            if reply is None:
+                return
+            summary = parse_webrtc_stats(reply).summary(is_receive=True)
+        except Exception as e:
+            self.log(f"Failed to read stats: {e}", "debug")
+            return
+        self.send_message({"type": "stats", "stats": summary})
+
     def on_ice_gathering_state_notify(self, element, pspec):
         """Monitor ICE gathering state changes"""
         state = element.get_property('ice-gathering-state')
         self.log(f"ICE gathering state: {state.value_name}")
         
     def shutdown(self):
-        """Shutdown the handler"""
+        """Shutdown the handler once its recording containers are finalized"""
+        if self._shutdown_started:
+            return
+        self._shutdown_started = True
         self.log("Shutting down...")
 
-        self.finalize_recordings()
+        if not self.finalize_recordings(self._finish_shutdown):
+            self._finish_shutdown()
+            return
+        loop = self.host.main_loop if self.host is not None else self.main_loop
+        if not loop.is_running():
+            # SIGINT already ended the main loop; run its context until the muxers finish
+            context = GLib.MainContext.default()
+            while self._finalize_done is not None:
+                context.iteration(True)
+
+    def _finish_shutdown(self):
+        self.finish_hls_playlist()
         
         # Log recording status
         if hasattr(self, 'recording_video') and self.recording_video:
@@ -3130,16 +3296,27 @@ class GLibWebRTCHandler:
                     self.log(f"   Warning: Output file not found")
         
         self.running = False
+        if self._stats_timer is not None:
+            GLib.source_remove(self._stats_timer)
+            self._stats_timer = None
         
         if self.pipe:
             self.pipe.set_state(Gst.State.NULL)
-            
-        self.main_loop.quit()
 
-    def finalize_recordings(self, timeout_seconds=3):
-        """Send EOS to file branches and wait briefly for their muxers."""
+        if self.host is not None:
+            self.host.handler_finished(self)
+        else:
+            self.main_loop.quit()
+
+    def finalize_recordings(self, on_done, timeout_seconds=3):
+        """Send EOS to file branches; returns True if on_done will be called once the muxers finish.
+
+        Pooled recorders share one GLib main loop, so this must not block: a
+        bus watch catches EOS or ERROR and a timeout covers a muxer that never
+        finishes.
+        """
         if not self.pipe or not (self.recording_video or self.recording_audio):
-            return
+            return False
 
         queues = []
         for attr in ("recording_video_queue", "recording_audio_queue"):
@@ -3148,7 +3325,17 @@ class GLibWebRTCHandler:
                 queues.append(queue)
 
         if not queues:
-            return
+            return False
+
+        # A track still missing would hold the shared muxer back forever
+        if self.av_mux is not None:
+            self._release_unjoined_mux_pads()
+
+        # Nothing has watched this bus so far; drop what it queued so an old
+        # message can't pass for the end of finalization
+        bus = self.pipe.get_bus()
+        bus.set_flushing(True)
+        bus.set_flushing(False)
 
         self.log("Finalizing recording container(s)...")
         eos_sent = False
@@ -3162,20 +3349,43 @@ class GLibWebRTCHandler:
 
         if not eos_sent:
             self.log("No recording branch accepted EOS; forcing pipeline shutdown", "warning")
-            return
+            return False
 
-        bus = self.pipe.get_bus()
-        message = bus.timed_pop_filtered(
-            int(max(timeout_seconds, 0) * Gst.SECOND),
-            Gst.MessageType.EOS | Gst.MessageType.ERROR,
-        )
-        if message and message.type == Gst.MessageType.EOS:
+        self._finalize_done = on_done
+        self._finalize_watching = True
+        bus.add_watch(GLib.PRIORITY_DEFAULT, self._on_finalize_message)
+        self._finalize_timer = GLib.timeout_add(int(max(timeout_seconds, 0) * 1000), self._on_finalize_timeout)
+        return True
+
+    def _on_finalize_message(self, bus, message):
+        if message.type == Gst.MessageType.EOS:
             self.log("Recording container finalization complete")
-        elif message and message.type == Gst.MessageType.ERROR:
+        elif message.type == Gst.MessageType.ERROR:
             error, debug = message.parse_error()
             self.log(f"Recording finalization error: {error} ({debug})", "warning")
         else:
-            self.log("Recording finalization timed out; continuing shutdown", "warning")
+            return True
+        self._finalize_watching = False
+        self._end_finalize()
+        return False
+
+    def _on_finalize_timeout(self):
+        self.log("Recording finalization timed out; continuing shutdown", "warning")
+        self._finalize_timer = None
+        self._end_finalize()
+        return False
+
+    def _end_finalize(self):
+        """Remove the finalization watch and timeout, then continue the shutdown"""
+        if self._finalize_timer is not None:
+            GLib.source_remove(self._finalize_timer)
+            self._finalize_timer = None
+        if self._finalize_watching:
+            self._finalize_watching = False
+            self.pipe.get_bus().remove_watch()
+        on_done, self._finalize_done = self._finalize_done, None
+        if on_done is not None:
+            on_done()
         
     def run(self):
         """Run the main loop"""
@@ -3184,20 +3394,120 @@ class GLibWebRTCHandler:
         self.log("Main loop exited")
 
 
+class RecorderWorkerHost:
+    """Runs several GLibWebRTCHandler recorders on one GLib main loop (``--worker``).
+
+    Every message to or from a hosted recorder carries its ``stream_id``;
+    messages without one are addressed to the worker itself.
+    """
+
+    def __init__(self, channel: ChildChannel):
+        self.handlers: Dict[str, GLibWebRTCHandler] = {}
+        self.running = True
+        self.channel = channel
+        self.main_loop = GLib.MainLoop()
+        self.stdin_channel = add_control_watch(FrameDecoder(), self.handle_message, self.shutdown, self.log)
+
+    def send(self, msg: Dict[str, Any]):
+        """Write one message to the parent; recorders call this from GStreamer threads."""
+        self.channel.send(msg)
+
+    def log(self, message: str, level: str = "info"):
+        self.channel.log(level, f"[worker {os.getpid()}] {message}")
+
+    def handle_message(self, msg: Dict[str, Any]):
+        msg_type = msg.get('type')
+        stream_id = msg.get('stream_id')
+        if stream_id is None:
+            if msg_type == 'shutdown':
+                self.shutdown()
+            else:
+                self.log(f"Unknown worker message type: {msg_type}", "warning")
+            return
+
+        if msg_type == 'start':
+            self.start_recorder(stream_id, msg.get('config') or {})
+            return
+
+        handler = self.handlers.get(stream_id)
+        if handler is None:
+            if msg_type == 'stop':
+                self.send({"type": "stopped", "stream_id": stream_id})
+            else:
+                self.log(f"No recorder for stream {stream_id}", "warning")
+            return
+        handler.handle_message(msg)
+
+    def start_recorder(self, stream_id: str, config: Dict[str, Any]):
+        if stream_id in self.handlers:
+            self.log(f"Recorder for {stream_id} already running", "warning")
+            self.send({"type": "ready", "stream_id": stream_id})
+            return
+        try:
+            handler = GLibWebRTCHandler(dict(config, stream_id=stream_id), host=self)
+        except Exception as e:
+            self.log(f"Failed to start recorder for {stream_id}: {e}", "error")
+            self.send({"type": "stopped", "stream_id": stream_id})
+            return
+        self.handlers[stream_id] = handler
+        handler.send_message({"type": "ready"})
+
+    def handler_finished(self, handler: GLibWebRTCHandler):
+        if self.handlers.get(handler.stream_id) is handler:
+            del self.handlers[handler.stream_id]
+            self.send({"type": "stopped", "stream_id": handler.stream_id})
+        if not self.running and not self.handlers:
+            self.main_loop.quit()
+
+    def shutdown(self):
+        """Stop every recorder; the loop quits once the last one has finalized its files"""
+        if not self.running:
+            return
+        self.running = False
+        for handler in list(self.handlers.values()):
+            handler.shutdown()
+        if not self.handlers:
+            self.main_loop.quit()
+
+    def run(self):
+        self.send({"type": "worker_ready"})
+        self.main_loop.run()
+
+
+def run_worker():
+    """Entry point for a pooled recorder worker"""
+    host = None
+    try:
+        host = RecorderWorkerHost(open_child_channel(sys.argv))
+        host.run()
+    except KeyboardInterrupt:
+        if host is not None:
+            host.shutdown()
+    except Exception as e:
+        sys.stderr.write(f"Worker error: {e}\n")
+        import traceback
+        traceback.print_exc(file=sys.stderr)
+
+
 def main():
     """Main entry point"""
+    if '--worker' in sys.argv[1:]:
+        run_worker()
+        return
+
     handler = None
     try:
-        # Read configuration from first line
-        config_line = sys.stdin.readline()
-        if not config_line:
+        channel = open_child_channel(sys.argv)
+
+        # The configuration is the first control frame
+        decoder = FrameDecoder()
+        config = read_control_frame(sys.stdin.fileno(), decoder)
+        if config is None:
             sys.stderr.write("No configuration received\n")
             return
-            
-        config = json.loads(config_line.strip())
-        
+
         # Create handler
-        handler = GLibWebRTCHandler(config)
+        handler = GLibWebRTCHandler(config, channel=channel, decoder=decoder)
         
         # Send ready signal
         handler.send_message({"type": "ready"})